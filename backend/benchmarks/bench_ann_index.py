@@ -0,0 +1,158 @@
+"""
+메모리 ANN 인덱스 벤치마크 (IVF-Flat vs 정확 검색)
+
+데이터셋마다 utils/ann_index.IvfIndex를 빌드하고 다음을 JSON 한 줄씩 출력합니다.
+- build: 빌드 시간, 목록 수, 스냅샷 크기 / 저장 시간 / 메모리 매핑 로드 시간
+- exact: 정확 검색(전체 내적) 지연 p50 / p99
+- ann (nprobe별): recall@k (정확 검색 상위 k개 중 찾은 비율), 지연 p50 / p99
+
+데이터셋:
+- corpus: --snapshot 스냅샷(ann_backend가 만든 대학별 인덱스 디렉토리)의 실제 청크 임베딩,
+          없으면 --corpus 개수의 합성 벡터 (운영 document_chunks 규모)
+- synthetic: --synthetic 개수 (기본 1,000,000)의 합성 벡터
+합성 벡터는 주제 중심 주변에 모인 정규분포 혼합(실제 임베딩처럼 군집), 쿼리는 데이터 점 + 잡음입니다.
+1,000,000 x 768 float32는 약 3GB (빌드 중 약 2배) - 메모리가 부족하면 --dim이나 --synthetic을 줄이세요.
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.bench_ann_index
+    python -m benchmarks.bench_ann_index --snapshot cache/ann_index/<대학 키>/<버전> --synthetic 0
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ann_index import IvfIndex, normalize
+
+
+def clustered_vectors(count: int, dim: int, clusters: int, spread: float, seed: int) -> np.ndarray:
+    """주제 중심 주변 정규분포 혼합 (정규화 float32, 조각 단위 생성)"""
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.standard_normal((clusters, dim), dtype=np.float32))
+    vectors = np.empty((count, dim), dtype=np.float32)
+    batch = 65536
+    for start in range(0, count, batch):
+        size = min(batch, count - start)
+        labels = rng.integers(0, clusters, size)
+        noise = rng.standard_normal((size, dim), dtype=np.float32) * (spread / np.sqrt(dim))
+        vectors[start:start + size] = normalize(centers[labels] + noise)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, count: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    base = vectors[rng.choice(len(vectors), count, replace=False)]
+    return normalize(base + rng.standard_normal(base.shape, dtype=np.float32) * (noise / np.sqrt(vectors.shape[1])))
+
+
+def _latency(values):
+    values = sorted(values)
+    return {
+        "p50_ms": round(statistics.median(values) * 1000, 3),
+        "p99_ms": round(values[min(len(values) - 1, int(len(values) * 0.99))] * 1000, 3),
+    }
+
+
+def run_dataset(name: str, vectors: np.ndarray, args):
+    ids = np.arange(len(vectors), dtype=np.int64)
+    index = IvfIndex.build(vectors, ids, iterations=args.iterations, seed=args.seed)
+
+    # 스냅샷 저장 → 메모리 매핑 로드 (운영과 같은 경로로 검색)
+    directory = tempfile.mkdtemp(prefix="ann_bench_")
+    try:
+        started = time.perf_counter()
+        index.save(directory)
+        save_seconds = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+        del index
+        started = time.perf_counter()
+        index = IvfIndex.load(directory, mmap=True)
+        load_seconds = time.perf_counter() - started
+
+        print(json.dumps({
+            "dataset": name,
+            "phase": "build",
+            "vectors": len(index),
+            "dimension": index.dimension,
+            "nlist": index.nlist,
+            "build_seconds": index.meta["build_seconds"],
+            "snapshot_mb": round(size / 1024 / 1024, 1),
+            "save_seconds": round(save_seconds, 3),
+            "mmap_load_ms": round(load_seconds * 1000, 3),
+        }, ensure_ascii=False))
+
+        queries = make_queries(vectors, args.queries, args.query_noise, args.seed)
+        k_max = max(args.k)
+
+        # 첫 검색은 매핑된 페이지를 읽어 오므로 한 번 돌린 뒤 측정
+        index.exact_search(queries[0], k_max)
+        exact, times = [], []
+        for query in queries:
+            started = time.perf_counter()
+            positions, _ = index.exact_search(query, k_max)
+            times.append(time.perf_counter() - started)
+            exact.append(index.ids[positions])
+        print(json.dumps({"dataset": name, "phase": "exact", **_latency(times)}, ensure_ascii=False))
+
+        for nprobe in args.nprobe:
+            if nprobe > index.nlist:
+                continue
+            recalls = {k: [] for k in args.k}
+            times = []
+            for query, truth in zip(queries, exact):
+                started = time.perf_counter()
+                positions, _ = index.search(query, k_max, nprobe)
+                times.append(time.perf_counter() - started)
+                found = index.ids[positions]
+                for k in args.k:
+                    recalls[k].append(len(set(found[:k].tolist()) & set(truth[:k].tolist())) / k)
+            print(json.dumps({
+                "dataset": name,
+                "phase": "ann",
+                "nprobe": nprobe,
+                **{f"recall@{k}": round(statistics.mean(values), 4) for k, values in recalls.items()},
+                **_latency(times),
+            }, ensure_ascii=False))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", help="실제 청크 임베딩이 든 ANN 스냅샷 디렉토리 (corpus 데이터셋)")
+    parser.add_argument("--corpus", type=int, default=50_000, help="스냅샷이 없을 때 corpus 합성 벡터 수")
+    parser.add_argument("--synthetic", type=int, default=1_000_000, help="대규모 합성 벡터 수 (0이면 생략)")
+    parser.add_argument("--dim", type=int, default=768, help="합성 벡터 차원 (Gemini 임베딩 768)")
+    parser.add_argument("--clusters", type=int, default=2000, help="합성 벡터 주제 수")
+    parser.add_argument("--spread", type=float, default=1.0, help="주제 중심 주변 흩어짐 (클수록 군집이 흐림)")
+    parser.add_argument("--query-noise", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 30])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--iterations", type=int, default=10, help="k-means 반복 수")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.snapshot:
+        snapshot = IvfIndex.load(args.snapshot, mmap=True)
+        run_dataset(f"corpus:{snapshot.meta.get('school_name', 'snapshot')}", np.asarray(snapshot.vectors), args)
+    elif args.corpus:
+        run_dataset(f"corpus:synthetic:{args.corpus}",
+                    clustered_vectors(args.corpus, args.dim, max(1, args.clusters // 20), args.spread, args.seed), args)
+
+    if args.synthetic:
+        run_dataset(f"synthetic:{args.synthetic}",
+                    clustered_vectors(args.synthetic, args.dim, args.clusters, args.spread, args.seed), args)
+
+
+if __name__ == "__main__":
+    main()
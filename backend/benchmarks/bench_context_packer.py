@@ -0,0 +1,130 @@
+"""
+함수 결과 컨텍스트 패킹 벤치마크
+
+대학 여러 곳 univ 결과(각각 TOKEN_LIMIT까지 채운 상태)를 만들어
+services/multi_agent/context_packer.pack_function_results 전후를 JSON 한 줄씩 출력합니다.
+- tokens_before / tokens_after: Main Agent 프롬프트에 들어가는 청크 토큰 추정치 (utils/token_estimator)
+- chunks_before / chunks_after, pack_ms: 패킹 시간
+- relevance_kept: 남은 청크 관련도 합 / 전체 관련도 합 (같은 청크 id는 한 번만)
+- token_estimator: logs/token_calibration.jsonl 표본 기준 보정 결과와 len // 2 대비 오차 (표본이 있을 때)
+
+합성 결과: 대학마다 문서 몇 개를 겹치는 창(--overlap)으로 나눈 청크 + 대학 사이에 공유되는 문서(--shared)
+(같은 모집요강 / 공통 안내문이 여러 대학 검색에 걸리는 경우)
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.bench_context_packer
+    python -m benchmarks.bench_context_packer --universities 3 --budget 8000 12000 16000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# services.multi_agent/__init__은 에이전트 전체(Gemini SDK)를 import하므로 패키지 경로만 등록
+_package = types.ModuleType("services.multi_agent")
+_package.__path__ = [os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "services", "multi_agent")]
+sys.modules.setdefault("services.multi_agent", _package)
+
+from services.multi_agent.context_packer import _chunk_prompt_text, pack_function_results
+from utils.token_estimator import get_token_estimator
+
+TOKEN_LIMIT = 6000  # RAGFunctions.TOKEN_LIMIT
+
+
+def _document(rng: random.Random, words: int) -> list:
+    vocabulary = ["모집", "전형", "수능", "최저", "학생부", "교과", "종합", "정시", "수시", "반영", "비율", "등급",
+                  "환산", "점수", "경쟁률", "충원", "합격", "면접", "서류", "계열", "인문", "자연", "2025", "2026"]
+    return [f"{rng.choice(vocabulary)}{rng.randint(0, 99)}" for _ in range(words)]
+
+
+def _split(words: list, size: int, overlap: int) -> list:
+    step = max(1, size - overlap)
+    return [" ".join(words[i:i + size]) for i in range(0, max(1, len(words) - overlap), step)]
+
+
+def make_results(args, rng: random.Random) -> dict:
+    estimator = get_token_estimator()
+    shared = [_split(_document(rng, 500), args.chunk_words, args.overlap) for _ in range(args.shared)]
+    results = {}
+    for u in range(args.universities):
+        pieces = [(f"shared{d}", chunk) for d, doc in enumerate(shared) for chunk in doc]
+        for d in range(args.documents):
+            pieces += [(f"u{u}d{d}", chunk) for chunk in _split(_document(rng, 1500), args.chunk_words, args.overlap)]
+        # 공유 문서(공통 안내문)는 대학마다 상위에 걸림
+        rng.shuffle(pieces)
+        pieces.sort(key=lambda piece: not piece[0].startswith("shared"))
+
+        result = {"university": f"대학{u}", "query": "정시", "document_titles": {}, "document_urls": {},
+                  "document_summaries": {}, "chunks": []}
+        used = 0
+        for rank, (doc_id, content) in enumerate(pieces):
+            result["document_titles"][doc_id] = f"{doc_id} 모집요강"
+            result["document_urls"][doc_id] = f"https://example.com/{doc_id}.pdf"
+            chunk = {"chunk_id": f"{doc_id}:{hash(content)}", "document_id": doc_id, "page_number": rank % 30 + 1,
+                     "content": content, "weighted_score": round(0.9 - rank * 0.01 + rng.random() * 0.02, 4)}
+            tokens = estimator.estimate(content)
+            if used + tokens > TOKEN_LIMIT:
+                break
+            used += tokens
+            result["chunks"].append(chunk)
+        result["chunks"].sort(key=lambda c: -c["weighted_score"])
+        result["count"] = len(result["chunks"])
+        results[f"univ_{u}"] = result
+    return results
+
+
+def _relevance(results: dict) -> float:
+    unique = {}
+    for result in results.values():
+        for chunk in result["chunks"]:
+            unique[chunk["chunk_id"]] = max(unique.get(chunk["chunk_id"], 0.0), chunk["weighted_score"])
+    return sum(unique.values())
+
+
+def _tokens(results: dict) -> int:
+    estimator = get_token_estimator()
+    return sum(
+        estimator.estimate(_chunk_prompt_text(chunk, result))
+        for result in results.values() for chunk in result.get("chunks", [])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--universities", type=int, default=3)
+    parser.add_argument("--documents", type=int, default=3, help="대학별 문서 수")
+    parser.add_argument("--shared", type=int, default=1, help="대학 사이에 공유되는 문서 수")
+    parser.add_argument("--chunk-words", type=int, default=120)
+    parser.add_argument("--overlap", type=int, default=40, help="청크 사이 겹치는 단어 수")
+    parser.add_argument("--budget", type=int, nargs="+", default=[8000, 12000, 16000])
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    results = make_results(args, random.Random(args.seed))
+    relevance_total = _relevance(results)
+    for budget in args.budget:
+        started = time.perf_counter()
+        packed = pack_function_results(results, budget)
+        pack_ms = (time.perf_counter() - started) * 1000
+        print(json.dumps({
+            "universities": args.universities,
+            "budget": budget,
+            "chunks_before": sum(r["count"] for r in results.values()),
+            "chunks_after": sum(r["count"] for r in packed.values()),
+            "tokens_before": _tokens(results),
+            "tokens_after": _tokens(packed),
+            "relevance_kept": round(_relevance(packed) / relevance_total, 4),
+            "pack_ms": round(pack_ms, 2),
+        }, ensure_ascii=False))
+
+    print(json.dumps({"token_estimator": get_token_estimator().report()}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+업로드 임베딩 생성 벤치마크 (기존 방식 vs 배치 임베딩 + 슬라이딩 윈도우)
+
+합성 문서(기본 2,000청크)의 임베딩을
+- legacy: 텍스트당 embed_content 1회, 10개씩 묶어 전부 끝날 때까지 대기(배리어),
+          실패는 1개씩 재시도 후 0 벡터로 대체
+- batch:  EmbeddingService.create_embeddings_batch (요청당 100개, 동시 4개 슬라이딩 윈도우,
+          Rate Limit 쿨다운 공유 재시도, 실패는 EmbeddingBatchError로 보고)
+로 생성해 비교합니다.
+
+Gemini 호출은 지연 주입 대역으로 대체합니다.
+- 요청 1회 지연: --latency-ms + 텍스트당 --per-text-ms
+- 동시 요청이 --provider-concurrency를 넘으면 429 응답
+- --fail-rate 확률로 임의 요청이 429 응답
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.bench_embedding_batch --chunks 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DIMENSION = 768
+
+
+class LatencyInjectingEmbedder:
+    """Gemini embed_content 대역 (동기 호출, asyncio.to_thread에서 실행됨)"""
+
+    def __init__(self, latency: float, per_text: float, provider_concurrency: int, fail_rate: float, seed: int = 7):
+        self.latency = latency
+        self.per_text = per_text
+        self.provider_concurrency = provider_concurrency
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.rate_limited = 0
+
+    def embed(self, texts):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            overloaded = self.in_flight > self.provider_concurrency or self.rng.random() < self.fail_rate
+            if overloaded:
+                self.rate_limited += 1
+        try:
+            time.sleep(self.latency + self.per_text * len(texts))
+            if overloaded:
+                raise RuntimeError("429 Resource exhausted: rate limit")
+            return [[(hash(text) % 1000) / 1000.0] * DIMENSION for text in texts]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+async def legacy_embeddings(embedder: LatencyInjectingEmbedder, texts, batch_size: int = 10):
+    """기존 create_embeddings_batch 동작 재현"""
+    async def one(text):
+        return (await asyncio.to_thread(embedder.embed, [text]))[0]
+
+    embeddings, zero_filled = [], 0
+    for i in range(0, len(texts), batch_size):
+        batch = texts[i:i + batch_size]
+        results = await asyncio.gather(*[one(text) for text in batch], return_exceptions=True)
+        for idx, emb in enumerate(results):
+            if isinstance(emb, Exception):
+                try:
+                    emb = await one(batch[idx])
+                except Exception:
+                    emb = [0.0] * DIMENSION
+                    zero_filled += 1
+            embeddings.append(emb)
+    return embeddings, zero_filled
+
+
+async def batched_embeddings(embedder: LatencyInjectingEmbedder, texts):
+    from services.documents.embedding_service import EmbeddingService, EmbeddingBatchError
+    import services.documents.embedding_service as module
+
+    module.RETRY_BASE_DELAY = 0.2  # 벤치마크 시간 단축 (동작은 동일)
+
+    class StandInEmbeddingService(EmbeddingService):
+        def _embed_texts(self, batch):
+            return embedder.embed(batch)
+
+    service = StandInEmbeddingService()
+    try:
+        return await service.create_embeddings_batch(texts), 0
+    except EmbeddingBatchError as e:
+        return None, len(e.failed)
+
+
+def run(mode: str, args) -> dict:
+    texts = [f"청크 {i} " + "가나다라마바사" * 150 for i in range(args.chunks)]
+    embedder = LatencyInjectingEmbedder(
+        args.latency_ms / 1000, args.per_text_ms / 1000, args.provider_concurrency, args.fail_rate
+    )
+    started = time.perf_counter()
+    if mode == "legacy":
+        embeddings, failures = asyncio.run(legacy_embeddings(embedder, texts))
+    else:
+        embeddings, failures = asyncio.run(batched_embeddings(embedder, texts))
+    return {
+        "mode": mode,
+        "chunks": args.chunks,
+        "seconds": round(time.perf_counter() - started, 2),
+        "requests": embedder.requests,
+        "rate_limited": embedder.rate_limited,
+        # legacy: 0 벡터로 조용히 대체된 청크 수 / batch: EmbeddingBatchError로 보고된 청크 수
+        "failed_chunks": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="요청 1회 고정 지연")
+    parser.add_argument("--per-text-ms", type=float, default=2.0, help="텍스트 1개당 추가 지연")
+    parser.add_argument("--provider-concurrency", type=int, default=8, help="이보다 많은 동시 요청은 429")
+    parser.add_argument("--fail-rate", type=float, default=0.01, help="임의 429 확률")
+    parser.add_argument("--modes", nargs="+", default=["legacy", "batch"])
+    args = parser.parse_args()
+
+    # 대역만 사용하므로 .env가 없어도 설정 로딩이 되도록 필수값만 채움
+    for name in ("SUPABASE_URL", "SUPABASE_KEY", "GEMINI_API_KEY"):
+        os.environ.setdefault(name, "benchmark")
+
+    # 출력은 결과 JSON만 (서비스 진행 로그는 숨김)
+    for mode in args.modes:
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, "w")
+        try:
+            result = run(mode, args)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
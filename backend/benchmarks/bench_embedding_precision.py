@@ -0,0 +1,104 @@
+"""
+임베딩 차원 / 저장 정밀도 벤치마크
+
+차원(EMBEDDING_DIMENSION) x 정밀도(EMBEDDING_STORAGE_DTYPE) 조합마다 JSON 한 줄씩 출력합니다.
+- mb_per_million: 벡터 100만 개 저장 크기 (int8은 행별 scale 포함)
+- recall@k: 전체 차원 float32 정확 검색 상위 k개 중 찾은 비율 (검색 품질 차이)
+- recall@k_vs_float32: 같은 차원 float32 대비 (정밀도만의 차이)
+- score_mae: 같은 차원 float32 대비 코사인 유사도 평균 절대 오차
+- cache_bytes: 캐시 항목 1개 크기 (utils/embedding_codec.encode_vector)
+
+데이터:
+- --embeddings-file: 실제 임베딩 .npy (N, D) - 예: ANN 스냅샷의 vectors.npy는 이미 저장 정밀도라 전체 차원 float32로 받은 것을 권장
+- 없으면 Matryoshka 임베딩을 흉내 낸 합성 벡터 (앞 차원일수록 분산이 큰 군집 데이터)
+쿼리는 데이터 점 + 잡음이고 절단 후 다시 정규화합니다 (업로드 / 검색 경로와 같은 truncate_embedding 방식).
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.bench_embedding_precision
+    python -m benchmarks.bench_embedding_precision --embeddings-file chunks_3072.npy --dims 3072 1536 768 256
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ann_index import _top_k, normalize
+from utils.embedding_codec import DTYPES, bytes_per_vector, dequantize_rows, encode_vector, quantize_rows
+
+
+def matryoshka_vectors(count: int, dim: int, clusters: int, decay: float, seed: int) -> np.ndarray:
+    """군집 데이터 + 차원별 분산 감소 (앞 차원에 정보가 몰린 Matryoshka 임베딩 흉내)"""
+    rng = np.random.default_rng(seed)
+    weights = np.exp(-np.arange(dim, dtype=np.float32) / (dim * decay)).astype(np.float32)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, clusters, count)
+    vectors = centers[labels] + rng.standard_normal((count, dim), dtype=np.float32) * 0.8
+    return normalize(vectors * weights)
+
+
+def make_queries(vectors: np.ndarray, count: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    base = vectors[rng.choice(len(vectors), count, replace=False)]
+    return base + rng.standard_normal(base.shape, dtype=np.float32) * (noise / np.sqrt(vectors.shape[1]))
+
+
+def _search(matrix: np.ndarray, queries: np.ndarray, k: int):
+    scores = queries @ matrix.T
+    return [_top_k(row, k) for row in scores], scores
+
+
+def _recall(found, truth, k: int) -> float:
+    return statistics.mean(len(set(f[:k].tolist()) & set(t[:k].tolist())) / k for f, t in zip(found, truth))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--embeddings-file", help="실제 임베딩 .npy (N, D)")
+    parser.add_argument("--count", type=int, default=50_000, help="합성 벡터 수")
+    parser.add_argument("--full-dim", type=int, default=3072, help="합성 벡터 전체 차원 (gemini-embedding-001)")
+    parser.add_argument("--dims", type=int, nargs="+", default=[3072, 1536, 768, 256])
+    parser.add_argument("--dtypes", nargs="+", default=list(DTYPES), choices=DTYPES)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--decay", type=float, default=0.25, help="차원별 분산 감소 폭 (작을수록 앞 차원에 몰림)")
+    parser.add_argument("--query-noise", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.embeddings_file:
+        vectors = normalize(np.load(args.embeddings_file))
+        source = f"file:{os.path.basename(args.embeddings_file)}"
+    else:
+        vectors = matryoshka_vectors(args.count, args.full_dim, args.clusters, args.decay, args.seed)
+        source = f"synthetic:{args.count}x{args.full_dim}"
+    queries = make_queries(vectors, args.queries, args.query_noise, args.seed)
+    truth, _ = _search(vectors, normalize(queries), args.k)
+
+    for dim in sorted({d for d in args.dims if d <= vectors.shape[1]}, reverse=True):
+        truncated = normalize(vectors[:, :dim])
+        truncated_queries = normalize(queries[:, :dim])
+        baseline, baseline_scores = _search(truncated, truncated_queries, args.k)
+        for dtype in args.dtypes:
+            codes, scales = quantize_rows(truncated, dtype)
+            found, scores = _search(dequantize_rows(codes, scales), truncated_queries, args.k)
+            print(json.dumps({
+                "source": source,
+                "dimension": dim,
+                "dtype": dtype,
+                "mb_per_million": round(bytes_per_vector(dim, dtype) * 1_000_000 / 1024 / 1024, 1),
+                "cache_bytes": len(encode_vector(truncated[0], dtype)),
+                f"recall@{args.k}": round(_recall(found, truth, args.k), 4),
+                f"recall@{args.k}_vs_float32": round(_recall(found, baseline, args.k), 4),
+                "score_mae": round(float(np.abs(scores - baseline_scores).mean()), 6),
+            }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+청킹 벤치마크 (RecursiveCharacterTextSplitter 1200/200 vs Markdown 구조 기반 청커)
+
+입력 (우선순위):
+- --markdown 파일들 (파싱된 Markdown 덤프)
+- --from-cache: 내용 캐시(utils/content_cache)에 저장된 실제 업로드 PDF 파싱 결과
+- 둘 다 없으면 합성 모집요강 Markdown (제목 + 문단 + 표)
+
+문서마다 다음을 JSON 한 줄씩 출력합니다.
+- chunks / total_chars / est_tokens (한글 기준 글자 수 / 2, 검색 결과 토큰 추정과 같은 방식)
+- broken_rows: 행 중간에서 잘린 표 행 수
+- headless_tables: 머리행 없이 시작하는 표 조각 수
+- seconds / mb_per_s: 청킹 처리량
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.bench_markdown_chunker --from-cache
+    python -m benchmarks.bench_markdown_chunker --markdown parsed/*.md
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sqlite3
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_module(name: str, *parts: str):
+    # services.documents 패키지 __init__은 Gemini 클라이언트를 초기화하므로 모듈 파일만 직접 로드
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BACKEND_DIR, *parts))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_markdown(size: int, seed: int = 11) -> str:
+    """제목 / 문단 / 표가 섞인 모집요강 형태의 합성 Markdown"""
+    rng = random.Random(seed)
+    words = ["모집단위", "전형", "학생부교과", "학생부종합", "수능", "최저학력기준", "반영", "비율",
+             "지원자격", "제출서류", "면접", "서류평가", "충원", "경쟁률", "합격자", "등급", "백분위"]
+    majors = ["경영학과", "경제학부", "컴퓨터공학과", "전자공학부", "의예과", "국어국문학과", "수학과", "화학과"]
+
+    parts, length, section = [], 0, 0
+    while length < size:
+        roll = rng.random()
+        if roll < 0.08:
+            section += 1
+            part = f"## {section}. {rng.choice(words)} 안내\n\n"
+        elif roll < 0.2:
+            part = f"### {rng.choice(words)} {rng.choice(words)}\n\n"
+        elif roll < 0.5:
+            rows = [f"**<표 {section}-{rng.randint(1, 9)}> {rng.choice(words)} 현황**", "",
+                    "| 모집단위 | 전형 | 인원 | 경쟁률 | 70%컷 |", "|---|---|---|---|---|"]
+            for _ in range(rng.randint(5, 80)):
+                rows.append(
+                    f"| {rng.choice(majors)} | {rng.choice(words)} | {rng.randint(3, 80)} | "
+                    f"{rng.uniform(2, 30):.2f} | {rng.uniform(1, 5):.2f} |"
+                )
+            part = "\n".join(rows) + "\n\n"
+        else:
+            part = " ".join(rng.choice(words) for _ in range(rng.randint(20, 160))) + ".\n\n"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def cached_documents(limit: int):
+    """내용 캐시의 파싱 결과 (업로드된 실제 PDF) → [(이름, Markdown)]"""
+    from utils.content_cache import DEFAULT_PATH
+    from utils.shared_cache import decode_value
+
+    path = os.environ.get("CONTENT_CACHE_PATH") or DEFAULT_PATH
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(path)
+    rows = conn.execute(
+        "SELECT key, value FROM entries WHERE kind = 'parse' ORDER BY last_used DESC LIMIT ?", (limit,)
+    ).fetchall()
+    conn.close()
+    documents = []
+    for key, blob in rows:
+        slices = decode_value(blob)
+        documents.append((f"cache:{key[:12]}", [part['markdown'] for part in slices if part.get('markdown')]))
+    return documents
+
+
+def _table_stats(chunks):
+    """(행 중간에서 잘린 표 행 수, 머리행 없이 시작하는 표 조각 수)"""
+    broken, headless = 0, 0
+    for chunk in chunks:
+        lines = chunk.split("\n")
+        for i, line in enumerate(lines):
+            line = line.strip()
+            starts, ends = line.startswith('|'), line.endswith('|')
+            if starts != ends and (i == 0 or i == len(lines) - 1):
+                broken += 1
+        table_lines = [line.strip() for line in lines if line.strip().startswith('|')]
+        if len(table_lines) >= 1 and not (len(table_lines) >= 2 and set(table_lines[1]) <= set("|-: ")):
+            headless += 1
+    return broken, headless
+
+
+def _measure(name, mode, slices, chunk_fn):
+    started = time.perf_counter()
+    chunks = chunk_fn(slices)
+    seconds = time.perf_counter() - started
+    total_chars = sum(len(chunk) for chunk in chunks)
+    source_chars = sum(len(text) for text in slices)
+    broken, headless = _table_stats(chunks)
+    return {
+        "document": name,
+        "mode": mode,
+        "source_chars": source_chars,
+        "chunks": len(chunks),
+        "total_chars": total_chars,
+        "est_tokens": sum(max(1, len(chunk) // 2) for chunk in chunks),
+        "avg_chunk_chars": total_chars // len(chunks) if chunks else 0,
+        "broken_rows": broken,
+        "headless_tables": headless,
+        "seconds": round(seconds, 4),
+        "mb_per_s": round(source_chars / 1024 / 1024 / seconds, 2) if seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markdown", nargs="*", default=[], help="파싱된 Markdown 파일")
+    parser.add_argument("--from-cache", action="store_true", help="내용 캐시의 실제 PDF 파싱 결과 사용")
+    parser.add_argument("--limit", type=int, default=20, help="내용 캐시에서 읽을 문서 수")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200_000, 2_000_000], help="합성 Markdown 글자 수")
+    parser.add_argument("--chunk-size", type=int, default=1200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SUPABASE_URL", "http://localhost")
+    os.environ.setdefault("SUPABASE_KEY", "placeholder")
+    os.environ.setdefault("GEMINI_API_KEY", "placeholder")
+
+    chunker = _load_module("markdown_chunker", "services", "documents", "markdown_chunker.py")
+
+    documents = []
+    for path in args.markdown:
+        with open(path, encoding="utf-8") as f:
+            documents.append((os.path.basename(path), [f.read()]))
+    if args.from_cache:
+        documents.extend(cached_documents(args.limit))
+    if not documents:
+        # 실제 업로드처럼 5페이지 조각(약 15,000자) 단위로, 줄 경계에서 나눠 청킹
+        for size in args.sizes:
+            text = synthetic_markdown(size)
+            slices, start = [], 0
+            while start < len(text):
+                end = text.rfind("\n", start, start + 15_000) + 1 if start + 15_000 < len(text) else len(text)
+                end = end if end > start else start + 15_000
+                slices.append(text[start:end])
+                start = end
+            documents.append((f"synthetic:{size}", slices))
+
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=args.chunk_size,
+            chunk_overlap=200,
+            length_function=len,
+            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
+        )
+    except ImportError:
+        splitter = None
+        print(json.dumps({"note": "langchain-text-splitters 미설치 - 기존 청커 비교 생략"}, ensure_ascii=False))
+
+    def recursive(slices):
+        return [chunk for text in slices for chunk in splitter.split_text(text)]
+
+    def structured(slices):
+        chunks, section = [], []
+        for text in slices:
+            slice_chunks, section = chunker.chunk_markdown(text, args.chunk_size, section)
+            chunks.extend(chunk.text for chunk in slice_chunks)
+        return chunks
+
+    for name, slices in documents:
+        if splitter is not None:
+            print(json.dumps(_measure(name, "recursive_1200_200", slices, recursive), ensure_ascii=False))
+        print(json.dumps(_measure(name, "markdown", slices, structured), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
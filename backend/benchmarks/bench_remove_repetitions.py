@@ -0,0 +1,155 @@
+"""
+반복 패턴 제거 벤치마크 (기존 정규식 vs 선형 탐지)
+
+합성 Markdown (문단 + 표 + 일정 비율로 섞인 hallucination 반복 구간)에 대해
+- legacy: re.sub(r'(.{100,}?)(\\1{2,})', r'\\1', text, flags=re.DOTALL)
+- linear: services.documents.repetition_filter.remove_repetitions
+를 비교합니다.
+
+표 행이 반복 블록 안에서도 다시 나오는 고정 입력(recurring_rows_table)으로 먼저 두 결과가 같은지 확인합니다.
+기존 정규식은 반복이 없는 위치마다 모든 블록 길이를 시도해 O(n²) 이상이라
+1MB 이상에서는 끝나지 않으므로, 앞부분 --legacy-sizes 글자에 대해서만 시간을 재고
+두 결과가 같은지 확인합니다.
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.bench_remove_repetitions --sizes 1000000 10000000
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import re
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_filter():
+    # services.documents 패키지 __init__은 Gemini 클라이언트를 초기화하므로 모듈 파일만 직접 로드
+    path = os.path.join(BACKEND_DIR, "services", "documents", "repetition_filter.py")
+    spec = importlib.util.spec_from_file_location("repetition_filter", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.remove_repetitions
+
+
+def legacy_remove_repetitions(text: str, min_length: int = 100) -> str:
+    """기존 GeminiPDFService._remove_repetitions"""
+    if len(text) < min_length * 3:
+        return text
+    pattern = r'(.{' + str(min_length) + r',}?)(\1{2,})'
+    return re.sub(pattern, r'\1', text, flags=re.DOTALL)
+
+
+def synthetic_markdown(size: int, repeat_rate: float, seed: int = 7) -> str:
+    """대입 모집요강 형태의 합성 Markdown"""
+    rng = random.Random(seed)
+    words = ["모집단위", "전형", "학생부교과", "학생부종합", "수능", "최저학력기준", "반영", "비율",
+             "지원자격", "제출서류", "면접", "서류평가", "충원", "경쟁률", "합격자", "등급", "백분위"]
+    majors = ["경영학과", "경제학부", "컴퓨터공학과", "전자공학부", "의예과", "국어국문학과", "수학과", "화학과"]
+
+    def paragraph():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(20, 60))) + ".\n\n"
+
+    def table():
+        rows = ["| 모집단위 | 전형 | 인원 | 경쟁률 | 70%컷 |", "|---|---|---|---|---|"]
+        for _ in range(rng.randint(5, 30)):
+            rows.append(
+                f"| {rng.choice(majors)} | {rng.choice(words)} | {rng.randint(3, 80)} | "
+                f"{rng.uniform(2, 30):.2f} | {rng.uniform(1, 5):.2f} |"
+            )
+        return "\n".join(rows) + "\n\n"
+
+    def hallucination():
+        # 같은 표 행/문단이 수십 번 반복되거나, 한 줄 안에서 같은 값이 반복되는 출력
+        if rng.random() < 0.5:
+            block = table()
+        elif rng.random() < 0.5:
+            block = paragraph()
+        else:
+            block = "| " + " | ".join(f"{rng.uniform(1, 5):.2f}" for _ in range(rng.randint(20, 40))) + " "
+        return block * rng.randint(3, 40)
+
+    parts, length = [], 0
+    while length < size:
+        roll = rng.random()
+        part = hallucination() if roll < repeat_rate else (table() if roll < 0.5 else paragraph())
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:size]
+
+
+def recurring_rows_table() -> str:
+    """
+    표 행이 반복 블록 안에서도 다시 나오는 hallucination (정규식과 결과 비교용)
+
+    블록 A B C D A C B D의 모든 행이 블록 길이보다 짧은 거리에서 다시 나오므로
+    "다음 같은 줄까지의 거리"만 보면 실제 블록 길이를 후보로 찾지 못함
+    """
+    rows = {
+        "A": "| 경영학과 | 학생부교과 | 12 | 5.31 | 2.14 |",
+        "B": "| 경제학부 | 학생부종합 | 8 | 11.20 | 2.87 |",
+        "C": "| 수학과 | 논술 | 5 | 40.12 | 3.02 |",
+        "D": "| 화학과 | 학생부교과 | 7 | 6.45 | 1.98 |",
+    }
+    header = "| 모집단위 | 전형 | 인원 | 경쟁률 | 70%컷 |\n|---|---|---|---|---|\n"
+    block = "".join(rows[key] + "\n" for key in "ABCDACBD")
+    return header + block * 4 + "\n"
+
+
+def _time(func, text, repeat=1):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000], help="합성 Markdown 글자 수")
+    parser.add_argument("--repeat-rate", type=float, default=0.05, help="반복 구간 비율")
+    parser.add_argument("--legacy-sizes", type=int, nargs="+", default=[8_000, 16_000, 32_000],
+                        help="기존 정규식을 돌려볼 앞부분 글자 수")
+    args = parser.parse_args()
+
+    remove_repetitions = _load_filter()
+    table = recurring_rows_table()
+    print(json.dumps({
+        "mode": "recurring_rows",
+        "chars": len(table),
+        "identical": legacy_remove_repetitions(table) == remove_repetitions(table),
+        "output_chars": len(remove_repetitions(table)),
+    }, ensure_ascii=False))
+
+    for size in args.sizes:
+        text = synthetic_markdown(size, args.repeat_rate)
+        output, seconds = _time(remove_repetitions, text)
+        print(json.dumps({
+            "mode": "linear",
+            "chars": len(text),
+            "seconds": round(seconds, 3),
+            "output_chars": len(output),
+        }, ensure_ascii=False))
+
+        for prefix in args.legacy_sizes:
+            sample = text[:prefix]
+            expected, legacy_seconds = _time(legacy_remove_repetitions, sample)
+            actual, linear_seconds = _time(remove_repetitions, sample, repeat=3)
+            print(json.dumps({
+                "mode": "legacy",
+                "chars": len(sample),
+                "seconds": round(legacy_seconds, 3),
+                "linear_seconds": round(linear_seconds, 4),
+                "identical": expected == actual,
+                "output_chars": len(expected),
+            }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+워커 간 공유 캐시(2차 계층) 벤치마크
+
+워커 N개(1/4/8)가 같은 청크 조회 부하를 처리할 때
+- local: 워커별 DocumentCache만 사용 (64MB)
+- shared: 워커별 DocumentCache(8MB) + SQLite 공유 캐시
+를 비교합니다.
+
+측정 항목:
+- Supabase 조회 수 (콜드 미스, 전체 워커 합계)
+- 히트 지연 (1차 캐시 / 공유 캐시, p50·p99)
+- 워커당 RSS 증가량 (부하 전후 VmRSS 차이)
+
+Supabase 조회는 고정 지연(--db-latency-ms) + 결정적 텍스트 생성으로 흉내 냅니다.
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.bench_shared_cache --workers 1 4 8
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CHUNKS_PER_FILE = 25
+CHUNK_CHARS = 1200
+
+
+def _rss_kb() -> int:
+    """현재 프로세스 VmRSS (KB)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _make_vocab(seed: int = 7, size: int = 3000):
+    rng = random.Random(seed)
+    syllables = [chr(0xAC00 + i) for i in range(0, 11172, 7)]
+    return ["".join(rng.choice(syllables) for _ in range(rng.randint(1, 4))) for _ in range(size)]
+
+
+def _fake_chunks(file_id: int, vocab) -> list:
+    """policy_documents 조회 결과 흉내 (id, content, metadata)"""
+    rng = random.Random(file_id)
+    rows = []
+    for idx in range(CHUNKS_PER_FILE):
+        words, length = [], 0
+        while length < CHUNK_CHARS:
+            w = rng.choice(vocab)
+            words.append(w)
+            length += len(w) + 1
+        rows.append({
+            "id": file_id * 1000 + idx,
+            "content": " ".join(words),
+            "metadata": {"fileName": f"file_{file_id}.pdf", "chunkIndex": idx, "totalChunks": CHUNKS_PER_FILE},
+        })
+    return rows
+
+
+def _worker(args):
+    mode, shared_path, worker_id, files, requests, db_latency, result_queue = args
+    # 캐시 클래스만 사용하므로 .env가 없어도 설정 로딩이 되도록 필수값만 채움
+    for name in ("SUPABASE_URL", "SUPABASE_KEY", "GEMINI_API_KEY"):
+        os.environ.setdefault(name, "benchmark")
+    from utils.document_cache import DocumentCache
+    from utils.shared_cache import SharedCacheStore
+
+    vocab = _make_vocab()
+    if mode == "shared":
+        cache = DocumentCache(max_bytes=8 * 1024 * 1024, shared=SharedCacheStore(shared_path))
+    else:
+        cache = DocumentCache(max_bytes=64 * 1024 * 1024)
+
+    rng = random.Random(1000 + worker_id)
+    # 인기 문서에 조회가 몰리는 분포 (zipf 유사)
+    weights = [1.0 / (i + 1) ** 0.9 for i in range(files)]
+    picks = rng.choices(range(files), weights=weights, k=requests)
+
+    db_calls = 0
+
+    async def run():
+        latencies = {"l1": [], "shared": [], "db": []}
+        for file_id in picks:
+            async def loader(file_id=file_id):
+                nonlocal db_calls
+                db_calls += 1
+                await asyncio.sleep(db_latency)
+                return _fake_chunks(file_id, vocab)
+
+            before = cache.get_stats()["namespaces"].get("chunks", {})
+            t0 = time.perf_counter()
+            await cache.get_or_load("chunks", loader, filename=f"file_{file_id}.pdf")
+            elapsed = (time.perf_counter() - t0) * 1000
+            after = cache.get_stats()["namespaces"]["chunks"]
+            if after.get("shared_hits", 0) > before.get("shared_hits", 0):
+                latencies["shared"].append(elapsed)
+            elif after["hits"] > before.get("hits", 0):
+                latencies["l1"].append(elapsed)
+            else:
+                latencies["db"].append(elapsed)
+        return latencies
+
+    rss_before = _rss_kb()
+    latencies = asyncio.run(run())
+    result_queue.put({
+        "db_calls": db_calls,
+        "latencies": latencies,
+        "rss_delta_kb": _rss_kb() - rss_before,
+        "l1_bytes": cache.get_stats()["bytes"],
+    })
+
+
+def _pct(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))], 3)
+
+
+def run(mode: str, workers: int, files: int, requests: int, db_latency: float) -> dict:
+    ctx = mp.get_context("spawn")
+    result_queue = ctx.Queue()
+    with tempfile.TemporaryDirectory() as tmp:
+        shared_path = os.path.join(tmp, "cache.sqlite3")
+        procs = [
+            ctx.Process(target=_worker, args=((mode, shared_path, i, files, requests, db_latency, result_queue),))
+            for i in range(workers)
+        ]
+        for p in procs:
+            p.start()
+        results = [result_queue.get() for _ in procs]
+        for p in procs:
+            p.join()
+        shared_size = os.path.getsize(shared_path) if os.path.exists(shared_path) else 0
+
+    l1 = [v for r in results for v in r["latencies"]["l1"]]
+    shared = [v for r in results for v in r["latencies"]["shared"]]
+    return {
+        "mode": mode,
+        "workers": workers,
+        "db_calls": sum(r["db_calls"] for r in results),
+        "l1_hit_ms_p50": _pct(l1, 0.5),
+        "l1_hit_ms_p99": _pct(l1, 0.99),
+        "shared_hit_ms_p50": _pct(shared, 0.5),
+        "shared_hit_ms_p99": _pct(shared, 0.99),
+        "rss_delta_mb_per_worker": round(statistics.mean(r["rss_delta_kb"] for r in results) / 1024, 1),
+        "l1_mb_per_worker": round(statistics.mean(r["l1_bytes"] for r in results) / 1024 / 1024, 1),
+        "shared_file_mb": round(shared_size / 1024 / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=2000, help="워커당 조회 수")
+    parser.add_argument("--db-latency-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"문서 {args.files}개 × 청크 {CHUNKS_PER_FILE}개, 워커당 조회 {args.requests}회")
+    for workers in args.workers:
+        for mode in ("local", "shared"):
+            result = run(mode, workers, args.files, args.requests, args.db_latency_ms / 1000)
+            print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
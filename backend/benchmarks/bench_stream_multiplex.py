@@ -0,0 +1,112 @@
+"""
+/api/chat/stream 로그 멀티플렉싱 벤치마크
+
+기존 100ms 폴링(wait_for(queue.get(), timeout=0.1) + task.done() 확인)과
+LogChannel.follow() 이벤트 기반 방식을 동시 스트림 N개에서 비교합니다.
+
+측정 항목:
+- consumer wakeup 수 (스트림당)
+- 단계 전환 지연 (작업 완료 → consumer가 다음 단계로 넘어가기까지)
+- 전체 CPU 시간
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.bench_stream_multiplex --streams 500
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.request_log import LogChannel, agent_log, bind_log_channel  # noqa: E402
+
+import utils.request_log as request_log  # noqa: E402
+
+STAGES = 3  # orchestration / sub agents / final agent
+
+
+async def _stage_work(channel: LogChannel, logs: int, duration: float) -> float:
+    """로그를 찍으며 duration초 동안 일하는 가짜 단계 (완료 시각 반환)
+
+    실제 에이전트처럼 마지막 로그 뒤에도 로그 없는 작업(LLM 호출 등)이 이어집니다.
+    """
+    with bind_log_channel(channel):
+        for i in range(logs):
+            agent_log(f"log {i}")
+            await asyncio.sleep(duration / logs * random.uniform(0.5, 1.5))
+    return time.monotonic()
+
+
+async def _consume_polling(channel: LogChannel, task: asyncio.Task, stats: dict):
+    """기존 방식: 100ms 타임아웃 폴링"""
+    while not task.done():
+        stats["wakeups"] += 1
+        try:
+            msg = await asyncio.wait_for(channel.queue.get(), timeout=0.1)
+            json.dumps({"type": "log", "message": msg})
+        except asyncio.TimeoutError:
+            continue
+    while not channel.queue.empty():
+        channel.queue.get_nowait()
+
+
+async def _consume_event(channel: LogChannel, task: asyncio.Task, stats: dict):
+    """신규 방식: LogChannel.follow()"""
+    async for msg in channel.follow(task):
+        stats["wakeups"] += 1
+        json.dumps({"type": "log", "message": msg})
+    stats["wakeups"] += 1  # 작업 완료로 깨어난 1회
+
+
+async def _stream(mode: str, logs_per_stage: int, stage_duration: float, stats: dict):
+    channel = LogChannel()
+    consume = _consume_polling if mode == "polling" else _consume_event
+    for _ in range(STAGES):
+        task = asyncio.create_task(_stage_work(channel, logs_per_stage, stage_duration))
+        await consume(channel, task, stats)
+        noticed = time.monotonic()
+        stats["transition_ms"].append((noticed - task.result()) * 1000)
+
+
+async def _run(mode: str, streams: int, logs_per_stage: int, stage_duration: float) -> dict:
+    stats = {"wakeups": 0, "transition_ms": []}
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    await asyncio.gather(*[
+        _stream(mode, logs_per_stage, stage_duration, stats) for _ in range(streams)
+    ])
+    transitions = sorted(stats["transition_ms"])
+    return {
+        "mode": mode,
+        "wall_s": round(time.monotonic() - wall_start, 2),
+        "cpu_s": round(time.process_time() - cpu_start, 2),
+        "wakeups_per_stream": round(stats["wakeups"] / streams, 1),
+        "transition_ms_p50": round(statistics.median(transitions), 2),
+        "transition_ms_p99": round(transitions[int(len(transitions) * 0.99) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=500)
+    parser.add_argument("--logs-per-stage", type=int, default=5)
+    parser.add_argument("--stage-duration", type=float, default=1.0, help="단계당 작업 시간(초)")
+    args = parser.parse_args()
+
+    # 콘솔 sink 출력은 측정 대상이 아니므로 끔 (채널 전달은 그대로)
+    request_log._get_sink_logger().disabled = True
+
+    print(f"스트림 {args.streams}개 × {STAGES}단계, 단계당 로그 {args.logs_per_stage}개 / {args.stage_duration}초")
+    for mode in ("polling", "event"):
+        random.seed(0)
+        result = asyncio.run(_run(mode, args.streams, args.logs_per_stage, args.stage_duration))
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
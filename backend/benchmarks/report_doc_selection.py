@@ -0,0 +1,132 @@
+"""
+UniversityAgent 문서 선별 일치율 리포트 (로컬 재순위 vs LLM 필터)
+
+DOC_SELECTION_LOG=true로 기록된 logs/doc_selection.jsonl의 질의마다
+- 현재 재순위 코드로 다시 선택 (기록된 후보 요약/해시태그만 사용, DB 호출 없음)
+- LLM 선택: 기록에 있으면 그대로, 없으면 --run-llm일 때 Gemini로 새로 선택
+을 비교합니다.
+
+측정 항목:
+- 선택 집합 완전 일치율 / 평균 Jaccard / 재순위 1위가 LLM 선택에 포함된 비율
+- 애매한 선택 비율 (DOC_SELECT_LLM_FALLBACK을 켰을 때 LLM 호출 비율) 과 그 구간의 일치율
+- 재순위 소요 시간 (p50 / p99, µs)
+
+실행 (backend 디렉토리에서):
+    python -m benchmarks.report_doc_selection [--log logs/doc_selection.jsonl] [--run-llm] [--show-diff 10]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _load_records(path: str) -> list:
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def _pct(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))], 1)
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+async def run(args):
+    if not args.run_llm:
+        # 로컬 재순위만 사용하므로 .env가 없어도 설정 로딩이 되도록 필수값만 채움
+        for name in ("SUPABASE_URL", "SUPABASE_KEY", "GEMINI_API_KEY"):
+            os.environ.setdefault(name, "benchmark")
+    from services.documents.doc_selector import document_selector, SELECTION_LOG_FILE
+
+    path = args.log or SELECTION_LOG_FILE
+    records = _load_records(path)
+    print(f"기록 {len(records)}건: {path}")
+
+    rows = []
+    for record in records:
+        candidates = record["candidates"]
+        if not candidates:
+            continue
+        selection = document_selector.select(
+            record["query"],
+            candidates,
+            record.get("optional_tags") or [],
+            exclude_terms=[record.get("university") or ""]
+        )
+        rerank = [doc["file_name"] for doc in selection["docs"]]
+
+        llm = record.get("llm")
+        if llm is None and args.run_llm:
+            llm_docs = await document_selector.llm_select(record["query"], candidates)
+            llm = [doc["file_name"] for doc in llm_docs]
+        if llm is None:
+            continue
+
+        rows.append({
+            "query": record["query"],
+            "university": record.get("university"),
+            "titles": {doc["file_name"]: doc.get("title") for doc in candidates},
+            "rerank": rerank,
+            "llm": llm,
+            "ambiguous": selection["ambiguous"],
+            "elapsed_us": selection["elapsed_us"],
+        })
+
+    if not rows:
+        print("비교할 LLM 선택이 없습니다. (--run-llm 사용 또는 DOC_SELECT_LLM_FALLBACK 기록 필요)")
+        return
+
+    def summarize(items):
+        exact = sum(1 for r in items if set(r["rerank"]) == set(r["llm"]))
+        top1 = sum(1 for r in items if r["rerank"] and r["rerank"][0] in r["llm"])
+        return {
+            "queries": len(items),
+            "exact_match": round(exact / len(items), 3) if items else None,
+            "mean_jaccard": round(statistics.mean(_jaccard(set(r["rerank"]), set(r["llm"])) for r in items), 3) if items else None,
+            "top1_in_llm": round(top1 / len(items), 3) if items else None,
+        }
+
+    ambiguous = [r for r in rows if r["ambiguous"]]
+    confident = [r for r in rows if not r["ambiguous"]]
+    report = {
+        "all": summarize(rows),
+        "confident": summarize(confident),
+        "ambiguous": summarize(ambiguous),
+        "ambiguous_rate": round(len(ambiguous) / len(rows), 3),
+        "rerank_us_p50": _pct([r["elapsed_us"] for r in rows], 0.5),
+        "rerank_us_p99": _pct([r["elapsed_us"] for r in rows], 0.99),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    diffs = [r for r in rows if set(r["rerank"]) != set(r["llm"])]
+    for r in diffs[:args.show_diff]:
+        print(f"\n[{r['university']}] {r['query']}{' (애매)' if r['ambiguous'] else ''}")
+        print(f"   재순위: {[r['titles'].get(name) for name in r['rerank']]}")
+        print(f"   LLM:    {[r['titles'].get(name) for name in r['llm']]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=None, help="선택 기록 파일 (기본: logs/doc_selection.jsonl)")
+    parser.add_argument("--run-llm", action="store_true", help="LLM 선택이 없는 기록은 Gemini로 새로 선택")
+    parser.add_argument("--show-diff", type=int, default=10, help="불일치 예시 출력 수")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,11 @@ class Settings(BaseSettings):
     
     # Gemini (채팅/분류/임베딩용)
     GEMINI_API_KEY: str
+
+    # 임베딩 (업로드 EmbeddingService / 검색 RAGFunctions 공통)
+    EMBEDDING_MODEL: str = "models/gemini-embedding-001"
+    EMBEDDING_DIMENSION: int = 768  # 앞부분 절단 + 정규화 (최대 3072), 바꾸면 migrations/11 + services/documents/reembed_job
+    EMBEDDING_STORAGE_DTYPE: str = "float16"  # 캐시 / ANN 스냅샷 임베딩 정밀도 (float32 | float16 | int8)
     
     # Server
     BACKEND_PORT: int = 8000
@@ -21,6 +26,47 @@ class Settings(BaseSettings):
     # Documents
     SCORE_CONVERSION_GUIDE_URL: str = ""  # 점수 변환 가이드 PDF URL (선택사항)
     
+    # 이벤트 루프 모니터 (블로킹 호출 감지, 기본 비활성화)
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_MONITOR_THRESHOLD_MS: int = 100  # 이 시간 이상 루프가 멈추면 기록
+    LOOP_MONITOR_FAIL_MS: int = 0  # 테스트 모드: 0보다 크면 종료 시 초과 건이 있을 때 종료 코드 1 (/api/health/loop는 503)
+    
+    # 문서 조회 캐시 (utils/document_cache)
+    DOCUMENT_CACHE_MAX_MB: int = 64  # 캐시 전체 최대 크기
+    SHARED_CACHE_PATH: str = ""  # 워커 간 공유 2차 캐시 SQLite 파일 (비어있으면 사용 안 함)
+    SHARED_CACHE_MAX_MB: int = 512  # 공유 캐시 최대 크기 (압축 후 기준)
+
+    # 업로드 청크 일괄 삽입 (SupabaseService.insert_document_chunks)
+    CHUNK_INSERT_BATCH_SIZE: int = 100  # INSERT 1회당 행 수
+    CHUNK_INSERT_CONCURRENCY: int = 4  # 동시에 보내는 INSERT 수
+    CHUNK_INSERT_RETRIES: int = 2  # 배치 실패 시 재시도 횟수
+
+    # 업로드 작업 큐 (services/documents/upload_jobs)
+    UPLOAD_JOB_DIR: str = ""  # 작업 상태/체크포인트 디렉토리 (비어있으면 backend/upload_jobs)
+    UPLOAD_JOB_WORKERS: int = 2  # 프로세스당 동시에 처리하는 업로드 작업 수
+    UPLOAD_JOB_MAX_ATTEMPTS: int = 3  # 실패 시 자동 재시도 포함 최대 시도 횟수
+    UPLOAD_JOB_RETENTION_HOURS: float = 72  # 끝난(완료/실패) 작업 디렉토리 보관 시간 (0이면 정리 안 함)
+
+    # 업로드 내용 캐시 (utils/content_cache) - 같은 PDF/청크 재업로드 시 파싱/요약/임베딩 재사용
+    CONTENT_CACHE_ENABLED: bool = True
+    CONTENT_CACHE_PATH: str = ""  # SQLite 파일 (비어있으면 backend/cache/content_cache.sqlite3)
+    CONTENT_CACHE_MAX_MB: int = 2048  # 최대 크기 (넘으면 가장 오래 쓰지 않은 항목부터 삭제)
+
+    # RAG 검색 (services/multi_agent/functions.py)
+    RAG_SEARCH_BACKEND: str = "python"  # "python": 가중 점수/토큰 예산을 Python에서 계산, "rpc": DB 함수 한 번으로 계산 (migrations/10)
+    RAG_TWO_PHASE_SEARCH: bool = True  # (python) 후보 id/유사도/길이만 먼저 조회하고 선택된 청크 본문만 가져옴 (migrations/09)
+    RAG_CONTEXT_TOKEN_BUDGET: int = 12000  # Main Agent에 넘기는 univ 청크 전체 토큰 예산 (중복 제거 + MMR, 0이면 사용 안 함)
+
+    # 대학별 메모리 ANN 인덱스 (services/multi_agent/ann_backend) - 자주 검색되는 대학은 pgvector 대신 프로세스 안에서 검색
+    RAG_ANN_SCHOOLS: str = ""  # 대학명 쉼표 구분 (비어있으면 사용 안 함)
+    RAG_ANN_INDEX_DIR: str = ""  # 스냅샷 디렉토리 (비어있으면 backend/cache/ann_index)
+    RAG_ANN_NPROBE: int = 8  # 검색 시 살펴보는 목록 수 (클수록 recall↑ 지연↑, benchmarks/bench_ann_index로 측정)
+    RAG_ANN_MAX_AGE_HOURS: float = 24  # 이보다 오래된 스냅샷은 쓰지 않고 pgvector로 검색하며 백그라운드 재빌드
+
+    # UniversityAgent 문서 선별 (services/documents/doc_selector)
+    DOC_SELECT_LLM_FALLBACK: bool = False  # 로컬 재순위 결과가 애매할 때만 LLM 필터 사용
+    DOC_SELECTION_LOG: bool = False  # logs/doc_selection.jsonl에 선택 기록 (일치율 리포트용)
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -8,16 +8,14 @@ MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 
 # 텍스트 청킹 설정
 CHUNK_SIZE = 1200
-CHUNK_OVERLAP = 200
+CHUNK_OVERLAP = 0  # 구조 기반 청킹(services/documents/markdown_chunker.py)은 청크 사이 중복 없음
 
-# 임베딩 설정
-EMBEDDING_MODEL = "text-embedding-004"
-EMBEDDING_DIMENSION = 768  # Gemini 임베딩 차원
+# 임베딩 설정 (모델 / 차원 / 저장 정밀도는 config.settings의 EMBEDDING_*)
 BATCH_SIZE = 5  # Gemini 병렬 처리 개수
 
 # 요약 설정
 SUMMARY_MAX_LENGTH = 500
-CLASSIFICATION_SAMPLE_LENGTH = 2000
+CLASSIFICATION_SAMPLE_LENGTH = 2000  # 분류(요약/출처/해시태그)에 넣는 Markdown 개요 최대 글자 수
 
 # Gemini 모델
 GEMINI_FLASH_MODEL = "gemini-3-flash-preview"  # 대화/판단용 (고품질)
@@ -4,8 +4,13 @@ FastAPI 메인 애플리케이션
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from typing import Optional
+import os
+import sys
 from config import settings
 from routers import chat, upload, documents, auth, sessions, announcements, admin_evaluate, admin_logs
+from middleware.upload_limit import UploadSizeLimitMiddleware
 # agent_admin은 router_agent 테스트 중 비활성화
 
 # FastAPI 앱 생성
@@ -15,6 +20,14 @@ app = FastAPI(
     version="2.0.0",
 )
 
+# 업로드 크기 초과는 본문을 받기 전에 Content-Length로 거절 (CORS보다 먼저 등록 → 413에도 CORS 헤더)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path="/api/upload",
+    max_body=upload.MAX_SIZE + upload.MULTIPART_OVERHEAD,
+    detail="파일 크기는 50MB 이하여야 합니다.",
+)
+
 # CORS 설정 (프론트엔드 연결)
 app.add_middleware(
     CORSMiddleware,
@@ -31,7 +44,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-
 # 라우터 등록
 app.include_router(auth.router, prefix="/api/auth", tags=["인증"])
 app.include_router(sessions.router, prefix="/api/sessions", tags=["세션관리"])
@@ -51,8 +63,13 @@ async def startup_event():
     
     print("🚀 서버 Warm-up 시작...")
     
+    # 0. 이벤트 루프 모니터 (opt-in) - Warm-up 중 블로킹도 기록되도록 가장 먼저 시작
+    if settings.LOOP_MONITOR_ENABLED:
+        from utils.loop_monitor import start_loop_monitor
+        start_loop_monitor(threshold_ms=settings.LOOP_MONITOR_THRESHOLD_MS)
+    
     # 1. Supabase 연결 Warm-up
-    print("   [1/4] Supabase 연결 중...")
+    print("   [1/6] Supabase 연결 중...")
     try:
         from services.supabase_client import SupabaseService
         client = SupabaseService.get_client()
@@ -62,7 +79,7 @@ async def startup_event():
         print(f"   ⚠️ Supabase Warm-up 실패 (무시하고 계속): {e}")
     
     # 2. RAG Functions 초기화
-    print("   [2/4] RAGFunctions 초기화 중...")
+    print("   [2/6] RAGFunctions 초기화 중...")
     try:
         from services.multi_agent.functions import RAGFunctions
         RAGFunctions.get_instance()
@@ -71,7 +88,7 @@ async def startup_event():
         print(f"   ⚠️ RAGFunctions 초기화 실패 (무시하고 계속): {e}")
     
     # 3. Router Agent 초기화
-    print("   [3/4] RouterAgent 초기화 중...")
+    print("   [3/6] RouterAgent 초기화 중...")
     try:
         from services.multi_agent.router_agent import get_router
         get_router()
@@ -80,7 +97,7 @@ async def startup_event():
         print(f"   ⚠️ RouterAgent 초기화 실패 (무시하고 계속): {e}")
     
     # 4. Main Agent 초기화
-    print("   [4/4] MainAgent 초기화 중...")
+    print("   [4/6] MainAgent 초기화 중...")
     try:
         from services.multi_agent.main_agent import get_main_agent
         get_main_agent()
@@ -88,10 +105,60 @@ async def startup_event():
     except Exception as e:
         print(f"   ⚠️ MainAgent 초기화 실패 (무시하고 계속): {e}")
     
+    # 5. 업로드 작업 워커 시작 (끝나지 않은 작업은 체크포인트부터 재개)
+    print("   [5/6] 업로드 작업 큐 시작 중...")
+    try:
+        from services.documents import upload_job_queue
+        recovered = upload_job_queue.start()
+        print(f"   ✅ 업로드 작업 큐 시작 완료 (재개 {recovered}개)")
+    except Exception as e:
+        print(f"   ⚠️ 업로드 작업 큐 시작 실패 (무시하고 계속): {e}")
+    
+    # 6. 대학별 ANN 인덱스 (스냅샷은 RAGFunctions 초기화 때 메모리 매핑, 없거나 오래된 대학은 백그라운드 빌드)
+    print("   [6/6] ANN 인덱스 확인 중...")
+    try:
+        from services.multi_agent.ann_backend import get_ann_backend
+        ann_backend = get_ann_backend()
+        if ann_backend is None:
+            print("   ℹ️ RAG_ANN_SCHOOLS 미설정 (pgvector만 사용)")
+        else:
+            ann_backend.refresh_in_background()
+            print(f"   ✅ ANN 인덱스 {len(ann_backend.report()['indexes'])}/{len(ann_backend.schools)}개 로드 (나머지는 백그라운드 빌드)")
+    except Exception as e:
+        print(f"   ⚠️ ANN 인덱스 확인 실패 (무시하고 계속): {e}")
+    
     elapsed = time.time() - start_time
     print(f"🎉 서버 Warm-up 완료! (총 {elapsed:.2f}초) - 서버는 정상 기동됩니다.")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 업로드 작업 워커 중지 + 이벤트 루프 모니터 리포트 출력 (LOOP_MONITOR_FAIL_MS 초과 블로킹이 있으면 종료 코드 1)"""
+    from services.documents import upload_job_queue
+    if upload_job_queue.running:
+        await upload_job_queue.stop()
+    
+    from utils.loop_monitor import get_loop_monitor, stop_loop_monitor
+    monitor = get_loop_monitor()
+    if monitor is None:
+        return
+    
+    report = monitor.get_report(top=10)
+    print(f"🩺 이벤트 루프 모니터: stall {report['stalls']}건, 최대 lag {report['lag']['max_ms']}ms")
+    for row in report["by_site"]:
+        print(f"   • {row['key']}: {row['count']}회, 총 {row['total_ms']}ms (최대 {row['max_ms']}ms)")
+    
+    stop_loop_monitor()
+    if settings.LOOP_MONITOR_FAIL_MS > 0:
+        try:
+            monitor.assert_no_stalls(settings.LOOP_MONITOR_FAIL_MS)
+        except AssertionError as e:
+            print(f"❌ 테스트 모드 실패: {e}")
+            # uvicorn은 shutdown 이벤트 예외를 종료 코드에 반영하지 않으므로 직접 0이 아닌 코드로 종료 (CI 실패 처리)
+            sys.stdout.flush()
+            os._exit(1)
+
+
 @app.get("/")
 async def root():
     """루트 엔드포인트 - 서버 상태 확인"""
@@ -109,6 +176,33 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/api/health/loop")
+async def loop_health(fail_over_ms: Optional[int] = None, reset: bool = False):
+    """
+    이벤트 루프 블로킹 리포트
+    
+    - fail_over_ms(미지정 시 LOOP_MONITOR_FAIL_MS)를 초과한 블로킹이 있으면 503 반환 (CI 체크용)
+    - reset=true면 리포트 반환 후 통계 초기화
+    """
+    from utils.loop_monitor import get_loop_monitor
+    monitor = get_loop_monitor()
+    if monitor is None:
+        return {"running": False, "message": "LOOP_MONITOR_ENABLED=true로 서버를 시작하세요."}
+    
+    report = monitor.get_report()
+    limit = fail_over_ms if fail_over_ms is not None else settings.LOOP_MONITOR_FAIL_MS
+    if limit and limit > 0:
+        violations = monitor.check(limit)
+        report["check"] = {"fail_over_ms": limit, "passed": not violations, "violations": violations}
+    
+    if reset:
+        monitor.reset()
+    
+    if report.get("check") and not report["check"]["passed"]:
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -0,0 +1,32 @@
+"""
+업로드 크기 제한 미들웨어 (순수 ASGI)
+
+POST /api/upload 요청만 Content-Length로 검사해 본문을 받기 전에(multipart 파싱 / 디스크 기록 전) 413으로 거절합니다.
+BaseHTTPMiddleware가 아니므로 다른 라우트(SSE 스트림 포함)는 그대로 통과하고,
+CORSMiddleware보다 먼저 등록해 안쪽에서 실행되므로 413 응답에도 CORS 헤더가 붙습니다.
+"""
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, path: str, max_body: int, detail: str):
+        self.app = app
+        self.path = path.rstrip("/")
+        self.max_body = max_body
+        self.detail = detail
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"].rstrip("/") == self.path
+        ):
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_body:
+                        response = JSONResponse(status_code=413, content={"detail": self.detail})
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
@@ -0,0 +1,26 @@
+-- admission_rows 테이블 생성 (전형결과 문서에서 추출한 입결 행)
+-- Supabase Dashboard > SQL Editor에서 실행하세요
+-- 행 스키마는 score_system/data/admission_results/*.json과 동일
+
+CREATE TABLE IF NOT EXISTS admission_rows (
+  id BIGSERIAL PRIMARY KEY,
+  file_name TEXT NOT NULL REFERENCES documents_metadata(file_name) ON DELETE CASCADE,
+  admission_type TEXT,                      -- 수시 / 정시 (불명이면 NULL)
+  univ TEXT NOT NULL,                       -- 예: 경희대학교
+  major TEXT NOT NULL,                      -- 모집단위
+  type TEXT DEFAULT '일반',                 -- 전형명
+  field TEXT,                               -- 계열 (인문/자연/...)
+  cut_70_score NUMERIC,
+  cut_50_score NUMERIC,
+  total_scale NUMERIC,
+  recruit_count INTEGER,
+  competition_rate NUMERIC,
+  created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- 인덱스 생성 (문서별 삭제/조회, 대학별 조회)
+CREATE INDEX IF NOT EXISTS idx_admission_rows_file_name ON admission_rows(file_name);
+CREATE INDEX IF NOT EXISTS idx_admission_rows_univ ON admission_rows(univ, admission_type);
+
+-- 완료!
+SELECT 'admission_rows 테이블 생성 완료!' AS status;
@@ -0,0 +1,45 @@
+-- match_document_chunk_ids 함수 생성 (RAG 2단계 검색의 1단계)
+-- Supabase Dashboard > SQL Editor에서 실행하세요
+--
+-- match_document_chunks와 같은 검색/필터이지만 본문(content, raw_data) 대신 길이만 반환합니다.
+-- RAGFunctions.univ()는 이 결과로 순위/토큰 예산 선택을 먼저 하고,
+-- 선택된 청크의 본문만 document_chunks에서 한 번에 조회합니다.
+-- (함수가 없으면 기존 match_document_chunks 1회 조회로 동작)
+
+CREATE OR REPLACE FUNCTION match_document_chunk_ids(
+  query_embedding vector,
+  match_threshold FLOAT DEFAULT 0.0,
+  match_count INT DEFAULT 30,
+  filter_school_name TEXT DEFAULT NULL,
+  filter_section_id BIGINT DEFAULT NULL
+)
+RETURNS TABLE (
+  id BIGINT,
+  document_id BIGINT,
+  section_id BIGINT,
+  page_number INT,
+  chunk_type TEXT,
+  similarity FLOAT,
+  content_length INT                         -- raw_data(없으면 content) 글자 수 (토큰 예산 계산용)
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT
+    c.id,
+    c.document_id,
+    c.section_id,
+    c.page_number,
+    c.chunk_type,
+    1 - (c.embedding <=> query_embedding) AS similarity,
+    char_length(COALESCE(NULLIF(c.raw_data, ''), c.content, ''))::INT AS content_length
+  FROM document_chunks c
+  JOIN documents d ON d.id = c.document_id
+  WHERE (filter_school_name IS NULL OR d.school_name = filter_school_name)
+    AND (filter_section_id IS NULL OR c.section_id = filter_section_id)
+    AND 1 - (c.embedding <=> query_embedding) >= match_threshold
+  ORDER BY c.embedding <=> query_embedding
+  LIMIT match_count;
+$$;
+
+-- 완료!
+SELECT 'match_document_chunk_ids 함수 생성 완료!' AS status;
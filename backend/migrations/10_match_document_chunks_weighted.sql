@@ -0,0 +1,97 @@
+-- match_document_chunks_weighted 함수 생성 (RAG 가중 점수 계산을 DB에서)
+-- Supabase Dashboard > SQL Editor에서 실행하세요
+--
+-- RAGFunctions.univ()가 Python에서 하던 일을 한 번의 호출로 처리합니다.
+-- 1. 청크 벡터 검색 (match_count개, 학교 필터)
+-- 2. 문서 요약 임베딩(documents.embedding_summary)과의 유사도
+-- 3. 가중 점수 = 본문 유사도 * content_weight + 요약 유사도 * summary_weight
+-- 4. 가중 점수 순으로 토큰 예산(token_limit)까지 선택 (토큰 추정: 글자 수 / 2)
+-- 선택된 청크만 본문(raw_data 우선)과 문서 요약 / 파일명 / URL을 함께 반환합니다.
+-- (RAG_SEARCH_BACKEND=rpc, 함수가 없으면 기존 Python 계산으로 동작)
+
+CREATE OR REPLACE FUNCTION match_document_chunks_weighted(
+  query_embedding vector,
+  match_threshold FLOAT DEFAULT 0.0,
+  match_count INT DEFAULT 30,
+  filter_school_name TEXT DEFAULT NULL,
+  content_weight FLOAT DEFAULT 0.6,
+  summary_weight FLOAT DEFAULT 0.4,
+  token_limit INT DEFAULT 6000
+)
+RETURNS TABLE (
+  id BIGINT,
+  document_id BIGINT,
+  section_id BIGINT,
+  page_number INT,
+  chunk_type TEXT,
+  content TEXT,                              -- raw_data (없으면 content)
+  similarity FLOAT,                          -- 본문 유사도
+  summary_similarity FLOAT,                  -- 문서 요약 유사도 (요약 임베딩 없으면 0)
+  weighted_score FLOAT,
+  est_tokens INT,
+  document_summary TEXT,
+  document_filename TEXT,
+  document_file_url TEXT
+)
+LANGUAGE sql STABLE
+AS $$
+  WITH candidates AS (
+    SELECT
+      c.id,
+      c.document_id,
+      c.section_id,
+      c.page_number,
+      c.chunk_type,
+      COALESCE(NULLIF(c.raw_data, ''), c.content, '') AS body,
+      1 - (c.embedding <=> query_embedding) AS similarity
+    FROM document_chunks c
+    JOIN documents d ON d.id = c.document_id
+    WHERE (filter_school_name IS NULL OR d.school_name = filter_school_name)
+      AND 1 - (c.embedding <=> query_embedding) >= match_threshold
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count
+  ),
+  scored AS (
+    SELECT
+      cand.*,
+      COALESCE(1 - (d.embedding_summary <=> query_embedding), 0) AS summary_similarity,
+      GREATEST(1, char_length(cand.body) / 2) AS est_tokens,
+      d.summary,
+      d.filename,
+      d.file_url
+    FROM candidates cand
+    JOIN documents d ON d.id = cand.document_id
+  ),
+  budgeted AS (
+    SELECT
+      s.*,
+      s.similarity * content_weight + s.summary_similarity * summary_weight AS weighted_score,
+      -- 가중 점수 순 누적 토큰 (동점은 본문 유사도 순, Python 안정 정렬과 같은 순서)
+      SUM(s.est_tokens) OVER (
+        ORDER BY s.similarity * content_weight + s.summary_similarity * summary_weight DESC,
+                 s.similarity DESC, s.id
+        ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+      ) AS running_tokens
+    FROM scored s
+  )
+  SELECT
+    b.id,
+    b.document_id,
+    b.section_id,
+    b.page_number,
+    b.chunk_type,
+    b.body,
+    b.similarity,
+    b.summary_similarity,
+    b.weighted_score,
+    b.est_tokens,
+    b.summary,
+    b.filename,
+    b.file_url
+  FROM budgeted b
+  WHERE b.running_tokens <= token_limit
+  ORDER BY b.weighted_score DESC, b.similarity DESC, b.id;
+$$;
+
+-- 완료!
+SELECT 'match_document_chunks_weighted 함수 생성 완료!' AS status;
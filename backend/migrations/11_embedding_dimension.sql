@@ -0,0 +1,36 @@
+-- 임베딩 차원 통일 (EMBEDDING_DIMENSION = 768)
+-- Supabase Dashboard > SQL Editor에서 실행하세요 (pgvector 0.7 이상: subvector, l2_normalize)
+--
+-- 업로드(EmbeddingService)와 검색(RAGFunctions)이 같은 모델 / 차원(config.settings의 EMBEDDING_*)을 씁니다.
+-- gemini-embedding-001은 Matryoshka 학습이라 3072차원의 앞 768차원 + 재정규화가
+-- output_dimensionality=768로 새로 만든 임베딩과 같은 방식이므로, 기존 행은 재임베딩 없이 절단합니다.
+-- 768차원이면 HNSW 인덱스를 만들 수 있습니다 (vector 타입 HNSW는 2000차원까지).
+--
+-- 배포 순서:
+--   1) 이 마이그레이션 실행 (검색 함수는 vector 인자라 그대로 동작)
+--   2) EMBEDDING_DIMENSION=768로 백엔드 배포
+--   3) python -m services.documents.reembed_job policy_documents
+--      (policy_documents는 이전 모델(text-embedding-004)로 만든 임베딩이라 절단이 아닌 재임베딩 대상)
+-- EMBEDDING_DIMENSION을 다른 값으로 바꾸면 아래 768을 같은 값으로 바꿔 다시 실행하고,
+-- 줄이는 게 아니라 늘리는 경우에는 reembed_job으로 전체를 다시 만드세요.
+
+-- 1. document_chunks.embedding (청크 검색)
+DROP INDEX IF EXISTS document_chunks_embedding_hnsw_idx;
+ALTER TABLE document_chunks
+  ALTER COLUMN embedding TYPE vector(768)
+  USING l2_normalize(subvector(embedding, 1, 768))::vector(768);
+
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_hnsw_idx
+  ON document_chunks USING hnsw (embedding vector_cosine_ops);
+
+-- 2. documents.embedding_summary (요약 유사도 가중치)
+ALTER TABLE documents
+  ALTER COLUMN embedding_summary TYPE vector(768)
+  USING l2_normalize(subvector(embedding_summary, 1, 768))::vector(768);
+
+-- 3. policy_documents.embedding (업로드 청크) - 모델이 달라 값은 reembed_job이 다시 채움
+ALTER TABLE policy_documents
+  ALTER COLUMN embedding TYPE vector(768)
+  USING CASE WHEN vector_dims(embedding) >= 768
+             THEN l2_normalize(subvector(embedding, 1, 768))::vector(768)
+        END;
@@ -20,6 +20,7 @@ from services.multi_agent import (
     AVAILABLE_AGENTS
 )
 from utils.timing_logger import TimingLogger
+from utils.request_log import LogChannel, agent_log, bind_log_channel, set_log_callback
 
 router = APIRouter()
 
@@ -139,12 +140,8 @@ async def chat(request: ChatRequest):
         log_and_emit("="*80)
         log_and_emit(f"질문: {message}")
         
-        # 실시간 로그 콜백 설정
-        from services.multi_agent import orchestration_agent, sub_agents, final_agent
-        
-        orchestration_agent.set_log_callback(log_and_emit)
-        sub_agents.set_log_callback(log_and_emit)
-        final_agent.set_log_callback(log_and_emit)
+        # 실시간 로그 콜백 설정 (이 요청의 컨텍스트에만 적용)
+        set_log_callback(log_and_emit)
         
         orch_start = time.time()
         orchestration_result = await run_orchestration_agent(message, history)
@@ -798,8 +795,9 @@ async def chat_stream(request: ChatRequest):
     3. Final Agent → 최종 답변 생성
     """
     async def generate():
-        logs = []
-        log_queue = asyncio.Queue()
+        # 요청 전용 로그 채널 (에이전트 로그 → channel.queue → SSE)
+        channel = LogChannel()
+        logs = channel.logs
         
         try:
             session_id = request.session_id
@@ -814,17 +812,9 @@ async def chat_stream(request: ChatRequest):
             # 타이밍 로거 초기화
             timing_logger = TimingLogger(session_id, request_id)
 
-            # 로그를 큐에 추가하는 콜백
-            def log_callback(msg: str):
-                print(msg)
-                logs.append(msg)
-                try:
-                    log_queue.put_nowait(msg)
-                except:
-                    pass
-
             def send_log(msg: str):
-                log_callback(msg)
+                logs.append(msg)
+                agent_log(msg)
                 return f"data: {json.dumps({'type': 'log', 'message': msg})}\n\n"
 
             yield send_log(f"{'#'*80}")
@@ -852,33 +842,19 @@ async def chat_stream(request: ChatRequest):
             yield send_log("="*80)
             yield send_log(f"질문: {message}")
             
-            # Agent들이 로그를 찍을 때마다 큐에 추가
-            from services.multi_agent import orchestration_agent, sub_agents, final_agent
-            
-            orchestration_agent.set_log_callback(log_callback)
-            sub_agents.set_log_callback(log_callback)
-            final_agent.set_log_callback(log_callback)
-            
             # Orchestration Agent 실행 (백그라운드)
             orch_start = time.time()
             timing_logger.mark("orch_start", orch_start)
             
+            # 각 작업은 자신의 컨텍스트에 채널을 바인딩 (동시 요청끼리 로그가 섞이지 않음)
             async def run_orch():
-                return await run_orchestration_agent(message, history, timing_logger)
+                with bind_log_channel(channel):
+                    return await run_orchestration_agent(message, history, timing_logger)
             
             orch_task = asyncio.create_task(run_orch())
             
-            # 큐에서 로그를 읽어서 스트리밍
-            while not orch_task.done():
-                try:
-                    log_msg = await asyncio.wait_for(log_queue.get(), timeout=0.1)
-                    yield f"data: {json.dumps({'type': 'log', 'message': log_msg})}\n\n"
-                except asyncio.TimeoutError:
-                    continue
-            
-            # 남은 로그 처리
-            while not log_queue.empty():
-                log_msg = log_queue.get_nowait()
+            # 로그와 작업 완료를 이벤트 기반으로 함께 대기하며 스트리밍
+            async for log_msg in channel.follow(orch_task):
                 yield f"data: {json.dumps({'type': 'log', 'message': log_msg})}\n\n"
             
             orchestration_result = orch_task.result()
@@ -999,35 +975,26 @@ async def chat_stream(request: ChatRequest):
             timing_logger.mark("sub_agents_start", sub_start)
             
             async def run_subs():
-                return await execute_sub_agents(
-                    execution_plan,
-                    extracted_scores=extracted_scores,
-                    user_message=message,
-                    timing_logger=timing_logger
-                )
+                with bind_log_channel(channel):
+                    return await execute_sub_agents(
+                        execution_plan,
+                        extracted_scores=extracted_scores,
+                        user_message=message,
+                        timing_logger=timing_logger
+                    )
             
             subs_task = asyncio.create_task(run_subs())
             
-            # 큐에서 로그를 읽어서 스트리밍 (최대 대기 시간 추가)
+            # 로그와 작업 완료를 이벤트 기반으로 함께 대기하며 스트리밍 (최대 대기 시간 추가)
             max_wait_time = 180.0  # 최대 3분 대기
-            wait_start = time.time()
-            while not subs_task.done():
-                # 최대 대기 시간 초과 체크
-                if time.time() - wait_start > max_wait_time:
-                    yield send_log("⚠️ Sub Agents 처리 시간이 초과되었습니다. 계속 진행합니다...")
-                    break
-                    
-                try:
-                    log_msg = await asyncio.wait_for(log_queue.get(), timeout=0.1)
-                    yield f"data: {json.dumps({'type': 'log', 'message': log_msg})}\n\n"
-                except asyncio.TimeoutError:
-                    continue
-            
-            # 남은 로그 처리
-            while not log_queue.empty():
-                log_msg = log_queue.get_nowait()
+            async for log_msg in channel.follow(subs_task, timeout=max_wait_time):
                 yield f"data: {json.dumps({'type': 'log', 'message': log_msg})}\n\n"
             
+            if not subs_task.done():
+                yield send_log("⚠️ Sub Agents 처리 시간이 초과되었습니다. 계속 진행합니다...")
+                async for log_msg in channel.follow(subs_task):
+                    yield f"data: {json.dumps({'type': 'log', 'message': log_msg})}\n\n"
+            
             sub_agent_results = subs_task.result()
             sub_time = time.time() - sub_start
             timing_logger.mark("sub_agents_complete")
@@ -1057,36 +1024,27 @@ async def chat_stream(request: ChatRequest):
             timing_logger.mark("final_start", final_start)
             
             async def run_final():
-                return await generate_final_answer(
-                    user_question=message,
-                    answer_structure=answer_structure,
-                    sub_agent_results=sub_agent_results,
-                    history=history,
-                    timing_logger=timing_logger
-                )
+                with bind_log_channel(channel):
+                    return await generate_final_answer(
+                        user_question=message,
+                        answer_structure=answer_structure,
+                        sub_agent_results=sub_agent_results,
+                        history=history,
+                        timing_logger=timing_logger
+                    )
             
             final_task = asyncio.create_task(run_final())
             
-            # 큐에서 로그를 읽어서 스트리밍 (최대 대기 시간 추가)
+            # 로그와 작업 완료를 이벤트 기반으로 함께 대기하며 스트리밍 (최대 대기 시간 추가)
             max_wait_time = 180.0  # 최대 3분 대기
-            wait_start = time.time()
-            while not final_task.done():
-                # 최대 대기 시간 초과 체크
-                if time.time() - wait_start > max_wait_time:
-                    yield send_log("⚠️ Final Agent 처리 시간이 초과되었습니다. 계속 진행합니다...")
-                    break
-                    
-                try:
-                    log_msg = await asyncio.wait_for(log_queue.get(), timeout=0.1)
-                    yield f"data: {json.dumps({'type': 'log', 'message': log_msg})}\n\n"
-                except asyncio.TimeoutError:
-                    continue
-            
-            # 남은 로그 처리
-            while not log_queue.empty():
-                log_msg = log_queue.get_nowait()
+            async for log_msg in channel.follow(final_task, timeout=max_wait_time):
                 yield f"data: {json.dumps({'type': 'log', 'message': log_msg})}\n\n"
             
+            if not final_task.done():
+                yield send_log("⚠️ Final Agent 처리 시간이 초과되었습니다. 계속 진행합니다...")
+                async for log_msg in channel.follow(final_task):
+                    yield f"data: {json.dumps({'type': 'log', 'message': log_msg})}\n\n"
+            
             final_result = final_task.result()
             final_time = time.time() - final_start
             timing_logger.mark("final_complete")
@@ -5,7 +5,12 @@ PDF 변환, 임베딩 생성, 문서 분류
 
 from .gemini_pdf_service import GeminiPDFService, gemini_pdf_service
 from .classifier_service import ClassifierService, classifier_service
-from .embedding_service import EmbeddingService, embedding_service
+from .embedding_service import EmbeddingService, EmbeddingBatchError, embedding_service
+from .hashtag_index import HashtagIndex, hashtag_index, get_documents_metadata
+from .chunk_loader import load_document_chunks
+from .admission_extractor import AdmissionExtractor, admission_extractor, get_admission_rows
+from .doc_selector import DocumentSelector, document_selector
+from .upload_jobs import UploadJobStore, UploadJobQueue, upload_job_queue
 
 __all__ = [
     'GeminiPDFService',
@@ -13,5 +18,18 @@ __all__ = [
     'ClassifierService',
     'classifier_service',
     'EmbeddingService',
+    'EmbeddingBatchError',
     'embedding_service',
+    'HashtagIndex',
+    'hashtag_index',
+    'get_documents_metadata',
+    'load_document_chunks',
+    'AdmissionExtractor',
+    'admission_extractor',
+    'get_admission_rows',
+    'DocumentSelector',
+    'document_selector',
+    'UploadJobStore',
+    'UploadJobQueue',
+    'upload_job_queue',
 ]
@@ -0,0 +1,298 @@
+"""
+전형결과 문서 구조화 추출 서비스
+
+업로드 시 전형결과(입결) 문서를 감지하고, Markdown 표를
+score_system/data/admission_results/*.json과 같은 행 스키마로 추출합니다.
+
+    {"univ", "major", "type", "field", "cut_70_score", "cut_50_score",
+     "total_scale", "recruit_count", "competition_rate"}
+
+추출된 행은 admission_rows 테이블에 저장되어
+- 상담(ConsultingAgent) 프롬프트에는 원문 청크 대신 관련 행만 들어가고
+- 리버스 서치가 업로드된 대학까지 자동으로 포함합니다.
+
+표 묶음 하나라도 추출에 실패하면 일부 행만 저장하지 않고 AdmissionExtractionError를 올립니다.
+(호출 측은 행을 저장하지 않고 원문 청크를 그대로 사용)
+"""
+import asyncio
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from services.gemini_service import gemini_service
+from config.logging_config import setup_logger
+from utils.document_cache import cache_get_or_load
+
+logger = setup_logger('admission_extractor')
+
+# LLM 1회 호출당 표 텍스트 최대 길이
+SEGMENT_MAX_CHARS = 8000
+# 동시 LLM 호출 수
+MAX_CONCURRENT_SEGMENTS = 3
+# 표 앞에 함께 넘길 문맥(제목/전형명) 줄 수
+TABLE_CONTEXT_LINES = 3
+# PostgREST 응답 최대 행 수 (Supabase 기본 max-rows)
+PAGE_SIZE = 1000
+
+_NUMBER_PATTERN = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+class AdmissionExtractionError(Exception):
+    """전형결과 표 추출 실패 (일부 표 묶음의 LLM 호출 / JSON 파싱 실패)"""
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """'3.7:1', '545.9점', '1,234' 등에서 숫자 추출"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_PATTERN.search(str(value).replace(',', ''))
+    return float(match.group()) if match else None
+
+
+def _full_univ_name(name: str) -> str:
+    """'경희대' → '경희대학교' (score_system 데이터와 같은 표기)"""
+    name = (name or '').strip()
+    if not name:
+        return ''
+    if name.endswith('대학교'):
+        return name
+    if name.endswith('대'):
+        return name + '학교'
+    return name
+
+
+def _fetch_admission_rows() -> List[Dict[str, Any]]:
+    """admission_rows 전체 조회 (동기, 페이지 단위)"""
+    from services.supabase_client import SupabaseService  # supabase_client → documents 패키지 순환 import 방지
+    client = SupabaseService.get_client()
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        response = client.table('admission_rows')\
+            .select('*')\
+            .order('id')\
+            .range(offset, offset + PAGE_SIZE - 1)\
+            .execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+async def get_admission_rows() -> List[Dict[str, Any]]:
+    """업로드된 전형결과 행 전체 (문서 캐시 "admission_rows" 항목, 없으면 DB 조회)"""
+    async def load_rows():
+        return await asyncio.to_thread(_fetch_admission_rows)
+
+    return await cache_get_or_load("admission_rows", load_rows, table="admission_rows")
+
+
+class AdmissionExtractor:
+    """전형결과 표 → 입결 행 추출"""
+
+    def detect(self, title: str, hashtags: List[str], markdown: str) -> Optional[str]:
+        """
+        전형결과 문서인지 판단
+
+        Returns:
+            "수시" / "정시" / "" (전형 구분 불명) 또는 None (전형결과 문서 아님)
+        """
+        head = f"{title}\n{markdown[:3000]}"
+        is_result = '전형결과' in head or '입시결과' in head or '#입결통계' in (hashtags or [])
+        if not is_result:
+            return None
+
+        # 표가 없으면 추출할 행도 없음
+        table_lines = sum(1 for line in markdown.splitlines() if line.lstrip().startswith('|'))
+        if table_lines < 3:
+            return None
+
+        if '정시' in title or '#정시' in (hashtags or []):
+            return '정시'
+        if '수시' in title or '#수시' in (hashtags or []):
+            return '수시'
+        return ''
+
+    def _split_tables(self, markdown: str) -> List[str]:
+        """Markdown에서 표 블록(앞 문맥 포함)만 뽑아 LLM 입력 크기로 묶음"""
+        lines = markdown.splitlines()
+        blocks: List[str] = []
+        i = 0
+        while i < len(lines):
+            if not lines[i].lstrip().startswith('|'):
+                i += 1
+                continue
+            start = i
+            while i < len(lines) and lines[i].lstrip().startswith('|'):
+                i += 1
+            context = [l for l in lines[max(0, start - TABLE_CONTEXT_LINES):start] if l.strip()]
+            blocks.append("\n".join(context + lines[start:i]))
+
+        segments: List[str] = []
+        current = ""
+        for block in blocks:
+            # 너무 큰 표는 행 단위로 나눔 (헤더 유지)
+            while len(block) > SEGMENT_MAX_CHARS:
+                block_lines = block.splitlines()
+                header = block_lines[:TABLE_CONTEXT_LINES + 2]
+                cut, size = len(header), sum(len(l) + 1 for l in header)
+                while cut < len(block_lines) and size + len(block_lines[cut]) + 1 <= SEGMENT_MAX_CHARS:
+                    size += len(block_lines[cut]) + 1
+                    cut += 1
+                if cut == len(header):
+                    cut += 1
+                segments.append("\n".join(block_lines[:cut]))
+                block = "\n".join(header + block_lines[cut:])
+            if current and len(current) + len(block) + 2 > SEGMENT_MAX_CHARS:
+                segments.append(current)
+                current = ""
+            current = f"{current}\n\n{block}" if current else block
+        if current:
+            segments.append(current)
+        return segments
+
+    async def _extract_segment(self, segment: str, title: str, source: str, admission_type: str) -> List[Dict[str, Any]]:
+        """
+        표 묶음 1개 → 행 목록 (LLM)
+
+        Raises:
+            AdmissionExtractionError: LLM 호출 실패 또는 JSON 배열이 아닌 응답
+        """
+        prompt = f"""다음은 대학 입시 전형결과 문서의 표입니다. 모든 모집단위(학과) 행을 JSON 배열로 추출하세요.
+
+**문서 제목:** {title}
+**발행기관:** {source}
+**전형 구분:** {admission_type or '문서에서 판단'}
+
+**표:**
+{segment}
+
+---
+
+**각 행 형식:**
+{{
+  "univ": "대학명 (예: 경희대학교)",
+  "major": "모집단위/학과명",
+  "type": "전형명 (예: 일반, 지역균형, 학생부종합)",
+  "field": "계열 (예: 인문, 자연, 예체능, 없으면 빈 문자열)",
+  "cut_70_score": 70% 컷 점수 (숫자, 없으면 null),
+  "cut_50_score": 50% 컷 점수 (숫자, 없으면 null),
+  "total_scale": 점수 만점 (숫자, 없으면 null),
+  "recruit_count": 모집인원 (정수, 없으면 null),
+  "competition_rate": 경쟁률 (숫자, 예: "3.7:1" → 3.7, 없으면 null)
+}}
+
+규칙:
+- 표에 있는 숫자를 그대로 사용 (계산/추정 금지)
+- 합계/소계 행은 제외
+- 표에 모집단위가 없으면 빈 배열 []
+
+JSON 배열만 출력하세요."""
+
+        try:
+            response_text = await gemini_service.generate(
+                prompt,
+                system_instruction="당신은 입시 전형결과 표를 정확하게 구조화하는 데이터 추출 전문가입니다."
+            )
+
+            result_text = response_text
+            if "```json" in result_text:
+                result_text = result_text.split("```json")[1].split("```")[0].strip()
+            elif "```" in result_text:
+                result_text = result_text.split("```")[1].split("```")[0].strip()
+
+            rows = json.loads(result_text)
+        except Exception as e:
+            logger.error(f"전형결과 표 추출 실패: {e}")
+            raise AdmissionExtractionError(str(e) or type(e).__name__) from e
+        if not isinstance(rows, list):
+            logger.error(f"전형결과 표 추출 실패: JSON 배열이 아님 ({type(rows).__name__})")
+            raise AdmissionExtractionError("JSON 배열이 아닌 응답")
+        return rows
+
+    def _normalize_row(self, raw: Dict[str, Any], default_univ: str) -> Optional[Dict[str, Any]]:
+        """LLM 출력 행 → score_system 행 스키마 (필수값 없으면 None)"""
+        if not isinstance(raw, dict):
+            return None
+        major = str(raw.get('major') or '').strip()
+        if not major or major in ('합계', '소계', '계'):
+            return None
+
+        recruit_count = _to_number(raw.get('recruit_count'))
+        return {
+            'univ': _full_univ_name(str(raw.get('univ') or '')) or default_univ,
+            'major': major,
+            'type': str(raw.get('type') or '일반').strip() or '일반',
+            'field': str(raw.get('field') or '').strip(),
+            'cut_70_score': _to_number(raw.get('cut_70_score')),
+            'cut_50_score': _to_number(raw.get('cut_50_score')),
+            'total_scale': _to_number(raw.get('total_scale')),
+            'recruit_count': int(recruit_count) if recruit_count is not None else None,
+            'competition_rate': _to_number(raw.get('competition_rate')),
+        }
+
+    async def extract_rows(
+        self,
+        markdown: str,
+        title: str,
+        source: str,
+        admission_type: str = ""
+    ) -> List[Dict[str, Any]]:
+        """
+        전형결과 문서의 표를 입결 행으로 추출
+
+        Args:
+            markdown: PDF 변환 Markdown
+            title: 문서 제목
+            source: 발행기관 (대학명이 없을 때 기본값)
+            admission_type: detect() 결과
+
+        Returns:
+            score_system 행 스키마 목록
+
+        Raises:
+            AdmissionExtractionError: 표 묶음 중 하나라도 추출에 실패하면 (부분 결과는 반환하지 않음)
+        """
+        segments = self._split_tables(markdown)
+        if not segments:
+            return []
+
+        logger.info(f"전형결과 추출 시작 - 제목: {title}, 표 묶음 {len(segments)}개")
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEGMENTS)
+
+        async def run(segment: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._extract_segment(segment, title, source, admission_type)
+
+        results = await asyncio.gather(*[run(segment) for segment in segments], return_exceptions=True)
+        failed = [result for result in results if isinstance(result, BaseException)]
+        if failed:
+            for result in failed:
+                if not isinstance(result, Exception):
+                    raise result  # 취소 등은 그대로 전파
+            raise AdmissionExtractionError(
+                f"표 묶음 {len(failed)}/{len(segments)}개 추출 실패: {failed[0]}"
+            )
+
+        default_univ = _full_univ_name(source if source and source != '미상' else '')
+        rows: List[Dict[str, Any]] = []
+        seen = set()
+        for raw in (row for segment_rows in results for row in segment_rows):
+            row = self._normalize_row(raw, default_univ)
+            if row is None or not row['univ']:
+                continue
+            key = (row['univ'], row['major'], row['type'], row['field'])
+            if key in seen:
+                continue
+            seen.add(key)
+            rows.append(row)
+
+        logger.info(f"전형결과 추출 완료 - {len(rows)}개 행")
+        return rows
+
+
+# 전역 인스턴스
+admission_extractor = AdmissionExtractor()
@@ -0,0 +1,89 @@
+"""
+선택된 문서들의 청크 일괄 로드
+
+에이전트가 문서마다 policy_documents를 eq('metadata->>fileName', ...)로 한 번씩 조회하던 것을
+캐시 확인 → 남은 파일들을 IN 쿼리로 한 번에 조회 → 파일별로 chunkIndex 정렬 후 캐시 저장
+으로 바꿉니다. (선택 문서 수만큼의 왕복 → 1회)
+"""
+
+import asyncio
+from typing import Dict, List
+
+from utils.document_cache import cache_get, cache_set
+
+# IN 목록 1회당 최대 파일 수 (URL 길이 제한 대비), 초과분은 동시 조회
+IN_QUERY_MAX_FILES = 20
+# 동시에 보내는 IN 쿼리 수
+MAX_CONCURRENT_QUERIES = 4
+# PostgREST 응답 최대 행 수 (Supabase 기본 max-rows)
+PAGE_SIZE = 1000
+
+
+def _chunk_index(chunk: Dict) -> int:
+    return (chunk.get('metadata') or {}).get('chunkIndex', 0)
+
+
+def _fetch_files(file_names: List[str]) -> List[Dict]:
+    """파일 목록의 청크 전체 조회 (동기, 페이지 단위)"""
+    from services.supabase_client import SupabaseService  # supabase_client → hashtag_index 순환 import 방지
+    client = SupabaseService.get_client()
+    rows: List[Dict] = []
+    offset = 0
+    while True:
+        response = client.table('policy_documents')\
+            .select('id, content, metadata')\
+            .in_('metadata->>fileName', file_names)\
+            .order('id')\
+            .range(offset, offset + PAGE_SIZE - 1)\
+            .execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+async def load_document_chunks(file_names: List[str]) -> Dict[str, List[Dict]]:
+    """
+    여러 문서의 청크를 한 번에 로드
+
+    Args:
+        file_names: documents_metadata.file_name 목록
+
+    Returns:
+        {file_name: chunkIndex 순으로 정렬된 청크 목록} (청크가 없으면 빈 목록)
+    """
+    result: Dict[str, List[Dict]] = {}
+    missing: List[str] = []
+    for file_name in dict.fromkeys(file_names):
+        cached = cache_get("chunks", filename=file_name)
+        if cached is not None:
+            result[file_name] = cached
+        else:
+            missing.append(file_name)
+
+    if not missing:
+        return result
+
+    groups = [missing[i:i + IN_QUERY_MAX_FILES] for i in range(0, len(missing), IN_QUERY_MAX_FILES)]
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+
+    async def fetch(group: List[str]) -> List[Dict]:
+        async with semaphore:
+            return await asyncio.to_thread(_fetch_files, group)
+
+    pages = await asyncio.gather(*[fetch(group) for group in groups])
+
+    by_file: Dict[str, List[Dict]] = {file_name: [] for file_name in missing}
+    for rows in pages:
+        for row in rows:
+            file_name = (row.get('metadata') or {}).get('fileName')
+            if file_name in by_file:
+                by_file[file_name].append(row)
+
+    for file_name, chunks in by_file.items():
+        chunks.sort(key=_chunk_index)
+        cache_set("chunks", chunks, filename=file_name)
+        result[file_name] = chunks
+
+    return result
@@ -0,0 +1,282 @@
+"""
+UniversityAgent 문서 선별 (2단계)
+
+해시태그 검색 결과 상위 10개의 요약본을 Gemini에 보내 "최대 3개 번호"를 고르게 하던 것을
+프로세스 내 재순위(rerank)로 바꿉니다. (LLM 왕복 1회 → 1ms 미만)
+
+점수 (0~1, 후보 문서 집합 기준 IDF 가중):
+- 추가 해시태그 일치 (연도 / 전형 / 문서 성격)
+- 질문 글자 bigram이 제목 / 요약 / 해시태그에 포함된 비율
+
+LLM 필터는 점수가 애매할 때(최고점이 낮거나 선택 경계의 점수 차가 작을 때)만
+선택적으로 사용하며(DOC_SELECT_LLM_FALLBACK), 선택 기록은 logs/doc_selection.jsonl에 남겨
+benchmarks/report_doc_selection.py로 두 방식의 일치율을 비교합니다.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from config import settings
+
+# 최대 선택 문서 수
+MAX_SELECTED = 3
+# 질문과 겹치는 내용이 없을 때 사용하는 문서 수 (기존 LLM 필터 실패 시와 같음)
+FALLBACK_SELECTED = 2
+# 최고점 대비 이 비율 이상인 문서만 함께 선택
+RELATIVE_CUTOFF = 0.7
+# 최고점이 이보다 낮으면 "겹치는 내용 없음"
+MIN_SCORE = 0.05
+# 최고점이 이보다 낮거나, 선택 경계 점수 차가 AMBIGUITY_MARGIN보다 작으면 애매한 선택
+CONFIDENT_SCORE = 0.25
+AMBIGUITY_MARGIN = 0.03
+# LLM 필터에 보내는 최대 문서 수 / 요약 길이
+LLM_MAX_CANDIDATES = 10
+SUMMARY_CHARS = 500
+
+# 특징 가중치
+WEIGHTS = {
+    "tags": 0.35,
+    "title": 0.30,
+    "summary": 0.20,
+    "hashtags": 0.15,
+}
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SELECTION_LOG_FILE = os.path.join(BACKEND_DIR, "logs", "doc_selection.jsonl")
+
+_TEXT_PATTERN = re.compile(r'[가-힣A-Za-z0-9]+')
+
+
+def _bigrams(text: str) -> Set[str]:
+    """공백/기호를 제거한 글자 bigram 집합 (한 글자 단어는 그대로)"""
+    grams: Set[str] = set()
+    for token in _TEXT_PATTERN.findall((text or '').lower()):
+        if len(token) == 1:
+            grams.add(token)
+        else:
+            grams.update(token[i:i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+class DocumentSelector:
+    """요약/해시태그 기반 로컬 문서 재순위"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._features: Dict[str, tuple] = {}   # file_name → (행 객체, 특징)
+        self._log_lock = threading.Lock()
+        self._stats = {"selections": 0, "ambiguous": 0, "llm_fallbacks": 0}
+
+    def _doc_features(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """문서 특징 (행 객체가 바뀌지 않았으면 재사용)"""
+        file_name = doc.get('file_name') or doc.get('title') or ''
+        with self._lock:
+            cached = self._features.get(file_name)
+            if cached is not None and cached[0] is doc:
+                return cached[1]
+
+        hashtags = doc.get('hashtags') or []
+        features = {
+            "tags": set(hashtags),
+            "title": _bigrams(doc.get('title') or ''),
+            "summary": _bigrams((doc.get('summary') or '')[:SUMMARY_CHARS]),
+            "hashtags": _bigrams(" ".join(hashtags)),
+        }
+        with self._lock:
+            self._features[file_name] = (doc, features)
+        return features
+
+    def score(
+        self,
+        query: str,
+        docs: List[Dict[str, Any]],
+        optional_tags: Optional[List[str]] = None,
+        exclude_terms: Optional[List[str]] = None
+    ) -> List[float]:
+        """
+        후보 문서별 점수 (docs 순서)
+
+        Args:
+            query: 사용자 질문
+            docs: 후보 문서 (해시태그 검색 결과 순)
+            optional_tags: 질문에서 뽑은 추가 해시태그
+            exclude_terms: 모든 후보에 공통인 단어 (예: 대학명) - 질문 bigram에서 제외
+        """
+        if not docs:
+            return []
+
+        query_grams = _bigrams(query)
+        for term in exclude_terms or []:
+            query_grams -= _bigrams(term)
+        features = [self._doc_features(doc) for doc in docs]
+
+        # 후보 집합 기준 IDF: 어느 후보에도 없거나 모든 후보에 있는 bigram은 순위에 기여하지 않음
+        n = len(docs)
+        idf: Dict[str, float] = {}
+        for gram in query_grams:
+            df = sum(
+                1 for f in features
+                if gram in f["title"] or gram in f["summary"] or gram in f["hashtags"]
+            )
+            if 0 < df < n:
+                idf[gram] = math.log((n + 1) / df)
+        idf_total = sum(idf.values())
+
+        tags = set(optional_tags or [])
+        scores = []
+        for f in features:
+            score = 0.0
+            if tags:
+                score += WEIGHTS["tags"] * len(tags & f["tags"]) / len(tags)
+            if idf_total > 0:
+                for field in ("title", "summary", "hashtags"):
+                    covered = sum(w for gram, w in idf.items() if gram in f[field])
+                    score += WEIGHTS[field] * covered / idf_total
+            scores.append(round(score, 6))
+        return scores
+
+    def select(
+        self,
+        query: str,
+        docs: List[Dict[str, Any]],
+        optional_tags: Optional[List[str]] = None,
+        exclude_terms: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        후보 문서 중 질문에 필요한 문서 선택
+
+        Returns:
+            {"docs": 선택 문서, "scores": 후보별 점수, "ambiguous": LLM 확인이 필요한 선택인지,
+             "elapsed_us": 소요 시간}
+        """
+        started = time.perf_counter()
+        scores = self.score(query, docs, optional_tags, exclude_terms)
+        # 점수 내림차순, 동점이면 해시태그 검색 순서
+        order = sorted(range(len(docs)), key=lambda i: (-scores[i], i))
+
+        top = scores[order[0]] if order else 0.0
+        if top < MIN_SCORE:
+            selected_idx = list(range(min(FALLBACK_SELECTED, len(docs))))
+            ambiguous = len(docs) > 1
+        else:
+            selected_idx = [i for i in order[:MAX_SELECTED] if scores[i] >= top * RELATIVE_CUTOFF]
+            boundary = scores[selected_idx[-1]]
+            rest = [scores[i] for i in order[len(selected_idx):]]
+            ambiguous = top < CONFIDENT_SCORE or bool(rest and boundary - rest[0] < AMBIGUITY_MARGIN)
+
+        with self._lock:
+            self._stats["selections"] += 1
+            self._stats["ambiguous"] += int(ambiguous)
+
+        return {
+            "docs": [docs[i] for i in selected_idx],
+            "scores": scores,
+            "ambiguous": ambiguous,
+            "elapsed_us": round((time.perf_counter() - started) * 1e6, 1),
+        }
+
+    async def llm_select(
+        self,
+        query: str,
+        docs: List[Dict[str, Any]],
+        timing_logger=None,
+        agent_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """기존 LLM 필터 (요약본을 보고 최대 3개 번호 선택)"""
+        from services.gemini_service import gemini_service  # 로컬 선택만 쓰는 경우 Gemini 초기화 불필요
+
+        with self._lock:
+            self._stats["llm_fallbacks"] += 1
+
+        candidates = docs[:LLM_MAX_CANDIDATES]
+        docs_summary_list = []
+        for idx, doc in enumerate(candidates, 1):
+            title = doc.get('title', '제목 없음')
+            summary = (doc.get('summary') or '요약 없음')[:SUMMARY_CHARS]
+            hashtags = doc.get('hashtags', [])
+            docs_summary_list.append(
+                f"{idx}. 제목: {title}\n   해시태그: {', '.join(hashtags) if hashtags else '없음'}\n   요약: {summary}"
+            )
+
+        docs_summary_text = "\n\n".join(docs_summary_list)
+
+        filter_prompt = f"""다음 문서들의 요약본을 읽고, 질문에 답변하는데 필요한 문서만 선택하세요.
+
+질문: "{query}"
+
+문서 목록:
+{docs_summary_text}
+
+선택 기준:
+1. 질문에 답변하는데 필요한 정보가 포함된 문서만 선택
+2. 최대 {MAX_SELECTED}개까지만 선택
+
+답변 형식:
+관련 문서가 있으면: 번호만 쉼표로 구분 (예: 1, 3)
+관련 문서가 없으면: 없음"""
+
+        filter_result = await gemini_service.generate(
+            filter_prompt,
+            "문서 필터링 전문가",
+            timing_logger=timing_logger,
+            agent_name=agent_name
+        )
+
+        if not filter_result.strip() or "없음" in filter_result.lower():
+            return docs[:FALLBACK_SELECTED]
+        selected_indices = [int(n.strip()) - 1 for n in re.findall(r'\d+', filter_result)]
+        selected = [candidates[i] for i in selected_indices if 0 <= i < len(candidates)]
+        return selected or docs[:FALLBACK_SELECTED]
+
+    def log_selection(
+        self,
+        university: str,
+        query: str,
+        docs: List[Dict[str, Any]],
+        optional_tags: List[str],
+        selection: Dict[str, Any],
+        llm_docs: Optional[List[Dict[str, Any]]] = None
+    ):
+        """선택 기록 (DOC_SELECTION_LOG 활성화 시, 일치율 리포트 입력)"""
+        if not settings.DOC_SELECTION_LOG:
+            return
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "university": university,
+            "query": query,
+            "optional_tags": optional_tags,
+            "candidates": [
+                {
+                    "file_name": doc.get('file_name'),
+                    "title": doc.get('title'),
+                    "summary": (doc.get('summary') or '')[:SUMMARY_CHARS],
+                    "hashtags": doc.get('hashtags') or [],
+                }
+                for doc in docs[:LLM_MAX_CANDIDATES]
+            ],
+            "rerank": [doc.get('file_name') for doc in selection["docs"]],
+            "ambiguous": selection["ambiguous"],
+            "llm": [doc.get('file_name') for doc in llm_docs] if llm_docs is not None else None,
+        }
+        try:
+            with self._log_lock:
+                os.makedirs(os.path.dirname(SELECTION_LOG_FILE), exist_ok=True)
+                with open(SELECTION_LOG_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ 문서 선택 기록 실패: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """선택 통계"""
+        with self._lock:
+            return dict(self._stats)
+
+
+# 전역 인스턴스
+document_selector = DocumentSelector()
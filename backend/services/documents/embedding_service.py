@@ -3,9 +3,96 @@
 """
 import google.generativeai as genai
 from config import settings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import asyncio
+import random
+import time
+from utils.embedding_codec import truncate_embedding
+from .markdown_chunker import MarkdownChunk, chunk_markdown
+
+# 요청 1회당 최대 텍스트 수 (Gemini batchEmbedContents 제한)
+MAX_TEXTS_PER_REQUEST = 100
+# 동시에 진행하는 임베딩 요청 수 (슬라이딩 윈도우)
+MAX_CONCURRENT_REQUESTS = 4
+# 일시 오류(429/503 등) 재시도
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+
+
+# 재시도할 HTTP 상태 코드 (타임아웃 / Rate Limit / 서버 오류)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    """오류의 HTTP 상태 코드 (google.api_core 예외의 code, 없으면 None)"""
+    code = getattr(error, "code", None)
+    if isinstance(code, int):  # HTTPStatus 포함
+        return int(code)
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    code = _status_code(error)
+    if code is not None:
+        return code == 429
+    error_msg = str(error).lower()
+    return "rate limit" in error_msg or "resource exhausted" in error_msg
+
+
+def _is_retryable(error: Exception) -> bool:
+    """재시도하면 성공할 수 있는 오류 (Rate Limit / 과부하 / 타임아웃) - 상태 코드 또는 예외 타입으로 판단"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    code = _status_code(error)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    return _is_rate_limit(error)
+
+
+def _is_invalid_input(error: Exception) -> bool:
+    """요청 내용 문제 (400) - 요청을 나누면 문제 텍스트만 격리할 수 있는 오류"""
+    return _status_code(error) == 400
+
+
+class EmbeddingBatchError(Exception):
+    """일부 텍스트 임베딩 실패 (failed: {텍스트 인덱스: 오류 메시지})"""
+
+    def __init__(self, failed: Dict[int, str], total: int):
+        self.failed = failed
+        self.total = total
+        indices = sorted(failed)
+        preview = ", ".join(str(i + 1) for i in indices[:10]) + (" ..." if len(indices) > 10 else "")
+        super().__init__(f"임베딩 실패 {len(failed)}/{total}개 청크 (청크 번호: {preview})")
+
+
+class _RequestWindow:
+    """
+    동시 요청 수 제한 (슬라이딩 윈도우, Rate Limit에 맞춰 크기 조절)
+
+    429를 받으면 윈도우를 절반으로 줄이고, 성공할 때마다 1씩 최대치까지 늘립니다.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self.size = self.max_size
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.size)
+            self.in_flight += 1
+
+    async def release(self, rate_limited: bool = False):
+        async with self._cond:
+            self.in_flight -= 1
+            if rate_limited:
+                self.size = max(1, self.size // 2)
+            elif self.size < self.max_size:
+                self.size += 1
+            self._cond.notify_all()
 
 
 class EmbeddingService:
@@ -13,119 +100,187 @@ class EmbeddingService:
     
     def __init__(self):
         genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.embedding_model = "text-embedding-004"
-        self.embedding_dimension = 768  # Gemini 임베딩 차원
+        # 검색(RAGFunctions)과 같은 모델 / 차원 (config.settings)
+        self.embedding_model = settings.EMBEDDING_MODEL
+        self.embedding_dimension = settings.EMBEDDING_DIMENSION
+        self._rate_limited_until = 0.0  # Rate Limit 쿨다운 종료 시각 (모든 요청 공통)
     
     def chunk_text(
         self,
         text: str,
-        chunk_size: int = 1200,
-        chunk_overlap: int = 200
+        chunk_size: int = 1200
     ) -> List[str]:
         """
-        텍스트를 의미 단위로 청킹
-        
+        텍스트를 Markdown 구조(제목 / 표) 단위로 청킹
+
         Args:
-            text: 원본 텍스트
+            text: 원본 텍스트 (Markdown)
             chunk_size: 청크 크기
-            chunk_overlap: 중복 크기
-        
+
         Returns:
             청크 리스트
         """
+        chunks, _ = self.chunk_markdown(text, chunk_size)
+        return [chunk.text for chunk in chunks]
+
+    def chunk_markdown(
+        self,
+        text: str,
+        chunk_size: int = 1200,
+        section: Optional[List[str]] = None
+    ) -> Tuple[List[MarkdownChunk], List[str]]:
+        """
+        Markdown 구조 기반 청킹 (청크별 제목 경로 포함, services/documents/markdown_chunker.py)
+
+        Args:
+            text: 원본 Markdown
+            chunk_size: 청크 크기
+            section: 시작 제목 경로 (앞 PDF 조각의 마지막 경로)
+
+        Returns:
+            (청크 리스트, 마지막 제목 경로)
+        """
         print(f"\n📦 텍스트 청킹 시작...")
         print(f"   원본 크기: {len(text):,}자")
-        
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
-        )
-        
-        chunks = splitter.split_text(text)
-        
+
+        chunks, end_section = chunk_markdown(text, chunk_size, section)
+
         print(f"   ✅ {len(chunks)}개 청크 생성")
         if len(chunks) > 0:
-            print(f"   평균 크기: {sum(len(c) for c in chunks) // len(chunks):,}자\n")
+            print(f"   평균 크기: {sum(len(c.text) for c in chunks) // len(chunks):,}자\n")
         else:
             print(f"   ⚠️ 청크가 생성되지 않았습니다\n")
-        
-        return chunks
+
+        return chunks, end_section
     
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """여러 텍스트 임베딩 (batchEmbedContents 1회, 동기) - 설정 차원으로 절단 + 정규화"""
+        result = genai.embed_content(
+            model=self.embedding_model,
+            content=texts,
+            task_type="retrieval_document",
+            output_dimensionality=self.embedding_dimension
+        )
+        return [truncate_embedding(embedding, self.embedding_dimension) for embedding in result['embedding']]
+
+    async def _embed_request(self, texts: List[str], window: Optional[_RequestWindow] = None) -> List[List[float]]:
+        """임베딩 요청 1회 (429/503 등 일시 오류는 지수 백오프로 재시도)"""
+        window = window or _RequestWindow(1)
+        for attempt in range(MAX_RETRIES + 1):
+            # 다른 요청이 Rate Limit을 받았으면 쿨다운이 끝날 때까지 새 요청을 보내지 않음
+            wait = self._rate_limited_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            await window.acquire()
+            rate_limited = False
+            try:
+                embeddings = await asyncio.to_thread(self._embed_texts, texts)
+                if len(embeddings) != len(texts):
+                    raise ValueError(f"임베딩 응답 개수 불일치 ({len(embeddings)}/{len(texts)})")
+                return embeddings
+            except Exception as e:
+                rate_limited = _is_rate_limit(e)
+                if not _is_retryable(e) or attempt == MAX_RETRIES:
+                    raise
+                delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) * random.uniform(0.5, 1.0)
+                if _is_rate_limit(e):
+                    self._rate_limited_until = max(self._rate_limited_until, time.monotonic() + delay)
+                print(f"   ⚠️ 임베딩 요청 재시도 ({attempt + 1}/{MAX_RETRIES}) → {delay:.1f}초 후: {e}")
+            finally:
+                await window.release(rate_limited)
+            await asyncio.sleep(delay)
+
     async def create_embedding(self, text: str) -> List[float]:
         """단일 텍스트의 임베딩 생성"""
         try:
-            result = await asyncio.to_thread(
-                genai.embed_content,
-                model=self.embedding_model,
-                content=text,
-                task_type="retrieval_document"
-            )
-            return result['embedding']
+            embeddings = await self._embed_request([text])
+            return embeddings[0]
         except Exception as e:
             print(f"❌ 임베딩 생성 오류: {e}")
             raise
-    
+
     async def create_embeddings_batch(
         self,
         texts: List[str],
-        batch_size: int = 10
+        batch_size: int = MAX_TEXTS_PER_REQUEST,
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS
     ) -> List[List[float]]:
         """
-        여러 텍스트의 임베딩을 병렬로 생성 (Gemini)
-        
+        여러 텍스트의 임베딩 생성 (Gemini 배치 임베딩)
+
+        batch_size개씩 한 요청으로 보내고, 요청은 최대 max_concurrency개까지
+        슬라이딩 윈도우로 진행합니다 (한 요청이 끝나면 바로 다음 요청 시작,
+        429를 받으면 윈도우 축소).
+        입력 오류(400)로 실패한 요청은 반으로 나눠 실패 텍스트만 격리하고,
+        실패가 남으면 0 벡터로 채우지 않고 EmbeddingBatchError를 발생시킵니다.
+        그 밖의 오류(인증 / 권한 / 모델, 재시도 초과)는 요청을 나눠도 같으므로
+        남은 요청을 취소하고 바로 발생시킵니다.
+
         Args:
             texts: 텍스트 리스트
-            batch_size: 병렬 처리 개수
-        
+            batch_size: 요청 1회당 텍스트 수 (최대 100)
+            max_concurrency: 동시 요청 수
+
         Returns:
-            임베딩 벡터 리스트
+            임베딩 벡터 리스트 (texts 순서)
         """
+        batch_size = max(1, min(batch_size, MAX_TEXTS_PER_REQUEST))
+        total = len(texts)
+        total_requests = (total + batch_size - 1) // batch_size
+
         print(f"\n⚡ Gemini 임베딩 생성 시작...")
-        print(f"   총 {len(texts)}개 청크")
-        print(f"   병렬 처리: {batch_size}개씩\n")
-        
-        embeddings = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (len(texts) + batch_size - 1) // batch_size
-            
-            print(f"   🔄 배치 {batch_num}/{total_batches} 병렬 처리 중...")
-            
+        print(f"   총 {total}개 청크")
+        print(f"   요청 {total_requests}회 ({batch_size}개씩), 동시 {max_concurrency}개\n")
+
+        started = time.time()
+        results: List[Optional[List[float]]] = [None] * total
+        failed: Dict[int, str] = {}
+        window = _RequestWindow(max_concurrency)
+        done = 0
+
+        async def embed_span(offset: int, span: List[str]):
+            nonlocal done
             try:
-                # 병렬 처리
-                tasks = [self.create_embedding(text) for text in batch]
-                batch_embeddings = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # 예외 처리
-                for idx, emb in enumerate(batch_embeddings):
-                    if isinstance(emb, Exception):
-                        print(f"   ⚠️ 청크 {i+idx+1} 실패, 재시도 중...")
-                        try:
-                            emb = await self.create_embedding(batch[idx])
-                            embeddings.append(emb)
-                        except:
-                            embeddings.append([0.0] * self.embedding_dimension)
-                    else:
-                        embeddings.append(emb)
-                
-                print(f"   ✅ 배치 {batch_num} 완료 ({len(batch)}개)")
-                
+                embeddings = await self._embed_request(span, window)
             except Exception as e:
-                print(f"   ❌ 배치 {batch_num} 전체 실패: {e}")
-                # 개별 처리
-                for text in batch:
-                    try:
-                        emb = await self.create_embedding(text)
-                        embeddings.append(emb)
-                    except:
-                        embeddings.append([0.0] * self.embedding_dimension)
-        
-        print(f"\n✅ 임베딩 생성 완료: {len(embeddings)}개\n")
-        return embeddings
+                error = e
+            else:
+                results[offset:offset + len(span)] = embeddings
+                done += len(span)
+                print(f"   ✅ {done}/{total} ({done / total * 100:.0f}%)")
+                return
+
+            if not _is_invalid_input(error):
+                print(f"   ❌ 청크 {offset + 1}~{offset + len(span)} 임베딩 실패 (중단): {error}")
+                raise error
+            # 입력 오류 → 반으로 나눠 문제 텍스트만 실패 처리
+            if len(span) > 1:
+                mid = len(span) // 2
+                await asyncio.gather(
+                    embed_span(offset, span[:mid]),
+                    embed_span(offset + mid, span[mid:])
+                )
+                return
+            failed[offset] = str(error)
+            print(f"   ❌ 청크 {offset + 1} 임베딩 실패: {error}")
+
+        tasks = [
+            asyncio.create_task(embed_span(i, texts[i:i + batch_size])) for i in range(0, total, batch_size)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        if failed:
+            raise EmbeddingBatchError(failed, total)
+
+        print(f"\n✅ 임베딩 생성 완료: {total}개 ({time.time() - started:.2f}초)\n")
+        return results
 
 
 # 전역 인스턴스
@@ -1,21 +1,33 @@
 """
 Gemini PDF 파싱 서비스 (5페이지씩 병렬 처리)
 저렴하고 빠른 PDF → Markdown 변환
+
+- 페이지 분할은 메모리 버퍼에서 (임시 파일 없음, 워커 스레드에서 실행)
+- 원본은 바이트 또는 파일 경로 (경로면 파일 핸들로 필요한 페이지만 읽음)
+- 작은 조각은 요청에 직접 포함(inline), 큰 조각만 File API 업로드 (워커 스레드)
+- 최대 10개 조각을 슬라이딩 윈도우로 처리 (배치 단위 대기 없음)
+- iter_pdf_slices()로 완료된 조각부터 페이지 순서대로 받아 청킹/임베딩을 바로 시작할 수 있음
 """
 import google.generativeai as genai
 from config import settings
 from config.logging_config import setup_logger
 import asyncio
-from typing import Optional, List
-import tempfile
+import io
+from typing import AsyncIterator, Dict, Optional, List, Union
 import os
 import time
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from utils.token_logger import log_token_usage
+from .repetition_filter import remove_repetitions
 
 logger = setup_logger('gemini_pdf')
 
+# 동시에 파싱하는 조각 수 (슬라이딩 윈도우)
+MAX_CONCURRENT_SLICES = 10
+# 이 크기 이하 조각은 업로드 없이 요청에 직접 포함 (Gemini inline 요청 한도 20MB 대비 여유)
+INLINE_MAX_BYTES = 15 * 1024 * 1024
+
 
 class GeminiPDFService:
     """Gemini를 사용한 PDF 파싱 (5페이지씩 병렬 처리)"""
@@ -37,18 +49,10 @@ class GeminiPDFService:
         Returns:
             반복 제거된 텍스트
         """
-        if len(text) < min_length * 3:
-            return text
-        
-        # 긴 반복 패턴 찾기 (100자 이상)
-        import re
-        
-        # 같은 문장/표가 연속으로 3번 이상 반복되는 패턴 제거
-        # 예: "AAA" → "A"
-        pattern = r'(.{' + str(min_length) + r',}?)(\1{2,})'
-        
         original_len = len(text)
-        text = re.sub(pattern, r'\1', text, flags=re.DOTALL)
+        # 같은 문장/표가 연속으로 3번 이상 반복되는 패턴 제거 (예: "AAA" → "A")
+        # 기존 정규식 (.{100,}?)(\1{2,})와 같은 결과, 선형에 가까운 시간
+        text = remove_repetitions(text, min_length)
         
         if len(text) < original_len:
             logger.info(f"   🔧 반복 패턴 제거: {original_len:,}자 → {len(text):,}자")
@@ -72,22 +76,29 @@ class GeminiPDFService:
             end_page: 끝 페이지
 
         Returns:
-            (chunk_id, markdown_text, usage_metadata)
+            (chunk_id, markdown_text, usage_metadata, error)
+            - 실패하면 ("", None, 오류 메시지) - 재시도 초과(429/503) 포함,
+              내용이 없는 정상 페이지("", usage, None)와 구분됨
         """
         try:
-            # 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(pdf_bytes)
-                tmp_path = tmp_file.name
-
-            try:
-                # PDF 파일 업로드
+            uploaded_file = None
+            if len(pdf_bytes) <= INLINE_MAX_BYTES:
+                # 요청에 PDF 바이트를 직접 포함 (업로드 왕복 없음)
+                pdf_part = {"mime_type": "application/pdf", "data": pdf_bytes}
+            else:
+                # 큰 조각만 File API 업로드 (메모리 버퍼, 워커 스레드)
                 logger.info(f"   📤 청크 {chunk_id} 업로드 시작...")
                 upload_start = time.time()
-                uploaded_file = genai.upload_file(tmp_path)
+                uploaded_file = await asyncio.to_thread(
+                    genai.upload_file,
+                    io.BytesIO(pdf_bytes),
+                    mime_type="application/pdf"
+                )
+                pdf_part = uploaded_file
                 upload_time = time.time() - upload_start
                 logger.info(f"   ✅ 청크 {chunk_id} 업로드 완료 ({upload_time:.2f}초)")
-                
+
+            try:
                 # Markdown 변환 프롬프트
                 prompt = """이 PDF 문서를 Markdown 형식으로 정확하게 변환해주세요.
 
@@ -113,7 +124,7 @@ class GeminiPDFService:
                     try:
                         response = await asyncio.to_thread(
                             self.model.generate_content,
-                            [uploaded_file, prompt]
+                            [pdf_part, prompt]
                         )
                         break  # 성공하면 루프 탈출
                     except Exception as e:
@@ -169,22 +180,126 @@ class GeminiPDFService:
                 # 반복 패턴 제거 (같은 텍스트가 3번 이상 반복되면 제거)
                 markdown = self._remove_repetitions(markdown)
                 
-                # 업로드된 파일 삭제
-                try:
-                    genai.delete_file(uploaded_file.name)
-                except:
-                    pass
-                
                 logger.info(f"   ✅ 청크 {chunk_id} 완료 (페이지 {start_page}-{end_page}, {len(markdown)}자)")
-                return (chunk_id, markdown, usage_metadata)
+                return (chunk_id, markdown, usage_metadata, None)
 
             finally:
-                # 임시 파일 삭제
-                os.unlink(tmp_path)
+                # 업로드된 파일 삭제
+                if uploaded_file is not None:
+                    try:
+                        await asyncio.to_thread(genai.delete_file, uploaded_file.name)
+                    except Exception:
+                        pass
 
         except Exception as e:
             logger.error(f"   ❌ 청크 {chunk_id} 실패: {e}")
-            return (chunk_id, "", None)
+            return (chunk_id, "", None, str(e) or type(e).__name__)
+
+    @staticmethod
+    def _write_slice(reader, start: int, end: int) -> bytes:
+        """페이지 범위를 새 PDF 바이트로 (메모리 버퍼, 동기)"""
+        from pypdf import PdfWriter
+
+        writer = PdfWriter()
+        for page_num in range(start, end + 1):
+            writer.add_page(reader.pages[page_num])
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    async def iter_pdf_slices(
+        self,
+        source: Union[bytes, str],
+        filename: str,
+        max_pages: Optional[int] = None,
+        pages_per_chunk: int = 5,
+        max_concurrent: int = MAX_CONCURRENT_SLICES,
+        parsed: Optional[Dict[int, dict]] = None
+    ) -> AsyncIterator[dict]:
+        """
+        PDF를 페이지 조각으로 나눠 파싱하고, 완료된 조각을 페이지 순서대로 반환
+
+        조각 분할(워커 스레드)과 파싱은 겹쳐서 진행되며, 파싱은 최대 max_concurrent개를
+        슬라이딩 윈도우로 처리합니다. 앞 조각이 끝나는 대로 바로 yield하므로
+        호출 측은 나머지 조각이 파싱되는 동안 청킹/임베딩을 시작할 수 있습니다.
+
+        parsed(chunkId → 조각)에 있는 조각은 Gemini를 다시 호출하지 않고 그대로 반환합니다.
+        (업로드 작업 재개용, 같은 pages_per_chunk로 만든 조각이어야 함)
+
+        source가 파일 경로면 PdfReader에 파일 핸들을 넘겨 조각마다 필요한 부분만 읽으므로
+        PDF 전체를 메모리에 올리지 않습니다. (PdfReader(경로)는 파일 전체를 읽어 들임)
+
+        Yields:
+            {'chunkId', 'startPage', 'endPage', 'totalPages', 'totalSlices', 'markdown', 'usage', 'error'}
+            (파싱에 실패한 조각은 markdown이 ""이고 error에 오류 메시지, 성공하면 error는 None)
+        """
+        from pypdf import PdfReader
+
+        logger.info(f"🚀 Gemini PDF 파싱 시작: {filename}")
+        if isinstance(source, str):
+            size = os.path.getsize(source)
+            stream = open(source, 'rb')
+        else:
+            size = len(source)
+            stream = io.BytesIO(source)
+        logger.info(f"📦 파일 크기: {size / 1024 / 1024:.2f}MB")
+
+        try:
+            reader = await asyncio.to_thread(PdfReader, stream)
+        except BaseException:
+            stream.close()
+            raise
+        total_pages = len(reader.pages)
+
+        # 테스트 모드
+        if max_pages and max_pages < total_pages:
+            total_pages = max_pages
+            logger.info(f"⚠️  테스트 모드: {max_pages}페이지만 처리")
+
+        ranges = [
+            (i // pages_per_chunk + 1, i, min(i + pages_per_chunk - 1, total_pages - 1))
+            for i in range(0, total_pages, pages_per_chunk)
+        ]
+        logger.info(f"📄 총 {total_pages}페이지 → {pages_per_chunk}페이지씩 {len(ranges)}개 청크 (동시 {max_concurrent}개)")
+
+        semaphore = asyncio.Semaphore(max_concurrent)
+        split_lock = asyncio.Lock()  # PdfReader는 스레드 안전하지 않으므로 분할은 한 번에 하나씩
+
+        async def parse_slice(chunk_id: int, start: int, end: int) -> tuple:
+            async with semaphore:
+                async with split_lock:
+                    slice_bytes = await asyncio.to_thread(self._write_slice, reader, start, end)
+                return await self._parse_pdf_chunk(slice_bytes, chunk_id, start + 1, end + 1)
+
+        parsed = parsed or {}
+        if parsed:
+            logger.info(f"♻️  파싱 완료된 조각 {len(parsed)}개 재사용")
+        tasks = [
+            None if r[0] in parsed else asyncio.create_task(parse_slice(*r))
+            for r in ranges
+        ]
+        try:
+            for task, (chunk_id, start, end) in zip(tasks, ranges):
+                if task is None:
+                    yield parsed[chunk_id]
+                    continue
+                _, markdown, usage, error = await task
+                yield {
+                    'chunkId': chunk_id,
+                    'startPage': start + 1,
+                    'endPage': end + 1,
+                    'totalPages': total_pages,
+                    'totalSlices': len(ranges),
+                    'markdown': markdown,
+                    'usage': usage,
+                    'error': error,
+                }
+        finally:
+            # 호출 측이 중간에 중단하면 남은 파싱 취소
+            for task in tasks:
+                if task is not None:
+                    task.cancel()
+            stream.close()
 
     async def parse_pdf(
         self,
@@ -208,137 +323,85 @@ class GeminiPDFService:
                 'totalPages': int,
                 'processingTime': float
             }
-        """
-        from pypdf import PdfReader, PdfWriter
 
+        Raises:
+            Exception: 파싱에 실패한 조각이 있으면 (일부 페이지가 빠진 결과를 반환하지 않음)
+        """
         start_time = time.time()
 
-        logger.info(f"🚀 Gemini PDF 파싱 시작: {filename}")
-        logger.info(f"📦 파일 크기: {len(file_bytes) / 1024 / 1024:.2f}MB")
-
         try:
-            # 임시 파일로 저장 (페이지 수 확인용)
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(file_bytes)
-                tmp_path = tmp_file.name
+            slices = [
+                part async for part in self.iter_pdf_slices(file_bytes, filename, max_pages, pages_per_chunk)
+            ]
+        except Exception as e:
+            logger.error(f"❌ Gemini PDF 파싱 오류: {e}")
+            raise Exception(f"PDF 파싱 실패: {str(e)}")
 
-            try:
-                # 페이지 수 확인
-                reader = PdfReader(tmp_path)
-                total_pages = len(reader.pages)
-
-                # 테스트 모드
-                if max_pages and max_pages < total_pages:
-                    total_pages = max_pages
-                    logger.info(f"⚠️  테스트 모드: {max_pages}페이지만 처리")
-
-                logger.info(f"📄 총 {total_pages}페이지 → {pages_per_chunk}페이지씩 병렬 처리")
-
-                # 페이지 청크로 분할
-                chunks: List[tuple] = []
-                for i in range(0, total_pages, pages_per_chunk):
-                    start = i
-                    end = min(i + pages_per_chunk - 1, total_pages - 1)
-                    chunk_id = i // pages_per_chunk + 1
-                    
-                    # 청크용 PDF 생성
-                    writer = PdfWriter()
-                    for page_num in range(start, end + 1):
-                        writer.add_page(reader.pages[page_num])
-                    
-                    # 바이트로 변환
-                    chunk_tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-                    writer.write(chunk_tmp)
-                    chunk_tmp.close()
-                    
-                    with open(chunk_tmp.name, 'rb') as f:
-                        chunk_bytes = f.read()
-                    
-                    os.unlink(chunk_tmp.name)
-                    
-                    chunks.append((chunk_bytes, chunk_id, start + 1, end + 1))
+        failed = [part for part in slices if part.get('error')]
+        if failed:
+            pages = ", ".join(f"{part['startPage']}-{part['endPage']}" for part in failed)
+            raise Exception(f"PDF 파싱 실패: {len(failed)}개 조각 (페이지 {pages}): {failed[0]['error']}")
 
-                logger.info(f"⚡ {len(chunks)}개 청크 병렬 처리 시작...")
+        result = self.summarize_slices(slices, filename)
+        result['processingTime'] = time.time() - start_time
+        logger.info(f"⏱️  처리 시간: {result['processingTime']:.2f}초 ({len(slices)}개 청크 병렬)")
+        return result
 
-                # 병렬 처리 (최대 10개씩 배치)
-                max_concurrent = 10
-                all_results = []
-                
-                for batch_start in range(0, len(chunks), max_concurrent):
-                    batch = chunks[batch_start:batch_start + max_concurrent]
-                    batch_num = batch_start // max_concurrent + 1
-                    total_batches = (len(chunks) + max_concurrent - 1) // max_concurrent
-                    
-                    logger.info(f"   🔄 배치 {batch_num}/{total_batches} 처리 중 ({len(batch)}개 청크)...")
-                    
-                    tasks = [
-                        self._parse_pdf_chunk(chunk_bytes, chunk_id, start, end)
-                        for chunk_bytes, chunk_id, start, end in batch
-                    ]
-                    
-                    batch_results = await asyncio.gather(*tasks)
-                    all_results.extend(batch_results)
-
-                # 결과 정렬 및 병합
-                all_results.sort(key=lambda x: x[0])  # chunk_id로 정렬
-                markdown = "\n\n".join([text for _, text, _ in all_results if text])
-                
-                # 토큰 사용량 집계
-                total_prompt_tokens = 0
-                total_candidates_tokens = 0
-                total_tokens = 0
-                
-                for _, _, usage in all_results:
-                    if usage:
-                        total_prompt_tokens += usage.get('prompt_tokens', 0)
-                        total_candidates_tokens += usage.get('candidates_tokens', 0)
-                        total_tokens += usage.get('total_tokens', 0)
-
-            finally:
-                # 임시 파일 삭제
-                os.unlink(tmp_path)
-
-            processing_time = time.time() - start_time
-
-            logger.info(f"✅ 파싱 완료!")
-            logger.info(f"📝 결과 크기: {len(markdown) / 1024:.2f}KB")
-            logger.info(f"⏱️  처리 시간: {processing_time:.2f}초 ({len(chunks)}개 청크 병렬)")
-            
-            # 총 토큰 사용량 출력
-            if total_tokens > 0:
-                print(f"\n{'=' * 60}")
-                print(f"💰 총 토큰 사용량 (PDF 파싱)")
-                print(f"   입력 토큰: {total_prompt_tokens:,}")
-                print(f"   출력 토큰: {total_candidates_tokens:,}")
-                print(f"   총 토큰: {total_tokens:,}")
-                print(f"{'=' * 60}\n")
-                
-                logger.info(f"💰 총 토큰 사용량 - 입력: {total_prompt_tokens:,}, 출력: {total_candidates_tokens:,}, 총합: {total_tokens:,}")
-                
-                # CSV에 총합 기록
-                log_token_usage(
-                    operation="PDF파싱_총합",
-                    prompt_tokens=total_prompt_tokens,
-                    output_tokens=total_candidates_tokens,
-                    total_tokens=total_tokens,
-                    model="gemini-2.5-flash-lite",
-                    details=f"{filename} ({total_pages}페이지, {len(chunks)}청크)"
-                )
+    def summarize_slices(self, slices: List[dict], filename: str) -> dict:
+        """
+        조각 결과 병합 + 토큰 사용량 집계/기록
 
-            return {
-                'markdown': markdown,
-                'totalPages': total_pages,
-                'processingTime': processing_time,
-                'tokenUsage': {
-                    'promptTokens': total_prompt_tokens,
-                    'candidatesTokens': total_candidates_tokens,
-                    'totalTokens': total_tokens
-                }
+        Returns:
+            {'markdown', 'totalPages', 'tokenUsage'}
+        """
+        markdown = "\n\n".join(part['markdown'] for part in slices if part['markdown'])
+        total_pages = slices[0]['totalPages'] if slices else 0
+
+        # 토큰 사용량 집계
+        total_prompt_tokens = 0
+        total_candidates_tokens = 0
+        total_tokens = 0
+
+        for part in slices:
+            usage = part['usage']
+            if usage:
+                total_prompt_tokens += usage.get('prompt_tokens', 0)
+                total_candidates_tokens += usage.get('candidates_tokens', 0)
+                total_tokens += usage.get('total_tokens', 0)
+
+        logger.info(f"✅ 파싱 완료!")
+        logger.info(f"📝 결과 크기: {len(markdown) / 1024:.2f}KB")
+
+        # 총 토큰 사용량 출력
+        if total_tokens > 0:
+            print(f"\n{'=' * 60}")
+            print(f"💰 총 토큰 사용량 (PDF 파싱)")
+            print(f"   입력 토큰: {total_prompt_tokens:,}")
+            print(f"   출력 토큰: {total_candidates_tokens:,}")
+            print(f"   총 토큰: {total_tokens:,}")
+            print(f"{'=' * 60}\n")
+
+            logger.info(f"💰 총 토큰 사용량 - 입력: {total_prompt_tokens:,}, 출력: {total_candidates_tokens:,}, 총합: {total_tokens:,}")
+
+            # CSV에 총합 기록
+            log_token_usage(
+                operation="PDF파싱_총합",
+                prompt_tokens=total_prompt_tokens,
+                output_tokens=total_candidates_tokens,
+                total_tokens=total_tokens,
+                model="gemini-2.5-flash-lite",
+                details=f"{filename} ({total_pages}페이지, {len(slices)}청크)"
+            )
+
+        return {
+            'markdown': markdown,
+            'totalPages': total_pages,
+            'tokenUsage': {
+                'promptTokens': total_prompt_tokens,
+                'candidatesTokens': total_candidates_tokens,
+                'totalTokens': total_tokens
             }
-
-        except Exception as e:
-            logger.error(f"❌ Gemini PDF 파싱 오류: {e}")
-            raise Exception(f"PDF 파싱 실패: {str(e)}")
+        }
 
 
 # 전역 인스턴스
@@ -0,0 +1,214 @@
+"""
+해시태그 역색인 (documents_metadata)
+
+UniversityAgent가 에이전트 실행마다 documents_metadata 전체 행을 훑으며
+#{대학명} / 연도 / 전형 / 문서 성격 태그를 비교하던 것을
+해시태그 → 문서(file_name) posting list 교집합으로 바꿉니다.
+
+- 인덱스는 프로세스당 1개 (모든 대학 에이전트가 공유)
+- 원본은 문서 캐시의 "metadata" 항목 (캐시 값이 바뀌면 = 다른 워커의 변경이면 다시 빌드)
+- 업로드 / 해시태그 수정 / 삭제는 upsert() / update() / remove()로 증분 반영 후
+  반영된 테이블을 이 워커의 "metadata" 캐시 값으로 교체 (재빌드 없음)
+  다른 워커에는 공유 캐시 무효화만 알려 다음 조회 때 DB에서 최신 테이블을 읽도록 함
+  (이 워커의 사본을 공유 캐시에 쓰면 오래된 사본이 다른 워커의 변경을 덮어씀)
+"""
+
+import asyncio
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from utils.document_cache import cache_get_or_load, cache_replace_local
+
+# 점수: 대학 태그 일치 기본 점수 + 추가 태그 1개당 점수
+BASE_SCORE = 10
+OPTIONAL_TAG_SCORE = 5
+
+_YEAR_PATTERN = re.compile(r'(2024|2025|2026|2027|2028)')
+
+
+async def get_documents_metadata() -> List[Dict[str, Any]]:
+    """documents_metadata 전체 행 (문서 캐시 "metadata" 항목, 없으면 DB 조회)"""
+    async def load_metadata():
+        from services.supabase_client import SupabaseService  # supabase_client → hashtag_index 순환 import 방지
+        client = SupabaseService.get_client()
+        response = await asyncio.to_thread(
+            client.table('documents_metadata').select('*').execute
+        )
+        return response.data
+
+    return await cache_get_or_load("metadata", load_metadata, table="documents_metadata")
+
+
+def extract_query_tags(query: str) -> List[str]:
+    """질문에서 추가 해시태그 추출 (연도, 전형, 문서 성격)"""
+    tags = []
+    year_match = _YEAR_PATTERN.search(query)
+    if year_match:
+        tags.append(f"#{year_match.group()}")
+
+    if '수시' in query:
+        tags.append('#수시')
+    if '정시' in query:
+        tags.append('#정시')
+    if any(word in query for word in ['요강', '모집']):
+        tags.append('#모집요강')
+    if any(word in query for word in ['입결', '경쟁률', '커트']):
+        tags.append('#입결통계')
+    return tags
+
+
+class HashtagIndex:
+    """해시태그 → 문서 역색인"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, Any]] = {}      # file_name → 행
+        self._order: Dict[str, int] = {}                # file_name → 테이블 순서 (동점 정렬용)
+        self._postings: Dict[str, Set[str]] = {}        # 해시태그 → file_name 집합
+        self._source: Optional[list] = None             # 인덱스를 만든 캐시 값 (동일 객체면 재빌드 안 함)
+        self._next_order = 0
+        self._builds = 0
+
+    # ------------------------------------------------------------
+    # 빌드
+    # ------------------------------------------------------------
+
+    async def ensure_loaded(self):
+        """캐시(없으면 DB)의 documents_metadata로 인덱스 준비"""
+        rows = await get_documents_metadata()
+        if rows is not self._source:
+            self._build(rows or [])
+            self._source = rows
+
+    def _build(self, rows: List[Dict[str, Any]]):
+        """전체 재빌드"""
+        docs, order, postings = {}, {}, {}
+        for idx, row in enumerate(rows):
+            file_name = row.get('file_name')
+            if not file_name:
+                continue
+            docs[file_name] = row
+            order[file_name] = idx
+            for tag in row.get('hashtags') or []:
+                postings.setdefault(tag, set()).add(file_name)
+
+        with self._lock:
+            self._docs, self._order, self._postings = docs, order, postings
+            self._next_order = len(rows)
+            self._builds += 1
+
+    # ------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------
+
+    def search(self, required_tag: str, optional_tags: List[str]) -> List[Dict[str, Any]]:
+        """
+        필수 태그가 있는 문서를 추가 태그 일치 수로 점수화하여 반환
+
+        Returns:
+            점수 내림차순 문서 목록 (동점이면 테이블 순서)
+        """
+        with self._lock:
+            candidates = self._postings.get(required_tag)
+            if not candidates:
+                return []
+
+            scores = dict.fromkeys(candidates, BASE_SCORE)
+            for tag in optional_tags:
+                posting = self._postings.get(tag)
+                if not posting:
+                    continue
+                # 작은 쪽을 순회하는 교집합
+                small, large = (posting, candidates) if len(posting) < len(candidates) else (candidates, posting)
+                for file_name in small:
+                    if file_name in large:
+                        scores[file_name] += OPTIONAL_TAG_SCORE
+
+            ranked: List[Tuple[int, int, str]] = sorted(
+                (-score, self._order[file_name], file_name) for file_name, score in scores.items()
+            )
+            return [self._docs[file_name] for _, _, file_name in ranked]
+
+    # ------------------------------------------------------------
+    # 증분 갱신
+    # ------------------------------------------------------------
+
+    def _unindex(self, file_name: str):
+        """문서의 posting 제거 (lock 보유 상태에서 호출)"""
+        old = self._docs.get(file_name)
+        if old is None:
+            return
+        for tag in old.get('hashtags') or []:
+            posting = self._postings.get(tag)
+            if posting is not None:
+                posting.discard(file_name)
+                if not posting:
+                    del self._postings[tag]
+
+    def _index(self, row: Dict[str, Any]):
+        """문서 posting 추가 (lock 보유 상태에서 호출)"""
+        file_name = row['file_name']
+        self._docs[file_name] = row
+        for tag in row.get('hashtags') or []:
+            self._postings.setdefault(tag, set()).add(file_name)
+
+    def upsert(self, row: Dict[str, Any]):
+        """문서 추가 (업로드)"""
+        if self._source is None:
+            return  # 아직 빌드 전이면 첫 조회 때 DB에서 읽음
+        file_name = row['file_name']
+        with self._lock:
+            self._unindex(file_name)
+            if file_name not in self._order:
+                self._order[file_name] = self._next_order
+                self._next_order += 1
+            self._index(dict(row))
+        self._publish()
+
+    def update(self, file_name: str, **fields):
+        """문서 필드 수정 (제목 / 출처 / 해시태그)"""
+        if self._source is None:
+            return
+        with self._lock:
+            old = self._docs.get(file_name)
+            if old is None:
+                return
+            self._unindex(file_name)
+            self._index({**old, **fields})
+        self._publish()
+
+    def remove(self, file_name: str):
+        """문서 삭제"""
+        if self._source is None:
+            return
+        with self._lock:
+            self._unindex(file_name)
+            self._docs.pop(file_name, None)
+            self._order.pop(file_name, None)
+        self._publish()
+
+    def _publish(self):
+        """
+        증분 반영된 테이블을 이 워커의 "metadata" 캐시 값으로 교체
+
+        _source를 같은 객체로 맞춰 다음 ensure_loaded()가 재빌드하지 않게 하고,
+        다른 워커에는 무효화만 알림 (각자 DB에서 다시 읽어 재빌드)
+        """
+        with self._lock:
+            rows = sorted(self._docs.values(), key=lambda row: self._order[row['file_name']])
+            self._source = rows
+        cache_replace_local("metadata", rows, table="documents_metadata")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """인덱스 통계"""
+        with self._lock:
+            return {
+                'documents': len(self._docs),
+                'tags': len(self._postings),
+                'builds': self._builds,
+            }
+
+
+# 전역 인스턴스
+hashtag_index = HashtagIndex()
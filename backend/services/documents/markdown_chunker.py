@@ -0,0 +1,276 @@
+"""
+Markdown 구조 기반 청킹 (제목 / 표 단위)
+
+Gemini가 만든 Markdown을 RecursiveCharacterTextSplitter(1200/200)로 자르면
+표가 행 중간에서 잘리고, 모든 경계에 200자 중복이 붙어 청크 수와 토큰이 늘어납니다.
+
+이 청커는 줄 단위로 한 번만 훑으면서
+- 제목(#)에서 청크를 나누고 (짧은 절은 다음 절과 합침)
+- 표는 행 단위로만 나누고, 나뉜 조각마다 머리행(+ 구분선)을 다시 붙이고
+- 표 바로 위의 짧은 캡션 문장은 표와 같은 청크에 두고
+- 청크 사이 중복은 두지 않습니다 (청크 크기를 넘는 긴 문단만 문장 경계에서 나눔)
+
+청크마다 제목 경로(예: ["2026학년도 수시", "학생부종합", "지원자격"])를 함께 반환합니다.
+PDF 조각을 순서대로 처리할 때는 앞 조각의 마지막 경로를 section으로 넘기면 이어집니다.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# 이보다 짧은 청크는 제목이 나와도 끊지 않고 다음 절과 합침
+MIN_CHUNK_SIZE = 300
+# 표 캡션으로 보고 표와 함께 두는 문단 최대 길이
+CAPTION_MAX_LENGTH = 200
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_TABLE_RULE = re.compile(r'^\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?$')
+_FENCE = re.compile(r'^(```|~~~)')
+_SENTENCE_END = re.compile(r'(?<=[.!?。])\s+')
+
+# 블록 종류
+_PARAGRAPH = "paragraph"
+_TABLE = "table"
+_HEADING_BLOCK = "heading"
+
+
+@dataclass
+class MarkdownChunk:
+    """청크 텍스트 + 제목 경로"""
+    text: str
+    section: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Block:
+    kind: str
+    lines: List[str]
+    section: List[str]
+    header: List[str] = field(default_factory=list)  # 표: 머리행 + 구분선
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.header + self.lines)
+
+
+def _is_table_row(line: str) -> bool:
+    return line.startswith('|') and line.endswith('|') and len(line) > 1
+
+
+def _blocks(text: str, section: List[str]) -> Tuple[List[_Block], List[str]]:
+    """Markdown → 블록 (문단 / 표 / 제목), 마지막 제목 경로"""
+    blocks: List[_Block] = []
+    path = list(section)
+    paragraph: List[str] = []
+    lines = text.splitlines()
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(_Block(_PARAGRAPH, paragraph[:], list(path)))
+            paragraph.clear()
+
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+
+        if not line:
+            flush_paragraph()
+            i += 1
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            flush_paragraph()
+            level = len(heading.group(1))
+            # 상위 제목이 경로에 없는 경우(### 바로 시작 등)는 있는 깊이까지만 유지
+            path = path[:level - 1] + [heading.group(2).strip('*').strip()]
+            blocks.append(_Block(_HEADING_BLOCK, [line], list(path)))
+            i += 1
+            continue
+
+        if _FENCE.match(line):
+            # 코드 블록은 통째로 한 문단
+            flush_paragraph()
+            fence = line[:3]
+            start = i
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence):
+                i += 1
+            blocks.append(_Block(_PARAGRAPH, [l.rstrip() for l in lines[start:i + 1]], list(path)))
+            i += 1
+            continue
+
+        if _is_table_row(line):
+            flush_paragraph()
+            rows = []
+            while i < len(lines) and _is_table_row(lines[i].strip()):
+                rows.append(lines[i].strip())
+                i += 1
+            if len(rows) >= 2 and _TABLE_RULE.match(rows[1]):
+                blocks.append(_Block(_TABLE, rows[2:], list(path), header=rows[:2]))
+            else:
+                blocks.append(_Block(_TABLE, rows, list(path)))
+            continue
+
+        paragraph.append(line)
+        i += 1
+
+    flush_paragraph()
+    return blocks, path
+
+
+def _common_prefix(paths: List[List[str]]) -> List[str]:
+    prefix = paths[0]
+    for path in paths[1:]:
+        n = 0
+        while n < len(prefix) and n < len(path) and prefix[n] == path[n]:
+            n += 1
+        prefix = prefix[:n]
+    return list(prefix)
+
+
+def _split_long(text: str, chunk_size: int, first_size: int) -> List[str]:
+    """
+    청크 크기를 넘는 문단 → 줄 / 문장 / 글자 경계 순으로 나눔 (중복 없음)
+
+    first_size: 첫 조각 최대 길이 (앞 청크의 남은 자리, 보통 바로 위 제목과 같은 청크)
+    """
+    # (조각, 앞 조각과 이을 때 쓰는 구분자)
+    pieces: List[Tuple[str, str]] = []
+    for line in text.split("\n"):
+        if len(line) <= chunk_size:
+            pieces.append((line, "\n"))
+            continue
+        joiner = "\n"
+        for sentence in _SENTENCE_END.split(line):
+            while len(sentence) > chunk_size:
+                pieces.append((sentence[:chunk_size], joiner))
+                sentence, joiner = sentence[chunk_size:], ""
+            if sentence:
+                pieces.append((sentence, joiner))
+            joiner = " "
+
+    parts, current, limit = [], "", first_size
+    for piece, joiner in pieces:
+        if current and len(current) + len(joiner) + len(piece) > limit:
+            parts.append(current)
+            current, limit = piece, chunk_size
+        elif not current and len(piece) > limit:
+            parts.append("")  # 첫 조각이 남은 자리에 안 들어감
+            current, limit = piece, chunk_size
+        else:
+            current = f"{current}{joiner}{piece}" if current else piece
+    if current:
+        parts.append(current)
+    return parts
+
+
+class _Packer:
+    """블록을 청크 크기까지 채워 청크로 만듦"""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.chunks: List[MarkdownChunk] = []
+        self.parts: List[str] = []
+        self.paths: List[List[str]] = []
+        self.size = 0
+
+    def add(self, text: str, section: List[str]):
+        self.size += len(text) + (2 if self.parts else 0)
+        self.parts.append(text)
+        self.paths.append(section)
+
+    def fits(self, text: str) -> bool:
+        return self.size + len(text) + (2 if self.parts else 0) <= self.chunk_size
+
+    def flush(self):
+        if self.parts:
+            self.chunks.append(MarkdownChunk("\n\n".join(self.parts), _common_prefix(self.paths)))
+        self.parts, self.paths, self.size = [], [], 0
+
+    def pop_caption(self, section: List[str]) -> Optional[str]:
+        """마지막 블록이 같은 절의 짧은 문단이면 꺼냄 (표 캡션으로 옮기기)"""
+        if self.parts and self.paths[-1] == section and len(self.parts[-1]) <= CAPTION_MAX_LENGTH \
+                and not self.parts[-1].startswith(('|', '#')):
+            text = self.parts.pop()
+            self.paths.pop()
+            self.size = sum(len(part) for part in self.parts) + 2 * max(len(self.parts) - 1, 0)
+            return text
+        return None
+
+
+def chunk_markdown(
+    text: str,
+    chunk_size: int = 1200,
+    section: Optional[List[str]] = None
+) -> Tuple[List[MarkdownChunk], List[str]]:
+    """
+    Markdown을 제목 / 표 구조에 맞춰 청킹
+
+    Args:
+        text: Markdown
+        chunk_size: 청크 최대 글자 수 (표 행 하나가 이보다 길면 그 행만 단독 청크)
+        section: 시작 제목 경로 (앞 조각에서 이어질 때)
+
+    Returns:
+        (청크 리스트, 마지막 제목 경로)
+    """
+    blocks, end_section = _blocks(text, section or [])
+    packer = _Packer(chunk_size)
+
+    for block in blocks:
+        if block.kind == _HEADING_BLOCK:
+            # 제목에서 끊기 (너무 짧은 청크는 다음 절과 합침)
+            if packer.size >= MIN_CHUNK_SIZE:
+                packer.flush()
+            packer.add(block.text, block.section)
+            continue
+
+        body = block.text
+        if packer.fits(body):
+            packer.add(body, block.section)
+            continue
+
+        if block.kind == _TABLE and block.lines:
+            # 캡션은 표와 같은 청크로, 표는 행 단위로 나누고 조각마다 머리행 반복
+            def group(rows: List[str]) -> str:
+                return "\n".join(block.header + rows)
+
+            caption = packer.pop_caption(block.section)
+            head = group(block.lines[:1])
+            if packer.parts and not packer.fits(f"{caption}\n\n{head}" if caption else head):
+                packer.flush()
+            if caption:
+                packer.add(caption, block.section)
+            header_size = len(group([]))
+            rows: List[str] = []
+            rows_size = header_size
+            for row in block.lines:
+                if rows and packer.size + (2 if packer.parts else 0) + rows_size + 1 + len(row) > chunk_size:
+                    packer.add(group(rows), block.section)
+                    packer.flush()
+                    rows, rows_size = [], header_size
+                rows.append(row)
+                rows_size += len(row) + (1 if rows_size else 0)
+            packer.add(group(rows), block.section)
+            continue
+
+        if len(body) <= chunk_size:
+            packer.flush()
+            packer.add(body, block.section)
+            continue
+
+        # 긴 문단: 문장 경계에서 나눔 (앞 청크가 제목 정도로 짧으면 첫 조각은 그 남은 자리에)
+        if packer.size >= MIN_CHUNK_SIZE:
+            packer.flush()
+        room = chunk_size - packer.size - 2 if packer.parts else chunk_size
+        for part in _split_long(body, chunk_size, max(room, 0)):
+            if part and packer.fits(part):
+                packer.add(part, block.section)
+                continue
+            packer.flush()
+            if part:
+                packer.add(part, block.section)
+
+    packer.flush()
+    return packer.chunks, end_section
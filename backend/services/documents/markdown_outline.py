@@ -0,0 +1,159 @@
+"""
+문서 분류용 Markdown 개요 (목차 + 표 캡션)
+
+요약 / 출처 / 해시태그 추출에 원문 앞부분 대신 넣을 짧은 개요를 만듭니다.
+- 첫머리: 표지/머리말 (발행기관, 학년도가 주로 여기 있음)
+- 등장 연도 / 대학: 문서 전체에서 모은 목록 (해시태그 누락 방지)
+- 목차: 제목(#), 굵은 글씨 한 줄 제목, 표 캡션 + 머리행 (행 수)
+
+개요가 예산을 넘으면 굵은 글씨 → 표 → 깊은 제목 순으로 덜어냅니다.
+"""
+
+import re
+from typing import List, Tuple
+
+# 첫머리로 넣는 글자 수
+LEAD_LENGTH = 300
+# 개요 한 줄 최대 길이
+LINE_LENGTH = 120
+# 등장 연도 / 대학 최대 개수
+MAX_MENTIONS = 40
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_BOLD_LINE = re.compile(r'^\*\*(.+?)\*\*[:：]?$')
+_TABLE_ROW = re.compile(r'^\s*\|.*\|\s*$')
+_TABLE_RULE = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$')
+_YEAR = re.compile(r'(20[1-4]\d)\s*학년도')
+_UNIVERSITY = re.compile(r'([가-힣]{2,12}(?:대학교|과학기술원))(?!육)')  # "대학교육협의회" 제외
+
+# 수준 (작을수록 중요, 예산 초과 시 큰 수준부터 제외)
+_TABLE_LEVEL = 7
+_BOLD_LEVEL = 8
+
+
+def _clip(line: str, limit: int = LINE_LENGTH) -> str:
+    line = re.sub(r'\s+', ' ', line).strip()
+    return line if len(line) <= limit else line[:limit - 1] + '…'
+
+
+def _cells(row: str) -> List[str]:
+    return [cell.strip() for cell in row.strip().strip('|').split('|')]
+
+
+def _mentions(markdown: str) -> Tuple[List[str], List[str]]:
+    """문서 전체에서 학년도 / 대학명 (등장 순, 중복 제거)"""
+    years = list(dict.fromkeys(_YEAR.findall(markdown)))[:MAX_MENTIONS]
+    universities = list(dict.fromkeys(_UNIVERSITY.findall(markdown)))[:MAX_MENTIONS]
+    return years, universities
+
+
+def _structure(lines: List[str]) -> List[Tuple[int, str]]:
+    """[(수준, 개요 줄)] - 문서 순서"""
+    items: List[Tuple[int, str]] = []
+    seen = set()
+
+    def add(level: int, text: str):
+        key = re.sub(r'\s+', '', text)
+        if key and key not in seen:  # 페이지마다 반복되는 머리글 제외
+            seen.add(key)
+            items.append((level, text))
+
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        heading = _HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            add(level, '  ' * (level - 1) + _clip(f"- {heading.group(2)}"))
+            i += 1
+            continue
+
+        if _TABLE_ROW.match(line):
+            start = i
+            while i < len(lines) and _TABLE_ROW.match(lines[i].strip()):
+                i += 1
+            rows = [row for row in lines[start:i] if not _TABLE_RULE.match(row.strip())]
+            # 캡션: 표 바로 위의 짧은 일반 문장 (제목 줄은 이미 개요에 있음)
+            caption = ""
+            for prev in reversed(lines[max(0, start - 3):start]):
+                prev = prev.strip()
+                if not prev:
+                    continue
+                if not _HEADING.match(prev) and not _TABLE_ROW.match(prev) and len(prev) <= LINE_LENGTH:
+                    caption = prev.strip('*').strip()
+                    # 굵은 글씨 캡션은 표 항목으로 합침
+                    if items and items[-1] == (_BOLD_LEVEL, _clip(f"- {caption}")):
+                        items.pop()
+                break
+            header = " | ".join(cell for cell in _cells(rows[0]) if cell) if rows else ""
+            label = f"{caption} — " if caption else ""
+            add(_TABLE_LEVEL, _clip(f"[표] {label}{header} ({max(len(rows) - 1, 0)}행)"))
+            continue
+
+        bold = _BOLD_LINE.match(line)
+        if bold and len(line) <= LINE_LENGTH:
+            add(_BOLD_LEVEL, _clip(f"- {bold.group(1)}"))
+        i += 1
+    return items
+
+
+def _lead(lines: List[str]) -> str:
+    """표를 뺀 첫머리 LEAD_LENGTH자"""
+    parts, length = [], 0
+    for line in lines:
+        line = line.strip()
+        if not line or _TABLE_ROW.match(line):
+            continue
+        parts.append(line.lstrip('#').strip())
+        length += len(line)
+        if length >= LEAD_LENGTH:
+            break
+    return _clip(" / ".join(parts), LEAD_LENGTH)
+
+
+def build_outline(markdown: str, max_chars: int = 2000) -> str:
+    """
+    분류 프롬프트용 문서 개요
+
+    Args:
+        markdown: 파싱된 전체 Markdown
+        max_chars: 개요 최대 글자 수 (대략)
+
+    Returns:
+        첫머리 + 등장 연도/대학 + 목차 (짧은 문서는 원문 그대로)
+    """
+    if len(markdown) <= max_chars:
+        return markdown
+
+    lines = markdown.splitlines()
+    years, universities = _mentions(markdown)
+
+    header = [f"[첫머리] {_lead(lines)}"]
+    if years:
+        header.append("[등장 학년도] " + ", ".join(years))
+    if universities:
+        header.append("[등장 대학] " + ", ".join(universities))
+
+    items = _structure(lines)
+    budget = max_chars - sum(len(line) + 1 for line in header)
+
+    # 예산 안에 들어갈 때까지 하위 수준부터 제외
+    levels = sorted({level for level, _ in items}, reverse=True)
+    kept = items
+    while len(levels) > 1 and sum(len(text) + 1 for _, text in kept) > budget:
+        dropped = levels.pop(0)
+        kept = [(level, text) for level, text in kept if level < dropped]
+
+    # 최상위 수준만으로도 넘치면 앞에서부터 자름
+    outline = []
+    for _, text in kept:
+        budget -= len(text) + 1
+        if budget < 0:
+            break
+        outline.append(text)
+
+    omitted = len(items) - len(outline)
+    if omitted > 0:
+        outline.append(f"... (목차 {omitted}개 항목 생략)")
+
+    return "\n".join(header + ["[목차]"] + outline)
@@ -0,0 +1,152 @@
+"""
+임베딩 재생성 작업 (EMBEDDING_MODEL / EMBEDDING_DIMENSION 변경 후)
+
+대상 테이블의 텍스트를 현재 설정으로 다시 임베딩해 embedding 컬럼을 갱신합니다.
+- policy_documents: content → embedding (업로드 청크)
+- document_chunks: content → embedding (RAG 검색 청크)
+- documents: summary → embedding_summary (요약 유사도)
+
+id 순서로 페이지 단위 처리하고, 페이지마다 마지막 id를 체크포인트 파일에 저장해
+중단 후 다시 실행하면 이어서 진행합니다 (모델 / 차원이 바뀌면 처음부터).
+임베딩은 EmbeddingService.create_embeddings_batch (배치 + 슬라이딩 윈도우 + 재시도)를 그대로 사용합니다.
+차원만 줄이는 경우는 migrations/11의 절단으로 충분하고, 모델이 바뀐 경우에만 이 작업이 필요합니다.
+
+실행 (backend 디렉토리에서):
+    python -m services.documents.reembed_job policy_documents [--only-missing] [--dry-run]
+    python -m services.documents.reembed_job document_chunks documents --restart
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.documents.embedding_service import embedding_service
+from services.supabase_client import SupabaseService, _vector_literal
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CHECKPOINT_DIR = os.path.join(BACKEND_DIR, "cache", "reembed")
+
+# 테이블 → (텍스트 컬럼, 임베딩 컬럼)
+TARGETS = {
+    "policy_documents": ("content", "embedding"),
+    "document_chunks": ("content", "embedding"),
+    "documents": ("summary", "embedding_summary"),
+}
+
+# 한 번에 조회 / 임베딩하는 행 수 (PostgREST 기본 최대 1000행)
+PAGE_SIZE = 500
+# 동시에 보내는 행 update 수
+UPDATE_CONCURRENCY = 8
+
+
+def _checkpoint_path(table: str) -> str:
+    return os.path.join(CHECKPOINT_DIR, f"{table}.json")
+
+
+def load_checkpoint(table: str) -> Dict[str, Any]:
+    """현재 모델 / 차원의 체크포인트 (없거나 설정이 다르면 빈 상태)"""
+    try:
+        with open(_checkpoint_path(table), encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if checkpoint.get("model") != settings.EMBEDDING_MODEL or checkpoint.get("dimension") != settings.EMBEDDING_DIMENSION:
+        return {}
+    return checkpoint
+
+
+def save_checkpoint(table: str, checkpoint: Dict[str, Any]):
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    path = _checkpoint_path(table)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def _fetch_page(table: str, text_column: str, embedding_column: str, last_id: Optional[Any], only_missing: bool) -> List[Dict]:
+    """last_id 다음부터 PAGE_SIZE행 (id, 텍스트)"""
+    query = SupabaseService.get_client().table(table).select(f"id, {text_column}").order("id").limit(PAGE_SIZE)
+    if last_id is not None:
+        query = query.gt("id", last_id)
+    if only_missing:
+        query = query.is_(embedding_column, "null")
+    return query.execute().data or []
+
+
+async def reembed_table(table: str, only_missing: bool = False, dry_run: bool = False, restart: bool = False) -> int:
+    """
+    테이블 하나 재임베딩
+
+    Args:
+        only_missing: 임베딩이 비어 있는 행만 (migrations/11에서 NULL이 된 행 등)
+        dry_run: 조회만 하고 임베딩 / update는 하지 않음 (대상 행 수 확인)
+        restart: 체크포인트 무시하고 처음부터
+
+    Returns:
+        처리한 행 수
+    """
+    text_column, embedding_column = TARGETS[table]
+    checkpoint = {} if restart or dry_run else load_checkpoint(table)
+    last_id = checkpoint.get("last_id")
+    done = checkpoint.get("done", 0)
+    if last_id is not None:
+        print(f"🔄 {table}: 체크포인트에서 이어서 진행 (id > {last_id}, {done}행 완료)")
+
+    client = SupabaseService.get_client()
+    semaphore = asyncio.Semaphore(UPDATE_CONCURRENCY)
+
+    async def update_row(row_id: Any, embedding: List[float]):
+        async with semaphore:
+            await asyncio.to_thread(
+                client.table(table).update({embedding_column: _vector_literal(embedding)}).eq("id", row_id).execute
+            )
+
+    started = time.time()
+    while True:
+        rows = await asyncio.to_thread(_fetch_page, table, text_column, embedding_column, last_id, only_missing)
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        rows = [row for row in rows if (row.get(text_column) or "").strip()]
+
+        if not dry_run and rows:
+            embeddings = await embedding_service.create_embeddings_batch([row[text_column] for row in rows])
+            await asyncio.gather(*[update_row(row["id"], embedding) for row, embedding in zip(rows, embeddings)])
+        done += len(rows)
+
+        if not dry_run:
+            save_checkpoint(table, {
+                "model": settings.EMBEDDING_MODEL,
+                "dimension": settings.EMBEDDING_DIMENSION,
+                "last_id": last_id,
+                "done": done,
+            })
+        print(f"   {table}: {done}행 ({time.time() - started:.1f}초)")
+
+    action = "대상" if dry_run else "재임베딩 완료"
+    print(f"✅ {table}: {done}행 {action} ({settings.EMBEDDING_MODEL}, {settings.EMBEDDING_DIMENSION}차원)")
+    return done
+
+
+async def run(tables: List[str], only_missing: bool = False, dry_run: bool = False, restart: bool = False) -> Dict[str, int]:
+    """테이블 순서대로 재임베딩 → {테이블: 처리 행 수}"""
+    return {
+        table: await reembed_table(table, only_missing=only_missing, dry_run=dry_run, restart=restart)
+        for table in tables
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="현재 EMBEDDING_MODEL / EMBEDDING_DIMENSION으로 임베딩 재생성")
+    parser.add_argument("tables", nargs="+", choices=sorted(TARGETS), help="대상 테이블")
+    parser.add_argument("--only-missing", action="store_true", help="임베딩이 비어 있는 행만")
+    parser.add_argument("--dry-run", action="store_true", help="대상 행 수만 확인")
+    parser.add_argument("--restart", action="store_true", help="체크포인트 무시하고 처음부터")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.tables, only_missing=args.only_missing, dry_run=args.dry_run, restart=args.restart))
@@ -0,0 +1,210 @@
+"""
+반복 패턴 제거 (Gemini hallucination 방지)
+
+같은 문장/표가 연속으로 3번 이상 반복되면 1번만 남깁니다. (예: "AAA" → "A")
+
+기존 구현은 정규식 (.{100,}?)(\\1{2,}) (DOTALL)을 그대로 돌려서 위치마다 모든 블록 길이를
+시도했기 때문에 반복이 없는 문서에서도 O(n²) 이상이 걸렸습니다. 여기서는 같은 결과를
+O(n log n)에 가까운 시간으로 만듭니다.
+
+1. 후보 주기 찾기: 주기 p로 3번 이상 반복되는 구간 안에서는 p의 배수 위치 중 하나가 반드시
+   "p만큼 뒤와 같은 위치"가 되므로, 주기마다 배수 위치만 비교 (조화급수 → 전체 O(n log n))
+   - 블록에 줄바꿈이 있으면 줄 번호열에서 (줄 k개 주기 → 문자 주기는 줄 시작 위치 차이)
+   - 줄바꿈 없는 반복은 한 줄 안에 있으므로, min_length × 3 이상인 긴 줄만 32자 조각 단위로
+   (블록 안에서 같은 줄이 다시 나와도 놓치지 않음)
+2. 후보 확인: 문자열 비교(C 구현)를 2배씩 늘려 가며 앞뒤로 확장해 주기 구간을 구함
+   이미 확인한 구간 안의 후보는 구간의 기본 주기로 판정해 다시 비교하지 않음
+3. 정규식과 같은 순서로 치환: 가장 앞 위치에서, 가장 짧은 블록, 최대 반복 횟수
+"""
+
+from heapq import heapify, heappop, heappush
+from itertools import compress, islice
+from operator import eq
+from typing import Dict, List, Tuple
+
+# 긴 줄 안에서 위치 단위로 비교하는 조각 길이
+GRAM_LENGTH = 32
+# 문자열 비교를 시작하는 구간 길이 (일치하면 2배씩 늘림)
+_PROBE_SIZE = 64
+
+
+def _forward_match(text: str, x: int, y: int, limit: int) -> int:
+    """text[x:]와 text[y:]의 공통 접두사 길이 (최대 limit)"""
+    matched, step = 0, _PROBE_SIZE
+    while matched < limit:
+        size = min(step, limit - matched)
+        if text[x + matched:x + matched + size] == text[y + matched:y + matched + size]:
+            matched += size
+            step *= 2
+            continue
+        # 불일치가 있는 구간 안에서 이분 탐색 ([matched, matched + lo)까지 일치)
+        lo, hi = 0, size
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if text[x + matched + lo:x + matched + mid] == text[y + matched + lo:y + matched + mid]:
+                lo = mid
+            else:
+                hi = mid
+        return matched + lo
+    return matched
+
+
+def _backward_match(text: str, x: int, y: int, limit: int) -> int:
+    """text[:x]와 text[:y]의 공통 접미사 길이 (최대 limit)"""
+    matched, step = 0, _PROBE_SIZE
+    while matched < limit:
+        size = min(step, limit - matched)
+        if text[x - matched - size:x - matched] == text[y - matched - size:y - matched]:
+            matched += size
+            step *= 2
+            continue
+        lo, hi = 0, size
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if text[x - matched - mid:x - matched - lo] == text[y - matched - mid:y - matched - lo]:
+                lo = mid
+            else:
+                hi = mid
+        return matched + lo
+    return matched
+
+
+def _periodic_hits(anchors: List, period: int) -> List[int]:
+    """
+    이웃한 기준점 값이 같은 위치 (anchors[t] == anchors[t + 1] → t * period)
+
+    anchors는 주기 period 간격으로 뽑은 값이라 한 번의 C 수준 비교로 처리합니다.
+    """
+    return [t * period for t in compress(range(len(anchors) - 1), map(eq, anchors, islice(anchors, 1, None)))]
+
+
+def _line_candidates(lines: List[str], starts: List[int], min_length: int) -> List[Tuple[int, int]]:
+    """
+    줄 단위 후보 (블록 안에 줄바꿈이 있는 반복)
+
+    블록에 줄바꿈이 k개 있으면 반복 구간 안의 줄 번호열은 주기 k로 반복되고,
+    구간 안에서 lines[i] == lines[i + k]인 i가 2k - 1개 이상 연속하므로 k의 배수 위치를
+    반드시 하나 포함합니다. 주기마다 배수 위치만 비교해 전체 O(m log m) (m = 줄 수)
+    """
+    ids: Dict[str, int] = {}
+    keys = [ids.setdefault(line, len(ids)) for line in lines]
+    candidates = []
+    for period in range(1, len(keys) // 2 + 1):
+        for i in _periodic_hits(keys[::period], period):
+            distance = starts[i + period] - starts[i]
+            if distance >= min_length:
+                candidates.append((starts[i], distance))
+    return candidates
+
+
+def _inline_candidates(line: str, offset: int, min_length: int) -> List[Tuple[int, int]]:
+    """
+    긴 줄 안의 위치별 후보 (줄바꿈 없는 반복)
+
+    주기 p 구간 안에서 line[j:j + gram] == line[j + p:j + p + gram]인 j가 p + 1개 이상
+    연속하므로 p의 배수 위치만 비교해도 놓치지 않음 (줄 길이 l에 대해 O(l log l))
+    """
+    gram = min(GRAM_LENGTH, min_length)
+    candidates = []
+    for period in range(min_length, len(line) // 3 + 1):
+        anchors = [line[j:j + gram] for j in range(0, len(line) - gram + 1, period)]
+        candidates.extend((offset + j, period) for j in _periodic_hits(anchors, period))
+    return candidates
+
+
+def _find_candidates(text: str, min_length: int) -> List[Tuple[int, int]]:
+    """후보 (위치, 주기) 목록 - 위치 오름차순"""
+    lines = text.split('\n')
+    starts = []
+    position = 0
+    for line in lines:
+        starts.append(position)
+        position += len(line) + 1
+
+    candidates = _line_candidates(lines, starts, min_length)
+    for line, start in zip(lines, starts):
+        if len(line) >= min_length * 3:
+            candidates.extend(_inline_candidates(line, start, min_length))
+    candidates.sort()
+    return candidates
+
+
+def _find_runs(text: str, min_length: int) -> List[Tuple[int, int, int]]:
+    """
+    3번 이상 반복되는 주기 구간 목록
+
+    Returns:
+        [(시작, 블록 길이, 끝), ...] - text[j] == text[j + 블록 길이] (시작 <= j < 끝 - 블록 길이)
+    """
+    runs = []
+    last_end: Dict[int, int] = {}   # 주기 → 마지막으로 확인한 구간 끝
+    # 처음부터 확인한 반복 구간 (시작, 기본 주기, 끝) - 반복이 많은 문서에서 후보마다 전체를 다시 비교하지 않도록
+    # - 기본 주기의 배수인 후보: 구간 전체가 이미 같은 주기이므로 구간 경계에서만 확장
+    # - 배수가 아닌 후보: 두 주기가 p + d자 이상 겹치면 최대공약수도 주기가 되어 기본 주기 d와 모순 (Fine-Wilf)
+    #   → 구간 안쪽 깊이 있는 후보는 비교 없이 제외
+    covering: List[Tuple[int, int, int]] = []
+    for anchor, period in _find_candidates(text, min_length):
+        if anchor + period < last_end.get(period, -1):
+            continue  # 이미 확인한 구간 안의 후보
+        base, impossible = None, False
+        for base_start, root, base_end in covering:
+            if anchor + period >= base_end:
+                continue
+            if period % root == 0:
+                base = (base_start, root, base_end)
+                break
+            if period * 2 >= root and anchor - base_start >= root - 1 and base_end - anchor >= period + root:
+                impossible = True
+        if base is None and impossible:
+            continue
+        if base is not None:
+            base_start, _, base_end = base
+            backward = _backward_match(text, base_start, base_start + period, base_start)
+            forward = _forward_match(text, base_end - period, base_end, len(text) - base_end)
+            start, end = base_start - backward, base_end + forward
+        else:
+            forward = _forward_match(text, anchor, anchor + period, len(text) - anchor - period)
+            backward = _backward_match(text, anchor, anchor + period, anchor)
+            start, end = anchor - backward, anchor + period + forward
+        last_end[period] = end
+        if end - start >= period * 3:
+            runs.append((start, period, end))
+            if base is None:
+                # 블록의 최소 주기 (블록 길이의 약수) = 구간 전체의 기본 주기
+                block = text[start:start + period]
+                root = (block + block).find(block, 1)
+                covering = [c for c in covering if c[2] > anchor]
+                covering.append((start, root, end))
+    return runs
+
+
+def remove_repetitions(text: str, min_length: int = 100) -> str:
+    """
+    연속으로 3번 이상 반복되는 min_length자 이상 블록을 1번만 남김
+
+    re.sub(r'(.{min_length,}?)(\\1{2,})', r'\\1', text, flags=re.DOTALL)과 같은 결과
+    """
+    if len(text) < min_length * 3:
+        return text
+
+    runs = _find_runs(text, min_length)
+    if not runs:
+        return text
+
+    # 정규식 치환 순서 재현: 현재 위치 이후 가장 앞에서 시작하는 반복, 같으면 가장 짧은 블록
+    heap = list(runs)
+    heapify(heap)
+    parts = []
+    position = 0
+    while heap:
+        start, period, end = heappop(heap)
+        if start < position:
+            # 앞선 치환과 겹친 구간은 남은 부분이 여전히 3번 이상 반복일 때만 다시 후보로
+            if end - position >= period * 3:
+                heappush(heap, (position, period, end))
+            continue
+        copies = (end - start) // period
+        parts.append(text[position:start + period])
+        position = start + copies * period
+    parts.append(text[position:])
+    return ''.join(parts)
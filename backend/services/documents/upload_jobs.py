@@ -0,0 +1,453 @@
+"""
+업로드 작업 큐 (백그라운드 처리 + 단계별 체크포인트)
+
+POST /api/upload는 PDF를 작업 디렉토리로 조각 단위 복사(+ 내용 해시 계산)하고 작업 id만 반환합니다.
+원본은 어느 단계에서도 통째로 메모리에 올리지 않습니다. (파싱은 파일 핸들, Storage는 스트리밍 업로드)
+실제 처리(파싱 → 요약/해시태그 → 임베딩 → 저장)는 워커 풀(UPLOAD_JOB_WORKERS개)이
+백그라운드로 진행하므로 프록시 타임아웃과 무관합니다.
+
+작업 디렉토리 (UPLOAD_JOB_DIR/<job_id>/):
+- job.json          상태 / 단계 / 진행률 / 결과 (SSE 진행 스트림이 읽음)
+- source.pdf        업로드 원본 (완료 시 삭제)
+- storage.json      Storage 업로드 결과
+- slices/NNNN.json  파싱 완료된 페이지 조각
+- chunks/NNNN.json  조각별 청크 + 제목 경로, embeddings/NNNN.f32 조각별 임베딩 (float32)
+- analysis.json     요약 / 출처 / 해시태그 / 전형결과 행
+- inserted.json     메타데이터 저장 여부, 저장 완료된 청크 배치 번호
+
+작업 파일 읽기/쓰기는 모두 동기 함수이므로 이벤트 루프에서는 asyncio.to_thread로 호출합니다.
+끝난 작업(완료 / 실패) 디렉토리는 UPLOAD_JOB_RETENTION_HOURS가 지나면 정리합니다.
+
+실패한 작업은 UPLOAD_JOB_MAX_ATTEMPTS회까지 자동 재시도하고, 서버가 재시작되면
+끝나지 않은 작업을 다시 큐에 넣습니다. 어느 경우든 체크포인트가 있는 단계는 건너뛰므로
+이미 끝난 Gemini 파싱/임베딩을 다시 하지 않습니다.
+
+여러 uvicorn 워커가 같은 디렉토리를 보더라도 작업마다 파일 잠금(flock)을 잡은
+프로세스 하나만 처리합니다.
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from array import array
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from config import settings
+from utils.content_cache import ContentHasher
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_JOB_DIR = os.path.join(BACKEND_DIR, "upload_jobs")
+
+# 작업 상태
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+FINISHED_STATUSES = (COMPLETED, FAILED)
+
+# 자동 재시도 간격 (초, 시도 횟수만큼 곱함)
+RETRY_DELAY = 5.0
+# 원본 복사 / 해시 단위 (바이트)
+COPY_CHUNK_SIZE = 1024 * 1024
+# 끝난 작업 정리 주기 (초)
+PRUNE_INTERVAL = 3600.0
+
+
+class UploadTooLargeError(ValueError):
+    """업로드 파일이 최대 크기를 넘음 (복사 도중 중단)"""
+
+
+class UploadJobStore:
+    """작업 상태 / 체크포인트 파일 저장소"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.UPLOAD_JOB_DIR or DEFAULT_JOB_DIR
+        self._update_lock = threading.Lock()  # job.json 읽기-수정-쓰기 (워커 스레드 간)
+
+    def path(self, job_id: str, *parts: str) -> str:
+        return os.path.join(self.root, job_id, *parts)
+
+    # ----- JSON 파일 -----
+
+    def _write_json(self, path: str, data: Any):
+        """임시 파일에 쓰고 교체 (읽는 쪽이 쓰다 만 파일을 보지 않도록)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: str) -> Optional[Any]:
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_checkpoint(self, job_id: str, name: str, data: Any):
+        self._write_json(self.path(job_id, name), data)
+
+    def load_checkpoint(self, job_id: str, name: str) -> Optional[Any]:
+        return self._read_json(self.path(job_id, name))
+
+    # ----- 작업 -----
+
+    def create(self, file_name: str, title: str, source: BinaryIO, max_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        새 작업 생성 (원본 PDF를 COPY_CHUNK_SIZE 단위로 복사하면서 내용 해시 계산, 동기)
+
+        Raises:
+            UploadTooLargeError: max_size를 넘으면 (작업 디렉토리는 지움)
+        """
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.path(job_id), exist_ok=True)
+        hasher = ContentHasher()
+        tmp_path = self.path(job_id, "source.pdf.part")
+        try:
+            with open(tmp_path, 'wb') as f:
+                while True:
+                    chunk = source.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    if max_size is not None and hasher.size > max_size:
+                        raise UploadTooLargeError(f"{max_size} 바이트 초과")
+                    f.write(chunk)
+            os.replace(tmp_path, self.source_path(job_id))
+        except BaseException:
+            shutil.rmtree(self.path(job_id), ignore_errors=True)
+            raise
+
+        now = datetime.now().isoformat()
+        job = {
+            "id": job_id,
+            "fileName": file_name,
+            "title": title,
+            "size": hasher.size,
+            "sha256": hasher.hexdigest(),
+            "status": QUEUED,
+            "stage": "queued",
+            "message": "대기 중",
+            "progress": {},
+            "attempts": 0,
+            "error": None,
+            "result": None,
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        self._write_json(self.path(job_id, "job.json"), job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not job_id or os.path.sep in job_id or job_id.startswith('.'):
+            return None
+        return self._read_json(self.path(job_id, "job.json"))
+
+    def update(self, job_id: str, **fields) -> Dict[str, Any]:
+        """작업 상태 갱신 (progress는 기존 값에 병합)"""
+        with self._update_lock:
+            job = self.get(job_id) or {"id": job_id}
+            progress = fields.pop("progress", None)
+            if progress:
+                job["progress"] = {**(job.get("progress") or {}), **progress}
+            job.update(fields)
+            job["updatedAt"] = datetime.now().isoformat()
+            self._write_json(self.path(job_id, "job.json"), job)
+            return job
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """최근 작업 목록 (생성 시각 역순)"""
+        if not os.path.isdir(self.root):
+            return []
+        jobs = [self.get(name) for name in os.listdir(self.root)]
+        jobs = [job for job in jobs if job]
+        jobs.sort(key=lambda job: job.get("createdAt") or "", reverse=True)
+        return jobs[:limit]
+
+    def prune(self, max_age_hours: float) -> int:
+        """
+        끝난 지 max_age_hours가 지난 작업 디렉토리 삭제 (원본 PDF 포함), 삭제한 작업 수
+
+        끝나지 않은 작업은 재개 대상이므로 남기고, job.json이 없는 디렉토리(생성 중 중단)는
+        수정 시각 기준으로 지움. 처리 중인(잠긴) 작업은 건너뜀
+        """
+        if max_age_hours <= 0 or not os.path.isdir(self.root):
+            return 0
+        cutoff = time.time() - max_age_hours * 3600
+        pruned = 0
+        for name in os.listdir(self.root):
+            job_dir = self.path(name)
+            if name.startswith('.') or not os.path.isdir(job_dir):
+                continue
+            job = self.get(name)
+            if job is None:
+                try:
+                    expired = os.path.getmtime(job_dir) < cutoff
+                except OSError:
+                    continue
+            else:
+                try:
+                    updated = datetime.fromisoformat(job.get("updatedAt") or "").timestamp()
+                except ValueError:
+                    updated = 0.0
+                expired = job.get("status") in FINISHED_STATUSES and updated < cutoff
+            if not expired:
+                continue
+            lock = self.try_lock(name)
+            if lock is None:
+                continue
+            try:
+                shutil.rmtree(job_dir, ignore_errors=True)
+            finally:
+                self.unlock(lock)
+            pruned += 1
+        return pruned
+
+    def source_path(self, job_id: str) -> str:
+        return self.path(job_id, "source.pdf")
+
+    # ----- 조각별 체크포인트 -----
+
+    def _slice_name(self, folder: str, chunk_id: int, ext: str) -> str:
+        return os.path.join(folder, f"{chunk_id:04d}.{ext}")
+
+    def save_slice(self, job_id: str, part: Dict[str, Any]):
+        self.save_checkpoint(job_id, self._slice_name("slices", part['chunkId'], "json"), part)
+
+    def load_slices(self, job_id: str) -> Dict[int, Dict[str, Any]]:
+        """파싱 완료된 조각 (chunkId → 조각, 실패한 조각이 남아 있으면 제외해서 다시 파싱)"""
+        folder = self.path(job_id, "slices")
+        parsed = {}
+        if os.path.isdir(folder):
+            for name in os.listdir(folder):
+                if name.endswith(".json"):
+                    part = self._read_json(os.path.join(folder, name))
+                    if part and not part.get('error'):
+                        parsed[part['chunkId']] = part
+        return parsed
+
+    def save_embeddings(
+        self,
+        job_id: str,
+        chunk_id: int,
+        chunks: List[str],
+        embeddings: List[List[float]],
+        sections: Optional[List[List[str]]] = None,
+        end_section: Optional[List[str]] = None
+    ):
+        """조각별 청크(+ 제목 경로) + 임베딩 (임베딩을 먼저 쓰고 청크 파일을 완료 표시로 사용)"""
+        path = self.path(job_id, self._slice_name("embeddings", chunk_id, "f32"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        values = array('f')
+        for embedding in embeddings:
+            values.extend(embedding)
+        with open(path, 'wb') as f:
+            f.write(values.tobytes())
+        self.save_checkpoint(job_id, self._slice_name("chunks", chunk_id, "json"), {
+            "chunks": chunks,
+            "sections": sections or [[] for _ in chunks],
+            "endSection": end_section,
+        })
+
+    def load_embeddings(self, job_id: str, chunk_id: int) -> Optional[tuple]:
+        """
+        (청크, 임베딩, 청크별 제목 경로, 조각 마지막 제목 경로)
+        체크포인트가 없거나 손상되었으면 None (제목 경로가 없는 이전 형식이면 빈 경로 / None)
+        """
+        saved = self.load_checkpoint(job_id, self._slice_name("chunks", chunk_id, "json"))
+        if saved is None:
+            return None
+        if isinstance(saved, list):
+            saved = {"chunks": saved}
+        chunks = saved.get("chunks") or []
+        sections = saved.get("sections") or [[] for _ in chunks]
+        end_section = saved.get("endSection")
+        values = array('f')
+        try:
+            with open(self.path(job_id, self._slice_name("embeddings", chunk_id, "f32")), 'rb') as f:
+                values.frombytes(f.read())
+        except (OSError, ValueError):
+            return None
+        if not chunks:
+            return [], [], [], end_section
+        if len(values) % len(chunks) or len(sections) != len(chunks):
+            return None
+        dimension = len(values) // len(chunks)
+        embeddings = [values[i * dimension:(i + 1) * dimension].tolist() for i in range(len(chunks))]
+        return chunks, embeddings, sections, end_section
+
+    def reset_checkpoint(self, job_id: str, name: str):
+        try:
+            os.remove(self.path(job_id, name))
+        except OSError:
+            pass
+
+    def discard_artifacts(self, job_id: str):
+        """완료된 작업의 원본 / 중간 결과 삭제 (job.json만 남김)"""
+        for name in ("slices", "chunks", "embeddings"):
+            shutil.rmtree(self.path(job_id, name), ignore_errors=True)
+        for name in ("source.pdf", "storage.json", "analysis.json", "inserted.json"):
+            self.reset_checkpoint(job_id, name)
+
+    # ----- 처리 잠금 -----
+
+    def try_lock(self, job_id: str) -> Optional[int]:
+        """처리 잠금 (다른 프로세스가 처리 중이면 None, 프로세스가 죽으면 자동 해제)"""
+        fd = os.open(self.path(job_id, ".lock"), os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except OSError:
+            os.close(fd)
+            return None
+
+    def unlock(self, fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class UploadJobQueue:
+    """업로드 작업 워커 풀"""
+
+    def __init__(self, store: Optional[UploadJobStore] = None):
+        self.store = store or UploadJobStore()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending: set = set()   # 큐에 들어가 있는 작업 id
+        self._timers: set = set()    # 자동 재시도 대기 작업 (GC 방지)
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self, workers: Optional[int] = None) -> int:
+        """워커 시작 + 끝나지 않은 작업 복구 (복구한 작업 수 반환)"""
+        if self._workers:
+            return 0
+        self._queue = asyncio.Queue()
+        workers = workers or settings.UPLOAD_JOB_WORKERS
+        self._workers = [asyncio.create_task(self._worker(i + 1)) for i in range(workers)]
+        self._sweeper = asyncio.create_task(self._prune_loop())
+
+        recovered = 0
+        for job in reversed(self.store.list(limit=1000)):
+            if job.get("status") not in FINISHED_STATUSES:
+                self._put(job["id"])
+                recovered += 1
+        return recovered
+
+    async def stop(self):
+        """워커 중지 (처리 중인 작업은 체크포인트에서 다음 시작 때 재개)"""
+        for task in [*self._workers, *self._timers, *([self._sweeper] if self._sweeper else [])]:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._sweeper = None
+        self._pending.clear()
+
+    def _put(self, job_id: str):
+        if job_id in self._pending:
+            return
+        self._pending.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def enqueue(
+        self,
+        file_name: str,
+        title: str,
+        source: BinaryIO,
+        max_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """새 업로드 작업 등록 (원본 복사는 워커 스레드에서, source는 동기 파일 객체)"""
+        if not self._workers:
+            self.start()
+        job = await asyncio.to_thread(self.store.create, file_name, title, source, max_size)
+        self._put(job["id"])
+        print(f"📥 업로드 작업 등록: {file_name} ({job['id']}, 대기 {self._queue.qsize()}개)")
+        return job
+
+    async def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """실패한 작업 수동 재시도 (체크포인트부터 재개)"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            return None
+        if job.get("status") == FAILED:
+            if not await asyncio.to_thread(os.path.exists, self.store.source_path(job_id)):
+                return job
+            job = await asyncio.to_thread(
+                self.store.update, job_id, status=QUEUED, attempts=0, error=None, message="재시도 대기 중"
+            )
+        if not self._workers:
+            self.start()
+        if job.get("status") not in FINISHED_STATUSES:
+            self._put(job_id)
+        return job
+
+    async def _prune_loop(self):
+        """끝난 작업 디렉토리 주기적 정리 (시작 직후 1회 + PRUNE_INTERVAL마다)"""
+        while True:
+            try:
+                pruned = await asyncio.to_thread(self.store.prune, settings.UPLOAD_JOB_RETENTION_HOURS)
+                if pruned:
+                    print(f"🧹 끝난 업로드 작업 {pruned}개 정리")
+            except Exception as e:
+                print(f"⚠️ 업로드 작업 정리 실패: {e}")
+            await asyncio.sleep(PRUNE_INTERVAL)
+
+    async def _retry_later(self, job_id: str, delay: float):
+        await asyncio.sleep(delay)
+        self._put(job_id)
+
+    async def _worker(self, worker_no: int):
+        from .upload_pipeline import run_upload_job  # 파이프라인이 Supabase/Gemini 서비스를 가져오므로 지연 import
+
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            lock = await asyncio.to_thread(self.store.try_lock, job_id)
+            if lock is None:
+                print(f"⏭️ 업로드 작업 {job_id}: 다른 프로세스가 처리 중")
+                continue
+            try:
+                job = await asyncio.to_thread(self.store.get, job_id)
+                if job is None or job.get("status") in FINISHED_STATUSES:
+                    continue
+                attempt = job.get("attempts", 0) + 1
+                await asyncio.to_thread(self.store.update, job_id, status=RUNNING, attempts=attempt, error=None)
+                print(f"🛠️ [업로드 워커 {worker_no}] {job['fileName']} 처리 시작 (시도 {attempt})")
+                try:
+                    result = await run_upload_job(self.store, job_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"❌ 업로드 작업 실패 ({job['fileName']}, 시도 {attempt}): {e}")
+                    if attempt < settings.UPLOAD_JOB_MAX_ATTEMPTS:
+                        await asyncio.to_thread(
+                            self.store.update, job_id, status=QUEUED, error=str(e),
+                            message=f"오류로 재시도 대기 중 ({attempt}/{settings.UPLOAD_JOB_MAX_ATTEMPTS})"
+                        )
+                        timer = asyncio.create_task(self._retry_later(job_id, RETRY_DELAY * attempt))
+                        self._timers.add(timer)
+                        timer.add_done_callback(self._timers.discard)
+                    else:
+                        from .upload_pipeline import abandon_upload_job
+                        await abandon_upload_job(self.store, job_id)
+                        await asyncio.to_thread(self.store.update, job_id, status=FAILED, error=str(e), message="실패")
+                    continue
+                await asyncio.to_thread(
+                    self.store.update, job_id, status=COMPLETED, stage="done", message="완료", result=result
+                )
+                await asyncio.to_thread(self.store.discard_artifacts, job_id)
+            finally:
+                self.store.unlock(lock)
+
+
+# 전역 인스턴스
+upload_job_queue = UploadJobQueue()
@@ -0,0 +1,461 @@
+"""
+업로드 처리 파이프라인 (업로드 작업 워커에서 실행)
+
+1. PDF를 Supabase Storage에 저장 (작업 디렉토리의 원본을 스트리밍 업로드)
+2. Gemini로 PDF → Markdown 변환 (완료된 페이지 조각부터 청킹 + 임베딩 시작)
+3. Gemini로 요약 + 출처 + 해시태그 추출 (+ 전형결과 문서면 표 → 입결 행 추출)
+4. 임베딩 완료 대기
+5. Supabase에 저장 (메타데이터 → 청크 배치 → 전형결과 행)
+
+단계마다 결과를 작업 디렉토리에 체크포인트로 남기고, 재시도/재시작 시 체크포인트가 있는
+단계(조각, 청크 배치 단위)는 건너뜁니다.
+
+같은 PDF를 다시 올리면 내용 캐시(utils/content_cache)의 파싱/요약 결과를 그대로 쓰고,
+임베딩은 청크 텍스트 해시 기준으로 바뀐 청크만 새로 만듭니다.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+from config import settings
+from config.constants import CHUNK_SIZE
+from utils.content_cache import VECTOR_DTYPE, ContentHasher, content_hash, get_content_cache
+from utils.document_cache import cache_invalidate
+
+from .admission_extractor import AdmissionExtractionError, admission_extractor
+from .classifier_service import classifier_service
+from .embedding_service import embedding_service
+from .gemini_pdf_service import gemini_pdf_service as pdf_service
+from .upload_jobs import COPY_CHUNK_SIZE, UploadJobStore
+
+
+def _file_content_hash(path: str) -> str:
+    """파일 내용 해시 (sha256 필드가 없는 이전 작업용, 조각 단위로 읽음)"""
+    hasher = ContentHasher()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+async def _store_pdf(store: UploadJobStore, job_id: str, file_name: str) -> Dict[str, str]:
+    """1️⃣ Storage 업로드 (체크포인트: storage.json)"""
+    from services.supabase_client import supabase_service  # supabase_client → documents 순환 import 방지
+
+    storage = await asyncio.to_thread(store.load_checkpoint, job_id, "storage.json")
+    if storage is not None:
+        return storage
+
+    print("1️⃣ PDF를 Supabase Storage에 업로드 중...")
+    storage_result = await supabase_service.upload_pdf_to_storage(store.source_path(job_id), file_name)
+    if storage_result:
+        storage_file_name, file_url = storage_result
+    else:
+        print("⚠️ PDF Storage 업로드 실패 (계속 진행)")
+        storage_file_name = file_name  # 원본 파일명 사용
+        file_url = ''  # None 대신 빈 문자열
+    storage = {"storageFileName": storage_file_name, "fileUrl": file_url}
+    await asyncio.to_thread(store.save_checkpoint, job_id, "storage.json", storage)
+    return storage
+
+
+class _CacheSavings:
+    """내용 캐시 재사용량 (종류별 적중/미적중, 절약한 시간/토큰)"""
+
+    KINDS = ("parse", "analysis", "embedding")
+
+    def __init__(self):
+        self.items = {kind: {"hits": 0, "misses": 0, "seconds": 0.0, "tokens": 0} for kind in self.KINDS}
+
+    def hit(self, kind: str, count: int = 1, seconds: float = 0.0, tokens: int = 0):
+        item = self.items[kind]
+        item["hits"] += count
+        item["seconds"] += seconds
+        item["tokens"] += tokens
+
+    def miss(self, kind: str, count: int = 1):
+        self.items[kind]["misses"] += count
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "parseHit": self.items["parse"]["hits"] > 0,
+            "analysisHit": self.items["analysis"]["hits"] > 0,
+            "embeddingsReused": self.items["embedding"]["hits"],
+            "embeddingsCreated": self.items["embedding"]["misses"],
+            "secondsSaved": round(sum(item["seconds"] for item in self.items.values()), 1),
+            "tokensSaved": sum(item["tokens"] for item in self.items.values()),
+        }
+
+    def record(self, cache, file_name: str):
+        used = {kind: item for kind, item in self.items.items() if item["hits"] or item["misses"]}
+        if used:
+            cache.record_savings(file_name, used)
+
+
+async def _embed_slice(
+    store: UploadJobStore,
+    job_id: str,
+    chunk_id: int,
+    slice_chunks: list,
+    slice_sections: list,
+    end_section: list,
+    savings: _CacheSavings
+) -> list:
+    """조각 하나 임베딩 (내용 캐시에 없는 청크만 생성) 후 체크포인트 저장"""
+    cache = get_content_cache()
+    keys = [
+        content_hash(embedding_service.embedding_model, embedding_service.embedding_dimension, VECTOR_DTYPE, chunk)
+        for chunk in slice_chunks
+    ]
+    cached = await asyncio.to_thread(cache.get_many, "embedding", keys) if cache else {}
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+
+    created = {}
+    if missing:
+        started = time.time()
+        new_embeddings = await embedding_service.create_embeddings_batch([slice_chunks[i] for i in missing])
+        per_chunk = (time.time() - started) / len(missing)
+        created = dict(zip(missing, new_embeddings))
+        if cache:
+            await asyncio.to_thread(
+                cache.set_many, "embedding",
+                [(keys[i], embedding, per_chunk, 0) for i, embedding in created.items()]
+            )
+
+    embeddings = [created[i] if i in created else cached[key][0] for i, key in enumerate(keys)]
+    savings.hit("embedding", len(keys) - len(missing), sum(cached[key][1] for key in set(keys) & cached.keys()))
+    savings.miss("embedding", len(missing))
+    await asyncio.to_thread(
+        store.save_embeddings, job_id, chunk_id, slice_chunks, embeddings, slice_sections, end_section
+    )
+    return embeddings
+
+
+async def run_upload_job(store: UploadJobStore, job_id: str) -> Dict[str, Any]:
+    """
+    업로드 작업 처리 (체크포인트부터 재개)
+
+    Returns:
+        기존 POST /api/upload 응답과 같은 형태의 결과 (summary, stats, preview)
+    """
+    from services.supabase_client import supabase_service
+
+    start_time = time.time()
+    job = await asyncio.to_thread(store.get, job_id)
+    file_name = job["fileName"]
+    title = job["title"]
+    # 조각별 (청크, 청크별 제목 경로, 임베딩 작업, 체크포인트 임베딩) - 중간 실패 시 임베딩 작업 취소
+    embedding_tasks = []
+    admission_task = None
+    cache = get_content_cache()
+    savings = _CacheSavings()
+
+    print(f"\n{'=' * 60}")
+    print(f"📄 업로드 작업 처리: {file_name} ({job_id})")
+    print(f"   자동 추출 제목: {title}")
+    print(f"   크기: {job['size'] / 1024 / 1024:.2f}MB")
+    print(f"{'=' * 60}\n")
+
+    try:
+        # 원본은 파일 경로로만 다룸 (내용 해시는 업로드 받으면서 계산해 둔 값)
+        source_path = store.source_path(job_id)
+        content_key = job.get("sha256") or await asyncio.to_thread(_file_content_hash, source_path)
+
+        await asyncio.to_thread(store.update, job_id, stage="storage", message="PDF 저장 중")
+        storage = await _store_pdf(store, job_id, file_name)
+
+        # 2️⃣ PDF → Markdown 변환 + 청킹 + 임베딩 시작
+        # 페이지 조각이 (페이지 순서대로) 끝나는 대로 청킹하고 임베딩을 백그라운드로 시작
+        parsed = await asyncio.to_thread(store.load_slices, job_id)
+        parse_cached = False
+        if not parsed and cache:
+            hit = await asyncio.to_thread(cache.get, "parse", content_key)
+            # 실패한 조각이 섞인 이전 항목은 쓰지 않음 (빠진 페이지를 다시 파싱)
+            if hit is not None and not any(part.get('error') for part in hit[0]):
+                parsed = {part['chunkId']: part for part in hit[0]}
+                parse_cached = True
+                savings.hit("parse", seconds=hit[1], tokens=hit[2])
+                print(f"   ♻️ 같은 PDF의 파싱 결과 재사용 ({len(parsed)}개 조각, {hit[2]:,}토큰 절약)")
+        print(f"2️⃣ GEMINI로 PDF → Markdown 변환 중 (완료된 조각부터 청킹/임베딩, 체크포인트 {len(parsed)}개)...")
+        await asyncio.to_thread(store.update, job_id, stage="parse", message="PDF 변환 중")
+        parse_start = time.time()
+        slices = []
+        section = []  # 앞 조각의 마지막 제목 경로
+        try:
+            async for part in pdf_service.iter_pdf_slices(source_path, file_name, parsed=parsed):
+                if part.get('error'):
+                    # 실패한 조각은 체크포인트에 남기지 않음 (작업 재시도 때 이 조각만 다시 파싱)
+                    raise Exception(f"페이지 {part['startPage']}-{part['endPage']} 변환 실패: {part['error']}")
+                slices.append(part)
+                if part['chunkId'] not in parsed:
+                    await asyncio.to_thread(store.save_slice, job_id, part)
+                await asyncio.to_thread(
+                    store.update, job_id, progress={"slicesDone": len(slices), "slicesTotal": part['totalSlices']}
+                )
+                if not part['markdown'].strip():
+                    continue
+
+                checkpoint = await asyncio.to_thread(store.load_embeddings, job_id, part['chunkId'])
+                if checkpoint is not None:
+                    slice_chunks, saved, slice_sections, end_section = checkpoint
+                    section = end_section if end_section is not None else section
+                    embedding_tasks.append((slice_chunks, slice_sections, None, saved))
+                    continue
+                # 제목 / 표 단위 청킹 (제목 경로는 앞 조각에서 이어짐)
+                markdown_chunks, section = embedding_service.chunk_markdown(
+                    part['markdown'], chunk_size=CHUNK_SIZE, section=section
+                )
+                slice_chunks = [chunk.text for chunk in markdown_chunks]
+                slice_sections = [chunk.section for chunk in markdown_chunks]
+                embedding_tasks.append((slice_chunks, slice_sections, asyncio.create_task(
+                    _embed_slice(store, job_id, part['chunkId'], slice_chunks, slice_sections, section, savings)
+                ), None))
+        except Exception as e:
+            raise Exception(f"PDF 파싱 실패: {str(e)}")
+
+        parse_result = pdf_service.summarize_slices(slices, file_name)
+        markdown = parse_result['markdown']
+        total_pages = parse_result['totalPages']
+        parse_time = time.time() - parse_start
+        chunks = [chunk for slice_chunks, _, _, _ in embedding_tasks for chunk in slice_chunks]
+        sections = [path for _, slice_sections, _, _ in embedding_tasks for path in slice_sections]
+        if cache and not parse_cached and not any(part.get('error') for part in slices):
+            savings.miss("parse")
+            await asyncio.to_thread(
+                cache.set, "parse", content_key, slices, parse_time,
+                sum((part['usage'] or {}).get('total_tokens', 0) for part in slices)
+            )
+
+        # Markdown이 비어있으면 오류
+        if not markdown or len(markdown.strip()) == 0:
+            raise Exception("PDF 파싱 결과가 비어있습니다. 네트워크 연결을 확인하거나 다시 시도해주세요.")
+
+        # 3️⃣ 요약 + 출처 추출 + 해시태그 추출 (임베딩과 동시 진행, 체크포인트: analysis.json)
+        await asyncio.to_thread(store.update, job_id, stage="analysis", message="요약 / 해시태그 추출 중")
+        analysis = await asyncio.to_thread(store.load_checkpoint, job_id, "analysis.json")
+        analysis_seconds = 0.0
+        if analysis is None and cache:
+            hit = await asyncio.to_thread(cache.get, "analysis", content_key)
+            if hit is not None:
+                analysis, analysis_seconds = hit[0], hit[1]
+                savings.hit("analysis", seconds=analysis_seconds, tokens=hit[2])
+                await asyncio.to_thread(store.save_checkpoint, job_id, "analysis.json", analysis)
+                print("   ♻️ 같은 PDF의 요약 / 출처 / 해시태그 재사용")
+        if analysis is None:
+            print("3️⃣ Gemini 요약 + 출처 + 해시태그 추출...")
+            analysis_start = time.time()
+            # 요약 / 출처 / 해시태그를 한 번의 구조화 호출로 (입력은 Markdown 개요)
+            classified = await classifier_service.classify_document(markdown, title, max_length=500)
+            analysis = {
+                "summary": classified["summary"],
+                "source": classified["source"],
+                "hashtags": classified["hashtags"],
+                "admissionType": admission_extractor.detect(title, classified["hashtags"], markdown),
+                "admissionRows": None,
+                "fallback": classified["fallback"],
+            }
+            analysis_seconds = time.time() - analysis_start
+            await asyncio.to_thread(store.save_checkpoint, job_id, "analysis.json", analysis)
+            if cache:
+                savings.miss("analysis")
+            # 분류 실패 시의 기본값(제목 기반 요약 / 출처 "미상")은 캐시하지 않음 (재업로드 때 다시 분류)
+            if cache and not analysis["fallback"]:
+                await asyncio.to_thread(cache.set, "analysis", content_key, analysis, analysis_seconds)
+        summary = analysis["summary"]
+        source = analysis["source"]
+        hashtags = analysis["hashtags"]
+        admission_type = analysis["admissionType"]
+
+        print(f"   ✅ 추출된 출처: {source}")
+        print(f"   ✅ 추출된 해시태그: {hashtags}")
+
+        # 전형결과 문서면 표 추출을 임베딩과 동시에 진행
+        if admission_type is not None and analysis["admissionRows"] is None:
+            print(f"   📊 전형결과 문서 감지 ({admission_type or '전형 구분 없음'}) - 입결 행 추출 시작")
+            admission_start = time.time()
+            admission_task = asyncio.create_task(
+                admission_extractor.extract_rows(markdown, title, source, admission_type)
+            )
+
+        # 4️⃣ Gemini 임베딩 완료 대기 (파싱 중 조각별로 시작됨)
+        pending = [task for _, _, task, _ in embedding_tasks if task is not None]
+        print(f"4️⃣ Gemini 임베딩 완료 대기 ({len(pending)}/{len(embedding_tasks)}개 조각)...")
+        await asyncio.to_thread(store.update, job_id, stage="embedding", message="임베딩 생성 중")
+        embedding_start = time.time()
+        embeddings = []
+        for _, _, task, saved in embedding_tasks:
+            embeddings.extend(saved if task is None else await task)
+        embedding_time = time.time() - embedding_start
+
+        if admission_task is not None:
+            try:
+                analysis["admissionRows"] = await admission_task
+            except AdmissionExtractionError as e:
+                # 일부만 추출된 표로 원문 청크를 대신하지 않도록 행은 저장하지 않음 (상담은 원문 청크 사용)
+                print(f"   ⚠️ 전형결과 행 추출 실패 → 원문 청크 사용: {e}")
+            else:
+                await asyncio.to_thread(store.save_checkpoint, job_id, "analysis.json", analysis)
+                if cache and not analysis.get("fallback"):
+                    # 요약과 같은 항목에 행까지 저장 (다음 재업로드 때 표 추출 LLM 호출도 생략)
+                    analysis_seconds += time.time() - admission_start
+                    await asyncio.to_thread(cache.set, "analysis", content_key, analysis, analysis_seconds)
+            admission_task = None
+
+        # 5️⃣ Supabase 저장 (체크포인트: inserted.json)
+        print("5️⃣ Supabase에 저장 중...")
+        inserted = await asyncio.to_thread(store.load_checkpoint, job_id, "inserted.json") or {
+            "metadata": False,
+            "batchSize": None,
+            "batches": [],
+            "admissionRows": None,
+        }
+
+        # 5-1. documents_metadata 테이블에 먼저 저장 (1개만)
+        await asyncio.to_thread(store.update, job_id, stage="metadata", message="메타데이터 저장 중")
+        if not inserted["metadata"]:
+            print("   📝 문서 메타데이터 저장 중...")
+            metadata_success = await supabase_service.insert_document_metadata(
+                file_name=file_name,  # 원본 파일명 (한글 가능)
+                storage_file_name=storage["storageFileName"],  # Storage에 저장된 UUID 파일명
+                title=title,
+                source=source,
+                summary=summary,
+                total_pages=total_pages,
+                total_chunks=len(chunks),
+                file_url=storage["fileUrl"],  # Storage URL 추가
+                hashtags=hashtags  # 해시태그 추가
+            )
+            if not metadata_success:
+                raise Exception("문서 메타데이터 저장 실패")
+            inserted["metadata"] = True
+            await asyncio.to_thread(store.save_checkpoint, job_id, "inserted.json", inserted)
+            print(f"   ✅ 문서 메타데이터 저장 완료")
+
+        # 5-2. 청크 일괄 저장 (배치 INSERT 동시 실행, 저장된 배치는 건너뜀)
+        print(f"   📦 청크 저장 중 ({len(chunks)}개, 저장된 배치 {len(inserted['batches'])}개)...")
+        await asyncio.to_thread(
+            store.update, job_id, stage="chunks", message="청크 저장 중", progress={"chunksTotal": len(chunks)}
+        )
+        inserted["batchSize"] = inserted["batchSize"] or settings.CHUNK_INSERT_BATCH_SIZE
+        done_batches = set(inserted["batches"])
+
+        checkpoint_lock = asyncio.Lock()  # 동시에 끝난 배치의 기록 순서 보장 (최신 상태가 마지막에 써지도록)
+
+        async def on_batch_inserted(batch_no: int, rows: int):
+            done_batches.add(batch_no)
+            async with checkpoint_lock:
+                inserted["batches"] = sorted(done_batches)
+                await asyncio.to_thread(store.save_checkpoint, job_id, "inserted.json", dict(inserted))
+                await asyncio.to_thread(store.update, job_id, progress={
+                    "chunksInserted": min(len(chunks), len(done_batches) * inserted["batchSize"])
+                })
+
+        insert_stats = await supabase_service.insert_document_chunks(
+            file_name,
+            chunks,
+            embeddings,
+            batch_size=inserted["batchSize"],
+            sections=sections,
+            skip_batches=set(done_batches),
+            on_batch_inserted=on_batch_inserted
+        )
+        success_count = insert_stats["inserted"] + insert_stats["skipped"]
+        failed_count = insert_stats["failed"]
+
+        if failed_count:
+            # 저장된 배치는 체크포인트에 남아 있으므로 재시도 시 실패한 배치만 다시 저장
+            raise Exception(f"청크 저장 실패 ({failed_count}/{len(chunks)}개)")
+
+        print(
+            f"   ✅ 청크 저장 완료: {insert_stats['batches']}개 배치 (이전 시도에서 저장된 {insert_stats['skipped']}개 청크 제외), "
+            f"재시도 {insert_stats['retries']}회, {insert_stats['elapsed']:.2f}초"
+        )
+
+        # 5-3. 전형결과 행 저장 (admission_rows, 문서 삭제 시 CASCADE)
+        admission_rows = analysis["admissionRows"]
+        admission_row_count = 0
+        if admission_rows is not None:
+            await asyncio.to_thread(store.update, job_id, stage="admission", message="전형결과 행 저장 중")
+            if inserted["admissionRows"] is None:
+                inserted["admissionRows"] = await supabase_service.insert_admission_rows(
+                    file_name,
+                    admission_type,
+                    admission_rows
+                )
+                await asyncio.to_thread(store.save_checkpoint, job_id, "inserted.json", inserted)
+            admission_row_count = inserted["admissionRows"]
+            print(f"   📊 전형결과 행 저장: {admission_row_count}/{len(admission_rows)}개")
+
+        # 같은 파일명의 이전 청크 캐시 제거 (메타데이터 캐시/해시태그 인덱스는 저장 시 갱신됨)
+        cache_invalidate("chunks", filename=file_name)
+
+        total_time = time.time() - start_time
+        cache_report = savings.summary()
+        if cache:
+            await asyncio.to_thread(savings.record, cache, file_name)
+
+        print(f"\n{'=' * 60}")
+        print(f"🎉 처리 완료!")
+        print(f"   📄 페이지: {total_pages}페이지")
+        print(f"   📦 청크: {len(chunks)}개")
+        print(f"   ✅ 성공: {success_count}개")
+        print(f"   ❌ 실패: {failed_count}개")
+        if admission_rows is not None:
+            print(f"   📊 전형결과 행: {admission_row_count}개")
+        print(f"   ⏱️  총 소요시간: {total_time:.2f}초")
+        if cache_report["secondsSaved"] or cache_report["embeddingsReused"]:
+            print(
+                f"   ♻️  캐시 재사용: 임베딩 {cache_report['embeddingsReused']}/{len(chunks)}개, "
+                f"약 {cache_report['secondsSaved']}초 / {cache_report['tokensSaved']:,}토큰 절약"
+            )
+        print(f"   📝 요약 길이: {len(summary)}자")
+        print(f"{'=' * 60}\n")
+
+        return {
+            "success": True,
+            "message": "파일이 성공적으로 처리되었습니다.",
+            "summary": summary,
+            "stats": {
+                "totalPages": total_pages,
+                "chunksTotal": len(chunks),
+                "chunksSuccess": success_count,
+                "chunksFailed": failed_count,
+                "parseTime": f"{parse_time:.2f}초",
+                "embeddingWaitTime": f"{embedding_time:.2f}초",
+                "chunkBatches": insert_stats["batches"],
+                "chunkRetries": insert_stats["retries"],
+                "chunkInsertTime": f"{insert_stats['elapsed']:.2f}초",
+                "admissionRows": admission_row_count,
+                "cache": cache_report,
+                "processingTime": f"{total_time:.2f}초",
+                "markdownSize": f"{len(markdown) / 1024:.2f}KB"
+            },
+            "preview": {
+                "firstChunk": chunks[0][:500] if chunks else ""
+            }
+        }
+
+    except BaseException:
+        for task in [*(task for _, _, task, _ in embedding_tasks), admission_task]:
+            if task is not None and not task.done():
+                task.cancel()
+        raise
+
+
+async def abandon_upload_job(store: UploadJobStore, job_id: str):
+    """
+    재시도 횟수를 모두 쓴 작업 정리
+
+    일부만 저장된 문서가 검색되지 않도록 메타데이터/청크를 삭제하고 저장 체크포인트를 지웁니다.
+    파싱/임베딩 체크포인트는 남겨 두므로 수동 재시도 시 DB 저장부터 다시 합니다.
+    """
+    from services.supabase_client import supabase_service
+
+    inserted = await asyncio.to_thread(store.load_checkpoint, job_id, "inserted.json")
+    if not inserted or not (inserted.get("metadata") or inserted.get("batches")):
+        return
+    job = await asyncio.to_thread(store.get, job_id)
+    print(f"   ⚠️ 업로드 작업 포기 → 저장된 데이터 정리: {job['fileName']}")
+    await supabase_service.delete_document(job["fileName"])
+    await asyncio.to_thread(store.reset_checkpoint, job_id, "inserted.json")
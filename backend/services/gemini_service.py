@@ -39,7 +39,15 @@ class GeminiService:
             cls._instance = cls()
         return cls._instance
 
-    async def generate(self, prompt: str, system_instruction: str = "", timing_logger=None, agent_name: str = None) -> str:
+    async def generate(
+        self,
+        prompt: str,
+        system_instruction: str = "",
+        timing_logger=None,
+        agent_name: str = None,
+        generation_config: Optional[Dict[str, Any]] = None,
+        operation: str = "텍스트생성"
+    ) -> str:
         """
         Gemini로 텍스트 생성 (Retry 로직 포함)
 
@@ -48,6 +56,9 @@ class GeminiService:
             system_instruction: 시스템 지시사항 (선택)
             timing_logger: 타이밍 로거 (선택)
             agent_name: Agent 이름 (선택, timing_logger와 함께 사용)
+            generation_config: 생성 설정 (선택, 예: JSON 구조화 출력
+                {"response_mime_type": "application/json", "response_schema": {...}})
+            operation: 토큰 사용량 CSV에 기록할 작업명
 
         Returns:
             생성된 텍스트
@@ -75,7 +86,11 @@ class GeminiService:
                 if timing_logger and agent_name:
                     timing_logger.mark_agent(agent_name, "llm_api_sent")
 
-                response = self.model.generate_content(full_prompt, request_options=request_options)
+                response = self.model.generate_content(
+                    full_prompt,
+                    generation_config=generation_config,
+                    request_options=request_options
+                )
                 
                 if timing_logger and agent_name:
                     timing_logger.mark_agent(agent_name, "llm_api_received")
@@ -95,7 +110,7 @@ class GeminiService:
                     
                     # CSV에 기록
                     log_token_usage(
-                        operation="텍스트생성",
+                        operation=operation,
                         prompt_tokens=prompt_tokens,
                         output_tokens=output_tokens,
                         total_tokens=total_tokens,
@@ -12,6 +12,7 @@ from .router_agent import RouterAgent, route_query
 from .admin_agent import AdminAgent, evaluate_router_output, evaluate_function_result
 from .functions import execute_function_calls, RAGFunctions
 from .main_agent import MainAgent, generate_response as main_agent_generate, generate_response_stream as main_agent_generate_stream
+from utils.request_log import agent_log as _log
 
 # 기존 chat.py 호환용
 AVAILABLE_AGENTS = [
@@ -29,33 +30,33 @@ async def run_orchestration_agent(message: str, history: List[Dict] = None, timi
     
     try:
         # 1. router_agent 호출
-        print("🔄 [1/3] Router Agent 호출 중...")
+        _log("🔄 [1/3] Router Agent 호출 중...")
         router_start = time.time()
         result = await route_query(message, history)
         timing["router"] = round((time.time() - router_start) * 1000)  # ms
         
         # function_calls 추출
         function_calls = result.get("function_calls", [])
-        print(f"   ✅ Router 완료: {len(function_calls)}개 함수 호출 ({timing['router']}ms)")
+        _log(f"   ✅ Router 완료: {len(function_calls)}개 함수 호출 ({timing['router']}ms)")
         
         # 2. function_calls 실행 (RAG 검색)
-        print("🔄 [2/3] Functions 실행 중...")
+        _log("🔄 [2/3] Functions 실행 중...")
         function_results = {}
         func_start = time.time()
         if function_calls:
             try:
                 function_results = await execute_function_calls(function_calls)
                 timing["function"] = round((time.time() - func_start) * 1000)
-                print(f"   ✅ Functions 완료: {len(function_results)}개 결과 ({timing['function']}ms)")
+                _log(f"   ✅ Functions 완료: {len(function_results)}개 결과 ({timing['function']}ms)")
             except Exception as func_error:
                 timing["function"] = round((time.time() - func_start) * 1000)
-                print(f"   ⚠️ Function 실행 오류: {func_error}")
+                _log(f"   ⚠️ Function 실행 오류: {func_error}")
                 function_results = {"error": str(func_error)}
         else:
-            print("   ℹ️ 함수 호출 없음")
+            _log("   ℹ️ 함수 호출 없음")
         
         # 3. main_agent 호출 (함수 결과 없어도 일반 대화 처리)
-        print("🔄 [3/3] Main Agent 호출 중...")
+        _log("🔄 [3/3] Main Agent 호출 중...")
         main_response = ""
         main_result = {}
         main_start = time.time()
@@ -66,16 +67,16 @@ async def run_orchestration_agent(message: str, history: List[Dict] = None, timi
                 main_result = await main_agent_generate(message, history, function_results)
                 main_response = main_result.get("response", "")
                 timing["main_agent"] = round((time.time() - main_start) * 1000)
-                print(f"   ✅ Main Agent 완료: {len(main_response)}자 ({timing['main_agent']}ms)")
+                _log(f"   ✅ Main Agent 완료: {len(main_response)}자 ({timing['main_agent']}ms)")
             except Exception as main_error:
                 timing["main_agent"] = round((time.time() - main_start) * 1000)
-                print(f"   ⚠️ Main Agent 오류: {main_error}")
+                _log(f"   ⚠️ Main Agent 오류: {main_error}")
                 # 폴백: 청크 텍스트 사용
                 main_response = _format_chunks_response(function_results)
         else:
             # 에러가 있는 경우만 폴백
             main_response = _format_chunks_response(function_results)
-            print(f"   ℹ️ 폴백 사용 (에러 발생)")
+            _log(f"   ℹ️ 폴백 사용 (에러 발생)")
         
         # 에러가 있으면 추가
         if "error" in result:
@@ -95,7 +96,7 @@ async def run_orchestration_agent(message: str, history: List[Dict] = None, timi
         }
         
     except Exception as e:
-        print(f"❌ 파이프라인 오류: {e}")
+        _log(f"❌ 파이프라인 오류: {e}")
         return {
             "error": str(e),
             "router_output": {"error": str(e)},
@@ -389,8 +390,8 @@ def get_agent(name: str):
 
 
 # ============================================================
-# 더미 모듈 객체 (chat.py 호환용)
-# - chat.py에서 orchestration_agent.set_log_callback() 등 호출
+# 더미 모듈 객체 (하위 호환용)
+# - 로그 라우팅은 utils/request_log.py의 요청별 채널로 대체됨
 # - router_agent 모드에서는 실제로 사용하지 않음
 # ============================================================
 class _DummyModule:
@@ -0,0 +1,364 @@
+"""
+전형결과 문서 코퍼스 (ConsultingAgent용)
+
+ConsultingAgent가 상담 요청마다 documents_metadata 전체를 내려받아 docu_cat 정규식으로
+수시/정시 · 대학 · 캠퍼스를 다시 분류하고, 해당 문서 청크를 다시 조회하던 것을
+전형결과 문서만 미리 분류하고 본문까지 합쳐 둔 메모리 코퍼스로 바꿉니다.
+
+- (대학, 캠퍼스, 수시/정시, 연도) 단위로 묶어 보관
+- 원본은 문서 캐시의 "metadata" 항목: 업로드/수정/삭제로 값이 바뀌면 다음 요청에서 다시 빌드
+  (변경되지 않은 문서의 청크는 청크 캐시에서 바로 가져옴)
+- 빌드 이후 상담 요청은 메타데이터 스캔도, DB 호출도 하지 않음
+- 업로드 시 표를 추출해 둔 문서(admission_rows)는 원문 청크 대신 입결 행 표를 본문으로 사용
+  (질문의 대학 / 학과에 해당하는 행만, 행 단위로 잘라서)
+"""
+
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.documents.hashtag_index import get_documents_metadata
+from services.documents.chunk_loader import load_document_chunks
+from services.documents.admission_extractor import get_admission_rows
+from utils.request_log import agent_log as _log, DEBUG
+
+# 정시는 source 칼럼 기준 5개 대학만 (경희대학교, 고려대학교, 서울대학교, 연세대학교, 서강대학교)
+TARGET_UNIVERSITIES = {
+    "경희대학교": "경희대",
+    "고려대학교": "고려대",
+    "서울대학교": "서울대",
+    "연세대학교": "연세대",
+    "서강대학교": "서강대"
+}
+
+# 문서 1개 본문 최대 길이
+MAX_DOC_CONTENT = 20000
+
+_UNIV_PATTERN = re.compile(r'([가-힣]+대(?:학교)?)')
+_PAREN_PATTERN = re.compile(r'\([^)]*\)')
+# 학과명 끝에서 떼고 비교할 단위 (질문에는 "컴퓨터공학"처럼 줄여 쓰는 경우가 많음)
+_MAJOR_SUFFIXES = ("학부", "전공", "계열", "과")
+_YEAR_PATTERN = re.compile(r'(\d{4})년')
+
+GroupKey = Tuple[str, Optional[str], str, Optional[str]]  # (대학, 캠퍼스, 수시/정시, 연도)
+
+
+def _cell(value: Any) -> str:
+    return "—" if value is None or value == "" else str(value)
+
+
+def truncate_lines(text: str, max_chars: int) -> str:
+    """max_chars 이내에서 줄 경계로 자름 (표 행이 중간에 잘리지 않도록)"""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars + 1)
+    return text[:cut] if cut > 0 else text[:max_chars]
+
+
+def format_admission_rows(rows: List[Dict[str, Any]], max_chars: Optional[int] = None) -> str:
+    """입결 행 → 프롬프트용 Markdown 표 (max_chars를 넘는 행부터는 생략)"""
+    lines = [
+        "| 학과 | 전형 | 계열 | 70% 컷 | 50% 컷 | 만점 | 모집 | 경쟁률 |",
+        "| --- | --- | --- | --- | --- | --- | --- | --- |",
+    ]
+    size = sum(len(line) + 1 for line in lines)
+    for row in rows:
+        line = "| " + " | ".join(_cell(row.get(key)) for key in (
+            "major", "type", "field", "cut_70_score", "cut_50_score",
+            "total_scale", "recruit_count", "competition_rate"
+        )) + " |"
+        if max_chars is not None and size + len(line) + 1 > max_chars:
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def _major_keyword(major: str) -> str:
+    """'컴퓨터공학과(주간)' → '컴퓨터공학'"""
+    name = _PAREN_PATTERN.sub("", major or "").replace(" ", "")
+    for suffix in _MAJOR_SUFFIXES:
+        if name.endswith(suffix) and len(name) - len(suffix) >= 2:
+            return name[:-len(suffix)]
+    return name
+
+
+def filter_admission_rows(
+    rows: List[Dict[str, Any]],
+    universities: List[str],
+    query: str
+) -> List[Dict[str, Any]]:
+    """
+    질문에 해당하는 입결 행만 선택
+
+    - 요청 대학의 행만 (해당 행이 없으면 문서의 모든 행)
+    - 질문에 학과명이 있으면 그 학과 행만 (언급된 학과가 없으면 전부)
+    """
+    if universities:
+        univ_rows = [
+            row for row in rows
+            if any(req_univ in (row.get('univ') or '') for req_univ in universities)
+        ]
+        rows = univ_rows or rows
+
+    compact_query = (query or "").replace(" ", "")
+    if compact_query:
+        major_rows = [
+            row for row in rows
+            if len(_major_keyword(row.get('major', ''))) >= 2
+            and _major_keyword(row.get('major', '')) in compact_query
+        ]
+        rows = major_rows or rows
+    return rows
+
+
+def classify_admission_doc(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    documents_metadata 행 1개를 전형결과 문서로 분류
+
+    Returns:
+        {"university", "type", "campus", "year"} 또는 None (전형결과 문서가 아님)
+    """
+    source = doc.get('source', '') or ''
+    docu_cat = doc.get('docu_cat', '') or ''
+    title = doc.get('title', '') or ''
+
+    # docu_cat이 "전형결과"로 끝나는 문서만
+    if not docu_cat.strip().endswith('전형결과'):
+        return None
+
+    # docu_cat에서 전형 유형(수시/정시) 추출
+    if '수시' in docu_cat:
+        doc_type = '수시'
+    elif '정시' in docu_cat:
+        doc_type = '정시'
+    else:
+        return None
+
+    # 정시일 경우 source 칼럼으로 5개 대학만
+    if doc_type == '정시':
+        if source not in TARGET_UNIVERSITIES:
+            return None
+        university = TARGET_UNIVERSITIES[source]
+    elif source and source in TARGET_UNIVERSITIES:
+        university = TARGET_UNIVERSITIES[source]
+    else:
+        univ_match = _UNIV_PATTERN.search(docu_cat)
+        if univ_match:
+            university = univ_match.group(1).replace("대학교", "").replace("학교", "")
+        else:
+            university = source.replace("대학교", "").replace("학교", "") if source else "알수없음"
+
+    # 캠퍼스
+    campus = None
+    if "용인" in docu_cat or "용인" in title or "국제캠" in docu_cat or "국제캠" in title:
+        campus = "용인캠"
+    elif "서울" in docu_cat or "서울" in title or "서울캠" in docu_cat or "서울캠" in title:
+        campus = "서울캠"
+
+    year_match = _YEAR_PATTERN.search(docu_cat or title)
+
+    return {
+        "university": university,
+        "type": doc_type,
+        "campus": campus,
+        "year": year_match.group(1) if year_match else None,
+    }
+
+
+class AdmissionCorpus:
+    """전형결과 문서 메모리 코퍼스"""
+
+    def __init__(self):
+        self._entries: List[Dict[str, Any]] = []                 # 테이블 순서
+        self._groups: Dict[GroupKey, List[Dict[str, Any]]] = {}
+        self._source: Optional[list] = None
+        self._rows_source: Optional[list] = None
+        self._build_lock = asyncio.Lock()
+        self._builds = 0
+
+    async def ensure_loaded(self):
+        """메타데이터 또는 전형결과 행이 바뀌었으면 코퍼스 재빌드"""
+        rows = await get_documents_metadata()
+        try:
+            admission_rows = await get_admission_rows()
+        except Exception as e:
+            # admission_rows 테이블이 없거나 조회 실패 → 원문 청크만 사용
+            _log(f"   ⚠️ 전형결과 행 조회 실패 (청크 본문 사용): {e}")
+            admission_rows = None
+        if rows is self._source and admission_rows is self._rows_source:
+            return
+        async with self._build_lock:
+            if rows is self._source and admission_rows is self._rows_source:
+                return
+            await self._build(rows or [], admission_rows or [])
+            self._source, self._rows_source = rows, admission_rows
+
+    async def _build(self, rows: List[Dict[str, Any]], admission_rows: List[Dict[str, Any]]):
+        """전형결과 문서 분류 + 본문/인용 정보 미리 생성"""
+        classified = []
+        for doc in rows:
+            info = classify_admission_doc(doc)
+            if info is not None:
+                classified.append((doc, info))
+
+        chunks_by_file = await load_document_chunks([doc['file_name'] for doc, _ in classified])
+        rows_by_file: Dict[str, List[Dict[str, Any]]] = {}
+        for row in admission_rows:
+            rows_by_file.setdefault(row.get('file_name'), []).append(row)
+
+        entries: List[Dict[str, Any]] = []
+        groups: Dict[GroupKey, List[Dict[str, Any]]] = {}
+        for doc, info in classified:
+            title = doc['title']
+            file_url = doc.get('file_url') or ''
+            chunks = chunks_by_file.get(doc['file_name']) or []
+            extracted = rows_by_file.get(doc['file_name']) or []
+            if extracted:
+                content = format_admission_rows(extracted, MAX_DOC_CONTENT)
+            else:
+                content = truncate_lines("".join(chunk['content'] + "\n\n" for chunk in chunks), MAX_DOC_CONTENT)
+
+            entry = {
+                **info,
+                "order": len(entries),
+                "title": title,
+                "file_url": file_url,
+                "docu_cat": doc.get('docu_cat', '') or '',
+                "has_content": bool(chunks or extracted),
+                "rows": len(extracted),
+                "admission_rows": extracted,
+                "content": content,
+                "chunks": [
+                    {
+                        "id": chunk.get('id'),
+                        "content": chunk['content'],
+                        "title": title,
+                        "source": doc.get('source', ''),
+                        "file_url": file_url,
+                        "metadata": chunk.get('metadata', {})
+                    }
+                    for chunk in chunks
+                ],
+            }
+            entries.append(entry)
+            groups.setdefault((info["university"], info["campus"], info["type"], info["year"]), []).append(entry)
+
+        self._entries, self._groups = entries, groups
+        self._builds += 1
+        _log(
+            f"   📚 전형결과 코퍼스 빌드: 전체 {len(rows)}개 중 {len(entries)}개 문서, {len(groups)}개 그룹 "
+            f"(행 추출 문서 {sum(1 for entry in entries if entry['rows'])}개)"
+        )
+
+    def _matching_entries(
+        self,
+        universities: List[str],
+        admission_type: str,
+        campus_info: Dict[str, Optional[str]]
+    ) -> List[Dict[str, Any]]:
+        """(대학, 캠퍼스, 수시/정시, 연도) 그룹 키로 걸러낸 문서 목록 (테이블 순서)"""
+        matched = []
+        for (univ, campus, doc_type, _), group in self._groups.items():
+            # 대학명 매칭
+            if universities and not any(
+                req_univ == univ or req_univ in univ or univ in req_univ
+                for req_univ in universities
+            ):
+                continue
+            # 전형 유형
+            if admission_type != "both" and admission_type != doc_type:
+                continue
+            # 캠퍼스
+            if univ in campus_info:
+                required_campus = campus_info[univ]
+                if required_campus is not None and campus != required_campus:
+                    continue
+            matched.extend(group)
+        matched.sort(key=lambda entry: entry["order"])
+        return matched
+
+    def select(
+        self,
+        universities: List[str],
+        admission_type: str = "both",
+        campus_info: Optional[Dict[str, Optional[str]]] = None,
+        year: str = "2025",
+        query: str = ""
+    ) -> Dict[str, Any]:
+        """
+        질의 분석 결과에 맞는 전형결과 데이터 구성 (DB 호출 없음)
+
+        Args:
+            universities: 요청 대학 목록 (비어있으면 전체)
+            admission_type: "수시" / "정시" / "both"
+            campus_info: {대학: 캠퍼스 또는 None}
+            year: 문서에 연도가 없을 때 사용할 연도
+            query: 원래 질문 (입결 행이 있는 문서는 질문의 대학 / 학과 행만 포함)
+
+        Returns:
+            {"수시": {...}, "정시": {...}, "sources": [...], "citations": [...]}
+        """
+        campus_info = campus_info or {}
+        admission_results = {
+            "수시": {},
+            "정시": {},
+            "sources": [],
+            "citations": []
+        }
+
+        for entry in self._matching_entries(universities, admission_type, campus_info):
+            univ = entry["university"]
+            doc_type = entry["type"]
+            campus = entry["campus"]
+
+            doc_year = entry["year"] or year
+            source_name = f"{doc_year}년 {univ}"
+            if campus:
+                source_name += f" {campus}"
+            source_name += f" {doc_type} 전형결과"
+
+            admission_results["sources"].append(source_name)
+            _log(f"   📄 {source_name}", DEBUG)
+
+            if not entry["has_content"]:
+                continue
+
+            admission_results["citations"].extend(
+                {"chunk": chunk_info, "source": source_name, "url": entry["file_url"]}
+                for chunk_info in entry["chunks"]
+            )
+
+            content = entry["content"]
+            if entry["rows"]:
+                content = format_admission_rows(
+                    filter_admission_rows(entry["admission_rows"], universities, query), MAX_DOC_CONTENT
+                )
+
+            univ_key = f"{univ}_{campus}" if campus else univ
+            if univ_key not in admission_results[doc_type]:
+                admission_results[doc_type][univ_key] = {
+                    "university": univ,
+                    "campus": campus,
+                    "type": doc_type,
+                    "content": content,
+                    "title": entry["title"],
+                    "file_url": entry["file_url"]
+                }
+            else:
+                admission_results[doc_type][univ_key]["content"] += "\n\n" + content
+
+        return admission_results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """코퍼스 통계"""
+        return {
+            "documents": len(self._entries),
+            "groups": len(self._groups),
+            "documents_with_rows": sum(1 for entry in self._entries if entry["rows"]),
+            "builds": self._builds,
+        }
+
+
+# 전역 인스턴스
+admission_corpus = AdmissionCorpus()
@@ -0,0 +1,409 @@
+"""
+대학별 메모리 ANN 검색 백엔드 (RAGFunctions.univ Step 1-2 대체)
+
+자주 검색되는 대학(RAG_ANN_SCHOOLS)은 document_chunks 임베딩으로 대학별 IVF 인덱스(utils/ann_index)를
+만들어 디스크 스냅샷으로 두고, 시작 시 메모리 매핑해 네트워크 왕복 없이 프로세스 안에서 후보를 찾습니다.
+반환 형식은 RAGFunctions._search_candidates()와 같아서 (본문 없이 id / 유사도 / 본문 길이)
+이후 가중 점수 · 토큰 예산 선택 · 선택된 청크 본문 조회는 pgvector 검색과 같습니다.
+
+- 스냅샷: {RAG_ANN_INDEX_DIR}/{대학 키}/{빌드 시각}/ + current 파일 (새 버전을 다 쓴 뒤 current만 교체)
+  빌드 / 교체는 대학별 파일 잠금(flock)을 잡은 프로세스 하나만 하고, 나머지 워커는 잠금을 기다린 뒤
+  그 스냅샷을 로드함. 교체 후에는 직전 버전까지 남겨 current를 막 읽은 프로세스도 로드할 수 있게 함
+- document_chunks는 업로드 파이프라인 밖에서 채워져 변경 알림이 없으므로
+  RAG_ANN_MAX_AGE_HOURS보다 오래된 스냅샷은 쓰지 않고(pgvector로 검색) 백그라운드에서 다시 빌드
+- 인덱스가 없거나 오래됐거나 검색 오류면 None → 호출 측이 pgvector로 검색
+
+스냅샷 빌드 (cron 등):
+    python -m services.multi_agent.ann_backend 고려대학교 연세대학교 [--force]
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.ann_index import IvfIndex
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_INDEX_DIR = os.path.join(BACKEND_DIR, "cache", "ann_index")
+
+# document_chunks 조회: 한 번에 묶는 문서 수 / 페이지 크기 (PostgREST 기본 최대 1000행)
+FETCH_DOCUMENT_BATCH = 50
+FETCH_PAGE_SIZE = 1000
+
+_CURRENT = "current"
+_LOCK = ".lock"
+
+
+class RetrievalBackend:
+    """청크 후보 검색 백엔드 (search()가 None이면 처리하지 않음 → 다음 백엔드 / pgvector)"""
+
+    name = "base"
+
+    def search(self, school_name: str, query_embedding: List[float], top_k: int) -> Optional[List[Dict]]:
+        raise NotImplementedError
+
+
+def _school_key(school_name: str) -> str:
+    """대학명 → 디렉토리 이름"""
+    return hashlib.sha1(school_name.encode("utf-8")).hexdigest()[:16]
+
+
+def _parse_embedding(value: Any) -> List[float]:
+    # Supabase는 vector 타입을 문자열로 반환
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def fetch_school_chunks(school_name: str) -> Dict[str, Any]:
+    """
+    대학의 document_chunks 임베딩 + 행 값 조회 (본문은 길이만 남김)
+
+    Returns:
+        {"ids", "vectors", "columns", "chunk_types"}
+    """
+    from services.supabase_client import SupabaseService  # supabase_client import 순서 문제 방지
+    client = SupabaseService.get_client()
+
+    documents = client.table("documents").select("id").eq("school_name", school_name).execute().data or []
+    doc_ids = [row["id"] for row in documents]
+
+    ids, vectors, chunk_types = [], [], []
+    columns: Dict[str, list] = {"document_id": [], "section_id": [], "page_number": [], "chunk_type": [], "content_length": []}
+    for i in range(0, len(doc_ids), FETCH_DOCUMENT_BATCH):
+        start = 0
+        while True:
+            page = (
+                client.table("document_chunks")
+                .select("id, document_id, section_id, page_number, chunk_type, content, raw_data, embedding")
+                .in_("document_id", doc_ids[i:i + FETCH_DOCUMENT_BATCH])
+                .order("id")
+                .range(start, start + FETCH_PAGE_SIZE - 1)
+                .execute()
+                .data
+                or []
+            )
+            for row in page:
+                if not row.get("embedding"):
+                    continue
+                chunk_type = row.get("chunk_type") or "text"
+                if chunk_type not in chunk_types:
+                    chunk_types.append(chunk_type)
+                ids.append(row["id"])
+                vectors.append(np.asarray(_parse_embedding(row["embedding"]), dtype=np.float32))
+                columns["document_id"].append(row.get("document_id") or 0)
+                columns["section_id"].append(-1 if row.get("section_id") is None else row["section_id"])
+                columns["page_number"].append(row.get("page_number") or 0)
+                columns["chunk_type"].append(chunk_types.index(chunk_type))
+                # Context Swap: raw_data 우선 (match_document_chunk_ids의 content_length와 같은 기준)
+                columns["content_length"].append(len(row.get("raw_data") or row.get("content") or ""))
+            if len(page) < FETCH_PAGE_SIZE:
+                break
+            start += FETCH_PAGE_SIZE
+
+    return {
+        "ids": np.asarray(ids, dtype=np.int64),
+        "vectors": np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32),
+        "columns": {
+            "document_id": np.asarray(columns["document_id"], dtype=np.int64),
+            "section_id": np.asarray(columns["section_id"], dtype=np.int64),
+            "page_number": np.asarray(columns["page_number"], dtype=np.int32),
+            "chunk_type": np.asarray(columns["chunk_type"], dtype=np.int16),
+            "content_length": np.asarray(columns["content_length"], dtype=np.int32),
+        },
+        "chunk_types": chunk_types,
+    }
+
+
+class AnnRetrievalBackend(RetrievalBackend):
+    """대학별 IVF 인덱스 (스냅샷 메모리 매핑)"""
+
+    name = "ann"
+
+    def __init__(
+        self,
+        index_dir: str,
+        schools: List[str],
+        nprobe: int = 8,
+        max_age_hours: float = 24,
+        dtype: str = "float32"
+    ):
+        self.index_dir = index_dir
+        self.schools = schools
+        self.nprobe = nprobe
+        self.dtype = dtype
+        self.max_age = max_age_hours * 3600
+        self._indexes: Dict[str, IvfIndex] = {}
+        self._building = set()
+        self._lock = threading.Lock()
+        self.stats = {"searches": 0, "served": 0, "fallbacks": 0, "builds": 0}
+
+    def _school_dir(self, school_name: str) -> str:
+        return os.path.join(self.index_dir, _school_key(school_name))
+
+    def _is_fresh(self, index: IvfIndex) -> bool:
+        """최근 빌드 + 현재 저장 정밀도 (EMBEDDING_STORAGE_DTYPE를 바꾸면 다음 갱신 때 다시 빌드)"""
+        return time.time() - index.meta.get("built_at", 0) < self.max_age and index.dtype == self.dtype
+
+    @staticmethod
+    def _read_current(school_dir: str) -> Optional[str]:
+        """current가 가리키는 버전 (없으면 None)"""
+        try:
+            with open(os.path.join(school_dir, _CURRENT), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _lock_school(self, school_name: str) -> int:
+        """대학별 빌드 잠금 (다른 프로세스가 빌드 중이면 끝날 때까지 대기, 프로세스가 죽으면 자동 해제)"""
+        school_dir = self._school_dir(school_name)
+        os.makedirs(school_dir, exist_ok=True)
+        fd = os.open(os.path.join(school_dir, _LOCK), os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    @staticmethod
+    def _unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _load_current(self, school_name: str) -> Optional[IvfIndex]:
+        """current가 가리키는 스냅샷 (없으면 None)"""
+        school_dir = self._school_dir(school_name)
+        try:
+            version = self._read_current(school_dir)
+            if version is None:
+                return None
+            return IvfIndex.load(os.path.join(school_dir, version), mmap=True)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"⚠️ ANN 스냅샷 로드 실패 ({school_name}): {e}")
+            return None
+
+    def load(self) -> int:
+        """디스크 스냅샷 메모리 매핑 (로드한 대학 수)"""
+        for school_name in self.schools:
+            index = self._load_current(school_name)
+            if index is not None:
+                self._indexes[school_name] = index
+        return len(self._indexes)
+
+    def build(self, school_name: str) -> Optional[IvfIndex]:
+        """
+        document_chunks → 인덱스 빌드 → 새 버전 스냅샷 저장 후 교체 (청크가 없으면 None)
+
+        대학별 빌드 잠금을 잡은 상태에서 호출 (refresh() 참고)
+        """
+        started = time.time()
+        data = fetch_school_chunks(school_name)
+        if len(data["ids"]) == 0:
+            print(f"⚠️ ANN 인덱스 빌드 생략 ({school_name}): 청크 없음")
+            return None
+
+        built_at = time.time()
+        index = IvfIndex.build(
+            data["vectors"],
+            data["ids"],
+            columns=data["columns"],
+            meta={"school_name": school_name, "built_at": built_at, "chunk_types": data["chunk_types"]},
+            dtype=self.dtype,
+        )
+        school_dir = self._school_dir(school_name)
+        version = str(int(built_at * 1000))
+        index.save(os.path.join(school_dir, version))
+
+        # current 교체 → 새 버전 / 직전 버전만 남기고 삭제
+        # (직전 버전은 current를 막 읽고 로드하려는 프로세스용, 이미 매핑한 프로세스는 열린 파일을 계속 사용)
+        previous = self._read_current(school_dir)
+        pointer = os.path.join(school_dir, f"{_CURRENT}.{os.getpid()}.tmp")
+        with open(pointer, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(school_dir, _CURRENT))
+        for name in os.listdir(school_dir):
+            if name.isdigit() and name not in (version, previous):
+                shutil.rmtree(os.path.join(school_dir, name), ignore_errors=True)
+
+        index = IvfIndex.load(os.path.join(school_dir, version), mmap=True)
+        self._indexes[school_name] = index
+        self.stats["builds"] += 1
+        print(f"✅ ANN 인덱스 빌드 ({school_name}): {len(index)}개 청크, "
+              f"목록 {index.nlist}개, {index.dtype}, {time.time() - started:.1f}초")
+        return index
+
+    def refresh(self, schools: Optional[List[str]] = None, force: bool = False) -> int:
+        """
+        없거나 오래된 인덱스 갱신, 갱신한 대학 수
+
+        빌드는 대학별 잠금 안에서 하고, 잠금을 잡은 뒤 current를 다시 확인하므로
+        다른 프로세스가 먼저 빌드했으면 document_chunks를 다시 받지 않고 그 스냅샷을 로드
+        """
+        refreshed = 0
+        for school_name in schools or self.schools:
+            index = self._indexes.get(school_name)
+            if not force and index is not None and self._is_fresh(index):
+                continue
+            try:
+                lock = self._lock_school(school_name)
+            except OSError as e:
+                print(f"❌ ANN 인덱스 잠금 실패 ({school_name}): {e}")
+                continue
+            try:
+                current = self._load_current(school_name)
+                if not force and current is not None and self._is_fresh(current):
+                    self._indexes[school_name] = current
+                elif self.build(school_name) is None:
+                    continue
+            except Exception as e:
+                print(f"❌ ANN 인덱스 빌드 실패 ({school_name}): {e}")
+                continue
+            finally:
+                self._unlock(lock)
+            refreshed += 1
+        return refreshed
+
+    def refresh_in_background(self, schools: Optional[List[str]] = None):
+        """refresh()를 데몬 스레드에서 (대학마다 동시에 하나만)"""
+        with self._lock:
+            targets = [school for school in (schools or self.schools) if school not in self._building]
+            self._building.update(targets)
+        if not targets:
+            return
+
+        def run():
+            try:
+                self.refresh(targets)
+            finally:
+                with self._lock:
+                    self._building.difference_update(targets)
+
+        threading.Thread(target=run, name="ann-index-refresh", daemon=True).start()
+
+    def search(self, school_name: str, query_embedding: List[float], top_k: int) -> Optional[List[Dict]]:
+        """
+        대학 인덱스에서 후보 검색 (RAGFunctions._search_candidates와 같은 형식)
+
+        Returns:
+            documents (page_content는 None) / 이 대학을 처리하지 않으면 None
+        """
+        if school_name not in self.schools:
+            return None
+        self.stats["searches"] += 1
+
+        index = self._indexes.get(school_name)
+        if index is None or not self._is_fresh(index):
+            self.stats["fallbacks"] += 1
+            self.refresh_in_background([school_name])
+            return None
+        if len(query_embedding) != index.dimension:
+            print(f"⚠️ ANN 인덱스 차원 불일치 ({school_name}): 쿼리 {len(query_embedding)} / 인덱스 {index.dimension}")
+            self.stats["fallbacks"] += 1
+            return None
+
+        try:
+            positions, scores = index.search(np.asarray(query_embedding, dtype=np.float32), top_k, self.nprobe)
+        except Exception as e:
+            print(f"⚠️ ANN 검색 실패 ({school_name}): {e}")
+            self.stats["fallbacks"] += 1
+            return None
+
+        chunk_types = index.meta.get("chunk_types", [])
+        columns = index.columns
+        documents = []
+        for position, score in zip(positions, scores):
+            if score < 0.0:  # match_threshold 0.0과 같음
+                continue
+            section_id = int(columns["section_id"][position])
+            documents.append({
+                "page_content": None,
+                "metadata": {
+                    "chunk_id": int(index.ids[position]),
+                    "page_number": int(columns["page_number"][position]),
+                    "score": float(score),
+                    "chunk_type": chunk_types[int(columns["chunk_type"][position])],
+                    "section_id": None if section_id < 0 else section_id,
+                    "document_id": int(columns["document_id"][position]),
+                    "content_length": int(columns["content_length"][position]),
+                }
+            })
+        self.stats["served"] += 1
+        return documents
+
+    def report(self) -> Dict[str, Any]:
+        """로드된 인덱스 / 검색 통계"""
+        now = time.time()
+        return {
+            **self.stats,
+            "building": sorted(self._building),
+            "indexes": {
+                school_name: {
+                    "chunks": len(index),
+                    "nlist": index.nlist,
+                    "age_hours": round((now - index.meta.get("built_at", 0)) / 3600, 2),
+                    "fresh": self._is_fresh(index),
+                }
+                for school_name, index in self._indexes.items()
+            },
+        }
+
+
+def configured_schools() -> List[str]:
+    """RAG_ANN_SCHOOLS (쉼표 구분) → 대학명 목록"""
+    from config import settings
+    return [school.strip() for school in settings.RAG_ANN_SCHOOLS.split(",") if school.strip()]
+
+
+_ann_backend: Optional[AnnRetrievalBackend] = None
+_init_lock = threading.Lock()
+
+
+def get_ann_backend() -> Optional[AnnRetrievalBackend]:
+    """전역 ANN 백엔드 (RAG_ANN_SCHOOLS가 비어있으면 None), 처음 만들 때 디스크 스냅샷을 로드"""
+    global _ann_backend
+    if _ann_backend is not None:
+        return _ann_backend
+    schools = configured_schools()
+    if not schools:
+        return None
+    from config import settings
+    with _init_lock:
+        if _ann_backend is None:
+            backend = AnnRetrievalBackend(
+                settings.RAG_ANN_INDEX_DIR or DEFAULT_INDEX_DIR,
+                schools,
+                nprobe=settings.RAG_ANN_NPROBE,
+                max_age_hours=settings.RAG_ANN_MAX_AGE_HOURS,
+                dtype=settings.EMBEDDING_STORAGE_DTYPE,
+            )
+            backend.load()
+            _ann_backend = backend
+    return _ann_backend
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="대학별 ANN 인덱스 스냅샷 빌드")
+    parser.add_argument("schools", nargs="*", help="대학명 (비어있으면 RAG_ANN_SCHOOLS)")
+    parser.add_argument("--force", action="store_true", help="스냅샷이 최신이어도 다시 빌드")
+    args = parser.parse_args()
+
+    from config import settings
+    schools = args.schools or configured_schools()
+    backend = AnnRetrievalBackend(
+        settings.RAG_ANN_INDEX_DIR or DEFAULT_INDEX_DIR,
+        schools,
+        nprobe=settings.RAG_ANN_NPROBE,
+        max_age_hours=settings.RAG_ANN_MAX_AGE_HOURS,
+        dtype=settings.EMBEDDING_STORAGE_DTYPE,
+    )
+    backend.load()
+    print(f"🔄 갱신: {backend.refresh(force=args.force)}/{len(schools)}개 대학")
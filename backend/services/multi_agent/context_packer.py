@@ -0,0 +1,171 @@
+"""
+함수 결과 전체 토큰 예산 패킹 (execute_function_calls → Main Agent 사이)
+
+univ 호출은 각각 TOKEN_LIMIT(6,000)까지 채우므로 대학 3곳 질문이면 약 18,000토큰이 그대로 Main Agent로 가고,
+겹치는 분할에서 나온 거의 같은 청크도 여러 번 들어갑니다. 이 단계는 모든 univ 결과의 청크를 모아
+- 같은 청크 id / 같은 본문 / 이미 고른 청크에 거의 포함되는 청크(단어 n-gram 포함률)를 한 번만 남기고
+- 하나의 예산(RAG_CONTEXT_TOKEN_BUDGET) 안에서 한계 관련도(MMR: 관련도 - 이미 고른 청크와의 겹침)가
+  큰 청크부터 채웁니다 (검색 결과마다 최상위 청크 1개는 먼저 확보).
+토큰은 utils/token_estimator(usage_metadata로 보정)로 Main Agent 프롬프트에 들어가는 형태(출처 줄 + 본문)를 추정합니다.
+
+consult 청크(학생 성적 분석 / 지원 가능 대학 표)는 검색 결과가 아니라 그대로 두고,
+자체 한도(CONSULT_TOKEN_LIMIT)로 이미 잘려 있으므로 예산에 포함하지 않습니다.
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from utils.token_estimator import TokenEstimator, get_token_estimator
+
+# 후보 청크 n-gram의 이 비율 이상이 이미 고른 청크에 있으면 중복으로 간주
+# (작은 청크를 고른 뒤에도 그것을 포함하는 더 큰 청크는 추가 내용이 있으므로 중복이 아님)
+DUPLICATE_CONTAINMENT = 0.8
+# MMR 관련도 가중치 (1이면 관련도만, 낮을수록 겹침 감점이 큼)
+MMR_LAMBDA = 0.7
+# 겹침 비교 단위 (단어 n-gram)
+SHINGLE_SIZE = 5
+
+_WORD = re.compile(r"\w+")
+
+
+def _shingles(text: str) -> Set[int]:
+    words = _WORD.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {hash(" ".join(words))} if words else set()
+    return {hash(" ".join(words[i:i + SHINGLE_SIZE])) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _containment(a: Set[int], b: Set[int]) -> float:
+    """a(후보) 중 b에도 있는 비율"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a)
+
+
+def _chunk_prompt_text(chunk: Dict, result: Dict) -> str:
+    """MainAgent._format_function_results와 같은 형태 (출처 줄 + 본문)"""
+    doc_id = chunk.get("document_id")
+    title = result.get("document_titles", {}).get(doc_id, f"문서 {doc_id}")
+    page = chunk.get("page_number", "")
+    source_info = f"{title} {page}p" if page else title
+    url = result.get("document_urls", {}).get(doc_id, "")
+    return f"\n[청크 00] 출처: {source_info} | URL: {url}\n{chunk.get('content') or ''}"
+
+
+def pack_function_results(
+    function_results: Dict[str, Any],
+    budget: int,
+    estimator: Optional[TokenEstimator] = None
+) -> Dict[str, Any]:
+    """
+    univ 결과 청크 중복 제거 + 전체 예산 선택
+
+    Args:
+        function_results: execute_function_calls 결과 (변경하지 않음)
+        budget: univ 청크 전체 토큰 예산 (0 이하면 그대로 반환)
+
+    Returns:
+        같은 키의 결과 (univ 결과는 선택된 청크만, 청크 순서 / 문서 요약도 그에 맞춤,
+        packed_tokens = 그 결과에 남은 청크 토큰 추정치)
+    """
+    if budget <= 0:
+        return function_results
+    estimator = estimator or get_token_estimator()
+
+    candidates = []
+    for key, result in function_results.items():
+        if not key.startswith("univ_") or not isinstance(result, dict) or "error" in result:
+            continue
+        for rank, chunk in enumerate(result.get("chunks", [])):
+            content = chunk.get("content") or ""
+            candidates.append({
+                "key": key,
+                "rank": rank,
+                "chunk": chunk,
+                "relevance": chunk.get("weighted_score", chunk.get("score", 0.0)) or 0.0,
+                "tokens": estimator.estimate(_chunk_prompt_text(chunk, result)),
+                "digest": hashlib.sha1(" ".join(content.split()).encode("utf-8")).hexdigest(),
+                "shingles": _shingles(content),
+                "overlap": 0.0,  # 이미 고른 청크와의 최대 포함률 (고를 때마다 갱신)
+            })
+    if not candidates:
+        return function_results
+
+    selected: List[Dict] = []
+    seen_ids, seen_digests = set(), set()
+    used = 0
+    duplicates = 0
+
+    def is_duplicate(candidate: Dict) -> bool:
+        chunk_id = candidate["chunk"].get("chunk_id")
+        return (
+            (chunk_id is not None and chunk_id in seen_ids)
+            or candidate["digest"] in seen_digests
+            or candidate["overlap"] >= DUPLICATE_CONTAINMENT
+        )
+
+    def take(candidate: Dict, others: List[Dict]):
+        nonlocal used
+        selected.append(candidate)
+        used += candidate["tokens"]
+        if candidate["chunk"].get("chunk_id") is not None:
+            seen_ids.add(candidate["chunk"]["chunk_id"])
+        seen_digests.add(candidate["digest"])
+        for other in others:
+            if other is not candidate:
+                other["overlap"] = max(other["overlap"], _containment(other["shingles"], candidate["shingles"]))
+
+    # 1. 검색 결과마다 최상위 청크 1개 (대학 하나가 통째로 빠지지 않도록)
+    remaining = []
+    for candidate in sorted(candidates, key=lambda c: (c["rank"], -c["relevance"])):
+        if candidate["rank"] == 0 and used + candidate["tokens"] <= budget and not is_duplicate(candidate):
+            take(candidate, candidates)
+        else:
+            remaining.append(candidate)
+
+    # 2. 나머지: 중복은 버리고, MMR 점수가 가장 큰 청크부터 예산에 들어가는 만큼
+    while remaining:
+        best, best_score = None, None
+        kept = []
+        for candidate in remaining:
+            if is_duplicate(candidate):
+                duplicates += 1
+                continue
+            if used + candidate["tokens"] > budget:
+                continue
+            kept.append(candidate)
+            score = MMR_LAMBDA * candidate["relevance"] - (1 - MMR_LAMBDA) * candidate["overlap"]
+            if best_score is None or score > best_score:
+                best, best_score = candidate, score
+        if best is None:
+            break
+        remaining = [candidate for candidate in kept if candidate is not best]
+        take(best, remaining)
+
+    # 3. 결과별로 원래 순서대로 다시 구성
+    chosen: Dict[str, List[Dict]] = {}
+    for candidate in selected:
+        chosen.setdefault(candidate["key"], []).append(candidate)
+
+    packed = dict(function_results)
+    for key in {candidate["key"] for candidate in candidates}:
+        result = function_results[key]
+        items = sorted(chosen.get(key, []), key=lambda c: c["rank"])
+        chunks = [item["chunk"] for item in items]
+        used_doc_ids = {chunk.get("document_id") for chunk in chunks}
+        packed[key] = {
+            **result,
+            "chunks": chunks,
+            "count": len(chunks),
+            "document_summaries": {
+                doc_id: summary for doc_id, summary in result.get("document_summaries", {}).items()
+                if doc_id in used_doc_ids
+            },
+            "packed_tokens": sum(item["tokens"] for item in items),
+        }
+
+    before = sum(candidate["tokens"] for candidate in candidates)
+    print(f"📦 컨텍스트 패킹: 청크 {len(candidates)}→{len(selected)}개 "
+          f"(중복 {duplicates}개 제외), 약 {before}→{used} 토큰 / 예산 {budget}")
+    return packed
@@ -0,0 +1,110 @@
+"""
+UniversityAgent 정보 추출 결과 캐시 (4단계)
+
+같은 대학 · 같은 문서 · 같은 의도의 질문이면 최대 15,000자 문서를 Gemini에 다시 보내지 않고
+이전 추출 결과를 재사용합니다. 문서 캐시의 "extractions" 항목에 저장하므로
+TTL · 워커 간 공유 · 문서 변경 시 무효화(invalidate_document)를 그대로 따릅니다.
+
+캐시 키:
+- 대학 / 모델
+- 선택 문서 집합 (file_name 정렬) + 문서별 내용 버전 (제목 + 청크 id 해시, 재업로드 시 바뀜)
+- 질문 의도: 질문에서 조사/어미/인사말을 뗀 단어 집합 (순서, 띄어쓰기, 문장부호 무시)
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.document_cache import cache_get, cache_set
+
+# 의도와 무관한 요청/인사 표현
+_FILLER_WORDS = {
+    '알려줘', '알려주세요', '알려줄래', '알려줄래요', '알려주실래요', '궁금해', '궁금해요', '궁금합니다',
+    '뭐야', '뭐예요', '뭔가요', '무엇인가요', '어때', '어때요', '어떤가요', '어떻게', '돼', '되나요', '됩니까',
+    '좀', '혹시', '그럼', '그러면', '그리고', '관련', '대해', '대해서', '대한', '정보', '질문', '부탁해', '부탁드려요',
+    '있어', '있어요', '있나요', '있습니까', '해줘', '해주세요', '주세요', '요',
+}
+# 단어 끝 조사 (긴 것부터 확인, "교과"처럼 단어 일부인 경우가 많은 와/과는 제외)
+_PARTICLES = ('에서는', '에서', '으로', '에는', '까지', '부터', '이랑', '하고', '은', '는', '이', '가', '을', '를', '의', '에', '도', '로', '랑')
+
+_WORD_PATTERN = re.compile(r'[가-힣A-Za-z0-9]+')
+_YEAR_PATTERN = re.compile(r'^(\d{4})(?:학년도|년도|학년|년)')
+
+
+def normalize_query_intent(query: str) -> Tuple[str, ...]:
+    """
+    질문 → 의도 단어 집합 (정렬된 튜플)
+
+    "서울대 2025 정시 경쟁률 알려줘" 와 "2025 서울대의 정시 경쟁률은?" → 같은 키
+    """
+    words = set()
+    for word in _WORD_PATTERN.findall((query or '').lower()):
+        if word in _FILLER_WORDS:
+            continue
+        year = _YEAR_PATTERN.match(word)
+        if year:
+            # "2025학년도", "2025년" → "2025"
+            words.add(year.group(1))
+            continue
+        for particle in _PARTICLES:
+            # 두 글자 이상 남을 때만 조사로 보고 제거 (예: "정시는" → "정시", "이" 단독은 유지)
+            if word.endswith(particle) and len(word) - len(particle) >= 2:
+                word = word[:-len(particle)]
+                break
+        if word not in _FILLER_WORDS:
+            words.add(word)
+    return tuple(sorted(words))
+
+
+def document_versions(
+    selected_docs: List[Dict[str, Any]],
+    chunks_by_file: Dict[str, List[Dict]]
+) -> Tuple[Tuple[str, str], ...]:
+    """선택 문서별 (file_name, 내용 버전) - file_name 정렬"""
+    versions = []
+    for doc in selected_docs:
+        file_name = doc['file_name']
+        digest = hashlib.sha1()
+        digest.update((doc.get('title') or '').encode('utf-8'))
+        for chunk in chunks_by_file.get(file_name) or []:
+            digest.update(f"|{chunk.get('id')}".encode('utf-8'))
+        versions.append((file_name, digest.hexdigest()[:16]))
+    return tuple(sorted(versions))
+
+
+def _cache_key(
+    university: str,
+    model_name: str,
+    query: str,
+    selected_docs: List[Dict[str, Any]],
+    chunks_by_file: Dict[str, List[Dict]]
+) -> Dict[str, Any]:
+    return {
+        "university": university,
+        "model": model_name,
+        "docs": document_versions(selected_docs, chunks_by_file),
+        "intent": normalize_query_intent(query),
+    }
+
+
+def get_cached_extraction(
+    university: str,
+    model_name: str,
+    query: str,
+    selected_docs: List[Dict[str, Any]],
+    chunks_by_file: Dict[str, List[Dict]]
+) -> Optional[str]:
+    """이전 추출 결과 조회 (없으면 None)"""
+    return cache_get("extractions", **_cache_key(university, model_name, query, selected_docs, chunks_by_file))
+
+
+def set_cached_extraction(
+    university: str,
+    model_name: str,
+    query: str,
+    selected_docs: List[Dict[str, Any]],
+    chunks_by_file: Dict[str, List[Dict]],
+    extracted_info: str
+):
+    """추출 결과 저장"""
+    cache_set("extractions", extracted_info, **_cache_key(university, model_name, query, selected_docs, chunks_by_file))
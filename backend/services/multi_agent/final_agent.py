@@ -22,20 +22,8 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
-# 로그 콜백 (실시간 스트리밍용)
-_log_callback = None
-
-def set_log_callback(callback):
-    """로그 콜백 설정"""
-    global _log_callback
-    _log_callback = callback
-
-def _log(msg: str):
-    """로그 출력 및 콜백 호출"""
-    if _log_callback:
-        _log_callback(msg)
-    else:
-        print(msg)
+# 로그 (요청별 채널로 라우팅, 장식용 구분선은 DEBUG 레벨)
+from utils.request_log import agent_log as _log, debug_enabled, DEBUG
 
 
 class FinalAgent:
@@ -184,10 +172,10 @@ class FinalAgent:
         if timing_logger:
             final_timing = timing_logger.start_final_agent()
         
-        _log("")
-        _log("="*80)
+        _log("", DEBUG)
+        _log("="*80, DEBUG)
         _log("📝 Final Agent 실행")
-        _log("="*80)
+        _log("="*80, DEBUG)
         
         # history를 user_question에 병합
         user_question_with_context = self._merge_history_with_question(user_question, history)
@@ -216,30 +204,22 @@ class FinalAgent:
             timing_logger.mark("final_structure_formatted")
 
         
-        # 🔍 테스트 환경용 복사 가능한 데이터 출력
-        import json as _json
-        _log(f"")
-        _log("=" * 80)
-        _log("📋 [Final Agent 입력 데이터 - 테스트 환경에 복사 가능]")
-        _log("=" * 80)
-        
-        # JSON 형식으로 출력 (복사해서 테스트 환경에 바로 사용 가능)
-        test_data = {
-            "user_question_with_context": user_question_with_context,
-            "structure_text": structure_text,
-            "results_text": results_text,
-            "all_citations": all_citations
-        }
-        
-        _log(f"\n--- 1. user_question_with_context ---")
-        _log(user_question_with_context)
-        _log(f"\n--- 2. structure_text ---")
-        _log(structure_text)
-        _log(f"\n--- 3. results_text ---")
-        _log(results_text)
-        _log(f"\n--- 4. all_citations (JSON) ---")
-        _log(_json.dumps(all_citations, ensure_ascii=False, indent=2))
-        _log("=" * 80)
+        # 🔍 테스트 환경용 복사 가능한 데이터 출력 (DEBUG 레벨에서만 - JSON 직렬화 비용이 큼)
+        if debug_enabled():
+            import json as _json
+            _log(f"", DEBUG)
+            _log("=" * 80, DEBUG)
+            _log("📋 [Final Agent 입력 데이터 - 테스트 환경에 복사 가능]", DEBUG)
+            _log("=" * 80, DEBUG)
+            _log(f"\n--- 1. user_question_with_context ---", DEBUG)
+            _log(user_question_with_context, DEBUG)
+            _log(f"\n--- 2. structure_text ---", DEBUG)
+            _log(structure_text, DEBUG)
+            _log(f"\n--- 3. results_text ---", DEBUG)
+            _log(results_text, DEBUG)
+            _log(f"\n--- 4. all_citations (JSON) ---", DEBUG)
+            _log(_json.dumps(all_citations, ensure_ascii=False, indent=2), DEBUG)
+            _log("=" * 80, DEBUG)
         
         if timing_logger:
             timing_logger.mark("final_prompt_ready")
@@ -349,7 +329,7 @@ class FinalAgent:
             _log(f"   원본 답변 길이: {len(raw_answer)}자")
             _log(f"   후처리 답변 길이: {len(final_answer)}자")
             _log(f"   실제 인용된 청크 수: {len(used_chunks)}개 (중복 제거됨)")
-            _log("="*80)
+            _log("="*80, DEBUG)
 
             # 초상세 타이밍: Final Agent 완료
             if final_timing:
@@ -1,6 +1,11 @@
 """
 RAG Functions
 - Supabase 기반 유사도 검색
+- 2단계 검색: 후보 id / 유사도 / 본문 길이만 먼저 조회 → 순위 + 토큰 예산 선택 → 선택된 청크 본문만 조회
+- DB 가중 검색 (RAG_SEARCH_BACKEND=rpc): 가중 점수 / 순위 / 토큰 예산을 match_document_chunks_weighted 한 번으로 계산
+- 프로세스 내 검색 백엔드 (RAG_ANN_SCHOOLS): 대학별 ANN 인덱스로 후보 검색, 처리하지 않으면 pgvector
+- 쿼리 임베딩은 업로드(EmbeddingService)와 같은 EMBEDDING_MODEL / EMBEDDING_DIMENSION
+- 토큰 수는 utils/token_estimator(usage_metadata로 보정)로 추정, 모든 결과는 context_packer로 전체 예산에 맞춤
 - uniroad_recommed_1/core/rag_system.py의 search_global_raw 로직 이식
 """
 
@@ -16,7 +21,13 @@ load_dotenv()
 if os.getenv("GEMINI_API_KEY") and not os.getenv("GOOGLE_API_KEY"):
     os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
 
+from config import settings
 from services.supabase_client import SupabaseService
+from services.multi_agent.ann_backend import RetrievalBackend, get_ann_backend
+from services.multi_agent.context_packer import pack_function_results
+from utils.document_cache import cache_get, cache_set
+from utils.embedding_codec import truncate_embedding
+from utils.token_estimator import get_token_estimator
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 
@@ -25,12 +36,23 @@ class RAGFunctions:
     
     _instance = None
     
+    # 검색 결과 토큰 한도 (가중 점수 순으로 이 안에 들어가는 청크만 반환)
+    TOKEN_LIMIT = 6000
+    
     def __init__(self):
         self.supabase = SupabaseService.get_client()
         self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/gemini-embedding-001",
+            model=settings.EMBEDDING_MODEL,
             request_timeout=60,
         )
+        # match_document_chunk_ids 함수가 없으면 (migrations/09 미적용) 기존 1회 조회로 전환
+        self._two_phase_available = True
+        # match_document_chunks_weighted 함수가 없으면 (migrations/10 미적용) Python 계산으로 전환
+        self._weighted_rpc_available = True
+        # pgvector보다 먼저 시도하는 프로세스 내 검색 백엔드 (모두 None을 반환하면 pgvector)
+        self.retrieval_backends: List[RetrievalBackend] = [
+            backend for backend in [get_ann_backend()] if backend is not None
+        ]
     
     @classmethod
     def get_instance(cls):
@@ -52,8 +74,7 @@ class RAGFunctions:
         Returns:
             Tuple[documents, query_embedding] - 문서 리스트와 쿼리 임베딩 (재사용 위해)
         """
-        # 쿼리 임베딩 생성 (재사용을 위해 반환)
-        query_embedding = self.embeddings.embed_query(query)
+        query_embedding = self._query_embedding(query)
         
         # RPC 호출
         rpc_params = {
@@ -89,6 +110,145 @@ class RAGFunctions:
         
         return documents, query_embedding
     
+    def _query_embedding(self, query: str) -> List[float]:
+        """쿼리 임베딩 생성 (설정 차원으로 절단 + 정규화, 재사용을 위해 반환, 같은 쿼리는 캐시 사용)"""
+        model, dimension = settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSION
+        query_embedding = cache_get("embeddings", model=model, dimension=dimension, text=query)
+        if query_embedding is None:
+            query_embedding = truncate_embedding(self.embeddings.embed_query(query), dimension)
+            cache_set("embeddings", query_embedding, model=model, dimension=dimension, text=query)
+        return query_embedding
+    
+    def _search_candidates(
+        self,
+        query: str,
+        school_name: str,
+        top_k: int = 30
+    ) -> Tuple[List[Dict], List[float]]:
+        """
+        2단계 검색 1단계: 본문 없이 id / 유사도 / 본문 길이만 조회 (match_document_chunk_ids)
+        
+        page_content는 None이고, 선택된 청크만 _fetch_chunk_contents()로 채웁니다.
+        
+        Returns:
+            Tuple[documents, query_embedding] - _supabase_search와 같은 형태
+        """
+        query_embedding = self._query_embedding(query)
+        
+        rpc_params = {
+            "filter_school_name": school_name,
+            "filter_section_id": None,  # 전역 검색
+            "match_count": top_k,
+            "match_threshold": 0.0,
+            "query_embedding": query_embedding,
+        }
+        
+        response = self.supabase.rpc("match_document_chunk_ids", rpc_params).execute()
+        
+        documents = []
+        for row in response.data or []:
+            documents.append({
+                "page_content": None,
+                "metadata": {
+                    "chunk_id": row.get("id"),
+                    "page_number": row.get("page_number", 0),
+                    "score": row.get("similarity", 0.0),
+                    "chunk_type": row.get("chunk_type", "text"),
+                    "section_id": row.get("section_id"),
+                    "document_id": row.get("document_id"),
+                    "content_length": row.get("content_length") or 0,
+                }
+            })
+        
+        return documents, query_embedding
+    
+    def _fetch_chunk_contents(self, chunk_ids: List[int]) -> Dict[int, str]:
+        """
+        2단계 검색 2단계: 선택된 청크 본문 조회 (캐시 → 없는 것만 한 번에 조회)
+        
+        Returns:
+            {chunk_id: 본문 (raw_data 우선, 없으면 content)}
+        """
+        contents = {}
+        missing_ids = []
+        for chunk_id in dict.fromkeys(chunk_ids):
+            cached = cache_get("rag_chunks", id=chunk_id)
+            if cached is not None:
+                contents[chunk_id] = cached
+            else:
+                missing_ids.append(chunk_id)
+        if not missing_ids:
+            return contents
+        
+        response = self.supabase.table("document_chunks").select("id, content, raw_data").in_("id", missing_ids).execute()
+        for row in response.data or []:
+            # Context Swap: raw_data 우선 사용
+            content = row.get("raw_data") or row.get("content", "")
+            contents[row["id"]] = content
+            cache_set("rag_chunks", content, id=row["id"])
+        return contents
+    
+    def _weighted_search(
+        self,
+        query: str,
+        school_name: str,
+        top_k: int,
+        content_weight: float,
+        summary_weight: float
+    ) -> Tuple[List[Dict], Dict[int, Dict]]:
+        """
+        DB 가중 검색: 벡터 검색 + 요약 유사도 + 가중 점수 + 토큰 예산 선택을 한 번에 (match_document_chunks_weighted)
+        
+        Returns:
+            Tuple[selected_chunks, document_info] - univ() Step 6 / Step 3 결과와 같은 형태
+        """
+        rpc_params = {
+            "content_weight": content_weight,
+            "filter_school_name": school_name,
+            "match_count": top_k,
+            "match_threshold": 0.0,
+            "query_embedding": self._query_embedding(query),
+            "summary_weight": summary_weight,
+            "token_limit": self.TOKEN_LIMIT,
+        }
+        
+        response = self.supabase.rpc("match_document_chunks_weighted", rpc_params).execute()
+        
+        selected_chunks = []
+        document_info = {}
+        for row in response.data or []:
+            doc_id = row.get("document_id")
+            selected_chunks.append({
+                "doc": {
+                    "page_content": row.get("content", ""),
+                    "metadata": {
+                        "chunk_id": row.get("id"),
+                        "page_number": row.get("page_number", 0),
+                        "score": row.get("similarity", 0.0),
+                        "chunk_type": row.get("chunk_type", "text"),
+                        "section_id": row.get("section_id"),
+                        "document_id": doc_id,
+                    }
+                },
+                "weighted_score": row.get("weighted_score", 0.0),
+                "content_score": row.get("similarity", 0.0),
+                "summary_score": row.get("summary_similarity", 0.0),
+                "tokens": row.get("est_tokens", 0),
+            })
+            if doc_id and doc_id not in document_info:
+                document_info[doc_id] = {
+                    "summary": row.get("document_summary") or "",
+                    "title": self._document_title(row.get("document_filename")),
+                    "file_url": row.get("document_file_url") or "",
+                }
+        
+        return selected_chunks, document_info
+    
+    @staticmethod
+    def _document_title(filename: Optional[str]) -> str:
+        """filename에서 PDF 확장자 제거하여 title로 사용"""
+        return filename.replace(".pdf", "").replace(".PDF", "") if filename else ""
+    
     def _get_document_info(self, document_ids: List[int]) -> Dict[int, Dict]:
         """
         Step 3: documents 테이블에서 embedding_summary와 summary 조회
@@ -101,17 +261,24 @@ class RAGFunctions:
         if not document_ids:
             return {}
         
+        result = {}
+        missing_ids = []
+        for doc_id in set(document_ids):
+            cached = cache_get("documents", id=doc_id)
+            if cached is not None:
+                result[doc_id] = cached
+            else:
+                missing_ids.append(doc_id)
+        if not missing_ids:
+            return result
+        
         try:
-            unique_ids = list(set(document_ids))
-            response = self.supabase.table("documents").select("id, embedding_summary, summary, filename, file_url").in_("id", unique_ids).execute()
+            response = self.supabase.table("documents").select("id, embedding_summary, summary, filename, file_url").in_("id", missing_ids).execute()
             
-            result = {}
             for doc in response.data:
                 emb_str = doc.get("embedding_summary")
                 summary = doc.get("summary", "")
-                # filename에서 PDF 확장자 제거하여 title로 사용
-                filename = doc.get("filename", "")
-                title = filename.replace(".pdf", "").replace(".PDF", "") if filename else ""
+                title = self._document_title(doc.get("filename", ""))
                 file_url = doc.get("file_url", "")  # PDF 다운로드 URL
                 
                 embedding = None
@@ -128,18 +295,22 @@ class RAGFunctions:
                     "title": title,
                     "file_url": file_url
                 }
+                cache_set("documents", result[doc["id"]], id=doc["id"])
             return result
         except Exception as e:
             print(f"⚠️ Document 정보 조회 실패: {e}")
-            return {}
+            return result
     
     @staticmethod
     def _cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
         """
         코사인 유사도 계산
         원본: uniroad_recommed_1/core/rag_system.py (323-332줄)
+        길이가 다르면 긴 쪽을 앞부분만 사용 (재임베딩 전 옛 차원 임베딩, Matryoshka 절단과 같음)
         """
-        vec1, vec2 = np.array(vec1), np.array(vec2)
+        vec1, vec2 = np.asarray(vec1, dtype=np.float32), np.asarray(vec2, dtype=np.float32)
+        dimension = min(len(vec1), len(vec2))
+        vec1, vec2 = vec1[:dimension], vec2[:dimension]
         dot_product = np.dot(vec1, vec2)
         norm1, norm2 = np.linalg.norm(vec1), np.linalg.norm(vec2)
         return float(dot_product / (norm1 * norm2)) if norm1 and norm2 else 0.0
@@ -147,12 +318,15 @@ class RAGFunctions:
     @staticmethod
     def _estimate_tokens(text: str) -> int:
         """
-        토큰 수 추정 (한글/영어 혼합 고려)
-        - 한글 1자 ≈ 2토큰
-        - 영어 1단어 ≈ 1토큰
-        - 간단한 휴리스틱: 문자 수 / 2 (한글 위주 텍스트)
+        토큰 수 추정 (한글/영문/숫자/공백/기타 문자별 비율)
+        - utils/token_estimator: Main Agent usage_metadata로 보정, 보정 전에는 문자 수 / 2
         """
-        return max(1, len(text) // 2)
+        return get_token_estimator().estimate(text)
+    
+    @staticmethod
+    def _estimate_tokens_for_length(length: int) -> int:
+        """글자 수만 알 때 토큰 수 추정 (보정된 평균 비율, 2단계 검색용)"""
+        return get_token_estimator().estimate_length(length)
     
     async def univ(
         self, 
@@ -180,8 +354,43 @@ class RAGFunctions:
         """
         print(f"🔍 전역 검색: '{query}' (학교: {university})")
         
+        # Step 1-2 (프로세스 내): 대학별 ANN 인덱스 등 - 후보는 본문 없이 오고 선택된 청크 본문은 Step 6 이후에 조회
+        documents = None
+        if self.retrieval_backends:
+            query_embedding = self._query_embedding(query)
+            for backend in self.retrieval_backends:
+                documents = backend.search(university, query_embedding, top_k)
+                if documents is not None:
+                    print(f"⚡ {backend.name} 검색: {len(documents)}개 후보")
+                    break
+        two_phase = documents is not None
+        
+        # DB 가중 검색: Step 1-6을 DB 함수 한 번으로 처리하고 결과 포맷팅만
+        if documents is None and settings.RAG_SEARCH_BACKEND == "rpc" and self._weighted_rpc_available:
+            try:
+                selected_chunks, document_info = self._weighted_search(
+                    query, university, top_k, content_weight, summary_weight
+                )
+                total_tokens = sum(item["tokens"] for item in selected_chunks)
+                print(f"📊 DB 가중 검색: {len(selected_chunks)}개 청크 ({total_tokens} 토큰)")
+                return self._format_results(selected_chunks, document_info, university, query)
+            except Exception as e:
+                print(f"⚠️ match_document_chunks_weighted 호출 실패 → Python 계산으로 전환: {e}")
+                self._weighted_rpc_available = False
+        
         # Step 1-2: Supabase 벡터 검색 (30개) + 쿼리 임베딩 재사용
-        documents, query_embedding = self._supabase_search(query, university, top_k)
+        # 2단계 검색이면 본문 없이 후보만 받고, 선택된 청크 본문은 Step 6 이후에 조회
+        if documents is None:
+            two_phase = settings.RAG_TWO_PHASE_SEARCH and self._two_phase_available
+            if two_phase:
+                try:
+                    documents, query_embedding = self._search_candidates(query, university, top_k)
+                except Exception as e:
+                    print(f"⚠️ match_document_chunk_ids 호출 실패 → 기존 검색으로 전환: {e}")
+                    self._two_phase_available = False
+                    two_phase = False
+            if not two_phase:
+                documents, query_embedding = self._supabase_search(query, university, top_k)
         
         if not documents:
             print("⚠️ 검색 결과 없음")
@@ -221,24 +430,67 @@ class RAGFunctions:
         
         # Step 6: 정렬 후 토큰 기반 선택 (6,000 토큰 한도)
         scored_chunks.sort(key=lambda x: x["weighted_score"], reverse=True)
+        selected_chunks, total_tokens = self._select_by_budget(scored_chunks)
         
-        TOKEN_LIMIT = 6000
+        # Step 6-1: 2단계 검색이면 선택된 청크 본문만 조회
+        # 본문이 없는 청크(인덱스/검색 이후 삭제됨)는 후보에서 빼고, 남은 예산은 다음 후보로 다시 채움
+        if two_phase and selected_chunks:
+            fetched = 0
+            while True:
+                pending = [item for item in selected_chunks if item["doc"]["page_content"] is None]
+                if not pending:
+                    break
+                contents = self._fetch_chunk_contents([
+                    item["doc"]["metadata"]["chunk_id"]
+                    for item in pending if item["doc"]["metadata"].get("chunk_id")
+                ])
+                fetched += len(contents)
+                dropped = set()
+                for item in pending:
+                    content = contents.get(item["doc"]["metadata"].get("chunk_id"))
+                    if content:
+                        item["doc"]["page_content"] = content
+                    else:
+                        dropped.add(id(item))
+                if not dropped:
+                    break
+                print(f"⚠️ 본문 없는 청크 {len(dropped)}개 제외 (삭제된 청크) → 다시 선택")
+                scored_chunks = [item for item in scored_chunks if id(item) not in dropped]
+                selected_chunks, total_tokens = self._select_by_budget(scored_chunks)
+            print(f"📥 본문 조회: {fetched}/{len(documents)}개 청크")
+        
+        # Step 7: 결과 포맷팅
+        return self._format_results(selected_chunks, document_info, university, query)
+    
+    def _select_by_budget(self, scored_chunks: List[Dict]) -> Tuple[List[Dict], int]:
+        """가중 점수 순으로 TOKEN_LIMIT까지 선택 (본문이 없으면 content_length로 토큰 추정)"""
         selected_chunks = []
         total_tokens = 0
         
         for item in scored_chunks:
             content = item["doc"]["page_content"]
-            chunk_tokens = self._estimate_tokens(content)
+            if content is None:
+                chunk_tokens = self._estimate_tokens_for_length(item["doc"]["metadata"]["content_length"])
+            else:
+                chunk_tokens = self._estimate_tokens(content)
             
-            if total_tokens + chunk_tokens > TOKEN_LIMIT:
+            if total_tokens + chunk_tokens > self.TOKEN_LIMIT:
                 break
             
             selected_chunks.append(item)
             total_tokens += chunk_tokens
         
         print(f"📊 토큰 기반 선택: {len(selected_chunks)}개 청크 ({total_tokens} 토큰)")
-        
-        # Step 7: 결과 포맷팅
+        return selected_chunks, total_tokens
+    
+    @staticmethod
+    def _format_results(
+        selected_chunks: List[Dict],
+        document_info: Dict[int, Dict],
+        university: str,
+        query: str
+    ) -> Dict[str, Any]:
+        """선택된 청크 → univ() 반환 형식 (청크 + 결과에 포함된 문서들의 요약/제목/URL)"""
         results = []
         for item in selected_chunks:
             doc = item["doc"]
@@ -299,6 +551,7 @@ async def execute_function_calls(function_calls: List[Dict]) -> Dict[str, Any]:
             "univ_0": {"chunks": [...], "count": 10, ...},
             "univ_1": {"chunks": [...], "count": 5, ...}
         }
+        (univ 청크는 context_packer가 중복 제거 후 RAG_CONTEXT_TOKEN_BUDGET 안에서 다시 선택)
     """
     rag = RAGFunctions.get_instance()
     results = {}
@@ -323,10 +576,11 @@ async def execute_function_calls(function_calls: List[Dict]) -> Dict[str, Any]:
                     get_univ_converted_sections,
                 )
                 from services.multi_agent.score_system.search_engine import run_reverse_search
+                from services.documents.admission_extractor import get_admission_rows
                 
-                # 토큰 추정 함수
-                def estimate_tokens(text: str) -> int:
-                    return max(1, len(text) // 2)
+                # 토큰 추정 함수 (usage_metadata로 보정)
+                estimator = get_token_estimator()
+                estimate_tokens = estimator.estimate
                 
                 CONSULT_TOKEN_LIMIT = 40960  # consult는 40960 토큰
                 
@@ -361,8 +615,18 @@ async def execute_function_calls(function_calls: List[Dict]) -> Dict[str, Any]:
                 run_reverse = not target_univ or "어디 갈 수 있어" in user_message
                 
                 if run_reverse:
+                    # 업로드 입결 조회 실패(마이그레이션 미적용 등)는 JSON 전용 서치로 폴백
                     try:
-                        reverse_results = run_reverse_search(normalized, target_range)
+                        extra_rows = await get_admission_rows()
+                    except Exception as e:
+                        print(f"⚠️ 업로드 입결 조회 오류 (JSON 데이터만 사용): {e}")
+                        extra_rows = None
+                    try:
+                        reverse_results = run_reverse_search(
+                            normalized,
+                            target_range,
+                            extra_rows=extra_rows
+                        )
                     except Exception as e:
                         print(f"⚠️ 리버스 서치 오류: {e}")
                 
@@ -388,7 +652,7 @@ async def execute_function_calls(function_calls: List[Dict]) -> Dict[str, Any]:
                     total_tokens += score_tokens
                 else:
                     # 토큰 초과 시 잘라서 포함
-                    truncated_len = CONSULT_TOKEN_LIMIT * 2  # 토큰 * 2 = 대략 문자 수
+                    truncated_len = estimator.chars_for_tokens(CONSULT_TOKEN_LIMIT)  # 토큰 → 대략 문자 수
                     chunks.append({
                         "document_id": "score_conversion",
                         "chunk_id": "score_analysis",
@@ -469,4 +733,5 @@ async def execute_function_calls(function_calls: List[Dict]) -> Dict[str, Any]:
         except Exception as e:
             results[f"{func_name}_{idx}"] = {"error": str(e)}
     
-    return results
+    # 전체 결과 중복 제거 + 하나의 토큰 예산으로 선택 (Main Agent 입력 축소)
+    return pack_function_results(results, settings.RAG_CONTEXT_TOKEN_BUDGET)
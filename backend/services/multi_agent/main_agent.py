@@ -11,6 +11,8 @@ import json
 import os
 from dotenv import load_dotenv
 
+from utils.token_estimator import get_token_estimator
+
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -269,6 +271,13 @@ class MainAgent:
         
         return "\n".join(summaries) if summaries else "문서 설명 없음"
     
+    @staticmethod
+    def _observe_prompt_tokens(gemini_history: List[Dict], final_prompt: str, prompt_tokens: int):
+        """입력 텍스트(시스템 프롬프트 + 히스토리 + 프롬프트)와 실제 입력 토큰 수를 토큰 추정기 보정에 기록"""
+        texts = [MAIN_SYSTEM_PROMPT, final_prompt]
+        texts.extend(part for msg in gemini_history for part in msg["parts"])
+        get_token_estimator().observe(texts, prompt_tokens, source="main_agent")
+    
     def _post_process_sections(self, text: str) -> str:
         """
         섹션 마커 제거 및 cite 태그 정리
@@ -379,7 +388,7 @@ class MainAgent:
                 "citations": citations
             }
             
-            # 토큰 사용량
+            # 토큰 사용량 (+ 토큰 추정기 보정 표본)
             if hasattr(response, 'usage_metadata'):
                 usage = response.usage_metadata
                 result["tokens"] = {
@@ -387,6 +396,7 @@ class MainAgent:
                     "out": getattr(usage, 'candidates_token_count', 0),
                     "total": getattr(usage, 'total_token_count', 0)
                 }
+                self._observe_prompt_tokens(gemini_history, final_prompt, result["tokens"]["in"])
             
             return result
             
@@ -480,6 +490,11 @@ class MainAgent:
             total_time = time.time() - start_time
             print(f"✅ 스트리밍 완료: 총 {total_time:.3f}초, 응답 {len(full_response)}자")
             
+            # 토큰 추정기 보정 표본 (스트림을 다 읽은 뒤에 usage_metadata가 채워짐)
+            usage = getattr(response, 'usage_metadata', None)
+            if usage is not None:
+                self._observe_prompt_tokens(gemini_history, final_prompt, getattr(usage, 'prompt_token_count', 0))
+            
         except Exception as e:
             print(f"❌ 스트리밍 오류: {e}")
             yield f"오류가 발생했습니다: {str(e)}"
@@ -278,21 +278,6 @@ def parse_orchestration_response(response_text: str) -> Dict[str, Any]:
         }
 
 
-# 로그 콜백 (실시간 스트리밍용)
-_log_callback = None
-
-def set_log_callback(callback):
-    """로그 콜백 설정"""
-    global _log_callback
-    _log_callback = callback
-
-def _log(msg: str):
-    """로그 출력 및 콜백 호출"""
-    if _log_callback:
-        _log_callback(msg)
-    else:
-        print(msg)
-
 async def run_orchestration_agent_with_prompt(
     message: str, 
     history: List[Dict] = None,
@@ -90,6 +90,32 @@ def _load_admission_data(data_dir: str) -> List[Dict[str, Any]]:
     return all_rows
 
 
+def _merge_uploaded_rows(
+    all_rows: List[Dict[str, Any]],
+    extra_rows: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    업로드 시 추출된 정시 입결 행(admission_rows)을 JSON 데이터 뒤에 합침
+
+    같은 (대학, 학과, 전형, 계열) 행이 JSON에 이미 있으면 JSON 쪽을 유지합니다.
+    수시 행은 컷이 내신 등급이라 수능 환산 점수와 비교할 수 없으므로 제외합니다.
+    """
+    seen = {
+        (row.get("univ"), row.get("major"), row.get("type", "일반"), row.get("field", ""))
+        for row in all_rows if isinstance(row, dict)
+    }
+    merged = list(all_rows)
+    for row in extra_rows:
+        if not isinstance(row, dict) or row.get("admission_type") != "정시":
+            continue
+        key = (row.get("univ"), row.get("major"), row.get("type", "일반"), row.get("field", ""))
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(row)
+    return merged
+
+
 def _calculate_all_scores(
     normalized_scores: Dict[str, Any]
 ) -> Dict[str, Dict[str, Any]]:
@@ -145,7 +171,8 @@ def _build_result_item(
 # ============================================================
 def run_reverse_search(
     normalized_scores: Dict[str, Any],
-    target_range: List[str] = None
+    target_range: List[str] = None,
+    extra_rows: Optional[List[Dict[str, Any]]] = None
 ) -> List[Dict[str, Any]]:
     """
     normalized_scores를 입력받아, 입결 데이터와 비교한 지원 가능 학과 리스트를 반환.
@@ -153,6 +180,7 @@ def run_reverse_search(
     Args:
         normalized_scores: 정규화된 성적 데이터
         target_range: 필터링할 판정 목록 (예: ["안정", "적정", "상향"])
+        extra_rows: 업로드 문서에서 추출된 입결 행 (admission_rows, 환산 계산기가 있는 대학만 판정)
     """
     data_dir = _get_admission_data_dir()
     if not os.path.isdir(data_dir):
@@ -163,6 +191,8 @@ def run_reverse_search(
     
     # 2. 입결 데이터 로드
     all_rows = _load_admission_data(data_dir)
+    if extra_rows:
+        all_rows = _merge_uploaded_rows(all_rows, extra_rows)
     
     # 3. 각 row 처리
     results = []
@@ -14,9 +14,15 @@ from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
 from utils.token_logger import log_token_usage
-from utils.document_cache import cache_get, cache_set, cache_stats
+from utils.document_cache import cache_stats
+from services.documents.hashtag_index import hashtag_index, extract_query_tags
+from services.documents.chunk_loader import load_document_chunks
+from services.documents.doc_selector import document_selector, LLM_MAX_CANDIDATES
+from services.multi_agent.extraction_cache import get_cached_extraction, set_cached_extraction
+from config import settings
+from config.constants import GEMINI_FLASH_MODEL
+from services.multi_agent.admission_corpus import admission_corpus, truncate_lines
 
-from services.supabase_client import supabase_service
 from services.gemini_service import gemini_service
 from services.scoring import (
     ScoreConverter,
@@ -45,20 +51,8 @@ from services.scoring.data_standard import (
 #     ADMISSION_DATA_JEONGSI
 # )
 
-# 로그 콜백 (실시간 스트리밍용)
-_log_callback = None
-
-def set_log_callback(callback):
-    """로그 콜백 설정"""
-    global _log_callback
-    _log_callback = callback
-
-def _log(msg: str):
-    """로그 출력 및 콜백 호출"""
-    if _log_callback:
-        _log_callback(msg)
-    else:
-        print(msg)
+# 로그 (요청별 채널로 라우팅, 장식용 구분선은 DEBUG 레벨)
+from utils.request_log import agent_log as _log, DEBUG
 
 load_dotenv()
 
@@ -176,7 +170,7 @@ class UniversityAgent(SubAgentBase):
     
     검색 로직:
     1. 해시태그로 1차 탐색 (#{대학명})
-    2. 요약본(500자) 분석으로 적합한 문서 선별
+    2. 요약본/해시태그 로컬 재순위로 적합한 문서 선별 (애매할 때만 LLM 필터, 선택)
     3. 선별된 문서의 전체 내용 로드
     4. 정보 추출 후 출처와 함께 반환
     """
@@ -207,39 +201,28 @@ class UniversityAgent(SubAgentBase):
         """대학 정보 검색 및 정리"""
         import time
         
-        _log("")
-        _log("="*60)
+        _log("", DEBUG)
+        _log("="*60, DEBUG)
         _log(f"🏫 {self.name} 실행")
-        _log("="*60)
+        _log("="*60, DEBUG)
         _log(f"쿼리: {query}")
 
         try:
-            client = supabase_service.get_client()
-
             # ============================================================
             # 1단계: 해시태그로 1차 탐색
             # ============================================================
-            _log("")
+            _log("", DEBUG)
             _log(f"📋 [1단계] 해시태그 검색: #{self.university_name}")
             
             if timing_logger:
                 timing_logger.mark_agent(self.name, "db_query_start")
             
-            # 캐시 확인
-            cached_metadata = cache_get("metadata", university=self.university_name)
-            
-            if cached_metadata:
-                _log(f"   ✅ 캐시 히트: 메타데이터 ({len(cached_metadata)}개 문서)")
-                metadata_response_data = cached_metadata
-            else:
-                _log(f"   🔍 캐시 미스: DB 조회 중...")
-                metadata_response = client.table('documents_metadata').select('*').execute()
-                metadata_response_data = metadata_response.data
-                
-                # 캐시에 저장
-                cache_set("metadata", metadata_response_data, university=self.university_name)
+            # 해시태그 역색인 (전체 테이블 스캔 대신 posting list 교집합)
+            await hashtag_index.ensure_loaded()
+            index_stats = hashtag_index.get_stats()
+            _log(f"   ✅ 해시태그 인덱스: {index_stats['documents']}개 문서 / {index_stats['tags']}개 태그")
             
-            if not metadata_response_data:
+            if not index_stats['documents']:
                 return {
                     "agent": self.name,
                     "status": "no_data",
@@ -249,44 +232,10 @@ class UniversityAgent(SubAgentBase):
                     "citations": []
                 }
 
-            # 해시태그 필터링
+            # 필수: 대학 태그 / 추가: 연도, 전형, 문서 성격 태그 (일치할수록 높은 점수)
             required_univ_tag = f"#{self.university_name}"
-            
-            # 추가 해시태그 추출 (연도, 전형 등)
-            optional_tags = []
-            year_match = re.search(r'(2024|2025|2026|2027|2028)', query)
-            if year_match:
-                optional_tags.append(f"#{year_match.group()}")
-            
-            if '수시' in query:
-                optional_tags.append('#수시')
-            if '정시' in query:
-                optional_tags.append('#정시')
-            if any(word in query for word in ['요강', '모집']):
-                optional_tags.append('#모집요강')
-            if any(word in query for word in ['입결', '경쟁률', '커트']):
-                optional_tags.append('#입결통계')
-
-            # 필터링
-            relevant_docs = []
-            for doc in metadata_response_data:
-                doc_hashtags = doc.get('hashtags', []) or []
-                
-                # 필수 조건: 대학 태그 포함
-                if required_univ_tag not in doc_hashtags:
-                    continue
-                
-                # 점수 계산
-                score = 10  # 대학 태그 일치 기본 점수
-                for tag in optional_tags:
-                    if tag in doc_hashtags:
-                        score += 5
-                
-                relevant_docs.append((score, doc))
-            
-            # 점수순 정렬
-            relevant_docs.sort(key=lambda x: x[0], reverse=True)
-            relevant_docs = [doc for score, doc in relevant_docs]
+            optional_tags = extract_query_tags(query)
+            relevant_docs = hashtag_index.search(required_univ_tag, optional_tags)
             
             _log(f"   {self.university_name} 관련 문서: {len(relevant_docs)}개")
             
@@ -301,64 +250,45 @@ class UniversityAgent(SubAgentBase):
                 }
 
             # ============================================================
-            # 2단계: 요약본 분석 (500자 이내)
+            # 2단계: 문서 선별 (요약본/해시태그 로컬 재순위)
             # ============================================================
-            _log("")
-            _log(f"📋 [2단계] 요약본 분석")
-            
-            docs_summary_list = []
-            for idx, doc in enumerate(relevant_docs[:10], 1):  # 최대 10개
-                title = doc.get('title', '제목 없음')
-                summary = doc.get('summary', '요약 없음')[:500]
-                hashtags = doc.get('hashtags', [])
-                docs_summary_list.append(
-                    f"{idx}. 제목: {title}\n   해시태그: {', '.join(hashtags) if hashtags else '없음'}\n   요약: {summary}"
-                )
-            
-            docs_summary_text = "\n\n".join(docs_summary_list)
+            _log("", DEBUG)
+            _log(f"📋 [2단계] 문서 선별")
+            
+            candidates = relevant_docs[:LLM_MAX_CANDIDATES]  # 최대 10개
+            selection = document_selector.select(
+                query,
+                candidates,
+                optional_tags,
+                exclude_terms=[self.university_name]
+            )
+            selected_docs = selection["docs"]
+            _log(f"   재순위: {selection['elapsed_us']}µs, 점수 {selection['scores']}", DEBUG)
+            
+            llm_docs = None
+            if selection["ambiguous"] and settings.DOC_SELECT_LLM_FALLBACK:
+                _log(f"   ⚠️ 재순위 점수 차가 작음 → LLM 필터 사용")
+                try:
+                    llm_docs = await document_selector.llm_select(
+                        query,
+                        candidates,
+                        timing_logger=timing_logger,
+                        agent_name=self.name
+                    )
+                    selected_docs = llm_docs
+                except Exception as e:
+                    _log(f"   ⚠️ 요약본 분석 실패: {e}")
             
-            filter_prompt = f"""다음 문서들의 요약본을 읽고, 질문에 답변하는데 필요한 문서만 선택하세요.
-
-질문: "{query}"
-
-문서 목록:
-{docs_summary_text}
-
-선택 기준:
-1. 질문에 답변하는데 필요한 정보가 포함된 문서만 선택
-2. 최대 3개까지만 선택
-
-답변 형식:
-관련 문서가 있으면: 번호만 쉼표로 구분 (예: 1, 3)
-관련 문서가 없으면: 없음"""
-
-            try:
-                filter_result = await gemini_service.generate(
-                    filter_prompt,
-                    "문서 필터링 전문가",
-                    timing_logger=timing_logger,
-                    agent_name=self.name
-                )
-                
-                if not filter_result.strip() or "없음" in filter_result.lower():
-                    # 필터링 실패시 상위 2개 사용
-                    selected_docs = relevant_docs[:2]
-                else:
-                    selected_indices = [int(n.strip())-1 for n in re.findall(r'\d+', filter_result)]
-                    selected_docs = [relevant_docs[i] for i in selected_indices if i < len(relevant_docs)]
-                    if not selected_docs:
-                        selected_docs = relevant_docs[:2]
-                        
-            except Exception as e:
-                _log(f"   ⚠️ 요약본 분석 실패: {e}")
-                selected_docs = relevant_docs[:2]
+            document_selector.log_selection(
+                self.university_name, query, candidates, optional_tags, selection, llm_docs
+            )
             
             _log(f"   선별된 문서: {len(selected_docs)}개")
 
             # ============================================================
             # 3단계: 전체 내용 로드
             # ============================================================
-            _log("")
+            _log("", DEBUG)
             _log(f"📋 [3단계] 문서 내용 로드")
             
             full_content = ""
@@ -366,6 +296,9 @@ class UniversityAgent(SubAgentBase):
             source_urls = []
             citations = []
             
+            # 선택된 문서 청크 일괄 로드 (캐시 + IN 쿼리 1회, chunkIndex 순 정렬)
+            chunks_by_file = await load_document_chunks([doc['file_name'] for doc in selected_docs])
+            
             for doc in selected_docs:
                 filename = doc['file_name']
                 title = doc['title']
@@ -376,30 +309,10 @@ class UniversityAgent(SubAgentBase):
                 
                 _log(f"   📄 {title}")
                 
-                # 캐시 확인 (파일별)
-                cached_chunks = cache_get("chunks", filename=filename)
+                sorted_chunks = chunks_by_file.get(filename) or []
+                _log(f"       ✅ 청크 데이터 ({len(sorted_chunks)}개)")
                 
-                if cached_chunks:
-                    _log(f"       ✅ 캐시 히트: 청크 데이터 ({len(cached_chunks)}개)")
-                    chunks_data = cached_chunks
-                else:
-                    _log(f"       🔍 캐시 미스: 청크 조회 중...")
-                    # 청크 가져오기
-                    chunks_response = client.table('policy_documents')\
-                        .select('id, content, metadata')\
-                        .eq('metadata->>fileName', filename)\
-                        .execute()
-                    chunks_data = chunks_response.data
-                    
-                    # 캐시에 저장
-                    cache_set("chunks", chunks_data, filename=filename)
-                
-                if chunks_data:
-                    sorted_chunks = sorted(
-                        chunks_data,
-                        key=lambda x: x.get('metadata', {}).get('chunkIndex', 0)
-                    )
-                    
+                if sorted_chunks:
                     full_content += f"\n\n{'='*60}\n"
                     full_content += f"📄 {title}\n"
                     full_content += f"{'='*60}\n\n"
@@ -432,7 +345,7 @@ class UniversityAgent(SubAgentBase):
             # ============================================================
             # 4단계: 정보 추출
             # ============================================================
-            _log("")
+            _log("", DEBUG)
             _log(f"📋 [4단계] 정보 추출")
             
             # 사용 가능한 출처 목록 생성
@@ -456,30 +369,44 @@ class UniversityAgent(SubAgentBase):
 5. 마지막에 "출처: 문서1, 문서2, ..." 형태로 요약하지 말고, 정보마다 개별 표시
 6. JSON이 아닌 자연어로 작성"""
 
-            try:
-                extracted_info = await gemini_service.generate(
-                    extract_prompt,
-                    "문서 정보 추출 전문가",
-                    timing_logger=timing_logger,
-                    agent_name=self.name
-                )
-                
+            # 같은 문서(버전) + 같은 의도의 질문이면 이전 추출 결과 재사용
+            extracted_info = get_cached_extraction(
+                self.university_name, GEMINI_FLASH_MODEL, query, selected_docs, chunks_by_file
+            )
+            if extracted_info is not None:
+                _log(f"   ♻️ 추출 결과 캐시 사용 (LLM 호출 생략)")
                 if timing_logger:
                     timing_logger.mark_agent(self.name, "llm_call_complete")
+            else:
+                try:
+                    extracted_info = await gemini_service.generate(
+                        extract_prompt,
+                        "문서 정보 추출 전문가",
+                        timing_logger=timing_logger,
+                        agent_name=self.name
+                    )
+                    
+                    if timing_logger:
+                        timing_logger.mark_agent(self.name, "llm_call_complete")
+
+                    # citations는 이미 청크 정보와 함께 추가되었으므로 추가 작업 불필요
+                    if extracted_info and extracted_info.strip():
+                        set_cached_extraction(
+                            self.university_name, GEMINI_FLASH_MODEL, query,
+                            selected_docs, chunks_by_file, extracted_info
+                        )
 
-                # citations는 이미 청크 정보와 함께 추가되었으므로 추가 작업 불필요
-
-            except Exception as e:
-                extracted_info = f"정보 추출 실패: {e}"
-                if timing_logger:
-                    timing_logger.mark_agent(self.name, "llm_call_complete")
+                except Exception as e:
+                    extracted_info = f"정보 추출 실패: {e}"
+                    if timing_logger:
+                        timing_logger.mark_agent(self.name, "llm_call_complete")
             
             _log(f"   추출된 정보 길이: {len(extracted_info)}자")
             
             # 캐시 통계 로깅
             stats = cache_stats()
             _log(f"   📊 캐시 통계: {stats['hits']} 히트 / {stats['misses']} 미스 ({stats['hit_rate']}% 히트율)")
-            _log("="*60)
+            _log("="*60, DEBUG)
 
             return {
                 "agent": self.name,
@@ -543,10 +470,10 @@ class ConsultingAgent(SubAgentBase):
         """성적 기반 합격 가능 대학 분석"""
         import time
         
-        _log("")
-        _log("="*60)
+        _log("", DEBUG)
+        _log("="*60, DEBUG)
         _log(f"📊 컨설팅 Agent 실행")
-        _log("="*60)
+        _log("="*60, DEBUG)
         _log(f"쿼리: {query[:200]}..." if len(query) > 200 else f"쿼리: {query}")
         
         # extracted_scores 전달 확인 로그
@@ -637,7 +564,7 @@ class ConsultingAgent(SubAgentBase):
         # ============================================================
         # Supabase에서 전형결과 문서 조회
         # ============================================================
-        _log("")
+        _log("", DEBUG)
         _log(f"📋 [전형결과 조회] Supabase에서 입결 데이터 검색")
         
         # 질의 분석: 정시/수시 구분 및 대학명 추출
@@ -828,7 +755,7 @@ class ConsultingAgent(SubAgentBase):
                 _log(f"   ✅ 점수 산출 방법 문서 cite 태그 + citation 강제 추가 (normalized_scores 존재)")
 
             _log(f"   분석 완료")
-            _log("="*60)
+            _log("="*60, DEBUG)
 
             # sources 목록 구성 - Supabase 전형결과 데이터 포함
             sources = []
@@ -1792,14 +1719,16 @@ class ConsultingAgent(SubAgentBase):
                 "admission_type": "정시" | "수시" | "both" | None,
                 "universities": ["서울대", "경희대", ...],
                 "campus": {"경희대": "서울캠" | "용인캠" | None, ...},
-                "year": "2025" | None
+                "year": "2025" | None,
+                "query": 원래 질문 (입결 행 선택용)
             }
         """
         result = {
             "admission_type": None,
             "universities": [],
             "campus": {},
-            "year": None
+            "year": None,
+            "query": query
         }
         
         query_lower = query.lower()
@@ -1849,7 +1778,7 @@ class ConsultingAgent(SubAgentBase):
         normalized_scores: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Supabase에서 전형결과 문서 조회
+        전형결과 문서 조회 (미리 분류/병합된 전형결과 코퍼스 사용)
         
         Args:
             query_analysis: _analyze_query 결과
@@ -1864,199 +1793,18 @@ class ConsultingAgent(SubAgentBase):
             }
         """
         try:
-            client = supabase_service.get_client()
-            
-            # documents_metadata에서 전형결과 문서 조회
-            metadata_response = client.table('documents_metadata').select('*').execute()
-            
-            if not metadata_response.data:
-                return {
-                    "수시": {},
-                    "정시": {},
-                    "sources": [],
-                    "citations": []
-                }
-            
-            admission_type = query_analysis.get("admission_type", "both")
-            universities = query_analysis.get("universities", [])
-            year = query_analysis.get("year", "2025")
-            campus_info = query_analysis.get("campus", {})
-            
-            # 디버깅: 전체 문서 수 확인
-            _log(f"   전체 문서 수: {len(metadata_response.data)}개")
-            
-            # 정시일 경우: 5개 대학만 (경희대학교, 고려대학교, 서울대학교, 연세대학교, 서강대학교)
-            target_universities = {
-                "경희대학교": "경희대",
-                "고려대학교": "고려대",
-                "서울대학교": "서울대",
-                "연세대학교": "연세대",
-                "서강대학교": "서강대"
-            }
-            
-            relevant_docs = []
-            
-            for doc in metadata_response.data:
-                source = doc.get('source', '') or ''
-                docu_cat = doc.get('docu_cat', '') or ''
-                title = doc.get('title', '') or ''
-                
-                # 1단계: docu_cat이 "전형결과"로 끝나는지 확인
-                docu_cat_ends_with = docu_cat.strip().endswith('전형결과')
-                if not docu_cat_ends_with:
-                    continue
-                
-                # 2단계: docu_cat에서 전형 유형(수시/정시) 추출
-                doc_type = None
-                if '수시' in docu_cat:
-                    doc_type = '수시'
-                elif '정시' in docu_cat:
-                    doc_type = '정시'
-                
-                if not doc_type:
-                    continue
-                
-                # 3단계: 정시일 경우 source 칼럼으로 5개 대학만 필터링
-                if doc_type == '정시':
-                    if source not in target_universities:
-                        continue
-                    doc_univ_normalized = target_universities[source]
-                else:
-                    if source and source in target_universities:
-                        doc_univ_normalized = target_universities[source]
-                    else:
-                        univ_match = re.search(r'([가-힣]+대(?:학교)?)', docu_cat)
-                        if univ_match:
-                            doc_univ_raw = univ_match.group(1)
-                            doc_univ_normalized = doc_univ_raw.replace("대학교", "").replace("학교", "")
-                        else:
-                            doc_univ_normalized = source.replace("대학교", "").replace("학교", "") if source else "알수없음"
-                
-                _log(f"   ✓ 전형결과 문서 발견: {source} ({doc_type}) - {docu_cat[:60]}")
-                
-                # 4단계: 캠퍼스 정보 확인
-                doc_campus = None
-                if "용인" in docu_cat or "용인" in title or "국제캠" in docu_cat or "국제캠" in title:
-                    doc_campus = "용인캠"
-                elif "서울" in docu_cat or "서울" in title or "서울캠" in docu_cat or "서울캠" in title:
-                    doc_campus = "서울캠"
-                
-                # 5단계: 대학명 매칭
-                matched = False
-                if not universities:
-                    matched = True
-                else:
-                    for req_univ in universities:
-                        if req_univ == doc_univ_normalized or req_univ in doc_univ_normalized or doc_univ_normalized in req_univ:
-                            matched = True
-                            break
-                
-                # 전형 유형 필터링
-                if matched:
-                    if admission_type == "both" or admission_type == doc_type:
-                        if doc_univ_normalized in campus_info:
-                            required_campus = campus_info[doc_univ_normalized]
-                            if required_campus is None or doc_campus == required_campus:
-                                relevant_docs.append({
-                                    "doc": doc,
-                                    "university": doc_univ_normalized,
-                                    "type": doc_type,
-                                    "campus": doc_campus
-                                })
-                        else:
-                            relevant_docs.append({
-                                "doc": doc,
-                                "university": doc_univ_normalized,
-                                "type": doc_type,
-                                "campus": doc_campus
-                            })
-            
-            _log(f"   발견된 전형결과 문서: {len(relevant_docs)}개")
-            
-            # 문서 내용 로드 및 정리
-            admission_results = {
-                "수시": {},
-                "정시": {},
-                "sources": [],
-                "citations": []
-            }
-            
-            for item in relevant_docs:
-                doc = item["doc"]
-                univ = item["university"]
-                doc_type = item["type"]
-                campus = item.get("campus")
-                
-                filename = doc['file_name']
-                title = doc['title']
-                file_url = doc.get('file_url') or ''
-                docu_cat = doc.get('docu_cat', '') or ''
-                
-                # docu_cat에서 연도 추출
-                doc_year = year
-                year_match = re.search(r'(\d{4})년', docu_cat or title)
-                if year_match:
-                    doc_year = year_match.group(1)
-                
-                # 출처 추가
-                source_name = f"{doc_year}년 {univ}"
-                if campus:
-                    source_name += f" {campus}"
-                source_name += f" {doc_type} 전형결과"
-                
-                admission_results["sources"].append(source_name)
-                
-                _log(f"   📄 {source_name}")
-                
-                # 청크 가져오기
-                chunks_response = client.table('policy_documents')\
-                    .select('id, content, metadata')\
-                    .eq('metadata->>fileName', filename)\
-                    .execute()
-                
-                if chunks_response.data:
-                    sorted_chunks = sorted(
-                        chunks_response.data,
-                        key=lambda x: x.get('metadata', {}).get('chunkIndex', 0)
-                    )
-                    
-                    # 청크 내용 합치기
-                    full_content = ""
-                    for chunk in sorted_chunks:
-                        full_content += chunk['content'] + "\n\n"
-                        
-                        # citations 추가
-                        chunk_info = {
-                            "id": chunk.get('id'),
-                            "content": chunk['content'],
-                            "title": title,
-                            "source": doc.get('source', ''),
-                            "file_url": file_url,
-                            "metadata": chunk.get('metadata', {})
-                        }
-                        admission_results["citations"].append({
-                            "chunk": chunk_info,
-                            "source": source_name,
-                            "url": file_url
-                        })
-                    
-                    # 대학별로 데이터 저장
-                    univ_key = univ
-                    if campus:
-                        univ_key = f"{univ}_{campus}"
-                    
-                    if univ_key not in admission_results[doc_type]:
-                        admission_results[doc_type][univ_key] = {
-                            "university": univ,
-                            "campus": campus,
-                            "type": doc_type,
-                            "content": full_content[:20000],
-                            "title": title,
-                            "file_url": file_url
-                        }
-                    else:
-                        admission_results[doc_type][univ_key]["content"] += "\n\n" + full_content[:20000]
+            # 메타데이터가 바뀌었을 때만 재빌드 (그 외에는 DB 호출 없음)
+            await admission_corpus.ensure_loaded()
+            
+            admission_results = admission_corpus.select(
+                universities=query_analysis.get("universities", []),
+                admission_type=query_analysis.get("admission_type", "both"),
+                campus_info=query_analysis.get("campus", {}),
+                year=query_analysis.get("year", "2025"),
+                query=query_analysis.get("query", "")
+            )
             
+            _log(f"   발견된 전형결과 문서: {len(admission_results['sources'])}개")
             return admission_results
             
         except Exception as e:
@@ -2082,14 +1830,14 @@ class ConsultingAgent(SubAgentBase):
             for univ_key, data in susi_data.items():
                 univ = data.get("university", "")
                 campus = data.get("campus", "")
-                content = data.get("content", "")[:5000]
+                content = truncate_lines(data.get("content", ""), 5000)
                 
                 univ_name = univ
                 if campus:
                     univ_name += f" {campus}"
                 
                 lines.append(f"\n{univ_name}:")
-                lines.append(content[:5000])
+                lines.append(content)
                 lines.append(f"[출처: {data.get('title', '')}]")
         
         # 정시 데이터
@@ -2099,14 +1847,14 @@ class ConsultingAgent(SubAgentBase):
             for univ_key, data in jeongsi_data.items():
                 univ = data.get("university", "")
                 campus = data.get("campus", "")
-                content = data.get("content", "")[:5000]
+                content = truncate_lines(data.get("content", ""), 5000)
                 
                 univ_name = univ
                 if campus:
                     univ_name += f" {campus}"
                 
                 lines.append(f"\n{univ_name}:")
-                lines.append(content[:5000])
+                lines.append(content)
                 lines.append(f"[출처: {data.get('title', '')}]")
         
         if not lines:
@@ -2130,10 +1878,10 @@ class TeacherAgent(SubAgentBase):
         """학습 계획 및 조언 제공"""
         import time
         
-        _log("")
-        _log("="*60)
+        _log("", DEBUG)
+        _log("="*60, DEBUG)
         _log(f"👨‍🏫 선생님 Agent 실행")
-        _log("="*60)
+        _log("="*60, DEBUG)
         _log(f"쿼리: {query}")
 
         if self.custom_system_prompt:
@@ -2194,7 +1942,7 @@ class TeacherAgent(SubAgentBase):
                 )
 
             _log(f"   조언 완료")
-            _log("="*60)
+            _log("="*60, DEBUG)
 
             return {
                 "agent": self.name,
@@ -3,7 +3,23 @@ Supabase 클라이언트 서비스
 """
 from supabase import create_client, Client
 from config import settings
-from typing import Optional
+from typing import Awaitable, Callable, Optional
+import asyncio
+import json
+import time
+from utils.document_cache import cache_invalidate, cache_invalidate_document
+from services.documents.hashtag_index import hashtag_index
+
+# Storage 스트리밍 업로드 단위 (바이트)
+STORAGE_UPLOAD_CHUNK = 1024 * 1024
+
+
+def _vector_literal(embedding: list[float]) -> str:
+    """
+    임베딩을 PostgreSQL vector 형식으로 변환
+    [0.1, 0.2, 0.3] -> "[0.1,0.2,0.3]" (공백 없이, C 구현 JSON 인코더 사용)
+    """
+    return json.dumps(embedding, separators=(',', ':'))
 
 
 class SupabaseService:
@@ -27,45 +43,56 @@ class SupabaseService:
         return self.get_client()
     
     @classmethod
-    def upload_pdf_to_storage(
+    async def upload_pdf_to_storage(
         cls,
-        file_bytes: bytes,
+        file_path: str,
         file_name: str
     ) -> Optional[tuple]:
         """
-        PDF를 Supabase Storage에 업로드
-        
+        PDF를 Supabase Storage에 업로드 (스트리밍)
+
+        Storage REST API에 파일을 STORAGE_UPLOAD_CHUNK 단위로 읽어 보내므로
+        파일 크기와 관계없이 메모리 사용량이 일정하고, 이벤트 루프를 막지 않습니다.
+
         Returns:
             (storage_file_name, public_url) 튜플 (성공 시) 또는 None (실패 시)
         """
+        import os
         import uuid
-        client = cls.get_client()
-        
+        import httpx
+
         try:
             # UUID로 고유한 파일명 생성 (한글 파일명 문제 회피)
             file_extension = file_name.split('.')[-1] if '.' in file_name else 'pdf'
             storage_file_name = f"{uuid.uuid4()}.{file_extension}"
             storage_path = f"pdfs/{storage_file_name}"
-            
-            # 기존 파일이 있으면 삭제
-            try:
-                client.storage.from_('document').remove([storage_path])
-            except:
-                pass  # 파일이 없으면 무시
-            
-            # 새 파일 업로드
-            client.storage.from_('document').upload(
-                storage_path,
-                file_bytes,
-                file_options={
-                    "content-type": "application/pdf",
-                    "x-upsert": "true"
-                }
-            )
-            
+            base_url = f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object"
+
+            async def file_chunks():
+                with open(file_path, 'rb') as f:
+                    while True:
+                        chunk = await asyncio.to_thread(f.read, STORAGE_UPLOAD_CHUNK)
+                        if not chunk:
+                            break
+                        yield chunk
+
+            async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0)) as http:
+                response = await http.post(
+                    f"{base_url}/document/{storage_path}",
+                    content=file_chunks(),
+                    headers={
+                        "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+                        "apikey": settings.SUPABASE_KEY,
+                        "Content-Type": "application/pdf",
+                        "Content-Length": str(os.path.getsize(file_path)),
+                        "x-upsert": "true",
+                    }
+                )
+                response.raise_for_status()
+
             # Public URL 생성
-            public_url = client.storage.from_('document').get_public_url(storage_path)
-            
+            public_url = f"{base_url}/public/document/{storage_path}"
+
             print(f"✅ PDF Storage 업로드 완료: {storage_path}")
             print(f"   원본 파일명: {file_name}")
             return (storage_file_name, public_url)
@@ -111,6 +138,8 @@ class SupabaseService:
                 data['hashtags'] = hashtags
             
             response = client.table('documents_metadata').insert(data).execute()
+            cache_invalidate_document(file_name)
+            hashtag_index.upsert(response.data[0] if response.data else data)
 
             return True
         except Exception as e:
@@ -128,13 +157,9 @@ class SupabaseService:
         client = cls.get_client()
 
         try:
-            # 임베딩을 PostgreSQL vector 형식으로 변환
-            # [0.1, 0.2, 0.3] -> "[0.1,0.2,0.3]" (공백 없이)
-            embedding_str = '[' + ','.join(map(str, embedding)) + ']'
-
             response = client.table('policy_documents').insert({
                 'content': content,
-                'embedding': embedding_str,  # 문자열로 변환
+                'embedding': _vector_literal(embedding),  # 문자열로 변환
                 'metadata': metadata
             }).execute()
 
@@ -142,7 +167,129 @@ class SupabaseService:
         except Exception as e:
             print(f"❌ 문서 청크 삽입 오류: {e}")
             return False
-    
+
+    @classmethod
+    async def insert_document_chunks(
+        cls,
+        file_name: str,
+        chunks: list[str],
+        embeddings: list[list[float]],
+        batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        sections: Optional[list[list[str]]] = None,
+        skip_batches: Optional[set] = None,
+        on_batch_inserted: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> dict:
+        """
+        문서 청크 일괄 삽입 (여러 행 INSERT를 배치 단위로 동시 실행)
+
+        배치마다 실패를 격리해 재시도하고, 재시도 후에도 실패한 배치가 있으면
+        failed > 0으로 반환합니다 (정리는 호출 측에서 delete_document로).
+
+        sections: 청크별 제목 경로 (metadata.section에 "상위 > 하위" 형식으로 저장)
+        skip_batches: 이미 저장된 배치 번호 (업로드 작업 재개 시, 같은 batch_size여야 함)
+        on_batch_inserted: 배치 저장 성공 시 (배치 번호, 행 수)로 await (체크포인트 기록용 코루틴 함수)
+
+        Returns:
+            {"inserted", "skipped", "failed", "batches", "retries", "elapsed"}
+
+        Raises:
+            ValueError: sections 길이가 chunks와 다르면 (삽입 전에 검사)
+        """
+        if sections is not None and len(sections) != len(chunks):
+            raise ValueError(f"청크별 제목 경로 개수 불일치 (sections {len(sections)} / chunks {len(chunks)})")
+        batch_size = batch_size or settings.CHUNK_INSERT_BATCH_SIZE
+        max_concurrency = max_concurrency or settings.CHUNK_INSERT_CONCURRENCY
+        max_retries = settings.CHUNK_INSERT_RETRIES if max_retries is None else max_retries
+        client = cls.get_client()
+        started = time.time()
+
+        total = len(chunks)
+        rows = [
+            {
+                'content': chunk,
+                'embedding': _vector_literal(embedding),
+                # 간소화된 metadata (fileName, chunkIndex, totalChunks + 제목 경로)
+                'metadata': {
+                    'fileName': file_name,
+                    'chunkIndex': idx,
+                    'totalChunks': total,
+                    **({'section': ' > '.join(sections[idx])} if sections and sections[idx] else {})
+                }
+            }
+            for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+        ]
+        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+        skip_batches = skip_batches or set()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        stats = {
+            "inserted": 0,
+            "skipped": sum(len(batch) for i, batch in enumerate(batches) if i in skip_batches),
+            "failed": total - len(rows),
+            "batches": len(batches) - sum(1 for i in range(len(batches)) if i in skip_batches),
+            "retries": 0,
+        }
+        done = stats["skipped"]
+
+        async def insert_batch(batch_no: int, batch: list[dict]):
+            nonlocal done
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    try:
+                        await asyncio.to_thread(client.table('policy_documents').insert(batch).execute)
+                    except Exception as e:
+                        if attempt == max_retries:
+                            print(f"❌ 청크 배치 {batch_no + 1}/{len(batches)} 삽입 실패 ({len(batch)}개): {e}")
+                            stats["failed"] += len(batch)
+                            break
+                        stats["retries"] += 1
+                        print(f"⚠️ 청크 배치 {batch_no + 1}/{len(batches)} 재시도 {attempt + 1}/{max_retries}: {e}")
+                        await asyncio.sleep(0.5 * 2 ** attempt)
+                        continue
+                    stats["inserted"] += len(batch)
+                    # 체크포인트 기록 실패가 배치 재삽입(중복 행)으로 이어지지 않도록 삽입 try 밖에서 호출
+                    if on_batch_inserted is not None:
+                        await on_batch_inserted(batch_no, len(batch))
+                    break
+                done += len(batch)
+                print(f"   진행: {done}/{total} ({done / total * 100:.0f}%)")
+
+        await asyncio.gather(*[
+            insert_batch(i, batch) for i, batch in enumerate(batches) if i not in skip_batches
+        ])
+        stats["elapsed"] = time.time() - started
+        return stats
+
+    @classmethod
+    async def insert_admission_rows(
+        cls,
+        file_name: str,
+        admission_type: str,
+        rows: list[dict]
+    ) -> int:
+        """
+        전형결과 행 일괄 삽입 (문서 삭제 시 CASCADE로 함께 삭제)
+
+        Raises:
+            Exception: 삽입 실패 (0개로 저장된 것처럼 보이지 않도록 그대로 전파 → 업로드 작업 재시도)
+        """
+        if not rows:
+            return 0
+        client = cls.get_client()
+
+        data = [
+            {**row, 'file_name': file_name, 'admission_type': admission_type or None}
+            for row in rows
+        ]
+        try:
+            await asyncio.to_thread(client.table('admission_rows').insert(data).execute)
+        except Exception as e:
+            print(f"❌ 전형결과 행 삽입 오류: {e}")
+            raise
+        cache_invalidate("admission_rows")
+        return len(data)
+
     @classmethod
     async def update_document_metadata(
         cls,
@@ -170,6 +317,8 @@ class SupabaseService:
                 .update(update_data)\
                 .eq('file_name', file_name)\
                 .execute()
+            cache_invalidate_document(file_name)
+            hashtag_index.update(file_name, **update_data)
             
             print(f"✅ 문서 메타데이터 수정 완료: {file_name}")
             if hashtags is not None:
@@ -273,6 +422,8 @@ class SupabaseService:
                 .delete()\
                 .eq('file_name', document_id)\
                 .execute()
+            cache_invalidate_document(document_id)
+            hashtag_index.remove(document_id)
 
             print(f"\n✅ 문서 삭제 완료!")
             print(f"   파일명: {document_id}")
@@ -281,6 +432,8 @@ class SupabaseService:
             return True
 
         except Exception as e:
+            # 일부 단계만 삭제되었을 수 있으므로 캐시는 비움
+            cache_invalidate_document(document_id)
             print(f"\n❌ 문서 삭제 오류: {e}")
             print(f"{'='*60}\n")
             import traceback
@@ -0,0 +1,247 @@
+"""
+메모리 ANN 인덱스 (IVF-Flat, 코사인 유사도)
+
+벡터를 구면 k-means 중심(nlist개)으로 묶고, 검색 시 쿼리와 가까운 중심 nprobe개의 목록만
+정확히 계산합니다. 벡터는 정규화해 목록 순서대로 한 배열에 이어 붙여 두므로
+- 목록 하나 = 연속 구간 하나 (행렬-벡터 곱 한 번)
+- 스냅샷은 .npy 파일 그대로 저장하고, 시작 시 np.load(mmap_mode="r")로 메모리 매핑
+(여러 워커 프로세스가 같은 스냅샷을 열면 페이지 캐시를 공유)
+
+행마다 붙는 값(문서 id, 페이지 등)은 columns로 같은 순서의 배열에 함께 저장합니다.
+벡터는 dtype(float32 / float16 / int8, utils/embedding_codec)으로 저장하고, 검색 시 목록 구간만
+float32로 올려 계산합니다 (int8은 행별 scale을 scales.npy에 함께 저장).
+exact_search()는 같은 벡터 전체를 계산하는 기준 검색 (recall 측정용)입니다.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from utils.embedding_codec import dequantize_rows, quantize_rows
+
+# k-means 학습에 쓰는 목록당 표본 수 (전체가 더 적으면 전체)
+TRAIN_SAMPLES_PER_LIST = 64
+# 배정 / 정확 검색 시 한 번에 곱하는 행 수 (메모리 상한)
+ASSIGN_BATCH = 65536
+
+_VECTORS = "vectors.npy"
+_CENTROIDS = "centroids.npy"
+_OFFSETS = "offsets.npy"
+_IDS = "ids.npy"
+_SCALES = "scales.npy"
+_META = "meta.json"
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (float32, 0 벡터는 그대로)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def default_nlist(count: int) -> int:
+    """목록 수 기본값: 약 sqrt(N) (목록당 평균 sqrt(N)개)"""
+    return max(1, min(count, int(round(np.sqrt(count)))))
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """점수 상위 k개 위치 (내림차순)"""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """각 벡터 → 가장 가까운 중심 (내적 최대)"""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), ASSIGN_BATCH):
+        labels[start:start + ASSIGN_BATCH] = np.argmax(vectors[start:start + ASSIGN_BATCH] @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """구면 k-means (표본으로 학습, 빈 목록은 임의 표본으로 다시 시작)"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * TRAIN_SAMPLES_PER_LIST)
+    sample = vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))]
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class IvfIndex:
+    """IVF-Flat 인덱스 (정규화 벡터, 내적 = 코사인 유사도)"""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        columns: Optional[Dict[str, np.ndarray]] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        scales: Optional[np.ndarray] = None
+    ):
+        self.vectors = vectors
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.columns = columns or {}
+        self.meta = meta or {}
+        self.scales = scales
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def dtype(self) -> str:
+        return self.meta.get("dtype", "float32")
+
+    def rows(self, start: int, end: int) -> np.ndarray:
+        """[start, end) 구간 벡터 (float32로 복원)"""
+        scales = None if self.scales is None else self.scales[start:end]
+        return dequantize_rows(self.vectors[start:end], scales)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        columns: Optional[Dict[str, np.ndarray]] = None,
+        nlist: Optional[int] = None,
+        iterations: int = 10,
+        seed: int = 0,
+        meta: Optional[Dict[str, Any]] = None,
+        dtype: str = "float32"
+    ) -> "IvfIndex":
+        """
+        인덱스 생성
+
+        Args:
+            vectors: (N, D) 임베딩 (정규화 전이어도 됨)
+            ids: (N,) 행 id (청크 id)
+            columns: 행마다 붙는 값 {이름: (N,) 배열}
+            nlist: 목록 수 (기본 약 sqrt(N))
+            dtype: 벡터 저장 정밀도 (중심은 항상 float32)
+        """
+        started = time.time()
+        vectors = normalize(vectors)
+        ids = np.asarray(ids, dtype=np.int64)
+        nlist = min(nlist or default_nlist(len(vectors)), len(vectors))
+
+        centroids = train_centroids(vectors, nlist, iterations, seed)
+        labels = _assign(vectors, centroids)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=nlist), out=offsets[1:])
+        stored, scales = quantize_rows(vectors[order], dtype)
+
+        meta = dict(meta or {})
+        meta.update({
+            "count": int(len(ids)),
+            "dimension": int(vectors.shape[1]),
+            "nlist": int(nlist),
+            "dtype": dtype,
+            "build_seconds": round(time.time() - started, 3),
+        })
+        return cls(
+            stored,
+            centroids,
+            offsets,
+            ids[order],
+            {name: np.asarray(values)[order] for name, values in (columns or {}).items()},
+            meta,
+            scales,
+        )
+
+    def search(self, query: np.ndarray, k: int, nprobe: int = 8) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        근사 검색
+
+        Returns:
+            (행 위치, 코사인 유사도) - 유사도 내림차순, 최대 k개
+            (id / columns는 위치로 조회: index.ids[positions])
+        """
+        query = normalize(query)
+        probes = _top_k(self.centroids @ query, min(nprobe, self.nlist))
+
+        positions, scores = [], []
+        for probe in probes:
+            start, end = int(self.offsets[probe]), int(self.offsets[probe + 1])
+            if start == end:
+                continue
+            positions.append(np.arange(start, end))
+            scores.append(self.rows(start, end) @ query)
+        if not positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        positions, scores = np.concatenate(positions), np.concatenate(scores)
+        top = _top_k(scores, k)
+        return positions[top], scores[top]
+
+    def exact_search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """전체 벡터 정확 검색 (search()와 같은 반환 형식)"""
+        query = normalize(query)
+        scores = np.concatenate([
+            self.rows(start, start + ASSIGN_BATCH) @ query
+            for start in range(0, len(self.vectors), ASSIGN_BATCH)
+        ])
+        top = _top_k(scores, k)
+        return top, scores[top]
+
+    def save(self, directory: str):
+        """스냅샷 저장 (디렉토리는 새로 만드는 경로여야 함 - 교체는 호출 측에서)"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, _VECTORS), self.vectors)
+        np.save(os.path.join(directory, _CENTROIDS), self.centroids)
+        np.save(os.path.join(directory, _OFFSETS), self.offsets)
+        np.save(os.path.join(directory, _IDS), self.ids)
+        if self.scales is not None:
+            np.save(os.path.join(directory, _SCALES), self.scales)
+        for name, values in self.columns.items():
+            np.save(os.path.join(directory, f"col_{name}.npy"), values)
+        with open(os.path.join(directory, _META), "w", encoding="utf-8") as f:
+            json.dump({**self.meta, "columns": sorted(self.columns)}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "IvfIndex":
+        """스냅샷 로드 (mmap=True면 벡터 / 행 값은 메모리 매핑)"""
+        mode = "r" if mmap else None
+        with open(os.path.join(directory, _META), encoding="utf-8") as f:
+            meta = json.load(f)
+        columns = {
+            name: np.load(os.path.join(directory, f"col_{name}.npy"), mmap_mode=mode)
+            for name in meta.pop("columns", [])
+        }
+        scales_path = os.path.join(directory, _SCALES)
+        return cls(
+            np.load(os.path.join(directory, _VECTORS), mmap_mode=mode),
+            np.load(os.path.join(directory, _CENTROIDS)),
+            np.load(os.path.join(directory, _OFFSETS)),
+            np.load(os.path.join(directory, _IDS), mmap_mode=mode),
+            columns,
+            meta,
+            np.load(scales_path, mmap_mode=mode) if os.path.exists(scales_path) else None,
+        )
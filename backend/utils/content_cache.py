@@ -0,0 +1,265 @@
+"""
+업로드 내용 주소 캐시 (재업로드 시 Gemini 호출 생략)
+
+관리자가 제목/해시태그만 고치고 같은 PDF를 다시 올리는 경우가 많아서,
+파싱 · 요약 · 임베딩 결과를 "내용 해시" 기준으로 로컬 SQLite 파일에 보관합니다.
+
+- parse      PDF 바이트 해시 (+ 조각 페이지 수) → 페이지 조각별 Markdown
+- analysis   PDF 바이트 해시 → 요약 / 출처 / 해시태그 / 전형결과 행
+- embedding  임베딩 모델 + 차원 + 저장 정밀도 + 청크 텍스트 해시 → 임베딩 (float32 원본)
+  (캐시 값이 그대로 Supabase 청크 임베딩으로 저장되므로 EMBEDDING_STORAGE_DTYPE로 줄이지 않음)
+
+같은 파일은 LLM 호출 없이 처리되고, 일부 페이지만 바뀐 문서는 바뀐 청크만 다시 임베딩합니다.
+항목마다 처음 만들 때 든 시간/토큰을 같이 저장해 두었다가, 재사용할 때 절약량으로 기록합니다.
+(GET /api/upload/cache 로 누적 리포트 확인)
+
+직렬화는 공유 캐시(utils/shared_cache)와 같은 형식을 사용합니다.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.shared_cache import decode_value, encode_value
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATH = os.path.join(BACKEND_DIR, "cache", "content_cache.sqlite3")
+
+# 크기 정리는 쓰기 N회마다 한 번만
+EVICT_EVERY_WRITES = 64
+# SQLite IN (...) 한 번에 조회하는 키 수
+LOOKUP_BATCH = 500
+# 임베딩 저장 정밀도 (embedding 키에도 포함 - 정밀도를 줄여 저장하던 예전 항목은 재사용하지 않음)
+VECTOR_DTYPE = "float32"
+
+
+def content_hash(*parts: Any) -> str:
+    """내용 해시 (sha256, 문자열은 UTF-8)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class ContentHasher:
+    """content_hash(바이트)와 같은 값을 조각 단위로 계산 (파일 전체를 메모리에 올리지 않음)"""
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def update(self, chunk: bytes):
+        self._digest.update(chunk)
+        self.size += len(chunk)
+
+    def hexdigest(self) -> str:
+        digest = self._digest.copy()
+        digest.update(b'\x00')
+        return digest.hexdigest()
+
+
+class ContentCache:
+    """내용 해시 → 처리 결과 (SQLite)"""
+
+    def __init__(self, path: str, max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        """SQLite 연결 (fork된 워커에서는 연결을 새로 엶)"""
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " seconds REAL NOT NULL, tokens INTEGER NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (kind, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS savings ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, file_name TEXT,"
+            " kind TEXT NOT NULL, hits INTEGER NOT NULL, misses INTEGER NOT NULL,"
+            " seconds REAL NOT NULL, tokens INTEGER NOT NULL)"
+        )
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._connect()
+        return self._conn
+
+    # ------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------
+
+    def get(self, kind: str, key: str) -> Optional[Tuple[Any, float, int]]:
+        """
+        Returns:
+            (값, 처음 만들 때 걸린 시간(초), 사용 토큰) 또는 None
+        """
+        hits = self.get_many(kind, [key])
+        return hits.get(key)
+
+    def get_many(self, kind: str, keys: List[str]) -> Dict[str, Tuple[Any, float, int]]:
+        """여러 키 조회 {key: (값, 시간, 토큰)} - 없는 키는 빠짐"""
+        found: Dict[str, Tuple[Any, float, int]] = {}
+        unique = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(unique), LOOKUP_BATCH):
+                batch = unique[i:i + LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, value, seconds, tokens FROM entries WHERE kind = ? AND key IN ({placeholders})",
+                    (kind, *batch)
+                ).fetchall()
+                for key, blob, seconds, tokens in rows:
+                    try:
+                        found[key] = (decode_value(blob), seconds, tokens)
+                    except Exception:
+                        continue
+            if found:
+                self.conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE kind = ? AND key = ?",
+                    [(now, kind, key) for key in found]
+                )
+        return found
+
+    def set(self, kind: str, key: str, data: Any, seconds: float = 0.0, tokens: int = 0):
+        self.set_many(kind, [(key, data, seconds, tokens)])
+
+    def set_many(self, kind: str, items: List[Tuple[str, Any, float, int]]):
+        """여러 항목 저장 [(key, 값, 시간, 토큰), ...]"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, data, seconds, tokens in items:
+            blob = encode_value(data, VECTOR_DTYPE)
+            rows.append((kind, key, sqlite3.Binary(blob), len(blob), float(seconds), int(tokens), now))
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entries (kind, key, value, size, seconds, tokens, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._writes += 1
+            if self._writes % EVICT_EVERY_WRITES == 0:
+                self._evict()
+
+    def _evict(self):
+        """최대 크기 유지 - 가장 오래 쓰지 않은 항목부터 삭제 (lock 보유 상태에서 호출)"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for kind, key, size in self.conn.execute("SELECT kind, key, size FROM entries ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            victims.append((kind, key))
+            total -= size
+        self.conn.executemany("DELETE FROM entries WHERE kind = ? AND key = ?", victims)
+
+    # ------------------------------------------------------------
+    # 절약 리포트
+    # ------------------------------------------------------------
+
+    def record_savings(self, file_name: str, items: Dict[str, Dict[str, Any]]):
+        """
+        재사용 결과 기록 (업로드 1건 · 종류별 1행)
+
+        Args:
+            items: {종류: {"hits", "misses", "seconds", "tokens"}} - 같은 업로드의 행은 같은 시각으로 기록
+                   (최근 업로드 리포트가 시각 + 파일명으로 묶음)
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO savings (ts, file_name, kind, hits, misses, seconds, tokens) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (now, file_name, kind, item["hits"], item["misses"], item["seconds"], item["tokens"])
+                    for kind, item in items.items()
+                ]
+            )
+
+    def report(self, recent: int = 20) -> Dict[str, Any]:
+        """누적 절약량 (종류별) + 저장 항목 현황 + 최근 업로드별 절약량"""
+        with self._lock:
+            by_kind = self.conn.execute(
+                "SELECT kind, COUNT(*), SUM(hits), SUM(misses), SUM(seconds), SUM(tokens) FROM savings GROUP BY kind"
+            ).fetchall()
+            entries = self.conn.execute(
+                "SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY kind"
+            ).fetchall()
+            uploads = self.conn.execute(
+                "SELECT ts, file_name, SUM(hits), SUM(misses), SUM(seconds), SUM(tokens) FROM savings"
+                " GROUP BY ts, file_name ORDER BY ts DESC LIMIT ?",
+                (recent,)
+            ).fetchall()
+
+        savings = {
+            kind: {
+                "uploads": count,
+                "hits": hits,
+                "misses": misses,
+                "hitRate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "secondsSaved": round(seconds, 1),
+                "tokensSaved": tokens,
+            }
+            for kind, count, hits, misses, seconds, tokens in by_kind
+        }
+        return {
+            "path": self.path,
+            "maxMB": round(self.max_bytes / 1024 / 1024),
+            "entries": {kind: {"count": count, "sizeMB": round(size / 1024 / 1024, 2)} for kind, count, size in entries},
+            "savings": savings,
+            "totalSecondsSaved": round(sum(item["secondsSaved"] for item in savings.values()), 1),
+            "totalTokensSaved": sum(item["tokensSaved"] for item in savings.values()),
+            "recentUploads": [
+                {
+                    "timestamp": ts,
+                    "fileName": file_name,
+                    "hits": hits,
+                    "misses": misses,
+                    "secondsSaved": round(seconds, 1),
+                    "tokensSaved": tokens,
+                }
+                for ts, file_name, hits, misses, seconds, tokens in uploads
+            ],
+        }
+
+
+_content_cache: Optional[ContentCache] = None
+_init_lock = threading.Lock()
+
+
+def get_content_cache() -> Optional[ContentCache]:
+    """전역 내용 캐시 (CONTENT_CACHE_ENABLED=false거나 파일을 열 수 없으면 None)"""
+    global _content_cache
+    if _content_cache is not None:
+        return _content_cache
+    from config import settings
+    if not settings.CONTENT_CACHE_ENABLED:
+        return None
+    with _init_lock:
+        if _content_cache is None:
+            try:
+                _content_cache = ContentCache(
+                    settings.CONTENT_CACHE_PATH or DEFAULT_PATH,
+                    max_bytes=settings.CONTENT_CACHE_MAX_MB * 1024 * 1024
+                )
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ 내용 캐시 초기화 실패 (캐시 없이 진행): {e}")
+                return None
+    return _content_cache
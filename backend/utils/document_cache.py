@@ -1,146 +1,454 @@
 """
 문서 조회 결과 캐싱 시스템
 
-Supabase에서 조회한 문서 데이터를 메모리에 캐싱하여 
+Supabase에서 조회한 문서 데이터를 메모리에 캐싱하여
 반복 조회 시 성능을 향상시킵니다.
+
+- 네임스페이스(metadata, chunks, ...)별 TTL / stale 허용 시간
+- 항목 수가 아닌 바이트 크기 기준 LRU (청크 1개 목록 ~ 메타데이터 전체 테이블까지 크기 차이가 큼)
+- 키는 (네임스페이스, 정렬된 조건 튜플) 그대로 사용 (조회마다 json.dumps + MD5 하지 않음)
+- stale-while-revalidate: 만료 직후에는 이전 값을 바로 반환하고 백그라운드에서 새로 조회
+- 문서 업로드/수정/삭제 시 invalidate_document()로 관련 항목만 제거
+- SHARED_CACHE_PATH를 설정하면 워커 간 공유 2차 캐시(utils/shared_cache) 사용
 """
 
-import time
-import hashlib
+import asyncio
 import json
-from typing import Any, Dict, Optional
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
 from collections import OrderedDict
 import threading
 
+from config import settings
+from utils.shared_cache import SharedCacheStore
+
+
+# 네임스페이스별 정책: (TTL 초, TTL 이후 stale 값을 반환하며 재조회할 수 있는 시간 초)
+# 업로드/수정/삭제는 invalidate_document()로 즉시 반영되므로 TTL은 외부 변경 대비용
+NAMESPACE_POLICIES: Dict[str, Tuple[int, int]] = {
+    "metadata": (600, 3600),      # documents_metadata 전체 테이블
+    "chunks": (3600, 86400),      # 파일별 청크 (파일 내용은 재업로드 전까지 불변)
+    "admission_results": (3600, 3600),
+    "admission_rows": (3600, 3600),  # 업로드 시 추출한 전형결과 행 전체 테이블
+    "documents": (3600, 3600),    # RAG documents 테이블 (요약 + 요약 임베딩)
+    "rag_chunks": (3600, 86400),  # RAG document_chunks 본문 (청크 id별, 재업로드 시 id가 바뀜)
+    "embeddings": (86400, 0),     # 쿼리 임베딩 (모델 + 텍스트가 같으면 불변)
+    "extractions": (1800, 0),     # UniversityAgent 정보 추출 결과 (문서 버전 + 질문 의도)
+}
+
+# 다른 워커의 무효화 기록을 확인하는 주기 (초)
+SHARED_SYNC_INTERVAL = 1.0
+
+CacheKey = Tuple[str, Tuple[Tuple[str, Hashable], ...]]
+
+
+def _freeze(value: Any) -> Hashable:
+    """조회 조건 값을 해시 가능한 형태로 변환"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """캐시 데이터의 대략적인 메모리 크기 (바이트)"""
+    size = sys.getsizeof(obj)
+    if _depth > 8:
+        return size
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, _depth + 1)
+    return size
+
 
 class DocumentCache:
-    """문서 조회 결과 캐시 (LRU)"""
-    
-    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
+    """문서 조회 결과 캐시 (네임스페이스 + 바이트 크기 기준 LRU)"""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: int = 3600,
+        policies: Optional[Dict[str, Tuple[int, int]]] = None,
+        shared: Optional[SharedCacheStore] = None
+    ):
         """
         Args:
-            max_size: 최대 캐시 항목 수
-            ttl_seconds: 캐시 유효 시간 (초, 기본 1시간)
+            max_bytes: 캐시 전체 최대 크기 (바이트)
+            ttl_seconds: 정책이 없는 네임스페이스의 기본 유효 시간 (초, 기본 1시간)
+            policies: 네임스페이스별 (TTL, stale 허용 시간)
+            shared: 워커 간 공유 2차 캐시 (None이면 프로세스 내 캐시만 사용)
         """
-        self.max_size = max_size
+        self.max_bytes = max_bytes
         self.ttl_seconds = ttl_seconds
-        self._cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self.policies = dict(NAMESPACE_POLICIES if policies is None else policies)
+        self._cache: OrderedDict[CacheKey, Dict[str, Any]] = OrderedDict()
         self._lock = threading.Lock()
-        self._hits = 0
-        self._misses = 0
-    
-    def _generate_key(self, cache_type: str, **kwargs) -> str:
-        """캐시 키 생성"""
-        # 정렬된 키-값 쌍으로 일관된 키 생성
-        sorted_params = sorted(kwargs.items())
-        key_string = f"{cache_type}:{json.dumps(sorted_params, sort_keys=True)}"
-        return hashlib.md5(key_string.encode()).hexdigest()
-    
+        self._bytes = 0
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.shared = shared
+        self._last_shared_sync = 0.0
+
+    def _make_key(self, cache_type: str, **kwargs) -> CacheKey:
+        """캐시 키 생성 (정렬된 조건 튜플)"""
+        return (cache_type, tuple(sorted((k, _freeze(v)) for k, v in kwargs.items())))
+
+    def _policy(self, cache_type: str) -> Tuple[int, int]:
+        return self.policies.get(cache_type, (self.ttl_seconds, 0))
+
+    def _ns_stats(self, cache_type: str) -> Dict[str, int]:
+        """네임스페이스 통계 (lock 보유 상태에서 호출)"""
+        stats = self._stats.get(cache_type)
+        if stats is None:
+            stats = {
+                'hits': 0, 'stale_hits': 0, 'shared_hits': 0, 'misses': 0,
+                'evictions': 0, 'loads': 0, 'load_errors': 0
+            }
+            self._stats[cache_type] = stats
+        return stats
+
+    def _remove(self, key: CacheKey, evicted: bool = False):
+        """항목 제거 (lock 보유 상태에서 호출)"""
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry['size']
+        if evicted:
+            self._ns_stats(key[0])['evictions'] += 1
+
+    def _lookup(self, key: CacheKey, allow_stale: bool) -> Tuple[Optional[Any], bool]:
+        """
+        항목 조회 (lock 보유 상태에서 호출)
+
+        Returns:
+            (데이터 또는 None, stale 여부)
+        """
+        stats = self._ns_stats(key[0])
+        entry = self._cache.get(key)
+        if entry is None:
+            stats['misses'] += 1
+            return None, False
+
+        now = time.time()
+        if now <= entry['expires_at']:
+            self._cache.move_to_end(key)
+            stats['hits'] += 1
+            return entry['data'], False
+
+        if allow_stale and now <= entry['stale_until']:
+            self._cache.move_to_end(key)
+            stats['stale_hits'] += 1
+            return entry['data'], True
+
+        # 완전히 만료된 캐시 삭제
+        if now > entry['stale_until']:
+            self._remove(key)
+        stats['misses'] += 1
+        return None, False
+
     def get(self, cache_type: str, **kwargs) -> Optional[Any]:
         """
-        캐시에서 데이터 조회
-        
+        캐시에서 데이터 조회 (TTL 이내 값만)
+
         Args:
             cache_type: 캐시 타입 (metadata, chunks, admission_results 등)
             **kwargs: 조회 조건 (예: university="서울대", filename="...")
-            
+
         Returns:
             캐시된 데이터 또는 None
         """
-        key = self._generate_key(cache_type, **kwargs)
-        
+        key = self._make_key(cache_type, **kwargs)
+        self._sync_shared()
         with self._lock:
-            if key in self._cache:
-                entry = self._cache[key]
-                
-                # TTL 체크
-                if time.time() - entry['timestamp'] > self.ttl_seconds:
-                    # 만료된 캐시 삭제
-                    del self._cache[key]
-                    self._misses += 1
-                    return None
-                
-                # LRU: 최근 사용으로 이동
-                self._cache.move_to_end(key)
-                self._hits += 1
-                
-                return entry['data']
-            else:
-                self._misses += 1
+            data, _ = self._lookup(key, allow_stale=False)
+        if data is None:
+            data, is_stale = self._get_shared(key)
+            if is_stale:
                 return None
-    
+        return data
+
     def set(self, cache_type: str, data: Any, **kwargs):
         """
         캐시에 데이터 저장
-        
+
         Args:
             cache_type: 캐시 타입
             data: 저장할 데이터
             **kwargs: 조회 조건
         """
-        key = self._generate_key(cache_type, **kwargs)
-        
+        self._store(self._make_key(cache_type, **kwargs), data)
+
+    def _store(
+        self,
+        key: CacheKey,
+        data: Any,
+        expires_at: Optional[float] = None,
+        stale_until: Optional[float] = None,
+        write_through: bool = True
+    ):
+        """1차 캐시에 저장 (write_through면 공유 캐시에도 저장)"""
+        if expires_at is None:
+            ttl, stale = self._policy(key[0])
+            expires_at = time.time() + ttl
+            stale_until = expires_at + stale
+        size = estimate_size(data)
+
+        if write_through and self.shared is not None:
+            try:
+                self.shared.set(key[0], self._shared_key(key), data, expires_at, stale_until)
+            except Exception as e:
+                print(f"⚠️ 공유 캐시 저장 실패 ({key[0]}): {e}")
+
         with self._lock:
-            # 최대 크기 초과 시 가장 오래된 항목 삭제
-            if len(self._cache) >= self.max_size and key not in self._cache:
-                self._cache.popitem(last=False)
-            
+            self._remove(key)
+            if size > self.max_bytes:
+                # 캐시 전체보다 큰 항목은 저장하지 않음
+                return
+
+            # 최대 크기 초과 시 가장 오래 사용하지 않은 항목부터 삭제
+            while self._cache and self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._cache))
+                self._remove(oldest, evicted=True)
+
             self._cache[key] = {
                 'data': data,
-                'timestamp': time.time()
+                'size': size,
+                'expires_at': expires_at,
+                'stale_until': stale_until
             }
-            self._cache.move_to_end(key)
-    
+            self._bytes += size
+
+    async def get_or_load(
+        self,
+        cache_type: str,
+        loader: Callable[[], Awaitable[Any]],
+        **kwargs
+    ) -> Any:
+        """
+        캐시 조회 후 없으면 loader로 조회하여 저장 (stale-while-revalidate)
+
+        - TTL 이내: 캐시 값 반환
+        - TTL 지났지만 stale 허용 시간 이내: 캐시 값을 바로 반환하고 백그라운드에서 재조회
+        - 없음: loader 실행 (같은 키를 동시에 요청하면 조회는 1번만 수행)
+
+        Args:
+            cache_type: 캐시 타입
+            loader: 데이터를 조회하는 코루틴 함수 (인자 없음)
+            **kwargs: 조회 조건
+        """
+        key = self._make_key(cache_type, **kwargs)
+        self._sync_shared()
+        with self._lock:
+            data, is_stale = self._lookup(key, allow_stale=True)
+        if data is None or is_stale:
+            # 다른 워커가 이미 새로 조회해 두었을 수 있음
+            shared_data, shared_stale = self._get_shared(key, l1_missed=data is None)
+            if shared_data is not None and (data is None or not shared_stale):
+                data, is_stale = shared_data, shared_stale
+        if data is not None and not is_stale:
+            return data
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = asyncio.ensure_future(self._load(key, loader))
+                # 백그라운드 재조회 실패는 _load에서 로깅 (미회수 예외 경고 방지)
+                future.add_done_callback(lambda f: f.cancelled() or f.exception())
+                self._inflight[key] = future
+
+        if data is not None:
+            # stale 값 반환, 재조회는 백그라운드에서 계속
+            return data
+        return await asyncio.shield(future)
+
+    async def _load(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """loader 실행 후 저장 (조회 중 무효화되었으면 저장하지 않음)"""
+        me = asyncio.current_task()
+        try:
+            data = await loader()
+        except Exception as e:
+            with self._lock:
+                self._ns_stats(key[0])['load_errors'] += 1
+            print(f"⚠️ 캐시 재조회 실패 ({key[0]}): {e}")
+            raise
+        finally:
+            with self._lock:
+                still_current = self._inflight.get(key) is me
+                if still_current:
+                    del self._inflight[key]
+
+        with self._lock:
+            self._ns_stats(key[0])['loads'] += 1
+        if still_current and data is not None:
+            self._store(key, data)
+        return data
+
     def invalidate(self, cache_type: Optional[str] = None, **kwargs):
         """
         캐시 무효화
-        
+
         Args:
             cache_type: 특정 타입만 무효화 (None이면 전체)
             **kwargs: 특정 조건의 캐시만 무효화
         """
+        key = self._make_key(cache_type, **kwargs) if kwargs else None
+        self._invalidate_local(cache_type, key)
+        if self.shared is not None:
+            try:
+                self.shared.invalidate(cache_type, self._shared_key(key) if key else None)
+            except Exception as e:
+                print(f"⚠️ 공유 캐시 무효화 실패 ({cache_type}): {e}")
+
+    def replace_local(self, cache_type: str, data: Any, **kwargs):
+        """
+        이 워커의 1차 캐시 값만 교체하고 다른 워커에는 무효화를 알림
+
+        이 워커가 방금 반영한 변경은 data에 이미 들어 있으므로 다시 조회하지 않고,
+        다른 워커는 공유 캐시의 무효화 기록을 보고 다음 조회 때 DB에서 새로 읽음
+        (이 워커의 사본을 공유 캐시에 쓰지 않으므로 다른 워커의 변경을 덮어쓰지 않음)
+        """
+        key = self._make_key(cache_type, **kwargs)
+        with self._lock:
+            self._inflight.pop(key, None)
+        self._store(key, data, write_through=False)
+        if self.shared is not None:
+            try:
+                self.shared.invalidate(cache_type, self._shared_key(key))
+            except Exception as e:
+                print(f"⚠️ 공유 캐시 무효화 실패 ({cache_type}): {e}")
+
+    def _invalidate_local(self, cache_type: Optional[str], key: Optional[CacheKey]):
+        """1차 캐시에서만 무효화"""
         with self._lock:
-            if cache_type is None and not kwargs:
+            if cache_type is None and key is None:
                 # 전체 캐시 삭제
                 self._cache.clear()
-            elif cache_type and not kwargs:
+                self._bytes = 0
+                self._inflight.clear()
+            elif key is None:
                 # 특정 타입의 모든 캐시 삭제
-                keys_to_delete = [
-                    key for key in self._cache.keys()
-                    if key.startswith(hashlib.md5(cache_type.encode()).hexdigest()[:8])
-                ]
-                for key in keys_to_delete:
-                    del self._cache[key]
+                for key in [k for k in self._cache if k[0] == cache_type]:
+                    self._remove(key)
+                for key in [k for k in self._inflight if k[0] == cache_type]:
+                    del self._inflight[key]
             else:
                 # 특정 키 삭제
-                key = self._generate_key(cache_type, **kwargs)
-                if key in self._cache:
-                    del self._cache[key]
-    
+                self._remove(key)
+                self._inflight.pop(key, None)
+
+    # ------------------------------------------------------------
+    # 공유 2차 캐시
+    # ------------------------------------------------------------
+
+    @staticmethod
+    def _shared_key(key: CacheKey) -> str:
+        """공유 캐시용 문자열 키 (네임스페이스 제외)"""
+        return json.dumps(key[1], ensure_ascii=False, separators=(',', ':'))
+
+    def _get_shared(self, key: CacheKey, l1_missed: bool = True) -> Tuple[Optional[Any], bool]:
+        """공유 캐시 조회, 있으면 1차 캐시에 채움 (Returns: (데이터 또는 None, stale 여부))"""
+        if self.shared is None:
+            return None, False
+        try:
+            found = self.shared.get(key[0], self._shared_key(key))
+        except Exception as e:
+            print(f"⚠️ 공유 캐시 조회 실패 ({key[0]}): {e}")
+            return None, False
+        if found is None:
+            return None, False
+
+        data, expires_at, stale_until = found
+        self._store(key, data, expires_at, stale_until, write_through=False)
+        with self._lock:
+            # 1차 캐시 미스로 집계된 것을 공유 캐시 히트로 정정
+            stats = self._ns_stats(key[0])
+            if l1_missed:
+                stats['misses'] -= 1
+            stats['shared_hits'] += 1
+        return data, time.time() > expires_at
+
+    def _sync_shared(self):
+        """다른 워커가 기록한 무효화를 1차 캐시에 반영 (SHARED_SYNC_INTERVAL마다)"""
+        if self.shared is None:
+            return
+        now = time.monotonic()
+        if now - self._last_shared_sync < SHARED_SYNC_INTERVAL:
+            return
+        self._last_shared_sync = now
+        try:
+            invalidations = self.shared.poll_invalidations()
+        except Exception as e:
+            print(f"⚠️ 공유 캐시 무효화 동기화 실패: {e}")
+            return
+        for ns, shared_key in invalidations:
+            key = (ns, tuple(_freeze(v) for v in json.loads(shared_key))) if shared_key else None
+            self._invalidate_local(ns, key)
+
+    def invalidate_document(self, file_name: str):
+        """
+        문서 1개가 추가/수정/삭제되었을 때 관련 항목 제거
+
+        - metadata: documents_metadata 전체 테이블 캐시
+        - chunks: 해당 파일의 청크 캐시
+        - admission_rows: 전형결과 행 전체 테이블 (삭제 시 CASCADE로 함께 지워짐)
+        - extractions: 정보 추출 결과 (여러 문서 조합이 키라서 항목 전체)
+        """
+        self.invalidate("metadata")
+        self.invalidate("chunks", filename=file_name)
+        self.invalidate("admission_rows")
+        self.invalidate("extractions")
+
     def get_stats(self) -> Dict[str, Any]:
         """캐시 통계 반환"""
         with self._lock:
-            total_requests = self._hits + self._misses
-            hit_rate = (self._hits / total_requests * 100) if total_requests > 0 else 0
-            
+            namespaces: Dict[str, Dict[str, Any]] = {
+                ns: {**stats, 'entries': 0, 'bytes': 0}
+                for ns, stats in self._stats.items()
+            }
+            for (ns, _), entry in self._cache.items():
+                ns_entry = namespaces.setdefault(ns, {'entries': 0, 'bytes': 0})
+                ns_entry['entries'] += 1
+                ns_entry['bytes'] += entry['size']
+
+            hits = sum(s['hits'] + s['stale_hits'] + s['shared_hits'] for s in self._stats.values())
+            misses = sum(s['misses'] for s in self._stats.values())
+            total_requests = hits + misses
+            hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
+
             return {
                 'size': len(self._cache),
-                'max_size': self.max_size,
-                'hits': self._hits,
-                'misses': self._misses,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': hits,
+                'misses': misses,
                 'hit_rate': round(hit_rate, 2),
-                'total_requests': total_requests
+                'total_requests': total_requests,
+                'namespaces': namespaces,
+                'shared': self.shared.get_stats() if self.shared is not None else None
             }
-    
+
     def clear_stats(self):
         """통계 초기화"""
         with self._lock:
-            self._hits = 0
-            self._misses = 0
+            self._stats.clear()
 
 
 # 전역 캐시 인스턴스
-_document_cache = DocumentCache(max_size=100, ttl_seconds=3600)
+_document_cache = DocumentCache(
+    max_bytes=settings.DOCUMENT_CACHE_MAX_MB * 1024 * 1024,
+    shared=SharedCacheStore(
+        settings.SHARED_CACHE_PATH,
+        max_bytes=settings.SHARED_CACHE_MAX_MB * 1024 * 1024,
+        vector_dtype=settings.EMBEDDING_STORAGE_DTYPE
+    ) if settings.SHARED_CACHE_PATH else None
+)
 
 
 def get_document_cache() -> DocumentCache:
@@ -159,11 +467,26 @@ def cache_set(cache_type: str, data: Any, **kwargs):
     _document_cache.set(cache_type, data, **kwargs)
 
 
+async def cache_get_or_load(cache_type: str, loader: Callable[[], Awaitable[Any]], **kwargs) -> Any:
+    """캐시 조회, 없으면 loader로 조회 후 저장 (stale-while-revalidate)"""
+    return await _document_cache.get_or_load(cache_type, loader, **kwargs)
+
+
 def cache_invalidate(cache_type: Optional[str] = None, **kwargs):
     """캐시 무효화"""
     _document_cache.invalidate(cache_type, **kwargs)
 
 
+def cache_replace_local(cache_type: str, data: Any, **kwargs):
+    """이 워커의 캐시 값만 교체하고 다른 워커에는 무효화 알림"""
+    _document_cache.replace_local(cache_type, data, **kwargs)
+
+
+def cache_invalidate_document(file_name: str):
+    """문서 추가/수정/삭제 시 관련 캐시 무효화"""
+    _document_cache.invalidate_document(file_name)
+
+
 def cache_stats() -> Dict[str, Any]:
     """캐시 통계"""
     return _document_cache.get_stats()
@@ -0,0 +1,86 @@
+"""
+임베딩 차원 절단 / 저정밀도 저장
+
+- truncate_embedding: 앞 N차원만 남기고 L2 정규화
+  (gemini-embedding-001은 Matryoshka 학습이라 앞부분 절단 = output_dimensionality 지정과 같은 방식,
+  업로드 / 검색 양쪽이 이 함수를 거쳐 같은 차원 · 같은 정규화를 보장)
+- encode_vector / decode_vector: 캐시용 바이트 (float32 / float16 / int8)
+- quantize_rows / dequantize_rows: ANN 인덱스용 행렬 (int8은 행마다 scale)
+
+int8은 대칭 양자화(행 최대 절댓값 / 127)라 정규화 벡터의 코사인 유사도 오차가 작습니다.
+정밀도별 메모리 / recall 차이는 benchmarks/bench_embedding_precision으로 측정합니다.
+"""
+
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+
+# 캐시 바이트 앞 1바이트 (정밀도)
+_TAGS = {"float32": b'F', "float16": b'H', "int8": b'Q'}
+_DTYPES_BY_TAG = {tag: dtype for dtype, tag in _TAGS.items()}
+
+
+def truncate_embedding(values: Sequence[float], dimension: Optional[int] = None) -> List[float]:
+    """앞 dimension차원만 남기고 L2 정규화 (dimension이 없거나 더 크면 정규화만)"""
+    vector = np.asarray(values, dtype=np.float32)
+    if dimension and dimension < len(vector):
+        vector = vector[:dimension]
+    norm = float(np.linalg.norm(vector))
+    return (vector / norm if norm else vector).tolist()
+
+
+def bytes_per_vector(dimension: int, dtype: str) -> int:
+    """벡터 1개 저장 크기 (int8은 scale float32 포함)"""
+    if dtype == "int8":
+        return dimension + 4
+    return dimension * np.dtype(dtype).itemsize
+
+
+def quantize_rows(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    (N, D) float 행렬 → (저장 행렬, 행별 scale 또는 None)
+
+    int8: round(v / scale), scale = 행 최대 절댓값 / 127
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"지원하지 않는 임베딩 정밀도: {dtype} ({', '.join(DTYPES)})")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype != "int8":
+        return vectors.astype(dtype), None
+    scales = np.abs(vectors).max(axis=-1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[..., None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def dequantize_rows(codes: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """quantize_rows 역변환 → float32"""
+    values = np.asarray(codes, dtype=np.float32)
+    if scales is not None:
+        values = values * np.asarray(scales, dtype=np.float32)[..., None]
+    return values
+
+
+def encode_vector(values: Sequence[float], dtype: str = "float32") -> bytes:
+    """임베딩 1개 → 태그 + 바이트 (int8은 scale float32 4바이트 뒤에 코드)"""
+    codes, scale = quantize_rows(np.asarray(values, dtype=np.float32)[None, :], dtype)
+    body = codes[0].tobytes()
+    if scale is not None:
+        body = struct.pack('<f', float(scale[0])) + body
+    return _TAGS[dtype] + body
+
+
+def is_vector_blob(blob: bytes) -> bool:
+    return blob[:1] in _DTYPES_BY_TAG
+
+
+def decode_vector(blob: bytes) -> List[float]:
+    """encode_vector 역변환 → float 리스트"""
+    dtype, body = _DTYPES_BY_TAG[blob[:1]], blob[1:]
+    if dtype == "int8":
+        (scale,) = struct.unpack('<f', body[:4])
+        return (np.frombuffer(body[4:], dtype=np.int8).astype(np.float32) * scale).tolist()
+    return np.frombuffer(body, dtype=dtype).astype(np.float32).tolist()
@@ -0,0 +1,311 @@
+"""
+이벤트 루프 정지(Stall) 감지 유틸리티
+
+async 코드 안에 숨어있는 동기 블로킹 호출(generate_content, PostgREST .execute(),
+embed_query, genai.upload_file 등)이 이벤트 루프를 얼마나 오래 멈췄는지 측정하고,
+멈춘 순간의 스택을 캡처하여 호출 위치별로 집계합니다.
+
+동작 방식:
+- 루프 안의 heartbeat 코루틴이 주기적으로 깨어나며 실제 지연(lag)을 기록
+- 별도 watchdog 스레드가 heartbeat가 임계값 이상 끊기면 루프 스레드의 스택을 캡처
+- 캡처된 스택에서 프로젝트 코드의 가장 안쪽 프레임을 "블로킹 호출 위치"로 집계
+- ASGI scope가 보이면 요청 경로(path)까지 함께 기록
+
+사용법 (opt-in):
+    LOOP_MONITOR_ENABLED=true LOOP_MONITOR_THRESHOLD_MS=100 uvicorn main:app
+    GET /api/health/loop               → 리포트
+    GET /api/health/loop?fail_over_ms=200 → 위반이 있으면 503 (CI 체크용)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+# backend 디렉토리 (프로젝트 코드 판별용)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 스택 캡처 시 제외할 경로 (라이브러리 코드)
+_LIBRARY_MARKERS = ("site-packages", "dist-packages", os.sep + "lib" + os.sep + "python")
+
+
+class LoopMonitor:
+    """이벤트 루프 lag 측정 + 블로킹 호출 위치 집계"""
+
+    def __init__(
+        self,
+        threshold_ms: float = 100.0,
+        interval_ms: float = 20.0,
+        max_events: int = 200
+    ):
+        """
+        Args:
+            threshold_ms: 이 시간 이상 루프가 멈추면 stall로 기록
+            interval_ms: heartbeat 주기
+            max_events: 보관할 최근 stall 이벤트 수 (집계 / CI 체크는 전체 stall 기준)
+        """
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_beat = time.monotonic()
+
+        # lag 통계
+        self._lag_samples = 0
+        self._lag_total_ms = 0.0
+        self._lag_max_ms = 0.0
+
+        # stall 집계
+        self._pending_stack: Optional[Dict[str, Any]] = None
+        self._events: deque = deque(maxlen=max_events)
+        self._stall_count = 0
+        self._by_site: Dict[str, Dict[str, Any]] = {}
+        self._by_path: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------
+    # 시작 / 종료
+    # ------------------------------------------------------------
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """현재 실행 중인 이벤트 루프에 모니터 부착 (루프 안에서 호출)"""
+        if self._heartbeat_task is not None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch,
+            name="loop-monitor-watchdog",
+            daemon=True
+        )
+        self._watchdog.start()
+        print(f"🩺 이벤트 루프 모니터 시작 (임계값 {self.threshold_ms:.0f}ms)")
+
+    def stop(self):
+        """모니터 중지"""
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None
+
+    # ------------------------------------------------------------
+    # 루프 측 heartbeat
+    # ------------------------------------------------------------
+
+    async def _heartbeat(self):
+        """주기적으로 깨어나며 실제 지연 시간(lag) 측정"""
+        interval = self.interval_ms / 1000.0
+        while not self._stop.is_set():
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            lag_ms = max(0.0, (now - expected) * 1000.0)
+
+            with self._lock:
+                self._last_beat = now
+                self._lag_samples += 1
+                self._lag_total_ms += lag_ms
+                if lag_ms > self._lag_max_ms:
+                    self._lag_max_ms = lag_ms
+
+                # watchdog이 캡처해둔 스택이 있으면 실제 지연 시간과 함께 확정
+                if self._pending_stack is not None and lag_ms >= self.threshold_ms:
+                    self._record_stall(self._pending_stack, lag_ms)
+                self._pending_stack = None
+
+    # ------------------------------------------------------------
+    # watchdog 스레드
+    # ------------------------------------------------------------
+
+    def _watch(self):
+        """heartbeat가 임계값 이상 끊기면 루프 스레드 스택 캡처"""
+        poll = min(self.interval_ms, self.threshold_ms / 2) / 1000.0
+        threshold = self.threshold_ms / 1000.0
+        while not self._stop.wait(poll):
+            with self._lock:
+                stalled_for = time.monotonic() - self._last_beat
+                already_captured = self._pending_stack is not None
+            if stalled_for < threshold or already_captured:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            captured = self._capture(frame)
+            with self._lock:
+                if self._pending_stack is None:
+                    self._pending_stack = captured
+
+    def _capture(self, frame) -> Dict[str, Any]:
+        """스택에서 블로킹 호출 위치와 요청 경로 추출"""
+        stack = traceback.extract_stack(frame)
+        path = None
+
+        # ASGI scope를 가진 프레임에서 요청 경로 찾기
+        f = frame
+        while f is not None:
+            scope = f.f_locals.get("scope")
+            if isinstance(scope, dict) and scope.get("type") == "http":
+                path = f"{scope.get('method', '')} {scope.get('path', '')}".strip()
+                break
+            f = f.f_back
+
+        # 프로젝트 코드 중 가장 안쪽 프레임 = 블로킹 호출을 한 위치
+        site = None
+        for fs in reversed(stack):
+            filename = os.path.abspath(fs.filename)
+            if filename.startswith(BACKEND_DIR) and not any(m in filename for m in _LIBRARY_MARKERS):
+                if os.path.basename(filename) == "loop_monitor.py":
+                    continue
+                rel = os.path.relpath(filename, BACKEND_DIR)
+                site = f"{rel}:{fs.lineno} ({fs.name})"
+                break
+        if site is None and stack:
+            fs = stack[-1]
+            site = f"{fs.filename}:{fs.lineno} ({fs.name})"
+
+        return {
+            "site": site or "unknown",
+            "path": path,
+            "stack": [f"{fs.filename}:{fs.lineno} in {fs.name}" for fs in stack[-15:]],
+        }
+
+    # ------------------------------------------------------------
+    # 집계
+    # ------------------------------------------------------------
+
+    def _record_stall(self, captured: Dict[str, Any], lag_ms: float):
+        """stall 1건 기록 (lock 보유 상태에서 호출)"""
+        event = {
+            "timestamp": time.time(),
+            "blocked_ms": round(lag_ms, 1),
+            **captured,
+        }
+        self._events.append(event)
+        self._stall_count += 1
+
+        path = captured["path"] or "(no request)"
+        for table, key, other in ((self._by_site, captured["site"], path), (self._by_path, path, captured["site"])):
+            entry = table.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "max_at": None})
+            entry["count"] += 1
+            entry["total_ms"] += lag_ms
+            if lag_ms > entry["max_ms"]:
+                # 가장 길게 멈춘 stall의 상대 키 (경로별 → 호출 위치, 호출 위치별 → 경로)
+                entry["max_ms"] = lag_ms
+                entry["max_at"] = other
+
+        print(f"🐢 이벤트 루프 {lag_ms:.0f}ms 정지: {captured['site']}"
+              + (f" [{captured['path']}]" if captured["path"] else ""))
+
+    def get_report(self, top: int = 20) -> Dict[str, Any]:
+        """호출 위치/요청 경로별 집계 리포트"""
+        def ranked(table: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+            rows = [
+                {
+                    "key": key,
+                    "count": v["count"],
+                    "total_ms": round(v["total_ms"], 1),
+                    "max_ms": round(v["max_ms"], 1),
+                }
+                for key, v in table.items()
+            ]
+            rows.sort(key=lambda r: r["total_ms"], reverse=True)
+            return rows[:top]
+
+        with self._lock:
+            avg_lag = self._lag_total_ms / self._lag_samples if self._lag_samples else 0.0
+            return {
+                "running": self.running,
+                "threshold_ms": self.threshold_ms,
+                "lag": {
+                    "samples": self._lag_samples,
+                    "avg_ms": round(avg_lag, 2),
+                    "max_ms": round(self._lag_max_ms, 1),
+                },
+                "stalls": self._stall_count,
+                "by_site": ranked(self._by_site),
+                "by_path": ranked(self._by_path),
+                "recent": list(self._events)[-10:],
+            }
+
+    def check(self, max_block_ms: float) -> List[Dict[str, Any]]:
+        """
+        CI 체크: max_block_ms를 초과해 루프를 멈춘 요청 경로/호출 위치 목록
+
+        최근 이벤트(max_events개)가 아닌 경로별 누적 집계 기준이라 오래전 위반도 빠지지 않음
+
+        Returns:
+            위반 목록 (경로별 최대 정지 1건, 비어있으면 통과)
+        """
+        with self._lock:
+            return [
+                {
+                    "path": path,
+                    "site": v["max_at"],
+                    "blocked_ms": round(v["max_ms"], 1),
+                }
+                for path, v in self._by_path.items()
+                if v["max_ms"] > max_block_ms
+            ]
+
+    def assert_no_stalls(self, max_block_ms: float):
+        """위반이 있으면 AssertionError (테스트/CI 스크립트용)"""
+        violations = self.check(max_block_ms)
+        if violations:
+            lines = [f"  - {v['path']} → {v['site']} ({v['blocked_ms']}ms)" for v in violations]
+            raise AssertionError(
+                f"이벤트 루프가 {max_block_ms:.0f}ms 이상 블로킹됨 ({len(violations)}건):\n" + "\n".join(lines)
+            )
+
+    def reset(self):
+        """통계 초기화"""
+        with self._lock:
+            self._lag_samples = 0
+            self._lag_total_ms = 0.0
+            self._lag_max_ms = 0.0
+            self._events.clear()
+            self._stall_count = 0
+            self._by_site.clear()
+            self._by_path.clear()
+
+
+# 전역 모니터 인스턴스
+_loop_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> Optional[LoopMonitor]:
+    """전역 모니터 인스턴스 반환 (비활성화 상태면 None)"""
+    return _loop_monitor
+
+
+def start_loop_monitor(threshold_ms: float = 100.0) -> LoopMonitor:
+    """전역 모니터 생성 및 시작 (이벤트 루프 안에서 호출)"""
+    global _loop_monitor
+    if _loop_monitor is None:
+        _loop_monitor = LoopMonitor(threshold_ms=threshold_ms)
+    _loop_monitor.start()
+    return _loop_monitor
+
+
+def stop_loop_monitor():
+    """전역 모니터 중지"""
+    if _loop_monitor is not None:
+        _loop_monitor.stop()
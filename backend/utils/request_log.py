@@ -0,0 +1,207 @@
+"""
+요청 단위 에이전트 로그 라우팅
+
+기존에는 sub_agents / final_agent / orchestration_agent 모듈마다 전역 `_log_callback`을 두고
+/api/chat/stream이 요청마다 덮어썼기 때문에, 동시에 들어온 스트림끼리 로그가 섞이고
+콜백이 없으면 모든 로그가 동기 print로 출력되었습니다.
+
+이 모듈은:
+- contextvars로 요청별 LogChannel을 바인딩 (create_task로 만든 하위 작업에도 자동 전파)
+- LogChannel은 asyncio.Queue로 SSE 전송용 로그를 전달 (다른 스레드에서 호출돼도 안전)
+- 채널이 없는 로그는 QueueHandler 기반 비동기 sink로 보내 이벤트 루프를 막지 않음
+- 로그 레벨: 장식용 구분선("="*60 등)은 DEBUG로 찍어 운영 환경에서는 즉시 버려짐
+
+사용법:
+    with bind_log_channel() as channel:
+        task = asyncio.create_task(run_pipeline())
+        ...
+        msg = await channel.queue.get()
+"""
+
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, List, Optional
+
+# 운영 환경 기본 INFO (DEBUG로 설정하면 장식용 구분선까지 출력)
+AGENT_LOG_LEVEL = logging.getLevelName(os.getenv("AGENT_LOG_LEVEL", "INFO").upper())
+if not isinstance(AGENT_LOG_LEVEL, int):
+    AGENT_LOG_LEVEL = logging.INFO
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+
+class LogChannel:
+    """요청 하나에 대한 로그 채널 (SSE 전송용 큐 + 전체 로그 보관)"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None, callback: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            loop: 큐가 속한 이벤트 루프 (None이면 현재 실행 중인 루프)
+            callback: 큐 대신 동기 콜백으로 받고 싶을 때 (레거시 set_log_callback 호환)
+        """
+        try:
+            self.loop = loop or asyncio.get_running_loop()
+        except RuntimeError:
+            self.loop = None
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.logs: List[str] = []
+        self.callback = callback
+
+    def emit(self, msg: str):
+        """로그 1건 전달 (루프 스레드가 아니면 call_soon_threadsafe로 넘김)"""
+        self.logs.append(msg)
+        if self.callback is not None:
+            self.callback(msg)
+            return
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if self.loop is None or running is self.loop:
+            self.queue.put_nowait(msg)
+        elif not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, msg)
+
+    def drain(self) -> List[str]:
+        """큐에 쌓인 로그를 모두 꺼내서 반환"""
+        items = []
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        return items
+
+    async def follow(self, task: "asyncio.Future", timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        작업이 끝날 때까지 로그를 이벤트 기반으로 흘려보내는 async iterator
+
+        큐의 get()과 작업 완료를 asyncio.wait(FIRST_COMPLETED)로 함께 기다리므로
+        로그가 없을 때는 전혀 깨어나지 않고, 작업이 끝나는 즉시 반환됩니다.
+        (기존 wait_for(timeout=0.1) 폴링: 초당 10회 wakeup + 단계 전환마다 최대 100ms 지연)
+
+        Args:
+            task: 완료를 기다릴 작업
+            timeout: 최대 대기 시간(초). 초과하면 작업이 끝나지 않았어도 반복 종료
+                     (호출 측에서 task.done()으로 확인)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        getter: Optional[asyncio.Future] = None
+        try:
+            while not task.done():
+                if getter is None:
+                    getter = asyncio.ensure_future(self.queue.get())
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                done, _ = await asyncio.wait(
+                    {getter, task},
+                    timeout=remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter in done:
+                    yield getter.result()
+                    getter = None
+        finally:
+            if getter is not None and not getter.done():
+                getter.cancel()
+
+        # 작업 완료 직전에 쌓인 로그 처리
+        if getter is not None and getter.done() and not getter.cancelled():
+            yield getter.result()
+        for msg in self.drain():
+            yield msg
+
+
+# 현재 요청의 로그 채널
+_current_channel: ContextVar[Optional[LogChannel]] = ContextVar("agent_log_channel", default=None)
+
+
+@contextmanager
+def bind_log_channel(channel: Optional[LogChannel] = None):
+    """현재 컨텍스트(요청)에 로그 채널 바인딩"""
+    channel = channel or LogChannel()
+    token = _current_channel.set(channel)
+    try:
+        yield channel
+    finally:
+        _current_channel.reset(token)
+
+
+def get_log_channel() -> Optional[LogChannel]:
+    """현재 컨텍스트의 로그 채널 (없으면 None)"""
+    return _current_channel.get()
+
+
+def set_log_callback(callback: Optional[Callable[[str], None]]):
+    """
+    (하위 호환) 현재 컨텍스트에 콜백 채널 바인딩
+
+    모듈 전역이 아니라 호출한 요청의 컨텍스트에만 적용되므로 동시 요청끼리 섞이지 않습니다.
+    """
+    _current_channel.set(LogChannel(callback=callback) if callback else None)
+
+
+# ============================================================
+# 비동기 sink (채널 밖 로그 → QueueHandler → 백그라운드 스레드에서 출력)
+# ============================================================
+
+_sink_logger: Optional[logging.Logger] = None
+_sink_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _get_sink_logger() -> logging.Logger:
+    """QueueHandler 기반 에이전트 로거 (최초 호출 시 리스너 시작)"""
+    global _sink_logger, _sink_listener
+    if _sink_logger is not None:
+        return _sink_logger
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter('%(message)s'))
+
+    _sink_listener = logging.handlers.QueueListener(log_queue, console_handler, respect_handler_level=False)
+    _sink_listener.start()
+    atexit.register(_sink_listener.stop)
+
+    logger = logging.getLogger("agent")
+    logger.setLevel(AGENT_LOG_LEVEL)
+    logger.propagate = False
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _sink_logger = logger
+    return logger
+
+
+def debug_enabled() -> bool:
+    """DEBUG 로그가 출력되는지 (비싼 디버그 문자열 생성 전에 확인)"""
+    return AGENT_LOG_LEVEL <= DEBUG
+
+
+def agent_log(msg: str, level: int = INFO):
+    """
+    에이전트 로그 출력
+
+    - 레벨이 AGENT_LOG_LEVEL보다 낮으면 즉시 반환 (비용 없음)
+    - 요청 채널이 바인딩되어 있으면 채널로 전달 (SSE)
+    - 콘솔 출력은 항상 비동기 sink를 통해 처리
+    """
+    if level < AGENT_LOG_LEVEL:
+        return
+    channel = _current_channel.get()
+    if channel is not None:
+        channel.emit(msg)
+        if channel.callback is not None:
+            return  # 콜백이 출력까지 담당 (레거시 동작)
+    _get_sink_logger().log(level, msg)
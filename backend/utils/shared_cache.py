@@ -0,0 +1,216 @@
+"""
+워커 간 공유 캐시 (2차 캐시 계층)
+
+uvicorn 워커마다 DocumentCache / RAGFunctions 싱글톤을 따로 갖기 때문에
+워커를 늘리면 메모리도, Supabase 콜드 미스도 워커 수만큼 늘어납니다.
+
+이 모듈은 같은 호스트의 모든 워커가 함께 읽는 SQLite(WAL) 파일을
+프로세스 내 캐시(DocumentCache) 뒤에 두는 2차 계층입니다.
+
+- 직렬화: 작은 값은 JSON, 큰 값은 JSON + zlib (청크 본문 압축),
+  임베딩(float 목록)은 float32 / float16 / int8 바이트 (utils/embedding_codec, EMBEDDING_STORAGE_DTYPE)
+- 만료 시각(expires_at / stale_until)을 함께 저장하여 1차 캐시와 같은 정책 유지
+- 최대 크기 초과 시 stale_until이 가장 이른 항목부터 삭제
+- 무효화는 invalidations 테이블에 기록 → 다른 워커가 주기적으로 읽어 1차 캐시에서도 제거
+
+사용법:
+    SHARED_CACHE_PATH=/tmp/uniroad_cache.sqlite3 uvicorn main:app --workers 4
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from utils.embedding_codec import decode_vector, encode_vector, is_vector_blob
+
+# 직렬화 태그 (값 앞 1바이트)
+_TAG_JSON = b'J'
+_TAG_ZLIB = b'Z'
+# 임베딩 태그는 utils/embedding_codec (F: float32, H: float16, Q: int8)
+
+# 이 크기 이상인 JSON은 압축
+COMPRESS_MIN_BYTES = 512
+
+# 크기 정리(SUM 집계 + 삭제)는 쓰기 N회마다 한 번만 (워커 간 쓰기 잠금 경합 감소)
+EVICT_EVERY_WRITES = 32
+
+
+def encode_value(data: Any, vector_dtype: str = "float32") -> bytes:
+    """캐시 값 → 바이트 (임베딩 벡터는 vector_dtype 정밀도)"""
+    if isinstance(data, list) and len(data) >= 16 and all(isinstance(v, float) for v in data):
+        # 임베딩 벡터: float32 기준 JSON 대비 약 1/5 크기 (float16 1/10, int8 1/20)
+        return encode_vector(data, vector_dtype)
+
+    raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return _TAG_ZLIB + zlib.compress(raw, 6)
+    return _TAG_JSON + raw
+
+
+def decode_value(blob: bytes) -> Any:
+    """바이트 → 캐시 값"""
+    if is_vector_blob(blob):
+        return decode_vector(blob)
+    tag, body = blob[:1], blob[1:]
+    if tag == _TAG_ZLIB:
+        body = zlib.decompress(body)
+    return json.loads(body)
+
+
+class SharedCacheStore:
+    """SQLite 기반 워커 간 공유 캐시"""
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024, vector_dtype: str = "float32"):
+        """
+        Args:
+            path: SQLite 파일 경로 (같은 호스트의 워커가 모두 같은 경로 사용)
+            max_bytes: 저장 값 전체 최대 크기 (압축 후 기준)
+            vector_dtype: 임베딩 저장 정밀도 (float32 / float16 / int8)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.vector_dtype = vector_dtype
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_invalidation_id = 0
+        self._writes = 0
+        self._connect()
+
+    def _connect(self):
+        """SQLite 연결 (fork된 워커에서는 연결을 새로 엶)"""
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " ns TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, expires_at REAL NOT NULL, stale_until REAL NOT NULL,"
+            " PRIMARY KEY (ns, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_stale_until ON cache (stale_until)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS invalidations ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, ns TEXT, key TEXT, pid INTEGER, ts REAL)"
+        )
+
+        row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM invalidations").fetchone()
+        self._last_invalidation_id = row[0]
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._connect()
+        return self._conn
+
+    # ------------------------------------------------------------
+    # 조회 / 저장
+    # ------------------------------------------------------------
+
+    def get(self, ns: str, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Returns:
+            (값, expires_at, stale_until) 또는 None (없거나 stale 기간까지 지난 경우)
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at, stale_until FROM cache WHERE ns = ? AND key = ?",
+                (ns, key)
+            ).fetchone()
+        if row is None or row[2] < time.time():
+            return None
+        try:
+            return decode_value(row[0]), row[1], row[2]
+        except Exception:
+            return None
+
+    def set(self, ns: str, key: str, data: Any, expires_at: float, stale_until: float):
+        """값 저장 (크기 초과 시 오래된 항목 정리)"""
+        blob = encode_value(data, self.vector_dtype)
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, size, expires_at, stale_until)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (ns, key, sqlite3.Binary(blob), len(blob), expires_at, stale_until)
+            )
+            self._writes += 1
+            if self._writes % EVICT_EVERY_WRITES == 0:
+                self._evict()
+
+    def _evict(self):
+        """만료 항목 삭제 + 최대 크기 유지 (lock 보유 상태에서 호출)"""
+        self.conn.execute("DELETE FROM cache WHERE stale_until < ?", (time.time(),))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT ns, key, size FROM cache ORDER BY stale_until").fetchall()
+        victims = []
+        for ns, key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((ns, key))
+            total -= size
+        self.conn.executemany("DELETE FROM cache WHERE ns = ? AND key = ?", victims)
+
+    # ------------------------------------------------------------
+    # 무효화 (다른 워커에 전파)
+    # ------------------------------------------------------------
+
+    def invalidate(self, ns: Optional[str] = None, key: Optional[str] = None):
+        """항목 삭제 + 무효화 기록 (ns=None이면 전체)"""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if ns is None:
+                    self.conn.execute("DELETE FROM cache")
+                elif key is None:
+                    self.conn.execute("DELETE FROM cache WHERE ns = ?", (ns,))
+                else:
+                    self.conn.execute("DELETE FROM cache WHERE ns = ? AND key = ?", (ns, key))
+                self.conn.execute(
+                    "INSERT INTO invalidations (ns, key, pid, ts) VALUES (?, ?, ?, ?)",
+                    (ns, key, self._pid, now)
+                )
+                # 하루 지난 무효화 기록 정리
+                self.conn.execute("DELETE FROM invalidations WHERE ts < ?", (now - 86400,))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def poll_invalidations(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """다른 워커가 기록한 새 무효화 목록 [(ns, key), ...]"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, ns, key, pid FROM invalidations WHERE id > ? ORDER BY id",
+                (self._last_invalidation_id,)
+            ).fetchall()
+        if not rows:
+            return []
+        self._last_invalidation_id = rows[-1][0]
+        return [(ns, key) for _, ns, key, pid in rows if pid != self._pid]
+
+    def get_stats(self) -> dict:
+        """저장 항목 수 / 크기"""
+        with self._lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+        return {'path': self.path, 'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,209 @@
+"""
+보정된 토큰 수 추정기
+
+글자 수 / 2 휴리스틱 대신 문자 종류별 토큰 비율(한글, 영문, 숫자, 공백, 기타)의 선형 모델로 추정합니다.
+- Main Agent 호출마다 입력 텍스트의 문자 종류별 개수와 usage_metadata.prompt_token_count를
+  logs/token_calibration.jsonl에 한 줄씩 기록 (본문은 저장하지 않음)
+- 시작 시 최근 표본으로 비음수 최소제곱 적합, 이후 REFIT_EVERY개 표본마다 다시 적합
+- 기록 / 재적합은 백그라운드 스레드 하나가 처리 (observe()는 큐에 넣기만 하므로 이벤트 루프를 막지 않음)
+- 표본이 MIN_SAMPLES개보다 적으면 기존 휴리스틱(모든 문자 0.5토큰)과 같은 값
+
+적합 결과 / 기존 휴리스틱 대비 오차 확인 (backend 디렉토리에서):
+    python -m utils.token_estimator
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALIBRATION_FILE = os.path.join(BACKEND_DIR, "logs", "token_calibration.jsonl")
+
+FEATURES = ("hangul", "latin", "digit", "space", "other")
+# 적합 전 기본 비율 (기존 len(text) // 2와 같음)
+DEFAULT_RATES = {name: 0.5 for name in FEATURES}
+
+# 적합에 쓰는 최소 / 최대 표본 수, 새 표본 몇 개마다 다시 적합할지
+MIN_SAMPLES = 30
+MAX_SAMPLES = 2000
+REFIT_EVERY = 25
+# 기록 대기 표본 최대 수 (가득 차면 새 표본은 버림)
+MAX_PENDING_OBSERVATIONS = 1000
+
+_PATTERNS = {
+    "hangul": re.compile(r"[ᄀ-ᇿ㄰-㆏가-힣]"),
+    "latin": re.compile(r"[A-Za-z]"),
+    "digit": re.compile(r"[0-9]"),
+    "space": re.compile(r"\s"),
+}
+
+
+def text_features(text: str) -> List[int]:
+    """문자 종류별 개수 (FEATURES 순서, other = 나머지 전부)"""
+    counts = [len(pattern.findall(text)) for pattern in _PATTERNS.values()]
+    return counts + [len(text) - sum(counts)]
+
+
+def _fit_nonnegative(features: np.ndarray, tokens: np.ndarray) -> np.ndarray:
+    """최소제곱 → 음수 계수는 0으로 고정하고 나머지로 다시 적합 (변수 5개라 몇 번이면 수렴)"""
+    active = np.ones(features.shape[1], dtype=bool)
+    coefficients = np.zeros(features.shape[1])
+    while active.any():
+        solution, *_ = np.linalg.lstsq(features[:, active], tokens, rcond=None)
+        coefficients[:] = 0
+        coefficients[active] = solution
+        if (solution >= 0).all():
+            break
+        active[np.flatnonzero(active)[solution < 0]] = False
+    return coefficients
+
+
+class TokenEstimator:
+    """문자 종류별 토큰 비율 선형 모델 (usage_metadata로 보정)"""
+
+    def __init__(self, path: str = CALIBRATION_FILE):
+        self.path = path
+        self.rates: Dict[str, float] = dict(DEFAULT_RATES)
+        # 글자 수만 알 때 쓰는 평균 비율 (표본의 문자 구성 기준)
+        self.rate_per_char = 0.5
+        self.calibrated = False
+        self._samples: List[tuple] = []
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=MAX_PENDING_OBSERVATIONS)
+        self._writer: Optional[threading.Thread] = None
+        self._load()
+
+    def estimate(self, text: str) -> int:
+        """텍스트 토큰 수 추정"""
+        if not text:
+            return 0
+        return max(1, int(round(sum(rate * count for rate, count in zip(self.rates.values(), text_features(text))))))
+
+    def estimate_length(self, length: int) -> int:
+        """글자 수만 알 때 토큰 수 추정 (2단계 검색의 content_length 등)"""
+        return max(1, int(round(length * self.rate_per_char)))
+
+    def chars_for_tokens(self, tokens: int) -> int:
+        """토큰 수 → 대략 글자 수 (자르기용)"""
+        return int(tokens / self.rate_per_char)
+
+    def observe(self, texts: Sequence[str], prompt_tokens: int, source: str = ""):
+        """
+        실제 호출 1회 기록 (입력 텍스트 전체 + usage_metadata.prompt_token_count)
+
+        문자 종류 집계 / 파일 기록 / 재적합은 백그라운드 스레드에서 하고 여기서는 큐에만 넣음
+
+        Args:
+            texts: 모델에 들어간 텍스트 (시스템 프롬프트, 히스토리, 프롬프트)
+            prompt_tokens: usage_metadata.prompt_token_count
+        """
+        if not prompt_tokens:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="token-calibration", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait((list(texts), prompt_tokens, source))
+        except queue.Full:
+            pass
+
+    def _write_loop(self):
+        while True:
+            self._record(*self._queue.get())
+
+    def _record(self, texts: Sequence[str], prompt_tokens: int, source: str):
+        """표본 1개 기록 (백그라운드 스레드, REFIT_EVERY개마다 재적합)"""
+        features = [sum(values) for values in zip(*(text_features(text) for text in texts if text))]
+        if not features:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            line = json.dumps({"ts": int(time.time()), "source": source, "features": features, "tokens": prompt_tokens})
+            with self._lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self._samples.append((features, prompt_tokens))
+                self._samples = self._samples[-MAX_SAMPLES:]
+                self._pending += 1
+                refit = self._pending >= REFIT_EVERY
+            if refit:
+                self.fit()
+        except Exception as e:
+            print(f"⚠️ 토큰 보정 표본 기록 실패: {e}")
+
+    def fit(self) -> bool:
+        """최근 표본으로 비율 적합 (표본 부족이면 기본값 유지)"""
+        with self._lock:
+            samples = list(self._samples)
+            self._pending = 0
+        if len(samples) < MIN_SAMPLES:
+            return False
+        features = np.array([sample[0] for sample in samples], dtype=np.float64)
+        tokens = np.array([sample[1] for sample in samples], dtype=np.float64)
+        coefficients = _fit_nonnegative(features, tokens)
+        if not coefficients.any():
+            return False
+        self.rates = dict(zip(FEATURES, coefficients.round(4).tolist()))
+        self.rate_per_char = float((features @ coefficients).sum() / features.sum())
+        self.calibrated = True
+        return True
+
+    def _load(self):
+        """기록된 표본 중 최근 MAX_SAMPLES개 로드 후 적합"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()[-MAX_SAMPLES:]
+        except OSError:
+            return
+        for line in lines:
+            try:
+                sample = json.loads(line)
+                if len(sample["features"]) == len(FEATURES):
+                    self._samples.append((sample["features"], sample["tokens"]))
+            except (ValueError, KeyError):
+                continue
+        self.fit()
+
+    def report(self) -> Dict[str, object]:
+        """적합 결과 + 표본 기준 평균 절대 오차 (기존 휴리스틱 대비)"""
+        samples = list(self._samples)
+        result = {
+            "samples": len(samples),
+            "calibrated": self.calibrated,
+            "rates": self.rates,
+            "rate_per_char": round(self.rate_per_char, 4),
+        }
+        if samples:
+            features = np.array([sample[0] for sample in samples], dtype=np.float64)
+            tokens = np.array([sample[1] for sample in samples], dtype=np.float64)
+            rates = np.array(list(self.rates.values()))
+            result["mape_calibrated"] = round(float(np.mean(np.abs(features @ rates - tokens) / tokens)), 4)
+            result["mape_len_div_2"] = round(float(np.mean(np.abs(features.sum(axis=1) / 2 - tokens) / tokens)), 4)
+        return result
+
+
+_estimator: Optional[TokenEstimator] = None
+
+
+def get_token_estimator() -> TokenEstimator:
+    """전역 토큰 추정기 (처음 호출 시 보정 표본 로드)"""
+    global _estimator
+    if _estimator is None:
+        _estimator = TokenEstimator()
+    return _estimator
+
+
+def estimate_tokens(text: str) -> int:
+    return get_token_estimator().estimate(text)
+
+
+if __name__ == "__main__":
+    print(json.dumps(get_token_estimator().report(), ensure_ascii=False, indent=2))
@@ -90,6 +90,7 @@ export interface ChatResponse {
 export interface UploadResponse {
   success: boolean
   message: string
+  summary?: string
   stats: {
     totalPages: number
     chunksTotal: number
@@ -103,6 +104,35 @@ export interface UploadResponse {
   }
 }
 
+// 업로드 작업 (백그라운드 처리)
+export interface UploadJob {
+  id: string
+  fileName: string
+  title: string
+  size: number
+  status: 'queued' | 'running' | 'completed' | 'failed'
+  stage: string
+  message: string
+  progress: {
+    slicesDone?: number
+    slicesTotal?: number
+    chunksInserted?: number
+    chunksTotal?: number
+  }
+  attempts: number
+  error: string | null
+  result: UploadResponse | null
+  createdAt: string
+  updatedAt: string
+}
+
+export interface UploadJobResponse {
+  success: boolean
+  message: string
+  jobId: string
+  job: UploadJob
+}
+
 export interface Document {
   id: string
   title: string
@@ -352,14 +382,14 @@ export const sendMessageStreamWithImage = async (
   }
 }
 
-// 업로드 API
+// 업로드 API (작업 등록만 하고 바로 반환)
 export const uploadDocument = async (
   file: File
-): Promise<UploadResponse> => {
+): Promise<UploadJobResponse> => {
   const formData = new FormData()
   formData.append('file', file)
 
-  const response = await api.post<UploadResponse>('/upload/', formData, {
+  const response = await api.post<UploadJobResponse>('/upload/', formData, {
     headers: {
       'Content-Type': 'multipart/form-data',
     },
@@ -368,6 +398,57 @@ export const uploadDocument = async (
   return response.data
 }
 
+// 업로드 작업 진행 상황 (SSE) - 작업이 끝나면 최종 상태 반환
+export const watchUploadJob = async (
+  jobId: string,
+  onUpdate: (job: UploadJob) => void,
+  abortSignal?: AbortSignal
+): Promise<UploadJob> => {
+  const response = await fetch(`${API_BASE_URL}/upload/jobs/${jobId}/events`, {
+    signal: abortSignal,
+  })
+  if (!response.ok) {
+    throw new Error(`서버 오류 (${response.status}): ${await response.text()}`)
+  }
+
+  const reader = response.body?.getReader()
+  if (!reader) {
+    throw new Error('스트리밍을 지원하지 않습니다')
+  }
+
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+
+    buffer += decoder.decode(value, { stream: true })
+
+    // SSE 메시지 파싱 (data: {...}\n\n 형식, keep-alive 주석은 무시)
+    const messages = buffer.split('\n\n')
+    buffer = messages.pop() || ''
+
+    for (const message of messages) {
+      if (!message.startsWith('data: ')) continue
+
+      const event = JSON.parse(message.slice(6))
+      if (event.type === 'error') {
+        throw new Error(event.message || '알 수 없는 오류')
+      }
+      const job = event.job as UploadJob
+      onUpdate(job)
+      if (event.type === 'done') {
+        return job
+      }
+    }
+  }
+
+  // 연결이 끊기면 마지막 상태를 한 번 더 조회
+  const latest = await api.get<UploadJob>(`/upload/jobs/${jobId}`)
+  return latest.data
+}
+
 // 문서 수정 API
 export const updateDocument = async (
   id: string,
@@ -1,6 +1,18 @@
 import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
-import { uploadDocument, getDocuments, deleteDocument, updateDocument, Document } from '../api/client'
+import { uploadDocument, watchUploadJob, getDocuments, deleteDocument, updateDocument, Document, UploadJob } from '../api/client'
+
+// 업로드 작업 진행 상황 → 표시 문구
+const formatJobProgress = (job: UploadJob): string => {
+  const { slicesDone, slicesTotal, chunksInserted, chunksTotal } = job.progress || {}
+  if (job.stage === 'parse' && slicesTotal) {
+    return `${job.message} (${slicesDone}/${slicesTotal} 조각)`
+  }
+  if (job.stage === 'chunks' && chunksTotal) {
+    return `${job.message} (${chunksInserted || 0}/${chunksTotal} 청크)`
+  }
+  return job.attempts > 1 ? `${job.message} (시도 ${job.attempts})` : job.message
+}
 
 interface UploadTask {
   id: string
@@ -122,8 +134,30 @@ export default function AdminPage() {
       )
 
       try {
-        // 실제 업로드
-        const result = await uploadDocument(task.file)
+        // 업로드 작업 등록 후 진행 상황 스트림 구독
+        const { jobId } = await uploadDocument(task.file)
+        let lastMessage = ''
+        const job = await watchUploadJob(jobId, (update) => {
+          const progress = formatJobProgress(update)
+          const isNewStage = update.message !== lastMessage
+          lastMessage = update.message
+          setUploadQueue((prev) =>
+            prev.map((t) =>
+              t.id === task.id
+                ? {
+                    ...t,
+                    progress,
+                    logs: isNewStage ? [...t.logs, `⏳ ${update.message}`] : t.logs
+                  }
+                : t
+            )
+          )
+        })
+
+        if (job.status !== 'completed' || !job.result) {
+          throw new Error(job.error || '업로드 처리 실패')
+        }
+        const result = job.result
         
         // 상태 업데이트: success
         setUploadQueue((prev) =>